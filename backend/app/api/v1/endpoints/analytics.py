@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, Query, status, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, case, extract
+from sqlalchemy import func, and_, case, extract, select
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from decimal import Decimal
 import logging
 
-from app.core.database import get_db
+from app.core.database import run_concurrently
+from app.core.db_routing import get_analytics_db
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.core.cookie_auth import get_current_user_from_cookie
@@ -27,22 +29,19 @@ logger = logging.getLogger(__name__)
 async def get_transaction_summary(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_from_cookie)
 ):
     """Get transaction summary with totals and category breakdown using optimized SQL aggregation"""
     try:
-        # Build base query with user filter
-        base_query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
-        
-        # Apply date filters
+        # Build base filters with user and date range
+        filters = [Transaction.user_id == current_user.id]
         if start_date:
-            base_query = base_query.filter(Transaction.date >= start_date)
+            filters.append(Transaction.date >= start_date)
         if end_date:
-            base_query = base_query.filter(Transaction.date <= end_date)
+            filters.append(Transaction.date <= end_date)
         
         # Single query to get all summary statistics using SQL aggregation
-        summary_stats = db.query(
+        summary_query = select(
             func.count(Transaction.id).label('total_transactions'),
             func.coalesce(
                 func.sum(
@@ -66,15 +65,26 @@ async def get_transaction_summary(
                     else_=0
                 )
             ).label('categorized_count')
-        ).filter(Transaction.user_id == current_user.id)
+        ).where(*filters)
         
-        # Apply same date filters to summary query
-        if start_date:
-            summary_stats = summary_stats.filter(Transaction.date >= start_date)
-        if end_date:
-            summary_stats = summary_stats.filter(Transaction.date <= end_date)
+        # Separate query for category breakdown (expenses only)
+        category_query = select(
+            Transaction.category,
+            func.sum(func.abs(Transaction.amount)).label('amount')
+        ).where(
+            *filters,
+            Transaction.is_income == False,
+            Transaction.category.isnot(None)
+        ).group_by(Transaction.category)
+        
+        async def fetch_summary(session: AsyncSession):
+            return (await session.execute(summary_query)).first()
         
-        result = summary_stats.first()
+        async def fetch_categories(session: AsyncSession):
+            return (await session.execute(category_query)).all()
+        
+        # Both aggregations are independent; run them concurrently
+        result, category_results = await run_concurrently(fetch_summary, fetch_categories)
         
         # Handle case where no transactions exist
         if not result or result.total_transactions == 0:
@@ -90,26 +100,6 @@ async def get_transaction_summary(
         # Calculate uncategorized count
         uncategorized_count = result.total_transactions - (result.categorized_count or 0)
         
-        # Separate query for category breakdown (expenses only)
-        category_query = db.query(
-            Transaction.category,
-            func.sum(func.abs(Transaction.amount)).label('amount')
-        ).filter(
-            and_(
-                Transaction.user_id == current_user.id,
-                Transaction.is_income == False,
-                Transaction.category.isnot(None)
-            )
-        )
-        
-        # Apply same date filters to category query
-        if start_date:
-            category_query = category_query.filter(Transaction.date >= start_date)
-        if end_date:
-            category_query = category_query.filter(Transaction.date <= end_date)
-        
-        category_results = category_query.group_by(Transaction.category).all()
-        
         # Convert category results to dictionary with Decimal values
         categories = {
             cat.category: Decimal(str(cat.amount))
@@ -142,7 +132,7 @@ async def get_transaction_summary(
 async def get_monthly_summary(
     year: int = Query(..., description="Year to analyze", ge=2000, le=2100),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """Get monthly transaction summary for a year using optimized SQL aggregation"""
     try:
@@ -249,7 +239,7 @@ async def get_top_categories(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """Get top spending categories with enhanced aggregation and error handling"""
     try:
@@ -335,7 +325,7 @@ async def get_spending_trends(
     periods_count: int = Query(12, ge=1, le=60),
     category: Optional[str] = None,
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """Get spending trends over time with various period aggregations"""
     try:
@@ -448,7 +438,7 @@ async def get_category_trends(
     months: int = Query(6, ge=1, le=24),
     top_categories: int = Query(5, ge=1, le=20),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """Get category spending trends over time"""
     try:
@@ -546,7 +536,7 @@ async def get_cash_flow_analysis(
     end_date: Optional[datetime] = Query(None, description="Analysis end date"),
     period: PeriodType = Query(PeriodType.MONTHLY, description="Aggregation period"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get comprehensive cash flow analysis with trends and forecasting.
@@ -584,7 +574,7 @@ async def get_category_insights(
     end_date: Optional[datetime] = Query(None, description="Analysis end date"),
     top_n: int = Query(10, ge=1, le=50, description="Number of top categories to analyze"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get advanced category analysis with trends, seasonality, and predictions.
@@ -622,7 +612,7 @@ async def get_vendor_analysis(
     end_date: Optional[datetime] = Query(None, description="Analysis end date"),
     top_n: int = Query(15, ge=1, le=100, description="Number of top vendors to analyze"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get comprehensive vendor spending analysis with patterns and insights.
@@ -660,7 +650,7 @@ async def detect_anomalies(
     end_date: Optional[datetime] = Query(None, description="Analysis end date"),
     sensitivity: float = Query(2.0, ge=1.0, le=5.0, description="Detection sensitivity (higher = less sensitive)"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Detect unusual transactions and spending patterns using statistical analysis.
@@ -699,7 +689,7 @@ async def get_comparative_analysis(
     compare_start: datetime = Query(..., description="Comparison period start date"),
     compare_end: datetime = Query(..., description="Comparison period end date"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Compare financial metrics between two time periods.
@@ -744,7 +734,7 @@ async def get_dashboard_data(
     start_date: Optional[datetime] = Query(None, description="Dashboard period start date"),
     end_date: Optional[datetime] = Query(None, description="Dashboard period end date"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get comprehensive dashboard data with KPIs, charts, and insights.
@@ -880,7 +870,7 @@ async def get_trend_analysis(
     forecast_periods: int = Query(3, ge=1, le=12, description="Number of periods to forecast"),
     metric: str = Query("expenses", regex="^(income|expenses|net_flow)$", description="Metric to analyze"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get trend analysis and forecasting for financial metrics.
@@ -1062,8 +1052,7 @@ async def get_trend_analysis(
 async def get_budget_analysis(
     month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = Query(None, ge=2000, le=2100),
-    current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_from_cookie)
 ):
     """Get budget analysis comparing spending to historical averages"""
     try:
@@ -1080,11 +1069,11 @@ async def get_budget_analysis(
             target_end = datetime(target_year, target_month + 1, 1) - timedelta(days=1)
         
         # Get current month spending by category
-        current_spending = db.query(
+        current_spending_query = select(
             Transaction.category,
             func.sum(func.abs(Transaction.amount)).label('amount'),
             func.count(Transaction.id).label('transaction_count')
-        ).filter(
+        ).where(
             and_(
                 Transaction.user_id == current_user.id,
                 Transaction.is_income == False,
@@ -1092,17 +1081,17 @@ async def get_budget_analysis(
                 Transaction.date >= target_start,
                 Transaction.date <= target_end
             )
-        ).group_by(Transaction.category).all()
+        ).group_by(Transaction.category)
         
         # Get historical averages (last 6 months, excluding current month)
         history_start = target_start - timedelta(days=180)  # Approximately 6 months
         
-        historical_avg = db.query(
+        historical_avg = select(
             Transaction.category,
             func.avg(
                 func.sum(func.abs(Transaction.amount))
             ).over(partition_by=Transaction.category).label('avg_amount')
-        ).filter(
+        ).where(
             and_(
                 Transaction.user_id == current_user.id,
                 Transaction.is_income == False,
@@ -1116,10 +1105,19 @@ async def get_budget_analysis(
         ).subquery()
         
         # Get the actual averages
-        historical_averages = db.query(
+        historical_averages_query = select(
             historical_avg.c.category,
             func.avg(historical_avg.c.avg_amount).label('avg_monthly_amount')
-        ).group_by(historical_avg.c.category).all()
+        ).group_by(historical_avg.c.category)
+        
+        async def fetch_current(session: AsyncSession):
+            return (await session.execute(current_spending_query)).all()
+        
+        async def fetch_historical(session: AsyncSession):
+            return (await session.execute(historical_averages_query)).all()
+        
+        # Current and historical aggregations are independent; run them concurrently
+        current_spending, historical_averages = await run_concurrently(fetch_current, fetch_historical)
         
         # Create lookup for historical averages
         avg_lookup = {avg.category: Decimal(str(avg.avg_monthly_amount)) for avg in historical_averages}
@@ -1193,7 +1191,7 @@ async def get_budget_analysis(
 @router.get("/v2/performance-metrics")
 async def get_enhanced_performance_metrics(
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get enhanced performance metrics for analytics operations.
@@ -1238,7 +1236,7 @@ async def get_predictive_insights(
     custom_start: Optional[datetime] = Query(None, description="Custom start date"),
     custom_end: Optional[datetime] = Query(None, description="Custom end date"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get predictive insights based on historical data analysis.
@@ -1368,7 +1366,7 @@ async def get_enhanced_vendor_analysis(
     custom_start: Optional[datetime] = Query(None, description="Custom start date"),
     custom_end: Optional[datetime] = Query(None, description="Custom end date"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get enhanced vendor analysis with frequency metrics and trend analysis.
@@ -1494,7 +1492,7 @@ async def get_enhanced_vendor_analysis(
 @router.post("/v2/clear-enhanced-cache")
 async def clear_enhanced_cache(
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Clear enhanced analytics cache with detailed reporting.
@@ -1532,7 +1530,7 @@ async def get_enhanced_analytics_summary(
     include_predictions: bool = Query(True, description="Include predictive insights"),
     include_performance: bool = Query(False, description="Include performance metrics"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get comprehensive enhanced analytics summary.
@@ -11,6 +11,7 @@ import logging
 from app.core.database import get_db
 from app.models.user import User
 from app.core.cookie_auth import get_current_user_from_cookie
+from app.core.principal_cache import get_principal_cache
 from app.services.analytics_cache import get_cache_stats, cleanup_cache, invalidate_user_cache
 
 router = APIRouter()
@@ -37,6 +38,17 @@ async def get_cache_statistics(
             detail="Failed to retrieve cache statistics."
         ) from e
 
+@router.get("/auth-stats")
+async def get_auth_cache_statistics(
+    current_user: User = Depends(get_current_user_from_cookie)
+) -> Dict[str, Any]:
+    """
+    Get authenticated principal cache statistics.
+    
+    Returns hit rate, entry count and invalidations for this worker.
+    """
+    return get_principal_cache().get_stats()
+
 @router.post("/cleanup")
 async def cleanup_expired_cache(
     current_user: User = Depends(get_current_user_from_cookie)
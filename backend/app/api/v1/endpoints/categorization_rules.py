@@ -10,9 +10,11 @@ from app.models.transaction import CategorizationRule, Transaction
 from app.core.cookie_auth import get_current_user_from_cookie
 from app.services.enhanced_categorization import EnhancedCategorizationService
 from app.services.categorization import CategorizationService
+from app.services.rule_match_index import note_rule_match
 from app.schemas.category import (
     RuleCreate, RuleUpdate, RuleResponse, RuleListResponse,
-    RuleTestRequest, RuleTestResponse, BulkRuleCreate, BulkOperationResponse,
+    RuleTestRequest, RuleTestResponse, RuleSimulationRequest, RuleSimulationResponse,
+    BulkRuleCreate, BulkOperationResponse,
     PerformanceAnalytics, RuleValidationResult, RuleExportResponse,
     RuleImportRequest, RuleImportResponse, RuleTemplateResponse
 )
@@ -299,6 +301,25 @@ async def test_categorization_rule(
         )
 
 
+@router.post("/simulate", response_model=RuleSimulationResponse)
+async def simulate_categorization_rules(
+    simulation_request: RuleSimulationRequest,
+    current_user: User = Depends(get_current_user_from_cookie),
+    db: Session = Depends(get_db)
+):
+    """Preview the exact category changes a set of draft rules would make"""
+    try:
+        enhanced_service = EnhancedCategorizationService(db)
+        return enhanced_service.simulate_rules(current_user.id, simulation_request)
+        
+    except Exception as e:
+        logger.error(f"Error simulating categorization rules: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to simulate categorization rules"
+        )
+
+
 @router.post("/validate", response_model=RuleValidationResult)
 async def validate_categorization_rule(
     pattern: str,
@@ -710,6 +731,7 @@ async def apply_rule_to_transactions(
                     transaction.subcategory = rule.subcategory
                     transaction.is_categorized = True
                     transaction.confidence_score = 0.9
+                    note_rule_match(db, rule, transaction)
                     categorized_count += 1
             
             db.commit()
@@ -6,12 +6,16 @@ with fuzzy matching, confidence scoring, and automated merge capabilities.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal
 import json
 
+from app.core.background_jobs import JobPriority
 from app.core.database import get_db
+from app.models.duplicate_group import DuplicateScan
 from app.models.user import User
 from app.core.cookie_auth import get_current_user_from_cookie
 from app.services.duplicate_detection import (
@@ -19,104 +23,77 @@ from app.services.duplicate_detection import (
     DuplicateConfidenceLevel, DuplicateMatchType, DuplicateReviewStatus,
     DuplicateDetectionLimits
 )
-from app.core.exceptions import ValidationException, BusinessLogicException
+from app.services.duplicate_scans import (
+    SCAN_FULL, duplicate_statistics, get_latest_scan, get_scan, list_duplicate_groups,
+    request_duplicate_scan, set_review_status, to_duplicate_group
+)
+from app.core.exceptions import ValidationException, BusinessLogicException, SystemException
 from app.core.error_sanitizer import error_sanitizer, create_secure_error_response
 from app.schemas.error import ErrorCategory, ErrorSeverity
 from app.core.rate_limiter import get_rate_limiter, RateLimitType, RateLimitTier, rate_limit
 from app.core.audit_logger import security_audit_logger
-from fastapi import Request
 import uuid
 
 router = APIRouter()
 
 
-@router.post("/scan")
-@rate_limit(requests_per_hour=20, requests_per_minute=2)  # Conservative limits for resource-intensive operation
-async def scan_for_duplicates(
-    date_range_days: int = Query(30, ge=1, le=90, description="Number of days to scan for duplicates"),
+@router.get("/groups")
+@rate_limit(requests_per_hour=200, requests_per_minute=20)
+async def get_duplicate_groups(
+    date_range_days: int = Query(30, ge=1, le=90, description="Only groups with a transaction in this many past days"),
     min_confidence: float = Query(0.5, ge=0.1, le=1.0, description="Minimum confidence score (0.1-1.0)"),
     include_reviewed: bool = Query(False, description="Include previously reviewed duplicates"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db),
-    request: Request = None
+    db: Session = Depends(get_db)
 ):
     """
-    Scan for potential duplicate transactions using advanced fuzzy matching algorithms.
+    Get the potential duplicate transactions found by the background scans.
     
-    This endpoint performs comprehensive duplicate detection using:
+    Duplicates are detected in the background after every import and nightly
+    across all recent transactions, using:
     - Exact matching on amount, date, description, and vendor
     - Fuzzy string matching for similar descriptions and vendors
     - Date proximity analysis for near-duplicate detection
     - Confidence scoring with multiple matching algorithms
     
-    Returns detailed results with suggested actions for each potential duplicate.
+    Returns the stored groups with suggested actions; no scan runs in the request.
     """
     try:
-        # Validate date range
-        if date_range_days > DuplicateDetectionLimits.MAX_COMPARISON_DAYS:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Date range cannot exceed {DuplicateDetectionLimits.MAX_COMPARISON_DAYS} days"
-            )
-        
-        # Validate confidence threshold
         if min_confidence < DuplicateDetectionLimits.MIN_CONFIDENCE_THRESHOLD:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Minimum confidence cannot be below {DuplicateDetectionLimits.MIN_CONFIDENCE_THRESHOLD}"
             )
         
-        # Initialize duplicate detection service
-        duplicate_service = DuplicateDetectionService(db, current_user)
-        
-        # Perform duplicate scan
-        result = await duplicate_service.scan_for_duplicates(
-            date_range_days=date_range_days,
+        review_statuses = None if include_reviewed else [DuplicateReviewStatus.PENDING.value]
+        records = list_duplicate_groups(
+            db,
+            current_user.id,
             min_confidence=min_confidence,
-            include_reviewed=include_reviewed
+            review_statuses=review_statuses,
+            date_from=datetime.utcnow() - timedelta(days=date_range_days)
         )
+        groups = [to_duplicate_group(record) for record in records]
+        latest_scan = get_latest_scan(db, current_user.id)
         
-        # Log scan activity
-        security_audit_logger.info(
-            f"Duplicate scan completed for user {current_user.id}",
-            extra={
-                "user_id": current_user.id,
-                "scan_id": result.scan_id,
-                "duplicates_found": result.potential_duplicates_found,
-                "high_confidence_matches": result.high_confidence_matches,
-                "date_range_days": date_range_days,
-                "min_confidence": min_confidence
-            }
-        )
-        
-        # Return serialized result
         return {
-            "scan_id": result.scan_id,
+            "scan_id": latest_scan.scan_id if latest_scan else None,
             "scan_summary": {
-                "total_transactions_scanned": result.total_transactions_scanned,
-                "potential_duplicates_found": result.potential_duplicates_found,
-                "high_confidence_matches": result.high_confidence_matches,
-                "auto_merge_candidates": result.auto_merge_candidates,
-                "total_amount_affected": str(result.total_amount_affected),
-                "scan_duration_ms": result.scan_duration_ms
+                "total_transactions_scanned": latest_scan.transactions_scanned if latest_scan else 0,
+                "potential_duplicates_found": len(groups),
+                "high_confidence_matches": sum(1 for group in groups if group.confidence_score >= 0.7),
+                "auto_merge_candidates": sum(
+                    1 for group in groups
+                    if group.confidence_score >= DuplicateDetectionLimits.AUTO_MERGE_THRESHOLD
+                ),
+                "total_amount_affected": str(sum((group.total_amount for group in groups), Decimal('0.00')))
             },
-            "duplicate_groups": [
-                {
-                    "group_id": group.group_id,
-                    "confidence_score": group.confidence_score,
-                    "primary_transaction_id": group.primary_transaction_id,
-                    "duplicate_count": group.duplicate_count,
-                    "total_amount": str(group.total_amount),
-                    "date_range": group.date_range,
-                    "review_status": group.review_status.value,
-                    "transactions": group.transactions,
-                    "suggested_action": _get_suggested_action_description(group.confidence_score)
-                }
-                for group in result.duplicate_groups
-            ],
+            "duplicate_groups": [_format_group(group) for group in groups],
             "scan_metadata": {
-                "started_at": result.started_at.isoformat(),
-                "completed_at": result.completed_at.isoformat(),
+                "last_scan_type": latest_scan.scan_type if latest_scan else None,
+                "last_scan_completed_at": (
+                    latest_scan.completed_at.isoformat() if latest_scan and latest_scan.completed_at else None
+                ),
                 "parameters": {
                     "date_range_days": date_range_days,
                     "min_confidence": min_confidence,
@@ -125,10 +102,58 @@ async def scan_for_duplicates(
             }
         }
         
-    except (ValidationException, BusinessLogicException) as e:
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_detail = create_secure_error_response(
+            exception=e,
+            error_code="DUPLICATE_GROUPS_FAILED",
+            error_category=ErrorCategory.SYSTEM_ERROR,
+            correlation_id=str(uuid.uuid4()),
+            user_message="Failed to retrieve duplicate transactions. Please try again.",
+            suggested_action="Contact support if the problem persists."
+        )
+        
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=error_detail.user_message
+        )
+
+
+@router.post("/scan")
+@rate_limit(requests_per_hour=20, requests_per_minute=2)  # Conservative limits for resource-intensive operation
+async def scan_for_duplicates(
+    current_user: User = Depends(get_current_user_from_cookie),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a full duplicate scan of the last 90 days of transactions.
+    
+    The scan runs in the background and replaces the stored groups it covers;
+    poll /scans/{scan_id} and read the results from /groups. A scan already
+    queued or running for the user is returned instead of queueing another.
+    """
+    try:
+        scan, queued = request_duplicate_scan(db, current_user.id, SCAN_FULL, priority=JobPriority.NORMAL)
+        
+        security_audit_logger.logger.info(
+            f"Duplicate scan requested for user {current_user.id}",
+            extra={
+                "user_id": current_user.id,
+                "scan_id": scan.scan_id,
+                "queued": queued
+            }
+        )
+        
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={**_format_scan(scan), "queued": queued}
+        )
+        
+    except SystemException:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Duplicate scanning is temporarily unavailable. Please try again later."
         )
     except Exception as e:
         error_detail = create_secure_error_response(
@@ -136,8 +161,8 @@ async def scan_for_duplicates(
             error_code="DUPLICATE_SCAN_FAILED",
             error_category=ErrorCategory.SYSTEM_ERROR,
             correlation_id=str(uuid.uuid4()),
-            user_message="Failed to scan for duplicate transactions. Please try again.",
-            suggested_action="Reduce the date range or contact support if the problem persists."
+            user_message="Failed to queue a duplicate scan. Please try again.",
+            suggested_action="Contact support if the problem persists."
         )
         
         raise HTTPException(
@@ -146,10 +171,62 @@ async def scan_for_duplicates(
         )
 
 
+@router.get("/scans/{scan_id}")
+async def get_duplicate_scan(
+    scan_id: str,
+    current_user: User = Depends(get_current_user_from_cookie),
+    db: Session = Depends(get_db)
+):
+    """Get the status and counts of one of the user's duplicate scans."""
+    scan = get_scan(db, current_user.id, scan_id)
+    if scan is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Duplicate scan not found"
+        )
+    return _format_scan(scan)
+
+
+@router.patch("/groups/{group_id}/review")
+@rate_limit(requests_per_hour=500, requests_per_minute=30)
+async def review_duplicate_group(
+    group_id: int,
+    review_status: DuplicateReviewStatus = Query(..., description="reviewed, dismissed or pending"),
+    current_user: User = Depends(get_current_user_from_cookie),
+    db: Session = Depends(get_db)
+):
+    """
+    Record the review of a duplicate group.
+    
+    Dismissed groups are kept so later scans do not suggest them again; a
+    group that gains a new matching transaction becomes pending again.
+    """
+    if review_status not in (
+        DuplicateReviewStatus.PENDING, DuplicateReviewStatus.REVIEWED, DuplicateReviewStatus.DISMISSED
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Groups are marked merged by merging them"
+        )
+    
+    group = set_review_status(db, current_user.id, group_id, review_status)
+    if group is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Duplicate group not found"
+        )
+    db.commit()
+    
+    security_audit_logger.logger.info(
+        f"Duplicate group {group_id} marked {review_status.value} by user {current_user.id}",
+        extra={"user_id": current_user.id, "group_id": group_id, "review_status": review_status.value}
+    )
+    return _format_group(to_duplicate_group(group))
+
+
 @router.post("/auto-merge")
 @rate_limit(requests_per_hour=10, requests_per_minute=1)  # Very conservative for potentially destructive operation
 async def auto_merge_high_confidence_duplicates(
-    scan_id: str = Query(..., description="Scan ID from duplicate detection scan"),
     min_confidence: float = Query(0.95, ge=0.8, le=1.0, description="Minimum confidence for auto-merge"),
     dry_run: bool = Query(True, description="Perform dry run without actual merging"),
     current_user: User = Depends(get_current_user_from_cookie),
@@ -161,8 +238,9 @@ async def auto_merge_high_confidence_duplicates(
     WARNING: This operation will permanently delete duplicate transactions!
     Use dry_run=true first to preview what will be merged.
     
-    Only transactions with very high confidence scores (>= 0.95 by default) 
-    will be auto-merged to prevent accidental data loss.
+    Only stored groups that are pending or reviewed (never dismissed) with
+    very high confidence scores (>= 0.95 by default) are auto-merged to
+    prevent accidental data loss.
     """
     try:
         if not dry_run and min_confidence < 0.9:
@@ -171,31 +249,26 @@ async def auto_merge_high_confidence_duplicates(
                 detail="Auto-merge requires minimum confidence of 0.9 for safety"
             )
         
-        # For this implementation, we need to re-scan to get the duplicate groups
-        # In production, scan results would be cached in Redis
-        duplicate_service = DuplicateDetectionService(db, current_user)
-        
-        # Perform a fresh scan with the specified confidence
-        result = await duplicate_service.scan_for_duplicates(
-            date_range_days=30,  # Standard range for auto-merge
-            min_confidence=min_confidence
+        records = list_duplicate_groups(
+            db,
+            current_user.id,
+            min_confidence=min_confidence,
+            review_statuses=[DuplicateReviewStatus.PENDING.value, DuplicateReviewStatus.REVIEWED.value]
         )
+        auto_merge_candidates = [to_duplicate_group(record) for record in records]
+        latest_scan = get_latest_scan(db, current_user.id)
+        scan_id = latest_scan.scan_id if latest_scan else None
         
         if dry_run:
             # Return preview of what would be merged
-            auto_merge_candidates = [
-                group for group in result.duplicate_groups
-                if group.confidence_score >= min_confidence
-            ]
-            
             return {
                 "dry_run": True,
-                "scan_id": result.scan_id,
+                "scan_id": scan_id,
                 "auto_merge_preview": {
                     "total_groups": len(auto_merge_candidates),
                     "total_transactions_to_merge": sum(len(group.transactions) for group in auto_merge_candidates),
                     "total_transactions_to_delete": sum(len(group.transactions) - 1 for group in auto_merge_candidates),
-                    "total_amount_affected": str(sum(group.total_amount for group in auto_merge_candidates))
+                    "total_amount_affected": str(sum((group.total_amount for group in auto_merge_candidates), Decimal('0.00')))
                 },
                 "groups_preview": [
                     {
@@ -216,17 +289,22 @@ async def auto_merge_high_confidence_duplicates(
             }
         else:
             # Perform actual auto-merge
+            duplicate_service = DuplicateDetectionService(db, current_user)
             merge_result = await duplicate_service.auto_merge_high_confidence_duplicates(
-                duplicate_groups=result.duplicate_groups,
+                duplicate_groups=auto_merge_candidates,
                 min_auto_merge_confidence=min_confidence
             )
             
+            for merged in merge_result['merged_groups']:
+                set_review_status(db, current_user.id, int(merged['group_id']), DuplicateReviewStatus.AUTO_MERGED)
+            db.commit()
+            
             # Log merge activity
-            security_audit_logger.info(
+            security_audit_logger.logger.info(
                 f"Auto-merge completed for user {current_user.id}",
                 extra={
                     "user_id": current_user.id,
-                    "scan_id": result.scan_id,
+                    "scan_id": scan_id,
                     "groups_merged": merge_result['total_merged'],
                     "merge_errors": merge_result['total_errors'],
                     "min_confidence": min_confidence
@@ -235,9 +313,9 @@ async def auto_merge_high_confidence_duplicates(
             
             return {
                 "dry_run": False,
-                "scan_id": result.scan_id,
+                "scan_id": scan_id,
                 "merge_results": {
-                    "total_groups_processed": len(result.duplicate_groups),
+                    "total_groups_processed": len(auto_merge_candidates),
                     "total_groups_merged": merge_result['total_merged'],
                     "total_merge_errors": merge_result['total_errors'],
                     "total_transactions_deleted": sum(
@@ -254,6 +332,8 @@ async def auto_merge_high_confidence_duplicates(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         error_detail = create_secure_error_response(
             exception=e,
@@ -280,11 +360,10 @@ async def get_duplicate_detection_stats(
     Get statistics about potential duplicates in user's transaction data.
     
     Provides overview of duplicate patterns, confidence distribution,
-    and recommendations for duplicate management.
+    and recommendations for duplicate management, from the stored groups.
     """
     try:
-        duplicate_service = DuplicateDetectionService(db, current_user)
-        stats = await duplicate_service.get_duplicate_statistics()
+        stats = duplicate_statistics(db, current_user.id)
         
         # Add recommendations based on stats
         recommendations = _generate_duplicate_recommendations(stats)
@@ -350,6 +429,37 @@ async def get_duplicate_detection_config():
     }
 
 
+def _format_group(group: DuplicateGroup) -> Dict[str, Any]:
+    """Format a duplicate group for the API response"""
+    return {
+        "group_id": group.group_id,
+        "confidence_score": group.confidence_score,
+        "primary_transaction_id": group.primary_transaction_id,
+        "duplicate_count": group.duplicate_count,
+        "total_amount": str(group.total_amount),
+        "date_range": group.date_range,
+        "review_status": group.review_status.value,
+        "transactions": group.transactions,
+        "suggested_action": _get_suggested_action_description(group.confidence_score)
+    }
+
+
+def _format_scan(scan: DuplicateScan) -> Dict[str, Any]:
+    """Format a duplicate scan for the API response"""
+    return {
+        "scan_id": scan.scan_id,
+        "scan_type": scan.scan_type,
+        "status": scan.status,
+        "error_message": scan.error_message if scan.status == "failed" else None,
+        "transactions_scanned": scan.transactions_scanned or 0,
+        "groups_found": scan.groups_found or 0,
+        "groups_created": scan.groups_created or 0,
+        "groups_removed": scan.groups_removed or 0,
+        "created_at": scan.created_at.isoformat() if scan.created_at else None,
+        "completed_at": scan.completed_at.isoformat() if scan.completed_at else None
+    }
+
+
 def _get_suggested_action_description(confidence_score: float) -> str:
     """Get human-readable suggested action description"""
     if confidence_score >= DuplicateDetectionLimits.AUTO_MERGE_THRESHOLD:
@@ -20,7 +20,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status, Backgrou
 from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.db_routing import get_export_db
 from app.core.cookie_auth import get_current_user_from_cookie
 from app.core.audit_logger import security_audit_logger
 from app.core.background_jobs import JobPriority
@@ -52,7 +52,7 @@ async def create_export_job(
     background_tasks: BackgroundTasks,
     request: Request,
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_export_db)
 ):
     """
     Create a new export job for background processing.
@@ -137,7 +137,7 @@ async def create_export_job(
 async def get_export_progress(
     job_id: str,
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_export_db)
 ):
     """
     Get the progress of an export job.
@@ -178,7 +178,7 @@ async def get_export_progress(
 async def download_export_file(
     download_token: str,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_export_db)
 ):
     """
     Download a completed export file using a secure download token.
@@ -289,7 +289,7 @@ async def download_export_file(
 async def get_export_history(
     limit: int = Query(default=50, ge=1, le=100, description="Maximum number of records to return"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_export_db)
 ):
     """
     Get the user's export history.
@@ -333,7 +333,7 @@ async def get_export_history(
 async def cancel_export_job(
     job_id: str,
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_export_db)
 ):
     """
     Cancel a pending or in-progress export job.
@@ -444,7 +444,7 @@ async def get_supported_formats():
 @router.get("/templates", response_model=List[Dict[str, str]])
 async def get_export_templates(
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_export_db)
 ):
     """
     Get available export templates for the current user.
@@ -491,7 +491,7 @@ async def get_export_templates(
 async def cleanup_expired_exports(
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_export_db)
 ):
     """
     Manually trigger cleanup of expired export files.
@@ -547,7 +547,7 @@ async def cleanup_expired_exports(
 @router.get("/stats", response_model=Dict[str, int])
 async def get_export_stats(
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_export_db)
 ):
     """
     Get export statistics for the current user.
@@ -598,7 +598,7 @@ async def get_export_stats(
 @router.get("/admin/queue-stats", response_model=Dict[str, Any])
 async def get_export_queue_stats(
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_export_db)
 ):
     """
     Get export queue statistics (admin only).
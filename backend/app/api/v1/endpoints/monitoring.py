@@ -8,9 +8,11 @@ and error analytics for operational and security monitoring.
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from fastapi.security import HTTPBearer
 
 from app.core.error_monitoring import error_monitor
+from app.core.performance_monitor import get_performance_monitor, MetricType
 from app.schemas.error import ErrorCategory, ErrorSeverity
 
 router = APIRouter()
@@ -240,6 +242,57 @@ async def get_error_patterns(
         )
 
 
+@router.get("/performance", summary="Performance Metrics Summary")
+async def get_performance_metrics(
+    metric_type: Optional[MetricType] = Query(None, description="Filter by metric type"),
+    token: str = Depends(security)
+) -> Dict[str, Any]:
+    """
+    Get per-operation latency statistics (count, average, p50/p95/p99)
+    
+    Args:
+        metric_type: Optional metric type filter
+        token: Bearer token for authentication
+        
+    Returns:
+        Aggregated performance statistics and counters
+    """
+    monitor = get_performance_monitor()
+    if monitor is None:
+        raise HTTPException(status_code=503, detail="Performance monitoring is disabled")
+    
+    return {
+        "aggregated_stats": monitor.collector.get_stats(metric_type),
+        "counters": monitor.collector.counters,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@router.get(
+    "/performance/prometheus",
+    summary="Prometheus Metrics Exposition",
+    response_class=PlainTextResponse
+)
+async def get_prometheus_metrics(token: str = Depends(security)) -> PlainTextResponse:
+    """
+    Expose performance metrics in the Prometheus text format (version 0.0.4)
+    
+    Args:
+        token: Bearer token for authentication
+        
+    Returns:
+        Prometheus exposition text
+    """
+    monitor = get_performance_monitor()
+    if monitor is None:
+        raise HTTPException(status_code=503, detail="Performance monitoring is disabled")
+    
+    return PlainTextResponse(
+        monitor.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 def _get_recommended_actions(error_code: str, category: ErrorCategory) -> list:
     """Get recommended actions for specific error types"""
     actions = {
@@ -344,4 +397,23 @@ def _generate_recommendations(metrics: Dict[str, Any], patterns: Dict[str, Any])
             "details": f"High authentication failure rate ({auth_errors}) may indicate attacks"
         })
     
-    return recommendations
\ No newline at end of file
+    return recommendations
+
+@router.get("/database/pools", summary="Database Connection Pool Metrics")
+async def get_database_pool_metrics(token: str = Depends(security)) -> Dict[str, Any]:
+    """
+    Get per-pool connection status and checkout wait statistics
+    
+    Args:
+        token: Bearer token for authentication
+        
+    Returns:
+        Pool status and wait-time percentiles for each workload pool
+    """
+    from app.core.db_routing import database_router
+    
+    return {
+        "replica_enabled": database_router.replica_enabled,
+        "pools": database_router.pool_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
@@ -6,9 +6,9 @@ user behavior analysis, and automated categorization improvements.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
-from datetime import datetime
 import json
 import uuid
 
@@ -20,7 +20,9 @@ from app.services.pattern_recognition import (
     PatternRule, UserBehaviorProfile, RuleGenerationStrategy, PatternType,
     PatternRecognitionLimits
 )
-from app.core.exceptions import ValidationException, BusinessLogicException
+from app.services.pattern_analyses import request_pattern_analysis, get_analysis, count_ids
+from app.models.pattern_analysis import PatternAnalysis
+from app.core.exceptions import ValidationException, BusinessLogicException, SystemException
 from app.core.error_sanitizer import error_sanitizer, create_secure_error_response
 from app.schemas.error import ErrorCategory, ErrorSeverity
 from app.core.rate_limiter import rate_limit
@@ -51,6 +53,11 @@ async def analyze_user_patterns(
     - User correction patterns for ML improvement
     - Behavioral patterns in categorization habits
     
+    Analysis runs as a background job. If the user's data has not changed
+    since an analysis with the same parameters, its stored results are
+    returned immediately; otherwise the analysis is queued and this returns
+    202 with an analysis_id to poll at /analyses/{analysis_id}.
+    
     Returns detailed analysis results with actionable rule suggestions.
     """
     try:
@@ -70,94 +77,45 @@ async def analyze_user_patterns(
                 detail=f"Analysis period cannot exceed {PatternRecognitionLimits.MAX_ANALYSIS_TIME_MINUTES * 24} days"
             )
         
-        # Initialize pattern recognition engine
-        pattern_engine = PatternRecognitionEngine(db, current_user)
-        
-        # Configure analysis strategy
-        pattern_engine.analysis_config["generation_strategy"] = strategy
+        parameters = {
+            "date_range_days": date_range_days,
+            "include_uncategorized": include_uncategorized,
+            "focus_corrections": focus_corrections,
+            "generation_strategy": strategy.value
+        }
         
-        # Perform comprehensive pattern analysis
-        analysis_result = await pattern_engine.analyze_user_patterns(
-            date_range_days=date_range_days,
-            include_uncategorized=include_uncategorized,
-            focus_corrections=focus_corrections
-        )
+        # Serve the stored analysis of the current data or queue a new one
+        analysis, queued = request_pattern_analysis(db, current_user, parameters)
         
-        # Log analysis activity
-        security_audit_logger.info(
-            f"Pattern analysis completed for user {current_user.id}",
+        security_audit_logger.logger.info(
+            f"Pattern analysis {'queued' if queued else 'requested'} for user {current_user.id}",
             extra={
                 "user_id": current_user.id,
-                "analysis_id": analysis_result.analysis_id,
-                "patterns_discovered": analysis_result.patterns_discovered,
-                "rules_suggested": analysis_result.rules_suggested,
-                "analysis_duration_ms": analysis_result.analysis_duration_ms,
+                "analysis_id": analysis.analysis_id,
+                "analysis_status": analysis.status,
                 "date_range_days": date_range_days,
                 "generation_strategy": generation_strategy
             }
         )
         
-        # Format response
-        return {
-            "analysis_summary": {
-                "analysis_id": analysis_result.analysis_id,
-                "total_transactions_analyzed": analysis_result.total_transactions_analyzed,
-                "patterns_discovered": analysis_result.patterns_discovered,
-                "rules_suggested": analysis_result.rules_suggested,
-                "high_confidence_patterns": analysis_result.high_confidence_patterns,
-                "analysis_duration_ms": analysis_result.analysis_duration_ms,
-                "accuracy_improvements": analysis_result.accuracy_improvements
-            },
-            "discovered_patterns": [
-                {
-                    "pattern_id": pattern.pattern_id,
-                    "pattern_type": pattern.pattern_type.value,
-                    "pattern_value": pattern.pattern_value,
-                    "confidence_score": pattern.confidence_score,
-                    "frequency": pattern.frequency,
-                    "category": pattern.category,
-                    "subcategory": pattern.subcategory,
-                    "supporting_transactions_count": len(pattern.supporting_transactions),
-                    "pattern_metadata": pattern.pattern_metadata,
-                    "created_at": pattern.created_at.isoformat(),
-                    "pattern_strength": _get_pattern_strength_description(pattern.confidence_score)
-                }
-                for pattern in analysis_result.discovered_patterns
-            ],
-            "suggested_rules": [
-                {
-                    "rule_id": rule.rule_id,
-                    "pattern_id": rule.pattern_id,
-                    "rule_pattern": rule.rule_pattern,
-                    "rule_type": rule.rule_type,
-                    "category": rule.category,
-                    "subcategory": rule.subcategory,
-                    "confidence": rule.confidence,
-                    "priority": rule.priority,
-                    "estimated_accuracy": rule.estimated_accuracy,
-                    "creation_reason": rule.creation_reason,
-                    "supporting_evidence": rule.supporting_evidence,
-                    "recommendation": _get_rule_recommendation(rule.confidence, rule.estimated_accuracy)
-                }
-                for rule in analysis_result.suggested_rules
-            ],
-            "analysis_metadata": {
-                "started_at": analysis_result.started_at.isoformat(),
-                "completed_at": analysis_result.completed_at.isoformat(),
-                "generation_strategy": generation_strategy,
-                "analysis_parameters": {
-                    "date_range_days": date_range_days,
-                    "include_uncategorized": include_uncategorized,
-                    "focus_corrections": focus_corrections
-                }
-            }
-        }
+        if analysis.status == "completed":
+            return _format_stored_analysis(analysis)
+        
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=_format_pending_analysis(analysis)
+        )
         
     except (ValidationException, BusinessLogicException) as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except SystemException:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Pattern analysis is temporarily unavailable. Please try again later."
+        )
     except Exception as e:
         error_detail = create_secure_error_response(
             exception=e,
@@ -174,6 +132,47 @@ async def analyze_user_patterns(
         )
 
 
+@router.get("/analyses/latest")
+@rate_limit(requests_per_hour=100, requests_per_minute=10)
+async def get_latest_pattern_analysis(
+    current_user: User = Depends(get_current_user_from_cookie),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the user's most recent completed pattern analysis from storage.
+    
+    Serving a stored analysis does not re-run pattern discovery.
+    """
+    analysis = get_analysis(db, current_user.id)
+    if not analysis:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No completed pattern analysis found. Run /analyze first."
+        )
+    return _format_stored_analysis(analysis)
+
+
+@router.get("/analyses/{analysis_id}")
+@rate_limit(requests_per_hour=300, requests_per_minute=30)  # Polled while the analysis job runs
+async def get_pattern_analysis(
+    analysis_id: str,
+    current_user: User = Depends(get_current_user_from_cookie),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a pattern analysis by ID: its results once completed, otherwise its job status.
+    """
+    analysis = get_analysis(db, current_user.id, analysis_id)
+    if not analysis:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pattern analysis not found"
+        )
+    if analysis.status == "completed":
+        return _format_stored_analysis(analysis)
+    return _format_pending_analysis(analysis)
+
+
 @router.post("/apply-rules")
 @rate_limit(requests_per_hour=20, requests_per_minute=2)
 async def apply_suggested_rules(
@@ -219,7 +218,7 @@ async def apply_suggested_rules(
         )
         
         # Log rule application
-        security_audit_logger.info(
+        security_audit_logger.logger.info(
             f"Pattern rules {'simulated' if dry_run else 'applied'} for user {current_user.id}",
             extra={
                 "user_id": current_user.id,
@@ -286,11 +285,11 @@ async def get_user_behavior_profile(
     try:
         pattern_engine = PatternRecognitionEngine(db, current_user)
         
-        # Get recent transactions for profile building
-        cutoff_date = datetime.utcnow() - timedelta(days=180)  # 6 months
-        transactions = await pattern_engine._get_transactions_for_pattern_analysis(180, True)
+        # Pattern statistics of the last 6 months for profile building
+        pattern_stats = await pattern_engine._load_pattern_statistics(180)
+        categorized_count = pattern_engine._count_categorized(pattern_stats)
         
-        if not transactions:
+        if not categorized_count:
             return {
                 "profile_available": False,
                 "message": "Insufficient transaction history for behavior analysis",
@@ -298,7 +297,7 @@ async def get_user_behavior_profile(
             }
         
         # Build behavior profile
-        user_profile = await pattern_engine._build_user_behavior_profile(transactions)
+        user_profile = await pattern_engine._build_user_behavior_profile(pattern_stats)
         
         # Get analytics
         analytics = await pattern_engine.get_pattern_analytics()
@@ -317,7 +316,7 @@ async def get_user_behavior_profile(
             "correction_patterns": {
                 "total_corrections": len(user_profile.correction_patterns),
                 "common_corrections": list(user_profile.correction_patterns.items())[:5],
-                "correction_frequency": user_profile.total_manual_corrections / max(len(transactions), 1)
+                "correction_frequency": user_profile.total_manual_corrections / max(categorized_count, 1)
             },
             "preferred_categories": {
                 "total_categories": len(user_profile.preferred_categories),
@@ -329,7 +328,7 @@ async def get_user_behavior_profile(
                 "category_distribution": _calculate_category_distribution(user_profile.preferred_categories)
             },
             "pattern_analytics": analytics,
-            "recommendations": _generate_behavior_recommendations(user_profile, len(transactions))
+            "recommendations": _generate_behavior_recommendations(user_profile, categorized_count)
         }
         
     except Exception as e:
@@ -452,6 +451,88 @@ async def get_pattern_recognition_config():
 
 # Helper functions
 
+def _format_stored_analysis(analysis: PatternAnalysis) -> Dict[str, Any]:
+    """Format a completed stored analysis for the API response"""
+    summary = analysis.summary or {}
+    parameters = analysis.parameters or {}
+    supporting = analysis.supporting_transactions or {}
+    rule_supports = {
+        rule["pattern_id"]: count_ids(supporting.get(rule["rule_id"]))
+        for rule in analysis.suggested_rules or []
+        if rule["rule_id"] in supporting
+    }
+    
+    return {
+        "analysis_summary": {
+            "analysis_id": analysis.analysis_id,
+            "total_transactions_analyzed": summary.get("total_transactions_analyzed", 0),
+            "patterns_discovered": summary.get("patterns_discovered", 0),
+            "rules_suggested": summary.get("rules_suggested", 0),
+            "high_confidence_patterns": summary.get("high_confidence_patterns", 0),
+            "analysis_duration_ms": summary.get("analysis_duration_ms", 0),
+            "accuracy_improvements": summary.get("accuracy_improvements", {})
+        },
+        "discovered_patterns": [
+            {
+                "pattern_id": pattern["pattern_id"],
+                "pattern_type": pattern["pattern_type"],
+                "pattern_value": pattern["pattern_value"],
+                "confidence_score": pattern["confidence_score"],
+                "frequency": pattern["frequency"],
+                "category": pattern["category"],
+                "subcategory": pattern["subcategory"],
+                "supporting_transactions_count": rule_supports.get(pattern["pattern_id"], pattern["frequency"]),
+                "pattern_metadata": pattern["pattern_metadata"],
+                "created_at": pattern["created_at"],
+                "pattern_strength": _get_pattern_strength_description(pattern["confidence_score"])
+            }
+            for pattern in analysis.patterns or []
+        ],
+        "suggested_rules": [
+            {
+                "rule_id": rule["rule_id"],
+                "pattern_id": rule["pattern_id"],
+                "rule_pattern": rule["rule_pattern"],
+                "rule_type": rule["rule_type"],
+                "category": rule["category"],
+                "subcategory": rule["subcategory"],
+                "confidence": rule["confidence"],
+                "priority": rule["priority"],
+                "estimated_accuracy": rule["estimated_accuracy"],
+                "creation_reason": rule["creation_reason"],
+                "supporting_evidence": rule["supporting_evidence"],
+                "supporting_transactions_count": count_ids(supporting.get(rule["rule_id"])),
+                "recommendation": _get_rule_recommendation(rule["confidence"], rule["estimated_accuracy"])
+            }
+            for rule in analysis.suggested_rules or []
+        ],
+        "analysis_metadata": {
+            "started_at": summary.get("started_at"),
+            "completed_at": summary.get("completed_at"),
+            "generation_strategy": parameters.get("generation_strategy"),
+            "analysis_parameters": {
+                "date_range_days": parameters.get("date_range_days"),
+                "include_uncategorized": parameters.get("include_uncategorized"),
+                "focus_corrections": parameters.get("focus_corrections")
+            },
+            "data_fingerprint": analysis.fingerprint
+        }
+    }
+
+
+def _format_pending_analysis(analysis: PatternAnalysis) -> Dict[str, Any]:
+    """Format a queued, running or failed analysis for the API response"""
+    return {
+        "analysis_id": analysis.analysis_id,
+        "status": analysis.status,
+        "job_id": analysis.analysis_id,
+        "error_message": analysis.error_message,
+        "created_at": analysis.created_at.isoformat() if analysis.created_at else None,
+        "started_at": analysis.started_at.isoformat() if analysis.started_at else None,
+        "poll_url": f"/api/v1/patterns/analyses/{analysis.analysis_id}"
+    }
+
+
 def _get_pattern_strength_description(confidence: float) -> str:
     """Get human-readable pattern strength description"""
     if confidence >= 0.95:
@@ -581,7 +662,3 @@ def _get_strategy_description(strategy: RuleGenerationStrategy) -> str:
         RuleGenerationStrategy.LEARNING: "Adaptive approach based on user feedback and behavior"
     }
     return descriptions.get(strategy, "Unknown strategy")
-
-
-# Import timedelta for behavior profile endpoint
-from datetime import timedelta
\ No newline at end of file
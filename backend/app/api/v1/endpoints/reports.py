@@ -37,11 +37,13 @@ import redis
 import os
 
 from app.core.database import get_db
+from app.core.db_routing import get_analytics_db
 from app.core.cookie_auth import get_current_user_from_cookie
 from app.core.exceptions import ValidationException, SystemException
 from app.core.config import settings
 from app.models.user import User
 from app.models.transaction import Transaction
+from app.services.transaction_search import contains_filter
 from app.services.analytics_engine import (
     AnalyticsEngine, AnalyticsDateRange, TimeRange, 
     AnalyticsCache, KPICalculator, TimeSeriesAnalyzer, ChartDataFormatter
@@ -484,7 +486,7 @@ class ReportBuilder:
             query = query.filter(Transaction.is_categorized == filters.is_categorized)
         
         if filters.description_contains:
-            query = query.filter(Transaction.description.ilike(f"%{filters.description_contains}%"))
+            query = query.filter(contains_filter(Transaction.description, filters.description_contains))
         
         return query
     
@@ -743,7 +745,7 @@ class ReportExporter:
 async def generate_report(
     definition: ReportDefinition,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
     current_user: User = Depends(get_current_user_from_cookie)
 ):
     """
@@ -966,7 +968,7 @@ async def create_report_job_v2(
 @router.get("/v2/templates", response_model=List[Dict[str, Any]])
 async def get_report_templates_v2(
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get available report templates for the current user.
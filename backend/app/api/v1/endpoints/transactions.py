@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
 from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, select
 from typing import List, Optional, Dict, Any, Union
 from datetime import datetime, timedelta, date
 import os
 from pathlib import Path
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.core.transaction_manager import (
     TransactionManager, 
     financial_transaction, 
@@ -20,14 +21,33 @@ import uuid
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.core.cookie_auth import get_current_user_from_cookie
-from app.services.categorization import CategorizationService
+from app.services.categorization import (
+    CategorizationService,
+    get_available_categories_async,
+    get_categorization_performance_async
+)
 from app.services.export_service import ExportService
+from app.services.rule_match_index import record_rule_overrides
+from app.services.transaction_search import contains_filter, search_transactions
+from app.services.import_batches import (
+    delete_import_batch as delete_import_batch_rows,
+    list_user_import_batches,
+    refresh_import_batches
+)
 from app.schemas.transaction import TransactionResponse, TransactionUpdate
 from app.schemas.export import (
     ExportFormat, ExportRequest, ExportJobResponse, ExportProgress, 
     ExportFilterParams, ExportColumnsConfig, ExportOptionsConfig
 )
 from app.core.financial_validators import validate_and_secure_sort_parameters
+from app.core.keyset_pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    estimate_row_count,
+    keyset_after,
+    keyset_order_by
+)
 from app.core.exceptions import ValidationException
 from app.core.rate_limiter import get_rate_limiter, RateLimitType, RateLimitTier, rate_limit
 from app.core.audit_logger import security_audit_logger
@@ -35,68 +55,95 @@ from app.services.transaction_operations import (
     TransactionBulkOperations, BulkUpdateRequest, BulkOperationType, 
     BulkOperationStatus, BusinessLogicException, BulkOperationLimits
 )
-from fastapi import Request
+from fastapi import Request, Response
 
 router = APIRouter()
 
-@router.get("/", response_model=List[TransactionResponse])
-async def get_transactions(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
-    limit: int = Query(50, ge=1, le=1000, description="Number of records to return"),
-    category: Optional[str] = Query(None, description="Filter by category"),
-    subcategory: Optional[str] = Query(None, description="Filter by subcategory"),
-    vendor: Optional[str] = Query(None, description="Filter by vendor"),
-    description: Optional[str] = Query(None, description="Filter by description (partial match)"),
-    start_date: Optional[datetime] = Query(None, description="Filter transactions from this date"),
-    end_date: Optional[datetime] = Query(None, description="Filter transactions until this date"),
-    is_income: Optional[bool] = Query(None, description="Filter by income/expense"),
-    is_categorized: Optional[bool] = Query(None, description="Filter by categorization status"),
-    min_amount: Optional[float] = Query(None, description="Minimum amount"),
-    max_amount: Optional[float] = Query(None, description="Maximum amount"),
-    sort_by: str = Query("date", description="Sort field (validated): date, amount, description, vendor, category, subcategory, is_income, is_categorized, confidence_score, created_at, updated_at"),
-    sort_order: str = Query("desc", description="Sort order (validated): asc, desc"),
-    current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
-):
-    """Get user transactions with optional filtering and pagination"""
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+def _transaction_filters(
+    user_id: int,
+    category: Optional[str] = None,
+    subcategory: Optional[str] = None,
+    vendor: Optional[str] = None,
+    description: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    is_income: Optional[bool] = None,
+    is_categorized: Optional[bool] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None
+) -> list:
+    """Build the WHERE conditions shared by the transaction list and count endpoints"""
+    conditions = [Transaction.user_id == user_id]
     
-    # Apply filters
     if category:
-        query = query.filter(Transaction.category == category)
+        conditions.append(Transaction.category == category)
     
     if subcategory:
-        query = query.filter(Transaction.subcategory == subcategory)
+        conditions.append(Transaction.subcategory == subcategory)
     
     if vendor:
         # Search in both vendor and description fields for more flexible search
-        query = query.filter(
+        conditions.append(
             or_(
-                Transaction.vendor.ilike(f"%{vendor}%"),
-                Transaction.description.ilike(f"%{vendor}%")
+                contains_filter(Transaction.vendor, vendor),
+                contains_filter(Transaction.description, vendor)
             )
         )
     
     if description:
-        query = query.filter(Transaction.description.ilike(f"%{description}%"))
+        conditions.append(contains_filter(Transaction.description, description))
     
     if start_date:
-        query = query.filter(Transaction.date >= start_date)
+        conditions.append(Transaction.date >= start_date)
     
     if end_date:
-        query = query.filter(Transaction.date <= end_date)
+        conditions.append(Transaction.date <= end_date)
     
     if is_income is not None:
-        query = query.filter(Transaction.is_income == is_income)
+        conditions.append(Transaction.is_income == is_income)
     
     if is_categorized is not None:
-        query = query.filter(Transaction.is_categorized == is_categorized)
+        conditions.append(Transaction.is_categorized == is_categorized)
     
     if min_amount is not None:
-        query = query.filter(Transaction.amount >= min_amount)
+        conditions.append(Transaction.amount >= min_amount)
     
     if max_amount is not None:
-        query = query.filter(Transaction.amount <= max_amount)
+        conditions.append(Transaction.amount <= max_amount)
+    
+    return conditions
+
+@router.get("/", response_model=List[TransactionResponse])
+async def get_transactions(
+    response: Response,
+    skip: int = Query(0, ge=0, description="Number of records to skip (ignored when cursor is given)"),
+    limit: int = Query(50, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    subcategory: Optional[str] = Query(None, description="Filter by subcategory"),
+    vendor: Optional[str] = Query(None, description="Filter by vendor"),
+    description: Optional[str] = Query(None, description="Filter by description (partial match)"),
+    start_date: Optional[datetime] = Query(None, description="Filter transactions from this date"),
+    end_date: Optional[datetime] = Query(None, description="Filter transactions until this date"),
+    is_income: Optional[bool] = Query(None, description="Filter by income/expense"),
+    is_categorized: Optional[bool] = Query(None, description="Filter by categorization status"),
+    min_amount: Optional[float] = Query(None, description="Minimum amount"),
+    max_amount: Optional[float] = Query(None, description="Maximum amount"),
+    sort_by: str = Query("date", description="Sort field (validated): date, amount, description, vendor, category, subcategory, is_income, is_categorized, confidence_score, created_at, updated_at"),
+    sort_order: str = Query("desc", description="Sort order (validated): asc, desc"),
+    current_user: User = Depends(get_current_user_from_cookie),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get user transactions with optional filtering and pagination
+    
+    Pass the X-Next-Cursor response header as `cursor` to fetch the next
+    page; cursor pages cost the same at any depth, unlike `skip`.
+    """
+    query = select(Transaction).where(*_transaction_filters(
+        current_user.id, category, subcategory, vendor, description,
+        start_date, end_date, is_income, is_categorized, min_amount, max_amount
+    ))
     
     # Apply secure sorting with comprehensive validation
     try:
@@ -118,15 +165,6 @@ async def get_transactions(
             }
         )
         
-        # Get the validated field from the Transaction model
-        sort_field = getattr(Transaction, validated_field)
-        
-        # Apply ordering based on validated parameters
-        if validated_order == "asc":
-            query = query.order_by(sort_field.asc())
-        else:
-            query = query.order_by(sort_field.desc())
-            
     except ValidationException as e:
         # Return HTTP 400 for validation errors with detailed field information
         raise HTTPException(
@@ -149,10 +187,32 @@ async def get_transactions(
         logger.error(f"Unexpected error in sort validation: {str(e)}")
         
         # Use secure default sorting
-        query = query.order_by(Transaction.date.desc())
+        validated_field, validated_order = "date", "desc"
+    
+    # Get the validated field from the Transaction model
+    sort_field = getattr(Transaction, validated_field)
+    
+    # Apply ordering based on validated parameters (id breaks ties for stable pages)
+    query = query.order_by(*keyset_order_by(sort_field, Transaction.id, validated_order))
     
     # Apply pagination
-    transactions = query.offset(skip).limit(limit).all()
+    if cursor:
+        try:
+            sort_value, last_id = decode_cursor(cursor, validated_field, validated_order, sort_field)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        query = query.where(keyset_after(sort_field, Transaction.id, validated_order, sort_value, last_id))
+    elif skip:
+        query = query.offset(skip)
+    
+    result = await db.execute(query.limit(limit))
+    transactions = result.scalars().all()
+    
+    if len(transactions) == limit:
+        last = transactions[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            validated_field, validated_order, getattr(last, validated_field), last.id
+        )
     return transactions
 
 @router.get("/count")
@@ -167,51 +227,35 @@ async def get_transaction_count(
     is_categorized: Optional[bool] = Query(None, description="Filter by categorization status"),
     min_amount: Optional[float] = Query(None, description="Minimum amount"),
     max_amount: Optional[float] = Query(None, description="Maximum amount"),
+    estimate: bool = Query(False, description="Return the query planner's estimate instead of an exact count"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get total count of transactions matching the filters"""
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
-    
     # Apply the same filters as the main endpoint
-    if category:
-        query = query.filter(Transaction.category == category)
-    
-    if subcategory:
-        query = query.filter(Transaction.subcategory == subcategory)
-    
-    if vendor:
-        # Search in both vendor and description fields for more flexible search
-        query = query.filter(
-            or_(
-                Transaction.vendor.ilike(f"%{vendor}%"),
-                Transaction.description.ilike(f"%{vendor}%")
-            )
-        )
-    
-    if description:
-        query = query.filter(Transaction.description.ilike(f"%{description}%"))
-    
-    if start_date:
-        query = query.filter(Transaction.date >= start_date)
-    
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    
-    if is_income is not None:
-        query = query.filter(Transaction.is_income == is_income)
-    
-    if is_categorized is not None:
-        query = query.filter(Transaction.is_categorized == is_categorized)
-    
-    if min_amount is not None:
-        query = query.filter(Transaction.amount >= min_amount)
+    conditions = _transaction_filters(
+        current_user.id, category, subcategory, vendor, description,
+        start_date, end_date, is_income, is_categorized, min_amount, max_amount
+    )
     
-    if max_amount is not None:
-        query = query.filter(Transaction.amount <= max_amount)
+    if estimate:
+        estimated = await estimate_row_count(db, select(Transaction.id).where(*conditions))
+        if estimated is not None:
+            return {"count": estimated, "estimated": True}
     
-    count = query.count()
-    return {"count": count}
+    query = select(func.count(Transaction.id)).where(*conditions)
+    count = (await db.execute(query)).scalar_one()
+    return {"count": count, "estimated": False}
+
+@router.get("/search", response_model=List[TransactionResponse])
+async def search_transactions_endpoint(
+    q: str = Query(..., min_length=1, max_length=200, description="Text to find in description or vendor"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    current_user: User = Depends(get_current_user_from_cookie),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Ranked description/vendor search, tolerant of prefixes and typos"""
+    return await search_transactions(db, current_user.id, q, limit)
 
 @router.get("/import-batches", response_model=List[dict])
 async def list_import_batches(
@@ -219,43 +263,21 @@ async def list_import_batches(
     db: Session = Depends(get_db)
 ):
     """List all import batches (files) for the current user with transaction counts"""
-    # First get basic batch info
-    batches = db.query(
-        Transaction.import_batch,
-        func.count(Transaction.id).label('transaction_count'),
-        func.min(Transaction.created_at).label('import_date'),
-        func.sum(Transaction.amount).label('total_amount')
-    ).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.import_batch.isnot(None)
-    ).group_by(
-        Transaction.import_batch
-    ).order_by(
-        func.min(Transaction.created_at).desc()
-    ).all()
-    
-    # Then get filenames for each batch
-    result = []
-    for batch in batches:
-        # Get filename from one transaction in the batch
-        filename_transaction = db.query(Transaction).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.import_batch == batch.import_batch
-        ).first()
-        
-        filename = "Unknown File"
-        if filename_transaction and filename_transaction.meta_data:
-            filename = filename_transaction.meta_data.get('filename', 'Unknown File')
-        
-        result.append({
-            "batch_id": batch.import_batch,
+    return [
+        {
+            "batch_id": batch.batch_id,
             "transaction_count": batch.transaction_count,
-            "import_date": batch.import_date,
-            "total_amount": float(batch.total_amount) if batch.total_amount else 0,
-            "filename": filename
-        })
-    
-    return result
+            "import_date": batch.created_at,
+            "total_amount": float(batch.total_amount or 0),
+            "filename": batch.filename or "Unknown File",
+            "file_hash": batch.file_hash,
+            "status": batch.status,
+            "rejected_count": batch.rejected_count,
+            "first_transaction_date": batch.first_transaction_date,
+            "last_transaction_date": batch.last_transaction_date
+        }
+        for batch in list_user_import_batches(db, current_user.id)
+    ]
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
@@ -324,6 +346,11 @@ async def update_transaction(
                 transaction.is_categorized = True
                 transaction.updated_at = datetime.utcnow()
                 
+                # A rule's result being changed counts against the rule's accuracy
+                record_rule_overrides(
+                    db, current_user.id, [transaction_id], transaction.category, transaction.subcategory
+                )
+                
                 # Release savepoint after successful update
                 tx_manager.release_savepoint(update_savepoint)
                 
@@ -459,6 +486,7 @@ async def delete_transaction(
             })
             
             db.delete(transaction)
+            refresh_import_batches(db, current_user.id, [transaction.import_batch])
             
             # Transaction will be committed automatically
             return {"message": "Transaction deleted successfully"}
@@ -767,7 +795,7 @@ async def get_categorization_performance(
     start_date: Optional[datetime] = Query(None, description="Start date for performance analysis"),
     end_date: Optional[datetime] = Query(None, description="End date for performance analysis"),
     current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get categorization performance metrics
@@ -775,8 +803,8 @@ async def get_categorization_performance(
     This endpoint provides detailed performance metrics for categorization,
     including accuracy rates, confidence distributions, and improvement trends.
     """
-    categorization_service = CategorizationService(db)
-    performance_data = await categorization_service.get_categorization_performance(
+    performance_data = await get_categorization_performance_async(
+        db,
         user_id=current_user.id,
         start_date=start_date,
         end_date=end_date
@@ -798,12 +826,10 @@ async def get_categorization_performance(
 
 @router.get("/categories/available")
 async def get_available_categories(
-    current_user: User = Depends(get_current_user_from_cookie),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_from_cookie)
 ):
     """Get all available categories and subcategories for the user"""
-    categorization_service = CategorizationService(db)
-    categories = categorization_service.get_available_categories(current_user.id)
+    categories = await get_available_categories_async(current_user.id)
     
     return {
         "categories": categories,
@@ -872,57 +898,29 @@ async def delete_import_batch(
             db_session=db
         ) as tx_manager:
             
-            # First, verify the batch exists and belongs to the user
-            batch_transactions = db.query(Transaction).filter(
-                Transaction.user_id == current_user.id,
-                Transaction.import_batch == batch_id
-            ).all()
+            # Set-based delete; counts come from the import_batches row
+            deleted = delete_import_batch_rows(db, current_user.id, batch_id)
             
-            if not batch_transactions:
+            if deleted is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"No transactions found for batch {batch_id}"
                 )
             
-            # Get transaction count and details before deletion
-            transaction_count = len(batch_transactions)
-            total_amount = sum(t.amount for t in batch_transactions)
+            deleted_count = deleted["deleted_count"]
             
             # Log the batch deletion operation
             tx_manager.add_operation("delete_import_batch", {
                 "batch_id": batch_id,
-                "transaction_count": transaction_count,
-                "total_amount": total_amount,
-                "transaction_ids": [t.id for t in batch_transactions]
+                "transaction_count": deleted_count,
+                "total_amount": deleted["total_amount"]
             })
             
-            # Delete all transactions in the batch with progress tracking
-            deleted_count = 0
-            for i, transaction in enumerate(batch_transactions):
-                # Create savepoint for each deletion to ensure individual rollback capability
-                delete_savepoint = tx_manager.create_savepoint(f"delete_transaction_{i}")
-                try:
-                    db.delete(transaction)
-                    deleted_count += 1
-                    tx_manager.release_savepoint(delete_savepoint)
-                except Exception as e:
-                    # Rollback individual transaction deletion
-                    tx_manager.rollback_to_savepoint(delete_savepoint)
-                    tx_manager.add_operation("transaction_deletion_failed", {
-                        "transaction_id": transaction.id,
-                        "error": error_sanitizer.sanitize_error_message(str(e))
-                    })
-                    # Continue with other deletions
-            
-            # If no transactions were successfully deleted, raise an error
-            if deleted_count == 0:
-                raise TransactionError("Failed to delete any transactions from the batch")
-            
             # Transaction will be committed automatically
             return {
                 "message": f"Successfully deleted {deleted_count} transactions from batch {batch_id}",
                 "deleted_count": deleted_count,
-                "total_count": transaction_count,
+                "total_count": deleted["total_count"],
                 "batch_id": batch_id
             }
             
@@ -1592,7 +1590,7 @@ async def undo_bulk_operation(
     Undo the last bulk operation
     
     Restores transactions to their previous state before the last bulk operation.
-    Note: Delete operations cannot be undone.
+    Note: Deletes from /bulk/delete are not journaled and cannot be undone.
     """
     try:
         bulk_ops = TransactionBulkOperations(db, current_user)
@@ -17,12 +17,17 @@ from app.core.exceptions import ValidationException, SystemException
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.core.cookie_auth import get_current_user_from_cookie
+from app.core.db_routing import database_router
 from app.services.categorization import CategorizationService
 from app.services.csv_parser import CSVParser, ParsingResult
+from app.services.file_analysis import analyze_file_content
+from app.services.import_batches import record_import_batch
+from app.services.duplicate_scans import queue_import_duplicate_scan
 from app.services.file_validator import FileValidator, ValidationResult, ThreatLevel
 from app.services.malware_scanner import scan_file_for_malware
 from app.services.upload_monitor import check_upload_allowed, record_upload
 from app.services.content_sanitizer import sanitize_csv_content, SanitizationLevel
+from app.services.upload_verdict_cache import get_upload_verdict_cache
 from app.services.simple_sandbox_analyzer import analyze_file_in_sandbox, AnalysisType
 from app.core.websocket_manager import (
     emit_validation_progress,
@@ -332,10 +337,13 @@ async def upload_csv(
                 detail=deny_reason
             )
         
+        # Single pass over the file: digests, entropy and signature positions
+        # shared by the validator, malware scanner and sandbox below
+        fingerprint = analyze_file_content(content)
+        
         # Generate SHA256 file hash for batch_id (replaces UUID for duplicate prevention)
         if not batch_id:
-            # Compute hash early for security and performance with streaming for memory efficiency
-            file_hash = calculate_file_hash_streaming(content)
+            file_hash = fingerprint.sha256
             batch_id = file_hash
             
             logger.info(f"Generated SHA256 hash for {file.filename}: {truncate_hash_for_display(file_hash)} (size: {file_size} bytes)")
@@ -378,6 +386,11 @@ async def upload_csv(
             details={"filename": file.filename, "size": file_size}
         )
         
+        # Identical files that already passed the security pipeline under the
+        # current rule set reuse the cached verdict instead of being rescanned
+        verdict_cache = get_upload_verdict_cache()
+        cached_verdict = verdict_cache.get(fingerprint.sha256, file.filename)
+        
         # Step 2: Comprehensive file validation
         await emit_validation_progress(
             batch_id=batch_id,
@@ -386,11 +399,15 @@ async def upload_csv(
             user_id=str(current_user.id)
         )
         
-        validation_result = await file_validator.validate_file(
-            file_content=content,
-            filename=file.filename,
-            user_id=str(current_user.id)
-        )
+        if cached_verdict:
+            validation_result = cached_verdict.validation_result()
+        else:
+            validation_result = await file_validator.validate_file(
+                file_content=content,
+                filename=file.filename,
+                user_id=str(current_user.id),
+                fingerprint=fingerprint
+            )
         
         await emit_validation_progress(
             batch_id=batch_id,
@@ -446,11 +463,15 @@ async def upload_csv(
             user_id=str(current_user.id)
         )
         
-        malware_scan_result = await scan_file_for_malware(
-            file_content=content,
-            filename=file.filename,
-            user_id=str(current_user.id)
-        )
+        if cached_verdict:
+            malware_scan_result = cached_verdict.malware_scan_result()
+        else:
+            malware_scan_result = await scan_file_for_malware(
+                file_content=content,
+                filename=file.filename,
+                user_id=str(current_user.id),
+                fingerprint=fingerprint
+            )
         
 
         
@@ -465,6 +486,16 @@ async def upload_csv(
             }
         )
         
+        if not malware_scan_result.is_clean and not malware_scan_result.threats_detected:
+            logger.warning(
+                f"Malware scan incomplete for {file.filename}: "
+                f"{malware_scan_result.metadata.get('engines_incomplete')}"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Malware scanning could not be completed. Please try the upload again."
+            )
+        
         if not malware_scan_result.is_clean:
             security_audit_logger.log_malware_detected(
                 user_id=str(current_user.id),
@@ -493,12 +524,15 @@ async def upload_csv(
             )
         
         # Step 2a: Sandbox analysis for suspicious files
-        if validation_result.threat_level in [ThreatLevel.MEDIUM, ThreatLevel.HIGH, ThreatLevel.CRITICAL]:
+        if cached_verdict:
+            sandbox_result = cached_verdict.sandbox_result
+        elif validation_result.threat_level in [ThreatLevel.MEDIUM, ThreatLevel.HIGH, ThreatLevel.CRITICAL]:
             sandbox_result = await analyze_file_in_sandbox(
                 file_content=content,
                 filename=file.filename,
                 user_id=str(current_user.id),
-                analysis_type=AnalysisType.BEHAVIORAL
+                analysis_type=AnalysisType.BEHAVIORAL,
+                fingerprint=fingerprint
             )
             
             if sandbox_result.get("threat_detected", False):
@@ -525,7 +559,8 @@ async def upload_csv(
                 file_content=content,
                 filename=file.filename,
                 user_id=str(current_user.id),
-                analysis_type=AnalysisType.STATIC
+                analysis_type=AnalysisType.STATIC,
+                fingerprint=fingerprint
             )
         
         # Step 3: File type specific validation
@@ -590,12 +625,16 @@ async def upload_csv(
                     )
             
             # Step 5a: Sanitize content for security
-            sanitization_result = await sanitize_csv_content(
-                content=content_str,
-                filename=file.filename,
-                user_id=str(current_user.id),
-                level=SanitizationLevel.STRICT
-            )
+            sanitization_result = None
+            if cached_verdict:
+                sanitization_result = cached_verdict.sanitization_result(content_str, SanitizationLevel.STRICT)
+            if sanitization_result is None:
+                sanitization_result = await sanitize_csv_content(
+                    content=content_str,
+                    filename=file.filename,
+                    user_id=str(current_user.id),
+                    level=SanitizationLevel.STRICT
+                )
             
             if not sanitization_result.is_safe:
                 security_audit_logger.log_content_sanitization_failure(
@@ -613,6 +652,18 @@ async def upload_csv(
                     }
                 )
             
+            # Remember the verdict so identical re-uploads skip the scans
+            if not cached_verdict:
+                verdict_cache.remember(
+                    fingerprint.sha256,
+                    file.filename,
+                    validation_result,
+                    malware_scan_result,
+                    sandbox_result,
+                    sanitization_result,
+                    original_content=content_str
+                )
+            
             # Use sanitized content for processing
             content_str = sanitization_result.sanitized_content
             
@@ -738,6 +789,8 @@ async def upload_csv(
             details={"total": total_transactions}
         )
         
+        imported_transactions = []
+        
         for transaction_data in parsing_result.transactions:
             try:
                 transaction = Transaction(
@@ -759,6 +812,7 @@ async def upload_csv(
                 )
                 
                 db.add(transaction)
+                imported_transactions.append(transaction)
                 processed_count += 1
                 
                 # Emit progress every 10% or every 50 transactions
@@ -804,8 +858,20 @@ async def upload_csv(
             details={"processed": processed_count, "errors": len(db_errors)}
         )
         
+        # One import_batches row per file, committed with its transactions
+        record_import_batch(
+            db,
+            user_id=current_user.id,
+            batch_id=batch_id,
+            filename=file.filename,
+            file_hash=fingerprint.sha256,
+            transactions=imported_transactions,
+            rejected_count=len(parsing_result.errors) + len(db_errors)
+        )
+        
         try:
             db.commit()
+            database_router.mark_write(current_user.id)
             logger.info(f"Successfully committed {processed_count} transactions")
             
             await emit_database_progress(
@@ -855,6 +921,9 @@ async def upload_csv(
         )
         categorized_count = categorization_result['rule_categorized'] + categorization_result['ml_categorized']
         
+        # Compare the new rows with the overlapping date window in the background
+        queue_import_duplicate_scan(db, current_user.id, batch_id)
+        
         await emit_categorization_progress(
             batch_id=batch_id,
             progress=95.0,
@@ -33,24 +33,28 @@ from dataclasses import dataclass, asdict
 from contextlib import asynccontextmanager
 
 import redis
-from rq import Queue, Worker, get_current_job
+from rq import Queue, Retry, Worker, get_current_job
 from rq.job import Job, JobStatus
 from rq.exceptions import InvalidJobOperation
 import pandas as pd
 import io
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import register_session_listeners
+from app.core.db_routing import database_router, get_background_session
 from app.core.audit_logger import security_audit_logger
 from app.core.error_sanitizer import error_sanitizer, create_secure_error_response
 from app.schemas.error import ErrorCategory, ErrorSeverity
 from app.core.exceptions import ValidationException, SystemException
 from app.services.categorization import CategorizationService
 from app.services.csv_parser import CSVParser, ParsingResult
+from app.services.file_analysis import analyze_file_content
+from app.services.import_batches import record_import_batch
 from app.services.file_validator import FileValidator, ValidationResult, ThreatLevel
 from app.services.malware_scanner import scan_file_for_malware
 from app.services.upload_monitor import check_upload_allowed, record_upload
 from app.services.content_sanitizer import sanitize_csv_content, SanitizationLevel
+from app.services.upload_verdict_cache import get_upload_verdict_cache
 from app.services.simple_sandbox_analyzer import analyze_file_in_sandbox, AnalysisType
 from app.models.user import User
 from app.models.transaction import Transaction
@@ -71,6 +75,8 @@ class JobType(str, Enum):
     BULK_CATEGORIZATION = "bulk_categorization"
     DATA_EXPORT = "data_export"
     BATCH_DELETE = "batch_delete"
+    PATTERN_ANALYSIS = "pattern_analysis"
+    DUPLICATE_SCAN = "duplicate_scan"
 
 class JobState(str, Enum):
     """Job execution states"""
@@ -141,16 +147,26 @@ class BackgroundJobManager:
                 health_check_interval=30
             )
             
+            # RQ stores pickled jobs and needs a connection that does not decode responses
+            self.queue_connection = redis.from_url(
+                settings.REDIS_URL,
+                socket_timeout=30,
+                socket_connect_timeout=30,
+                socket_keepalive=True,
+                socket_keepalive_options={},
+                health_check_interval=30
+            )
+            
             # Test Redis connection
             self.redis_client.ping()
             logger.info("Successfully connected to Redis for background jobs")
             
             # Initialize RQ queues with different priorities
             self.queues = {
-                JobPriority.CRITICAL: Queue('critical', connection=self.redis_client),
-                JobPriority.HIGH: Queue('high', connection=self.redis_client),
-                JobPriority.NORMAL: Queue('default', connection=self.redis_client),
-                JobPriority.LOW: Queue('low', connection=self.redis_client)
+                JobPriority.CRITICAL: Queue('critical', connection=self.queue_connection),
+                JobPriority.HIGH: Queue('high', connection=self.queue_connection),
+                JobPriority.NORMAL: Queue('default', connection=self.queue_connection),
+                JobPriority.LOW: Queue('low', connection=self.queue_connection)
             }
             
             # Job status tracking keys
@@ -255,7 +271,7 @@ class BackgroundJobManager:
                 job_data,
                 job_id=job_id,
                 job_timeout='30m',  # 30 minute timeout for large files
-                retry_count=3,
+                retry=Retry(max=3),
                 meta={'user_id': user_id, 'filename': filename, 'priority': priority.value}
             )
             
@@ -414,7 +430,7 @@ class BackgroundJobManager:
             
             # Try to cancel the RQ job
             try:
-                job = Job.fetch(job_id, connection=self.redis_client)
+                job = Job.fetch(job_id, connection=self.queue_connection)
                 job.cancel()
             except Exception:
                 pass  # Job might not exist in RQ anymore
@@ -530,7 +546,7 @@ def process_csv_upload_job(job_data: Dict[str, Any]) -> JobResult:
         batch_id = job_data['batch_id']
         
         # Get database session
-        db = next(get_db())
+        db = get_background_session()
         
         try:
             # Get user
@@ -577,12 +593,23 @@ def process_csv_upload_job(job_data: Dict[str, Any]) -> JobResult:
                 "Validating file format and structure"
             ))
             
-            file_validator = FileValidator()
-            validation_result = asyncio.run(file_validator.validate_file(
-                file_content=file_content,
-                filename=filename,
-                user_id=user_id
-            ))
+            # One pass over the file shared by validation, malware scan and sandbox
+            fingerprint = analyze_file_content(file_content)
+            
+            # Identical files that already passed the pipeline skip the scans
+            verdict_cache = get_upload_verdict_cache()
+            cached_verdict = verdict_cache.get(fingerprint.sha256, filename)
+            
+            if cached_verdict:
+                validation_result = cached_verdict.validation_result()
+            else:
+                file_validator = FileValidator()
+                validation_result = asyncio.run(file_validator.validate_file(
+                    file_content=file_content,
+                    filename=filename,
+                    user_id=user_id,
+                    fingerprint=fingerprint
+                ))
             
             if validation_result.validation_result == ValidationResult.REJECTED:
                 raise ValidationException(f"File validation failed: {validation_result.errors}")
@@ -595,17 +622,24 @@ def process_csv_upload_job(job_data: Dict[str, Any]) -> JobResult:
                 "Scanning file for malware and threats"
             ))
             
-            malware_scan_result = asyncio.run(scan_file_for_malware(
-                file_content=file_content,
-                filename=filename,
-                user_id=user_id
-            ))
+            if cached_verdict:
+                malware_scan_result = cached_verdict.malware_scan_result()
+            else:
+                malware_scan_result = asyncio.run(scan_file_for_malware(
+                    file_content=file_content,
+                    filename=filename,
+                    user_id=user_id,
+                    fingerprint=fingerprint
+                ))
             
             if not malware_scan_result.is_clean:
+                if not malware_scan_result.threats_detected:
+                    raise ValidationException("Malware scan could not be completed; upload the file again")
                 raise ValidationException(f"Malware detected: {malware_scan_result.threats_detected}")
             
             # Step 4: Sandbox analysis for suspicious files
-            if validation_result.threat_level in [ThreatLevel.MEDIUM, ThreatLevel.HIGH, ThreatLevel.CRITICAL]:
+            sandbox_result = cached_verdict.sandbox_result if cached_verdict else None
+            if not cached_verdict and validation_result.threat_level in [ThreatLevel.MEDIUM, ThreatLevel.HIGH, ThreatLevel.CRITICAL]:
                 asyncio.run(update_progress(
                     JobState.PROCESSING,
                     35.0,
@@ -617,7 +651,8 @@ def process_csv_upload_job(job_data: Dict[str, Any]) -> JobResult:
                     file_content=file_content,
                     filename=filename,
                     user_id=user_id,
-                    analysis_type=AnalysisType.BEHAVIORAL
+                    analysis_type=AnalysisType.BEHAVIORAL,
+                    fingerprint=fingerprint
                 ))
                 
                 if sandbox_result.get("threat_detected", False):
@@ -642,16 +677,31 @@ def process_csv_upload_job(job_data: Dict[str, Any]) -> JobResult:
                     raise ValidationException("File encoding error. Please ensure the file is UTF-8 encoded.")
             
             # Sanitize content
-            sanitization_result = asyncio.run(sanitize_csv_content(
-                content=content_str,
-                filename=filename,
-                user_id=user_id,
-                level=SanitizationLevel.STRICT
-            ))
+            sanitization_result = None
+            if cached_verdict:
+                sanitization_result = cached_verdict.sanitization_result(content_str, SanitizationLevel.STRICT)
+            if sanitization_result is None:
+                sanitization_result = asyncio.run(sanitize_csv_content(
+                    content=content_str,
+                    filename=filename,
+                    user_id=user_id,
+                    level=SanitizationLevel.STRICT
+                ))
             
             if not sanitization_result.is_safe:
                 raise ValidationException(f"Content sanitization failed: {sanitization_result.security_issues}")
             
+            if not cached_verdict:
+                verdict_cache.remember(
+                    fingerprint.sha256,
+                    filename,
+                    validation_result,
+                    malware_scan_result,
+                    sandbox_result,
+                    sanitization_result,
+                    original_content=content_str
+                )
+            
             content_str = sanitization_result.sanitized_content
             
             # Parse CSV
@@ -698,6 +748,8 @@ def process_csv_upload_job(job_data: Dict[str, Any]) -> JobResult:
             db_errors = []
             total_transactions = len(parsing_result.transactions)
             
+            imported_transactions = []
+            
             for transaction_data in parsing_result.transactions:
                 try:
                     transaction = Transaction(
@@ -721,6 +773,7 @@ def process_csv_upload_job(job_data: Dict[str, Any]) -> JobResult:
                     )
                     
                     db.add(transaction)
+                    imported_transactions.append(transaction)
                     processed_count += 1
                     
                     # Update progress every 10% or every 50 transactions
@@ -753,7 +806,19 @@ def process_csv_upload_job(job_data: Dict[str, Any]) -> JobResult:
                 "Committing transactions to database"
             ))
             
+            # One import_batches row per file, committed with its transactions
+            record_import_batch(
+                db,
+                user_id=user.id,
+                batch_id=batch_id,
+                filename=filename,
+                file_hash=fingerprint.sha256,
+                transactions=imported_transactions,
+                rejected_count=len(parsing_result.errors) + len(db_errors)
+            )
+            
             db.commit()
+            database_router.mark_write(user_id)
             logger.info(f"Successfully committed {processed_count} transactions")
             
             # Step 7: Apply categorization
@@ -770,6 +835,11 @@ def process_csv_upload_job(job_data: Dict[str, Any]) -> JobResult:
             ))
             categorized_count = categorization_result['rule_categorized'] + categorization_result['ml_categorized']
             
+            # Compare the new rows with the overlapping date window in the background
+            # Imported here: the duplicate scan jobs are queued through this module
+            from app.services.duplicate_scans import queue_import_duplicate_scan
+            queue_import_duplicate_scan(db, user.id, batch_id)
+            
             # Step 8: Complete processing
             processing_time = (datetime.utcnow() - start_time).total_seconds()
             
@@ -877,6 +947,7 @@ def start_worker(queue_names: List[str] = None) -> None:
         queue_names: List of queue names to process (default: all queues)
     """
     try:
+        register_session_listeners()
         redis_conn = redis.from_url(settings.REDIS_URL)
         
         if queue_names is None:
@@ -886,6 +957,10 @@ def start_worker(queue_names: List[str] = None) -> None:
         
         logger.info(f"Starting worker for queues: {queue_names}")
         
+        # The nightly duplicate scan reschedules itself; make sure one is scheduled
+        from app.services.duplicate_scans import schedule_nightly_duplicate_scan
+        schedule_nightly_duplicate_scan()
+        
         worker = Worker(queues, connection=redis_conn)
         worker.work(with_scheduler=True)
         
@@ -15,13 +15,36 @@ class Settings(BaseSettings):
     
     # Database - Environment variables are required for production security
     DATABASE_URL: Optional[str] = None
+    ASYNC_DATABASE_URL: Optional[str] = None  # Derived from DATABASE_URL (asyncpg driver) if not set
+    DATABASE_POOL_SIZE: int = 10  # Persistent connections per engine and worker
+    DATABASE_MAX_OVERFLOW: int = 20  # Additional connections when pool is full
+    DATABASE_POOL_TIMEOUT: int = 30  # Seconds to wait for a pooled connection
+    DATABASE_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+    DATABASE_REPLICA_URL: Optional[str] = None  # Read replica for analytics/report/export reads
+    DATABASE_ANALYTICS_POOL_SIZE: int = 5  # Analytics and report queries
+    DATABASE_EXPORT_POOL_SIZE: int = 3  # Export generation
+    DATABASE_BACKGROUND_POOL_SIZE: int = 5  # Background job workers
+    READ_YOUR_WRITES_WINDOW_SECONDS: int = 30  # Keep a user's reads on the primary after writes
     REDIS_URL: Optional[str] = None
     
     # Security - Environment variables are required for production security
     SECRET_KEY: Optional[str] = None
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-    
+
+    # Revoked-token filter (in-process view of revoked_tokens)
+    REVOCATION_CACHE_ENABLED: bool = True
+    REVOCATION_CACHE_REFRESH_SECONDS: float = 2.0  # Poll interval for revocations made by other workers
+    REVOCATION_CACHE_MAX_STALENESS_SECONDS: float = 30.0  # Fall back to database checks beyond this
+    REVOCATION_CACHE_REBUILD_SECONDS: int = 3600  # Full reload drops expired entries
+    REVOCATION_FILTER_CAPACITY: int = 100000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
+
+    # Authenticated principal cache (decoded claims + user snapshot per session token)
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
     # Cookie Security Settings
     COOKIE_NAME: str = "fingood_auth"
     COOKIE_SECURE: bool = True  # Set to False for localhost development
@@ -77,6 +100,20 @@ class Settings(BaseSettings):
     ENABLE_MALWARE_SCANNING: bool = True
     QUARANTINE_SUSPICIOUS_FILES: bool = True
     VIRUSTOTAL_API_KEY: Optional[str] = None
+    CLAMAV_SOCKET: Optional[str] = None  # clamd unix socket path or host:port (falls back to clamscan)
+    MALWARE_SCAN_WORKERS: int = 2  # Processes for CPU-bound scan engines (0 = thread pool)
+    MALWARE_SCAN_BUDGET_SECONDS: float = 45.0  # Deadline for all scan engines together
+    MALWARE_SCAN_EARLY_EXIT_CONFIDENCE: float = 0.9  # Cancel remaining engines once a threat reaches this
+    UPLOAD_VERDICT_CACHE_ENABLED: bool = True  # Reuse security verdicts for re-uploaded identical files
+    UPLOAD_VERDICT_CACHE_TTL_SECONDS: int = 7 * 24 * 3600  # Verdicts also expire when scanner rules change
+    UPLOAD_VERDICT_CACHE_MAX_SANITIZED_BYTES: int = 2 * 1024 * 1024  # Larger sanitized outputs are recomputed
+    
+    # Duplicate detection settings
+    DUPLICATE_SCAN_WORKERS: int = 2  # Processes scanning users in parallel during the nightly scan
+    DUPLICATE_NIGHTLY_SCAN_HOUR: int = 3  # UTC hour of the nightly all-users duplicate scan
+    
+    # Transaction search
+    TRANSACTION_SEARCH_SIMILARITY_THRESHOLD: float = 0.4  # pg_trgm word similarity for typo-tolerant matches
     
     # Rate limiting for file uploads
     MAX_UPLOADS_PER_HOUR: int = 50
@@ -191,12 +228,14 @@ class Settings(BaseSettings):
     ENABLE_SYSTEM_MONITORING: bool = True
     SYSTEM_METRICS_INTERVAL: int = 60  # seconds
     ENABLE_PERFORMANCE_MONITORING: bool = True
+    PERFORMANCE_METRIC_SAMPLE_EVERY: int = 10  # Log 1 in N metrics of hot operations
     ENABLE_REQUEST_LOGGING: bool = True
     ENABLE_RESPONSE_LOGGING: bool = True
     LOG_REQUEST_BODIES: bool = False  # Security risk if enabled
     LOG_RESPONSE_BODIES: bool = False  # Security risk if enabled
     MASK_SENSITIVE_DATA: bool = True
     MAX_LOG_BODY_SIZE: int = 1024 * 1024  # 1MB
+    MAX_INSPECTED_BODY_SIZE: int = 1024 * 1024  # 1MB cap for middleware body validation
     
     # Compliance and audit logging
     ENABLE_COMPLIANCE_LOGGING: bool = True
@@ -15,6 +15,8 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.security import jwt_manager, TokenExpiredError, TokenRevokedError, TokenInvalidError
 from app.core.database import get_db
+from app.core.principal_cache import get_principal_cache
+from app.core.revocation_cache import get_revocation_cache
 from app.models.user import User
 
 # Configure cookie auth logging
@@ -276,6 +278,14 @@ async def get_current_user_from_cookie(
             cookie_auth_logger.warning("No authentication token found in request")
             raise credentials_exception
         
+        # Recently verified token: claims and user come from the principal cache
+        principal_cache = get_principal_cache()
+        principal = principal_cache.get(token)
+        if principal is not None:
+            if get_revocation_cache().might_be_revoked(principal.jti, db) is False:
+                return principal_cache.attach_user(principal, db)
+            principal_cache.invalidate_token(principal.jti)
+        
         # Verify token using JWT manager
         payload = jwt_manager.verify_token(token, db, request)
         email: str = payload.get("sub")
@@ -299,6 +309,7 @@ async def get_current_user_from_cookie(
             )
         
         cookie_auth_logger.info(f"User authenticated successfully: {email}")
+        principal_cache.put(token, payload, user)
         return user
         
     except TokenExpiredError:
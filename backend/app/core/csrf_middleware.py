@@ -4,10 +4,11 @@ Automatically validates CSRF tokens for state-changing HTTP methods.
 """
 
 import logging
-from typing import Callable, List, Set
+from typing import List, Set
 
-from fastapi import Request, Response, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request, HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.core.csrf import csrf_protection, CSRFTokenMissingError, CSRFTokenInvalidError
 from app.core.cookie_auth import extract_token_from_request
@@ -17,15 +18,18 @@ from app.core.security import jwt_manager
 csrf_middleware_logger = logging.getLogger("fingood.csrf_middleware")
 
 
-class CSRFProtectionMiddleware(BaseHTTPMiddleware):
+class CSRFProtectionMiddleware:
     """
     CSRF protection middleware that validates tokens for state-changing operations.
     Implements automatic CSRF protection for financial application security.
+    
+    Implemented as a pure ASGI middleware; it only inspects headers and cookies,
+    so request and response bodies pass through untouched.
     """
     
     def __init__(
         self, 
-        app, 
+        app: ASGIApp, 
         exempt_paths: List[str] = None,
         require_csrf_methods: Set[str] = None
     ):
@@ -37,7 +41,7 @@ class CSRFProtectionMiddleware(BaseHTTPMiddleware):
             exempt_paths: List of paths to exempt from CSRF protection
             require_csrf_methods: HTTP methods that require CSRF protection
         """
-        super().__init__(app)
+        self.app = app
         
         # Default exempt paths (authentication endpoints)
         self.exempt_paths = exempt_paths or [
@@ -56,35 +60,40 @@ class CSRFProtectionMiddleware(BaseHTTPMiddleware):
             "POST", "PUT", "PATCH", "DELETE"
         }
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
-        Process request and validate CSRF token if required.
+        Validate the CSRF token if required, then pass the request through.
         
         Args:
-            request: Incoming HTTP request
-            call_next: Next middleware or endpoint handler
-            
-        Returns:
-            HTTP response
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request = Request(scope, receive)
         try:
             # Check if CSRF protection is required for this request
             if self._should_validate_csrf(request):
                 await self._validate_csrf_token(request)
-            
-            # Process the request
-            response = await call_next(request)
-            return response
-            
-        except HTTPException:
-            # Re-raise HTTP exceptions (like CSRF failures)
-            raise
+        except HTTPException as e:
+            # Exception handlers run inside the app, so answer directly
+            response = JSONResponse(status_code=e.status_code, content={"detail": e.detail})
+            await response(scope, receive, send)
+            return
         except Exception as e:
             csrf_middleware_logger.error(f"CSRF middleware error: {str(e)}")
-            raise HTTPException(
+            response = JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="CSRF protection error"
+                content={"detail": "CSRF protection error"}
             )
+            await response(scope, receive, send)
+            return
+        
+        # Process the request
+        await self.app(scope, receive, send)
     
     def _should_validate_csrf(self, request: Request) -> bool:
         """
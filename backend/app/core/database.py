@@ -1,8 +1,11 @@
 from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError, OperationalError, DisconnectionError
 from fastapi import HTTPException
+from typing import Any, Awaitable, Callable, List, Optional
+import asyncio
 import sys
 import time
 import logging
@@ -11,25 +14,38 @@ from app.core.config import settings
 # Configure logging for database operations
 logger = logging.getLogger(__name__)
 
-def create_database_engine():
-    """Create database engine with comprehensive error handling and security features."""
+def create_database_engine(
+    database_url: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+    application_name: str = "FinGood"
+):
+    """Create database engine with comprehensive error handling and security features.
+    
+    Args:
+        database_url: Database URL (defaults to DATABASE_URL)
+        pool_size: Persistent pool size (defaults to DATABASE_POOL_SIZE)
+        max_overflow: Overflow connections (defaults to DATABASE_MAX_OVERFLOW)
+        application_name: Name reported to PostgreSQL (identifies the pool)
+    """
+    database_url = database_url or settings.DATABASE_URL
     try:
         # Enhanced security and reliability settings for financial applications
         engine = create_engine(
-            settings.DATABASE_URL,
+            database_url,
             pool_pre_ping=True,  # Verify connections before use
-            pool_recycle=300,    # Recycle connections every 5 minutes
-            pool_size=10,        # Maximum number of connections in pool
-            max_overflow=20,     # Additional connections when pool is full
-            pool_timeout=30,     # Timeout for getting connection from pool
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,  # Recycle long-lived connections
+            pool_size=settings.DATABASE_POOL_SIZE if pool_size is None else pool_size,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW if max_overflow is None else max_overflow,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,  # Timeout for getting connection from pool
             echo=settings.DEBUG, # Log SQL queries in debug mode
             # Security: Disable autocommit to ensure transaction integrity
             isolation_level="READ_COMMITTED",
             # Enable connection health checks
             connect_args={
                 "connect_timeout": 10,  # Connection timeout in seconds
-                "application_name": "FinGood",  # Identify our application
-            } if settings.DATABASE_URL.startswith('postgresql') else {}
+                "application_name": application_name,  # Identify our application
+            } if database_url.startswith('postgresql') else {}
         )
         
         # Test database connection on startup
@@ -96,9 +112,77 @@ else:
     # For testing, create a placeholder
     SessionLocal = None
 
+# Async drivers for the synchronous DATABASE_URL schemes
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_url(database_url: str) -> str:
+    """Derive the async driver URL from a synchronous DATABASE_URL."""
+    scheme, separator, rest = database_url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+def create_async_database_engine():
+    """Create the async engine used by AsyncSession-based read paths.
+    
+    The engine is lazy: connections are opened on first use, so startup
+    connectivity is still verified by the synchronous engine.
+    """
+    url = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+    
+    engine_options = {}
+    if url.startswith("postgresql+asyncpg"):
+        engine_options = {
+            "isolation_level": "READ COMMITTED",
+            "connect_args": {
+                "timeout": 10,  # Connection timeout in seconds
+                "server_settings": {"application_name": "FinGood"},
+            },
+        }
+    
+    return create_async_engine(
+        url,
+        pool_pre_ping=True,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        echo=settings.DEBUG,
+        **engine_options,
+    )
+
+# Create async engine and session factory (skip during testing)
+if engine is not None:
+    async_engine = create_async_database_engine()
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,  # Keep loaded rows usable after commit
+    )
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
 # Create base class for models
 Base = declarative_base()
 
+
+def register_session_listeners() -> None:
+    """
+    Install the global Session listeners that keep derived data current
+
+    Pattern statistics and streaming fraud features follow every ORM write.
+    Called once by each process that writes transactions (API and workers).
+    """
+    from app.core import fraud_features
+    from app.services import pattern_statistics
+    pattern_statistics.register_listeners()
+    fraud_features.register_listeners()
+
 # Dependency to get database session with enhanced error handling
 def get_db():
     """Get database session with comprehensive error handling for financial applications."""
@@ -132,6 +216,56 @@ def get_db():
         except Exception as e:
             logger.warning(f"Error closing database session: {str(e)}")
 
+async def get_async_db():
+    """Get an AsyncSession for non-blocking database access.
+    
+    Used by hot read paths so queries do not block the event loop.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            
+        except (OperationalError, DisconnectionError) as e:
+            logger.error(f"Database connection error during async session: {str(e)}")
+            await db.rollback()
+            raise
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Database operation error: {str(e)}")
+            await db.rollback()
+            raise
+            
+        except HTTPException:
+            # Re-raise HTTPExceptions without logging them as database errors
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error during async database session: {str(e)}")
+            await db.rollback()
+            raise
+
+async def run_concurrently(*queries: Callable[[AsyncSession], Awaitable[Any]]) -> List[Any]:
+    """Run independent read queries concurrently.
+    
+    An AsyncSession can only run one statement at a time, so each query gets
+    its own short-lived session (and pooled connection).
+    
+    Args:
+        queries: Coroutine functions taking an AsyncSession
+    
+    Returns:
+        Query results in argument order
+    """
+    async def _run(query: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
+        async with AsyncSessionLocal() as session:
+            return await query(session)
+    
+    return list(await asyncio.gather(*(_run(query) for query in queries)))
+
+async def dispose_async_engine():
+    """Close all pooled async connections (application shutdown)."""
+    if async_engine is not None:
+        await async_engine.dispose()
+
 def get_db_health():
     """Check database health for monitoring and health checks."""
     try:
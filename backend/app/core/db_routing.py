@@ -0,0 +1,259 @@
+"""
+Database Session Routing for FinGood
+
+Routes sessions to separate connection pools per workload class so analytics
+scans, exports and background jobs cannot starve interactive (OLTP) requests
+of connections. Read-only analytics, report and export sessions go to the
+optional read replica (DATABASE_REPLICA_URL), except for users who wrote
+recently (e.g. just uploaded a file): their reads stay on the primary for
+READ_YOUR_WRITES_WINDOW_SECONDS so they always see their own data.
+
+Connection checkout wait times are recorded per pool in the performance
+monitor (operation "pool_wait.<pool>"), alongside live pool status.
+"""
+
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Any, Dict, Generator, Optional
+
+from fastapi import Depends
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.cookie_auth import get_current_user_from_cookie
+from app.core.database import create_database_engine, engine as primary_engine
+from app.core.performance_monitor import MetricType, get_performance_monitor
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class Workload(Enum):
+    """Workload classes, each with its own connection pool"""
+    OLTP = "oltp"
+    ANALYTICS = "analytics"
+    EXPORT = "export"
+    BACKGROUND = "background"
+
+
+# Workloads whose read-only sessions may be served by the replica
+REPLICA_WORKLOADS = frozenset({Workload.ANALYTICS, Workload.EXPORT})
+
+
+class ReadYourWritesTracker:
+    """
+    Remembers users who wrote recently so their reads stay on the primary
+
+    Marks are kept in-process and, when Redis is available, shared through
+    Redis so API workers and background job workers agree.
+    """
+
+    KEY_PREFIX = "fingood:db:recent_write:"
+
+    def __init__(self, window_seconds: int):
+        self.window_seconds = window_seconds
+        self._local: Dict[str, float] = {}  # user id -> monotonic expiry
+        self._redis = None
+        self._redis_checked = False
+
+    def _get_redis(self):
+        """Lazily connect to Redis (None if unavailable)"""
+        if not self._redis_checked:
+            self._redis_checked = True
+            if settings.REDIS_URL:
+                try:
+                    import redis
+                    self._redis = redis.from_url(settings.REDIS_URL, socket_timeout=0.5)
+                    self._redis.ping()
+                except Exception as e:
+                    logger.warning(f"Read-your-writes tracking is process-local (Redis unavailable): {e}")
+                    self._redis = None
+        return self._redis
+
+    def mark_write(self, user_id: int):
+        """Record that a user just wrote data"""
+        # Job payloads carry user ids as strings; normalize keys
+        user_key = str(user_id)
+        self._local[user_key] = time.monotonic() + self.window_seconds
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.setex(f"{self.KEY_PREFIX}{user_key}", self.window_seconds, 1)
+            except Exception as e:
+                logger.warning(f"Failed to record recent write for user {user_id}: {e}")
+
+    def wrote_recently(self, user_id: int) -> bool:
+        """Check whether a user wrote within the stickiness window"""
+        user_key = str(user_id)
+        expires = self._local.get(user_key)
+        if expires is not None:
+            if expires > time.monotonic():
+                return True
+            self._local.pop(user_key, None)
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                return bool(client.exists(f"{self.KEY_PREFIX}{user_key}"))
+            except Exception:
+                # Fail towards the primary: it is always consistent
+                return True
+        return False
+
+
+class DatabaseRouter:
+    """Creates and hands out sessions from per-workload (and replica) pools"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session_factories: Dict[str, sessionmaker] = {}
+        self._engines: Dict[str, Any] = {}
+        self.tracker = ReadYourWritesTracker(settings.READ_YOUR_WRITES_WINDOW_SECONDS)
+        if primary_engine is not None:
+            self._engines[Workload.OLTP.value] = primary_engine
+
+    @property
+    def replica_enabled(self) -> bool:
+        return bool(settings.DATABASE_REPLICA_URL)
+
+    def _pool_sizes(self, workload: Workload) -> Dict[str, int]:
+        sizes = {
+            Workload.ANALYTICS: settings.DATABASE_ANALYTICS_POOL_SIZE,
+            Workload.EXPORT: settings.DATABASE_EXPORT_POOL_SIZE,
+            Workload.BACKGROUND: settings.DATABASE_BACKGROUND_POOL_SIZE,
+        }
+        pool_size = sizes.get(workload, settings.DATABASE_POOL_SIZE)
+        return {"pool_size": pool_size, "max_overflow": pool_size}
+
+    def _factory(self, pool_name: str, workload: Workload, replica: bool) -> sessionmaker:
+        """Get (creating on first use) the session factory for a pool"""
+        factory = self._session_factories.get(pool_name)
+        if factory is not None:
+            return factory
+
+        with self._lock:
+            factory = self._session_factories.get(pool_name)
+            if factory is None:
+                if workload == Workload.OLTP and not replica and primary_engine is not None:
+                    # Interactive traffic keeps using the application's main engine
+                    pool_engine = primary_engine
+                else:
+                    pool_engine = create_database_engine(
+                        database_url=settings.DATABASE_REPLICA_URL if replica else settings.DATABASE_URL,
+                        application_name=f"FinGood-{pool_name}",
+                        **self._pool_sizes(workload)
+                    )
+                self._engines[pool_name] = pool_engine
+                factory = sessionmaker(autocommit=False, autoflush=False, bind=pool_engine)
+                self._session_factories[pool_name] = factory
+                logger.info(f"Database pool '{pool_name}' created")
+        return factory
+
+    def use_replica(self, workload: Workload, read_only: bool, user_id: Optional[int]) -> bool:
+        """Decide whether a session should be served by the replica"""
+        if not (read_only and self.replica_enabled and workload in REPLICA_WORKLOADS):
+            return False
+        return user_id is None or not self.tracker.wrote_recently(user_id)
+
+    def session(
+        self,
+        workload: Workload = Workload.OLTP,
+        read_only: bool = False,
+        user_id: Optional[int] = None
+    ) -> Session:
+        """
+        Open a session on the pool for a workload
+
+        The connection is checked out immediately so the pool wait is measured.
+
+        Args:
+            workload: Workload class of the caller
+            read_only: True if the session only reads (may use the replica)
+            user_id: User the session serves (for read-your-writes stickiness)
+
+        Returns:
+            New Session (the caller must close it)
+        """
+        replica = self.use_replica(workload, read_only, user_id)
+        pool_name = f"{workload.value}_replica" if replica else workload.value
+        db = self._factory(pool_name, workload, replica)()
+
+        start = time.perf_counter()
+        try:
+            db.connection()
+        except PoolTimeoutError:
+            self._record_wait(pool_name, (time.perf_counter() - start) * 1000, success=False)
+            db.close()
+            raise
+        self._record_wait(pool_name, (time.perf_counter() - start) * 1000)
+
+        db.info["pool"] = pool_name
+        return db
+
+    def _record_wait(self, pool_name: str, wait_ms: float, success: bool = True):
+        monitor = get_performance_monitor()
+        if monitor is not None:
+            monitor.observe(MetricType.DATABASE_QUERY, f"pool_wait.{pool_name}", wait_ms, success)
+
+    def mark_write(self, user_id: int):
+        """Keep a user's reads on the primary for the stickiness window"""
+        if self.replica_enabled:
+            self.tracker.mark_write(user_id)
+
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Live pool status and checkout wait statistics per pool"""
+        monitor = get_performance_monitor()
+        wait_stats = monitor.collector.get_stats(MetricType.DATABASE_QUERY) if monitor else {}
+
+        stats = {}
+        for pool_name, pool_engine in list(self._engines.items()):
+            pool = pool_engine.pool
+            stats[pool_name] = {
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "status": pool.status(),
+                "wait": wait_stats.get(f"{MetricType.DATABASE_QUERY.value}_pool_wait.{pool_name}", {}),
+            }
+        return stats
+
+
+# Global router instance
+database_router = DatabaseRouter()
+
+
+def _session_dependency(workload: Workload, read_only: bool, user_id: Optional[int]) -> Generator[Session, None, None]:
+    db = database_router.session(workload, read_only=read_only, user_id=user_id)
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def get_analytics_db(
+    current_user: User = Depends(get_current_user_from_cookie)
+) -> Generator[Session, None, None]:
+    """Read-only analytics/report session (replica when available)"""
+    yield from _session_dependency(Workload.ANALYTICS, True, current_user.id)
+
+
+def get_export_db() -> Generator[Session, None, None]:
+    """Export session on the export pool (primary; export jobs are written)"""
+    yield from _session_dependency(Workload.EXPORT, False, None)
+
+
+def get_background_session() -> Session:
+    """Session for background job workers (the caller must close it)"""
+    return database_router.session(Workload.BACKGROUND)
+
+
+def get_export_read_session(user_id: int) -> Session:
+    """Read-only session for export data generation (the caller must close it)"""
+    return database_router.session(Workload.EXPORT, read_only=True, user_id=user_id)
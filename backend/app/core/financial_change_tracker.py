@@ -10,7 +10,7 @@ import json
 import logging
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Dict, Any, Optional, List, Union, Set, Tuple
+from typing import Dict, Any, Optional, List, Union, Set, Tuple, Iterator, Sequence
 from enum import Enum
 from dataclasses import dataclass, asdict
 from copy import deepcopy
@@ -123,6 +123,152 @@ class TransactionChangeSet:
         return data
 
 
+def _id_ranges(entity_ids: Sequence[Any]) -> List[List[Any]]:
+    """Collapse integer ids into [first, last] runs; non-integer ids become single-id runs"""
+    ranges: List[List[Any]] = []
+    integer_ids = sorted({entity_id for entity_id in entity_ids if isinstance(entity_id, int)})
+    for entity_id in integer_ids:
+        if ranges and entity_id == ranges[-1][1] + 1:
+            ranges[-1][1] = entity_id
+        else:
+            ranges.append([entity_id, entity_id])
+    for entity_id in entity_ids:
+        if not isinstance(entity_id, int):
+            ranges.append([entity_id, entity_id])
+    return ranges
+
+
+def _serializable(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+@dataclass
+class BulkFieldChange:
+    """
+    Columnar changes of one field across a bulk operation
+
+    old_values and new_values are aligned with entity_ids; field metadata
+    and business impact are resolved once for the field.
+    """
+    field_name: str
+    field_metadata: FieldMetadata
+    business_impact: Optional[str]
+    entity_ids: List[Any]
+    old_values: List[Any]
+    new_values: List[Any]
+    validation_errors: Dict[int, List[str]]  # Position in entity_ids -> errors, only rows with errors
+    
+    def to_dict(self, include_values: bool = False) -> Dict[str, Any]:
+        data = {
+            'field_name': self.field_name,
+            'field_metadata': self.field_metadata.to_dict(),
+            'business_impact': self.business_impact,
+            'entity_count': len(self.entity_ids),
+            'id_ranges': _id_ranges(self.entity_ids),
+            'validation_errors': {
+                str(self.entity_ids[position]): errors
+                for position, errors in self.validation_errors.items()
+            }
+        }
+        if include_values:
+            data['entity_ids'] = list(self.entity_ids)
+            data['old_values'] = [_serializable(value) for value in self.old_values]
+            data['new_values'] = [_serializable(value) for value in self.new_values]
+        return data
+
+
+@dataclass
+class BulkChangeSet:
+    """
+    Single change record of a bulk operation
+
+    Holds one BulkFieldChange per changed field instead of a ChangeEvent per
+    field per entity; expand() produces the per-row events on demand.
+    """
+    change_set_id: str
+    entity_type: str
+    change_type: ChangeType
+    timestamp: datetime
+    user_id: str
+    session_id: Optional[str]
+    request_id: Optional[str]
+    business_justification: Optional[str]
+    entity_count: int
+    id_ranges: List[List[Any]]
+    fields: Dict[str, BulkFieldChange]
+    
+    @property
+    def change_count(self) -> int:
+        """Number of per-row field changes in the set"""
+        return sum(len(field_change.entity_ids) for field_change in self.fields.values())
+    
+    @property
+    def validation_status(self) -> str:
+        total_errors = sum(
+            len(errors)
+            for field_change in self.fields.values()
+            for errors in field_change.validation_errors.values()
+        )
+        if total_errors == 0:
+            return "valid"
+        elif total_errors < 3:
+            return "warning"
+        else:
+            return "invalid"
+    
+    def expand(self, entity_id: Any = None) -> Iterator[Tuple[Any, ChangeEvent]]:
+        """
+        Per-row change events, built lazily
+        
+        Args:
+            entity_id: Only expand this entity's changes
+            
+        Returns:
+            Iterator of (entity id, ChangeEvent)
+        """
+        for field_change in self.fields.values():
+            for position, row_entity_id in enumerate(field_change.entity_ids):
+                if entity_id is not None and row_entity_id != entity_id:
+                    continue
+                yield row_entity_id, ChangeEvent(
+                    field_name=field_change.field_name,
+                    old_value=field_change.old_values[position],
+                    new_value=field_change.new_values[position],
+                    change_type=self.change_type,
+                    timestamp=self.timestamp,
+                    user_id=self.user_id,
+                    session_id=self.session_id,
+                    request_id=self.request_id,
+                    field_metadata=field_change.field_metadata,
+                    validation_errors=field_change.validation_errors.get(position, []),
+                    business_impact=field_change.business_impact
+                )
+    
+    def to_dict(self, include_values: bool = False) -> Dict[str, Any]:
+        return {
+            'change_set_id': self.change_set_id,
+            'entity_type': self.entity_type,
+            'change_type': self.change_type.value,
+            'timestamp': self.timestamp.isoformat(),
+            'user_id': self.user_id,
+            'session_id': self.session_id,
+            'request_id': self.request_id,
+            'business_justification': self.business_justification,
+            'entity_count': self.entity_count,
+            'change_count': self.change_count,
+            'id_ranges': self.id_ranges,
+            'validation_status': self.validation_status,
+            'fields': {
+                field_name: field_change.to_dict(include_values)
+                for field_name, field_change in self.fields.items()
+            }
+        }
+
+
 class FinancialFieldRegistry:
     """Registry of financial fields and their metadata"""
     
@@ -362,6 +508,7 @@ class FinancialChangeTracker:
         self.logger = logging.getLogger('fingood.change_tracker')
         self.pending_changes: Dict[str, List[ChangeEvent]] = {}
         self.change_sets: List[TransactionChangeSet] = []
+        self.bulk_change_sets: List[BulkChangeSet] = []
     
     def track_entity_changes(
         self,
@@ -471,6 +618,116 @@ class FinancialChangeTracker:
         
         return changes
     
+    def track_bulk_changes(
+        self,
+        entity_type: str,
+        entity_ids: Sequence[Any],
+        columns_before: Optional[Dict[str, Sequence[Any]]],
+        columns_after: Optional[Dict[str, Sequence[Any]]],
+        change_type: ChangeType,
+        user_id: str,
+        session_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+        business_justification: Optional[str] = None
+    ) -> BulkChangeSet:
+        """
+        Track changes to many entities as one columnar change set
+        
+        Equivalent to track_entity_changes per entity, but field metadata and
+        business impact are resolved once per field and no per-row objects
+        are built; use BulkChangeSet.expand() for per-row detail.
+        
+        Args:
+            entity_type: Type of entity (transaction, category, user)
+            entity_ids: Ids of the affected entities
+            columns_before: Field name -> values before changes, aligned with entity_ids
+            columns_after: Field name -> values after changes, aligned with entity_ids
+            change_type: Type of change operation
+            user_id: User making the change
+            session_id: Session identifier
+            request_id: Request identifier
+            business_justification: Business reason for the change
+            
+        Returns:
+            BulkChangeSet of the operation
+        """
+        entity_ids = list(entity_ids)
+        columns_before = columns_before or {}
+        columns_after = columns_after or {}
+        row_count = len(entity_ids)
+        
+        for columns in (columns_before, columns_after):
+            for field_name, values in columns.items():
+                if len(values) != row_count:
+                    raise ValueError(
+                        f"Column {field_name} has {len(values)} values for {row_count} entities"
+                    )
+        
+        if change_type == ChangeType.CREATE:
+            field_names = list(columns_after)
+        elif change_type == ChangeType.DELETE:
+            field_names = list(columns_before)
+        else:
+            field_names = list(columns_before) + [
+                field_name for field_name in columns_after if field_name not in columns_before
+            ]
+        
+        fields: Dict[str, BulkFieldChange] = {}
+        for field_name in field_names:
+            field_metadata = self.field_registry.get_field_metadata(entity_type, field_name)
+            if not field_metadata or not field_metadata.audit_required:
+                continue
+            
+            empty = [None] * row_count
+            old_column = columns_before.get(field_name, empty) if change_type != ChangeType.CREATE else empty
+            new_column = columns_after.get(field_name, empty) if change_type != ChangeType.DELETE else empty
+            
+            if change_type in (ChangeType.CREATE, ChangeType.DELETE):
+                positions = range(row_count)
+            else:
+                positions = [
+                    position for position in range(row_count)
+                    if self._values_differ(old_column[position], new_column[position])
+                ]
+            if not positions:
+                continue
+            
+            old_values = [old_column[position] for position in positions]
+            new_values = [new_column[position] for position in positions]
+            validation_errors: Dict[int, List[str]] = {}
+            if change_type not in (ChangeType.CREATE, ChangeType.DELETE):
+                for index, (old_value, new_value) in enumerate(zip(old_values, new_values)):
+                    errors = self._validate_field_change(field_metadata, old_value, new_value, change_type)
+                    if errors:
+                        validation_errors[index] = errors
+            
+            fields[field_name] = BulkFieldChange(
+                field_name=field_name,
+                field_metadata=field_metadata,
+                business_impact=self._assess_business_impact(field_metadata, None, None),
+                entity_ids=[entity_ids[position] for position in positions],
+                old_values=old_values,
+                new_values=new_values,
+                validation_errors=validation_errors
+            )
+        
+        bulk_change_set = BulkChangeSet(
+            change_set_id=self._generate_change_set_id(f"{entity_type}:bulk:{row_count}"),
+            entity_type=entity_type,
+            change_type=change_type,
+            timestamp=datetime.now(timezone.utc),
+            user_id=user_id,
+            session_id=session_id,
+            request_id=request_id,
+            business_justification=business_justification,
+            entity_count=row_count,
+            id_ranges=_id_ranges(entity_ids),
+            fields=fields
+        )
+        
+        self.bulk_change_sets.append(bulk_change_set)
+        return bulk_change_set
+    
     def track_sqlalchemy_changes(
         self,
         db_session: Session,
@@ -638,6 +895,34 @@ class FinancialChangeTracker:
         
         return audit_records
     
+    async def convert_bulk_to_audit_records(self, change_set: BulkChangeSet) -> List[FinancialChangeRecord]:
+        """
+        Convert a bulk change set to financial audit records, one per field
+        
+        Args:
+            change_set: Bulk change set
+            
+        Returns:
+            List of FinancialChangeRecord instances whose values are
+            {'entity_ids', 'values'} vectors of the field
+        """
+        audit_records = []
+        
+        for field_change in change_set.fields.values():
+            data_sensitivity = self._map_field_sensitivity(field_change.field_metadata.sensitivity)
+            entity_ids = list(field_change.entity_ids)
+            
+            audit_records.append(FinancialChangeRecord(
+                field_name=field_change.field_name,
+                old_value={'entity_ids': entity_ids, 'values': [_serializable(value) for value in field_change.old_values]},
+                new_value={'entity_ids': entity_ids, 'values': [_serializable(value) for value in field_change.new_values]},
+                change_type=change_set.change_type.value,
+                data_sensitivity=data_sensitivity,
+                regulatory_impact=field_change.field_metadata.regulatory_implications
+            ))
+        
+        return audit_records
+    
     def _get_entity_state(self, entity) -> Dict[str, Any]:
         """Get current state of an entity as a dictionary"""
         state = {}
@@ -791,10 +1076,21 @@ class FinancialChangeTracker:
                 ]:
                     sensitive_changes += 1
         
+        for bulk_change_set in self.bulk_change_sets:
+            for field_change in bulk_change_set.fields.values():
+                total_changes += len(field_change.entity_ids)
+                if field_change.field_metadata.sensitivity in [
+                    FieldSensitivity.HIGHLY_SENSITIVE,
+                    FieldSensitivity.FINANCIAL_CRITICAL,
+                    FieldSensitivity.REGULATORY_PROTECTED
+                ]:
+                    sensitive_changes += len(field_change.entity_ids)
+        
         return {
             'total_changes_tracked': total_changes,
             'sensitive_changes': sensitive_changes,
             'change_sets_created': len(self.change_sets),
+            'bulk_change_sets_created': len(self.bulk_change_sets),
             'fields_registered': len(self.field_registry.field_metadata),
             'timestamp': datetime.now(timezone.utc).isoformat()
         }
@@ -868,6 +1164,31 @@ async def track_transaction_update(
     return []
 
 
+async def track_bulk_transaction_update(
+    transaction_ids: Sequence[Any],
+    columns_before: Dict[str, Sequence[Any]],
+    columns_after: Dict[str, Sequence[Any]],
+    user_id: str,
+    session_id: Optional[str] = None,
+    request_id: Optional[str] = None,
+    business_justification: Optional[str] = None
+) -> Optional[BulkChangeSet]:
+    """Track a bulk transaction update (e.g. recategorization) as one change set"""
+    if _change_tracker:
+        return _change_tracker.track_bulk_changes(
+            entity_type="transaction",
+            entity_ids=transaction_ids,
+            columns_before=columns_before,
+            columns_after=columns_after,
+            change_type=ChangeType.BULK_UPDATE,
+            user_id=user_id,
+            session_id=session_id,
+            request_id=request_id,
+            business_justification=business_justification
+        )
+    return None
+
+
 async def track_transaction_deletion(
     transaction_data: Dict[str, Any],
     user_id: str,
@@ -18,6 +18,8 @@ from enum import Enum
 from dataclasses import dataclass, asdict
 import asyncio
 from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
 import re
 
 from app.core.financial_audit_logger import (
@@ -31,6 +33,12 @@ from app.core.compliance_logger import (
     ComplianceRisk,
     get_compliance_logger
 )
+from app.core.fraud_features import (
+    KeywordAutomaton,
+    UserFraudFeatures,
+    amount_bands,
+    get_fraud_feature_engine
+)
 
 
 class ComplianceViolationType(Enum):
@@ -75,6 +83,31 @@ class ComplianceViolationType(Enum):
     DATA_INTEGRITY_VIOLATION = "data_integrity_violation"
 
 
+# Results of pure compliance checks for the current request, see compliance_request_scope()
+_check_memo: ContextVar[Optional[Dict[Tuple[str, str, str], Optional[Dict[str, Any]]]]] = ContextVar(
+    'compliance_check_memo', default=None
+)
+
+
+@contextmanager
+def compliance_request_scope():
+    """
+    Share pure compliance check results within one request
+
+    Rules with memo_fields are evaluated once per distinct input inside the
+    scope, so a bulk operation repeating the same amount, approver or
+    export settings runs each check once. Nested scopes reuse the outer memo.
+    """
+    if _check_memo.get() is not None:
+        yield
+        return
+    token = _check_memo.set({})
+    try:
+        yield
+    finally:
+        _check_memo.reset(token)
+
+
 class ComplianceSeverity(Enum):
     """Severity levels for compliance violations"""
     LOW = "low"
@@ -98,12 +131,17 @@ class ComplianceRule:
     active: bool
     threshold_values: Dict[str, Any]
     remediation_actions: List[str]
+    operation_types: Optional[List[FinancialOperationType]] = None  # None: every operation type
+    data_classifications: Optional[List[str]] = None  # Terms of context['data_classification']; None: any
+    memo_fields: Optional[List[str]] = None  # Inputs of a pure check ('amount', 'context.approver_id'); None: not memoized
     
     def to_dict(self) -> Dict[str, Any]:
         data = asdict(self)
         data['regulation'] = self.regulation.value
         data['violation_type'] = self.violation_type.value
         data['severity'] = self.severity.value
+        if self.operation_types is not None:
+            data['operation_types'] = [operation_type.value for operation_type in self.operation_types]
         return data
 
 
@@ -165,12 +203,21 @@ class FinancialComplianceMonitor:
     Comprehensive financial compliance monitoring system
     """
     
-    def __init__(self, secret_key: str):
+    # Seconds an operation waits for its compliance checks; late checks are cancelled
+    DEFAULT_CHECK_LATENCY_BUDGET = 0.5
+    
+    # Rules whose checks fail closed: a check that times out or errors is a violation
+    BLOCKING_SEVERITIES = (ComplianceSeverity.CRITICAL, ComplianceSeverity.REGULATORY_BREACH)
+    
+    def __init__(self, secret_key: str, check_latency_budget: Optional[float] = DEFAULT_CHECK_LATENCY_BUDGET):
         self.secret_key = secret_key
+        self.check_latency_budget = check_latency_budget
         self.logger = logging.getLogger('fingood.compliance_monitor')
         self.rules: Dict[str, ComplianceRule] = {}
+        self._rule_index: Optional[Dict[FinancialOperationType, List[ComplianceRule]]] = None
         self.violations: List[ComplianceViolation] = []
         self.integrity_checks: List[IntegrityCheckResult] = []
+        self.inconclusive_checks: List[Dict[str, Any]] = []
         
         # Statistics
         self.stats = {
@@ -178,7 +225,11 @@ class FinancialComplianceMonitor:
             'violations_detected': 0,
             'critical_violations': 0,
             'integrity_failures': 0,
-            'rules_evaluated': 0
+            'rules_evaluated': 0,
+            'rules_skipped': 0,
+            'memoized_checks': 0,
+            'checks_timed_out': 0,
+            'checks_inconclusive': 0
         }
         
         # Initialize compliance rules
@@ -202,7 +253,9 @@ class FinancialComplianceMonitor:
             parameters={"threshold": 10000},
             active=True,
             threshold_values={"amount_threshold": 10000},
-            remediation_actions=["Obtain retrospective approval", "Review approval process"]
+            remediation_actions=["Obtain retrospective approval", "Review approval process"],
+            operation_types=[FinancialOperationType.TRANSACTION_CREATE, FinancialOperationType.TRANSACTION_UPDATE],
+            memo_fields=['amount', 'context.approval_required', 'context.approver_id']
         ))
         
         self._add_rule(ComplianceRule(
@@ -216,7 +269,9 @@ class FinancialComplianceMonitor:
             parameters={},
             active=True,
             threshold_values={},
-            remediation_actions=["Provide business justification", "Document approval"]
+            remediation_actions=["Provide business justification", "Document approval"],
+            operation_types=[FinancialOperationType.TRANSACTION_DELETE, FinancialOperationType.TRANSACTION_BATCH_DELETE],
+            memo_fields=['context.business_justification']
         ))
         
         self._add_rule(ComplianceRule(
@@ -230,7 +285,8 @@ class FinancialComplianceMonitor:
             parameters={},
             active=True,
             threshold_values={},
-            remediation_actions=["Assign different approver", "Review role assignments"]
+            remediation_actions=["Assign different approver", "Review role assignments"],
+            memo_fields=['user_id', 'context.approver_id']
         ))
         
         # PCI DSS Compliance Rules
@@ -245,7 +301,9 @@ class FinancialComplianceMonitor:
             parameters={},
             active=True,
             threshold_values={},
-            remediation_actions=["Revoke access", "Conduct security review"]
+            remediation_actions=["Revoke access", "Conduct security review"],
+            operation_types=[FinancialOperationType.SENSITIVE_DATA_ACCESS],
+            memo_fields=['user_id', 'data_type', 'context.user_role']
         ))
         
         # FFIEC Compliance Rules
@@ -260,7 +318,9 @@ class FinancialComplianceMonitor:
             parameters={},
             active=True,
             threshold_values={},
-            remediation_actions=["Verify data integrity", "Restore from backup"]
+            remediation_actions=["Verify data integrity", "Restore from backup"],
+            operation_types=[FinancialOperationType.TRANSACTION_UPDATE, FinancialOperationType.TRANSACTION_DELETE],
+            memo_fields=['current_data', 'context.expected_integrity_hash']
         ))
         
         # BSA/AML Compliance Rules
@@ -275,7 +335,9 @@ class FinancialComplianceMonitor:
             parameters={"pattern_threshold": 5},
             active=True,
             threshold_values={"pattern_count": 5},
-            remediation_actions=["File SAR", "Conduct investigation"]
+            remediation_actions=["File SAR", "Conduct investigation"],
+            operation_types=[FinancialOperationType.TRANSACTION_CREATE],
+            memo_fields=['amount', 'vendor', 'description']
         ))
         
         # GLBA Compliance Rules
@@ -290,7 +352,10 @@ class FinancialComplianceMonitor:
             parameters={},
             active=True,
             threshold_values={},
-            remediation_actions=["Encrypt data", "Limit access"]
+            remediation_actions=["Encrypt data", "Limit access"],
+            operation_types=[FinancialOperationType.DATA_EXPORT],
+            data_classifications=['financial', 'pii'],
+            memo_fields=['export_type', 'context.data_classification', 'context.encryption_applied', 'context.access_logging']
         ))
     
     def _initialize_fraud_patterns(self):
@@ -316,10 +381,74 @@ class FinancialComplianceMonitor:
                 'risk_score': 0.9
             }
         }
+        
+        # Keyword automata: one pass over the text for all suspicious terms
+        self.suspicious_vendor_automaton = KeywordAutomaton(
+            ['cash', 'unknown', 'temp', 'test', 'dummy', 'atm']
+        )
+        self.suspicious_description_automaton = KeywordAutomaton(
+            ['cash withdraw', 'money transfer', 'wire', 'crypto', 'bitcoin']
+        )
+        
+        # Streaming per-user window features, updated as transactions are created
+        self.fraud_features = get_fraud_feature_engine()
     
     def _add_rule(self, rule: ComplianceRule):
         """Add a compliance rule to the monitor"""
         self.rules[rule.rule_id] = rule
+        self._rule_index = None
+    
+    def _rules_for(
+        self,
+        operation_type: FinancialOperationType,
+        data_classification: Optional[str]
+    ) -> List[ComplianceRule]:
+        """
+        Active rules that apply to an operation, in registration order
+        
+        Args:
+            operation_type: Type of financial operation
+            data_classification: Classification of the data involved, if known
+            
+        Returns:
+            Rules indexed under the operation type whose classification terms match
+        """
+        if self._rule_index is None:
+            self._rule_index = {
+                indexed_type: [
+                    rule for rule in self.rules.values()
+                    if rule.operation_types is None or indexed_type in rule.operation_types
+                ]
+                for indexed_type in FinancialOperationType
+            }
+        
+        classification = (data_classification or '').lower()
+        return [
+            rule for rule in self._rule_index.get(operation_type, [])
+            if rule.active and (
+                rule.data_classifications is None
+                or any(term in classification for term in rule.data_classifications)
+            )
+        ]
+    
+    def _memo_key(
+        self,
+        rule: ComplianceRule,
+        operation_type: FinancialOperationType,
+        user_id: str,
+        operation_data: Dict[str, Any],
+        context: Dict[str, Any]
+    ) -> Tuple[str, str, str]:
+        """Key of a pure check's result: the rule, the operation type and the rule's inputs"""
+        values = []
+        for field in rule.memo_fields:
+            if field == 'user_id':
+                values.append(user_id)
+            elif field.startswith('context.'):
+                values.append(context.get(field[len('context.'):]))
+            else:
+                values.append(operation_data.get(field))
+        return rule.rule_id, operation_type.value, json.dumps(values, sort_keys=True, default=str)
     
     async def evaluate_operation(
         self,
@@ -331,6 +460,13 @@ class FinancialComplianceMonitor:
         """
         Evaluate an operation against all relevant compliance rules
         
+        Only rules indexed under the operation type (and matching the
+        context's data classification) run. Their checks run concurrently
+        within check_latency_budget; pure checks are answered from the
+        request's memo when inside compliance_request_scope(). A check that
+        times out or fails is a violation for BLOCKING_SEVERITIES rules and
+        is recorded in inconclusive_checks otherwise.
+        
         Args:
             operation_type: Type of financial operation
             user_id: User performing the operation
@@ -343,75 +479,215 @@ class FinancialComplianceMonitor:
         violations = []
         context = context or {}
         
-        for rule in self.rules.values():
-            if not rule.active:
-                continue
-            
+        rules = self._rules_for(operation_type, context.get('data_classification'))
+        self.stats['rules_skipped'] += len(self.rules) - len(rules)
+        
+        memo = _check_memo.get()
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        pending: Dict[asyncio.Future, Tuple[ComplianceRule, Optional[Tuple[str, str, str]]]] = {}
+        
+        for rule in rules:
             self.stats['rules_evaluated'] += 1
             
-            try:
-                # Execute the compliance check
-                violation = await self._execute_compliance_check(
-                    rule, operation_type, user_id, operation_data, context
+            memo_key = None
+            if memo is not None and rule.memo_fields is not None:
+                memo_key = self._memo_key(rule, operation_type, user_id, operation_data, context)
+                if memo_key in memo:
+                    self.stats['memoized_checks'] += 1
+                    results[rule.rule_id] = memo[memo_key]
+                    continue
+            
+            task = asyncio.ensure_future(self._run_compliance_check(
+                rule, operation_type, user_id, operation_data, context
+            ))
+            pending[task] = (rule, memo_key)
+        
+        if pending:
+            done, timed_out = await asyncio.wait(pending, timeout=self.check_latency_budget)
+            
+            for task in timed_out:
+                task.cancel()
+                rule = pending[task][0]
+                self.stats['checks_timed_out'] += 1
+                results[rule.rule_id] = self._unfinished_check(
+                    rule, operation_type, user_id, operation_data,
+                    f"exceeded the {self.check_latency_budget}s latency budget"
                 )
-                
-                if violation:
-                    violations.append(violation)
-                    self.violations.append(violation)
-                    self.stats['violations_detected'] += 1
-                    
-                    if violation.severity == ComplianceSeverity.CRITICAL:
-                        self.stats['critical_violations'] += 1
-                    
-                    # Log the violation
-                    await self._log_compliance_violation(violation)
-                    
-            except Exception as e:
-                self.logger.error(f"Error executing compliance rule {rule.rule_id}: {e}")
+            
+            for task in done:
+                rule, memo_key = pending[task]
+                if task.exception():
+                    results[rule.rule_id] = self._unfinished_check(
+                        rule, operation_type, user_id, operation_data, f"failed: {task.exception()}"
+                    )
+                    continue
+                results[rule.rule_id] = task.result()
+                if memo_key is not None:
+                    memo[memo_key] = task.result()
+        
+        for rule in rules:
+            violation_detected = results.get(rule.rule_id)
+            if not violation_detected:
+                continue
+            
+            violation = self._create_violation(rule, violation_detected, operation_type, user_id, operation_data)
+            violations.append(violation)
+            self.violations.append(violation)
+            self.stats['violations_detected'] += 1
+            
+            if violation.severity == ComplianceSeverity.CRITICAL:
+                self.stats['critical_violations'] += 1
+        
+        if violations:
+            # Log the violations
+            log_results = await asyncio.gather(
+                *(self._log_compliance_violation(violation) for violation in violations),
+                return_exceptions=True
+            )
+            for violation, log_result in zip(violations, log_results):
+                if isinstance(log_result, Exception):
+                    self.logger.error(f"Error logging compliance violation for rule {violation.rule_id}: {log_result}")
         
         self.stats['total_checks_performed'] += 1
         return violations
     
-    async def _execute_compliance_check(
+    async def evaluate_operations(
+        self,
+        operation_type: FinancialOperationType,
+        user_id: str,
+        operations: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]] = None
+    ) -> List[ComplianceViolation]:
+        """
+        Evaluate each item of a bulk operation, sharing pure check results
+        
+        Args:
+            operation_type: Type of financial operation
+            user_id: User performing the operation
+            operations: Data of each item of the operation
+            context: Additional context information, shared by all items
+            
+        Returns:
+            List of compliance violations found across all items
+        """
+        violations = []
+        with compliance_request_scope():
+            for operation_data in operations:
+                violations.extend(await self.evaluate_operation(
+                    operation_type, user_id, operation_data, context
+                ))
+        return violations
+    
+    def _unfinished_check(
+        self,
+        rule: ComplianceRule,
+        operation_type: FinancialOperationType,
+        user_id: str,
+        operation_data: Dict[str, Any],
+        reason: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Outcome of a check that timed out or failed
+        
+        Returns:
+            A detection for BLOCKING_SEVERITIES rules; None for other rules,
+            which are recorded as inconclusive
+        """
+        blocking = rule.severity in self.BLOCKING_SEVERITIES
+        self.logger.error(
+            f"Compliance rule {rule.rule_id} {reason}",
+            extra={
+                'rule_id': rule.rule_id,
+                'operation_type': operation_type.value,
+                'user_id': user_id,
+                'transaction_id': operation_data.get('transaction_id'),
+                'outcome': 'violation' if blocking else 'inconclusive'
+            }
+        )
+        
+        if blocking:
+            return {
+                'description': f"{rule.rule_name} could not be verified: check {reason}",
+                'evidence': {'check_function': rule.check_function, 'check_incomplete': reason},
+                'immediate_action': True
+            }
+        
+        self.stats['checks_inconclusive'] += 1
+        self.inconclusive_checks.append({
+            'rule_id': rule.rule_id,
+            'operation_type': operation_type.value,
+            'user_id': user_id,
+            'transaction_id': operation_data.get('transaction_id'),
+            'reason': reason,
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        })
+        return None
+    
+    async def _run_compliance_check(
         self,
         rule: ComplianceRule,
         operation_type: FinancialOperationType,
         user_id: str,
         operation_data: Dict[str, Any],
         context: Dict[str, Any]
-    ) -> Optional[ComplianceViolation]:
-        """Execute a specific compliance check"""
+    ) -> Optional[Dict[str, Any]]:
+        """Run a rule's check function, returning its detection (if any)"""
         
         check_function = getattr(self, rule.check_function, None)
         if not check_function:
             self.logger.warning(f"Check function {rule.check_function} not found")
             return None
         
+        return await check_function(
+            rule, operation_type, user_id, operation_data, context
+        )
+    
+    def _create_violation(
+        self,
+        rule: ComplianceRule,
+        violation_detected: Dict[str, Any],
+        operation_type: FinancialOperationType,
+        user_id: str,
+        operation_data: Dict[str, Any]
+    ) -> ComplianceViolation:
+        """Build the violation record of a check's detection"""
+        return ComplianceViolation(
+            violation_id=self._generate_violation_id(),
+            rule_id=rule.rule_id,
+            violation_type=rule.violation_type,
+            severity=rule.severity,
+            regulation=rule.regulation,
+            timestamp=datetime.now(timezone.utc),
+            user_id=user_id,
+            transaction_id=operation_data.get('transaction_id'),
+            operation_type=operation_type,
+            description=violation_detected.get('description', rule.description),
+            evidence=dict(violation_detected.get('evidence', {})),  # Memoized detections are shared
+            risk_score=violation_detected.get('risk_score', 0.5),
+            immediate_action_required=violation_detected.get('immediate_action', False),
+            remediation_deadline=violation_detected.get('remediation_deadline'),
+            status='open',
+            assigned_to=None,
+            resolution_notes=None
+        )
+    
+    async def _execute_compliance_check(
+        self,
+        rule: ComplianceRule,
+        operation_type: FinancialOperationType,
+        user_id: str,
+        operation_data: Dict[str, Any],
+        context: Dict[str, Any]
+    ) -> Optional[ComplianceViolation]:
+        """Execute a specific compliance check"""
+        
         try:
-            violation_detected = await check_function(
+            violation_detected = await self._run_compliance_check(
                 rule, operation_type, user_id, operation_data, context
             )
             
             if violation_detected:
-                return ComplianceViolation(
-                    violation_id=self._generate_violation_id(),
-                    rule_id=rule.rule_id,
-                    violation_type=rule.violation_type,
-                    severity=rule.severity,
-                    regulation=rule.regulation,
-                    timestamp=datetime.now(timezone.utc),
-                    user_id=user_id,
-                    transaction_id=operation_data.get('transaction_id'),
-                    operation_type=operation_type,
-                    description=violation_detected.get('description', rule.description),
-                    evidence=violation_detected.get('evidence', {}),
-                    risk_score=violation_detected.get('risk_score', 0.5),
-                    immediate_action_required=violation_detected.get('immediate_action', False),
-                    remediation_deadline=violation_detected.get('remediation_deadline'),
-                    status='open',
-                    assigned_to=None,
-                    resolution_notes=None
-                )
+                return self._create_violation(rule, violation_detected, operation_type, user_id, operation_data)
         except Exception as e:
             self.logger.error(f"Error in compliance check {rule.check_function}: {e}")
         
@@ -774,6 +1050,7 @@ class FinancialComplianceMonitor:
             user_id: User identifier
             operation_data: Current operation data
             historical_data: Historical transaction data for pattern analysis
+                (defaults to the user's streaming window features)
             
         Returns:
             Fraud detection results
@@ -802,8 +1079,7 @@ class FinancialComplianceMonitor:
                 pass
         
         # Check for suspicious vendor patterns
-        suspicious_vendors = ['cash', 'unknown', 'temp', 'test', 'dummy', 'atm']
-        if any(pattern in vendor for pattern in suspicious_vendors):
+        if self.suspicious_vendor_automaton.matches(vendor):
             fraud_indicators.append({
                 'type': 'suspicious_vendor',
                 'description': 'Vendor name matches suspicious pattern',
@@ -812,8 +1088,7 @@ class FinancialComplianceMonitor:
             risk_score += 0.4
         
         # Check for suspicious descriptions
-        suspicious_descriptions = ['cash withdraw', 'money transfer', 'wire', 'crypto', 'bitcoin']
-        if any(pattern in description for pattern in suspicious_descriptions):
+        if self.suspicious_description_automaton.matches(description):
             fraud_indicators.append({
                 'type': 'suspicious_description',
                 'description': 'Transaction description contains suspicious terms',
@@ -821,42 +1096,31 @@ class FinancialComplianceMonitor:
             })
             risk_score += 0.3
         
-        # Analyze historical patterns if provided
-        if historical_data:
-            # Check for rapid transaction patterns
-            recent_transactions = [
-                tx for tx in historical_data 
-                if tx.get('timestamp') and self._is_recent(tx['timestamp'], hours=1)
-            ]
-            
-            if len(recent_transactions) >= 10:
+        # Window features: from the streaming engine, or from the given history
+        if historical_data is not None:
+            window_features = UserFraudFeatures.from_history(historical_data).snapshot()
+        else:
+            window_features = self.fraud_features.features(user_id)
+        
+        # Check for rapid transaction patterns
+        recent_count = window_features['1h']['count']
+        if recent_count >= self.fraud_patterns['rapid_transactions']['threshold']:
+            fraud_indicators.append({
+                'type': 'rapid_transactions',
+                'description': f'{recent_count} transactions in the last hour',
+                'risk_contribution': 0.6
+            })
+            risk_score += 0.6
+        
+        # Check for amount structuring
+        if amount and 'near_reporting_threshold' in amount_bands(amount):
+            if window_features['7d']['bands']['near_reporting_threshold'] >= 3:
                 fraud_indicators.append({
-                    'type': 'rapid_transactions',
-                    'description': f'{len(recent_transactions)} transactions in the last hour',
-                    'risk_contribution': 0.6
+                    'type': 'amount_structuring',
+                    'description': 'Multiple transactions just below $10,000 threshold',
+                    'risk_contribution': 0.8
                 })
-                risk_score += 0.6
-            
-            # Check for amount structuring
-            if amount:
-                try:
-                    amount_decimal = Decimal(str(amount))
-                    if 9900 <= amount_decimal <= 9999:
-                        recent_similar = [
-                            tx for tx in historical_data
-                            if tx.get('amount') and 9900 <= Decimal(str(tx['amount'])) <= 9999
-                            and self._is_recent(tx.get('timestamp'), days=7)
-                        ]
-                        
-                        if len(recent_similar) >= 3:
-                            fraud_indicators.append({
-                                'type': 'amount_structuring',
-                                'description': 'Multiple transactions just below $10,000 threshold',
-                                'risk_contribution': 0.8
-                            })
-                            risk_score += 0.8
-                except (ValueError, TypeError):
-                    pass
+                risk_score += 0.8
         
         # Determine overall risk level
         if risk_score >= 0.8:
@@ -874,6 +1138,7 @@ class FinancialComplianceMonitor:
             'risk_level': risk_level,
             'immediate_investigation_required': risk_score >= 0.7,
             'recommended_actions': self._get_fraud_response_actions(risk_score),
+            'window_features': window_features,
             'timestamp': datetime.now(timezone.utc).isoformat()
         }
     
@@ -1012,6 +1277,7 @@ class FinancialComplianceMonitor:
             'total_rules': len(self.rules),
             'open_violations': len([v for v in self.violations if v.status == 'open']),
             'critical_violations': len([v for v in self.violations if v.severity == ComplianceSeverity.CRITICAL]),
+            'inconclusive_checks': len(self.inconclusive_checks),
             'recent_integrity_checks': len([c for c in self.integrity_checks if self._is_recent(c.timestamp.isoformat(), hours=24)]),
             'integrity_failure_rate': self.stats['integrity_failures'] / max(len(self.integrity_checks), 1),
             'timestamp': datetime.now(timezone.utc).isoformat()
@@ -1057,6 +1323,20 @@ async def check_operation_compliance(
     return []
 
 
+async def check_bulk_operation_compliance(
+    operation_type: FinancialOperationType,
+    user_id: str,
+    operations: List[Dict[str, Any]],
+    **context
+) -> List[ComplianceViolation]:
+    """Check compliance of each item of a bulk operation"""
+    if _compliance_monitor:
+        return await _compliance_monitor.evaluate_operations(
+            operation_type, user_id, operations, context
+        )
+    return []
+
+
 async def verify_transaction_integrity(
     transaction_id: str,
     transaction_data: Dict[str, Any],
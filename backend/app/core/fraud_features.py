@@ -0,0 +1,340 @@
+"""
+Streaming Fraud Features for FinGood
+
+Keeps per-user fraud features current as transactions are created so fraud
+checks can run inline (e.g. on every import row) without loading history:
+
+- sliding-window transaction counts and amount sums over 1h, 24h and 7d
+- per-window amount histograms over the bands structuring detection uses
+  (just below the $10,000 reporting threshold, round amounts)
+- a precompiled keyword automaton (Aho-Corasick) for suspicious vendor and
+  description terms, one pass over the text for all keywords
+
+Windows are bucketed (1 minute for 1h, 15 minutes for 24h, 1 hour for 7d):
+updates and queries are amortized O(1), and a window's edge is exact to
+one bucket. Features live in process memory like the rest of the
+compliance monitor's state and start empty after a restart. Created
+transactions are recorded by session listeners installed by
+register_listeners() at startup (see app.core.database).
+"""
+
+import logging
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+# Window name -> (window seconds, bucket seconds)
+WINDOWS = {
+    "1h": (3600, 60),
+    "24h": (86400, 900),
+    "7d": (7 * 86400, 3600),
+}
+
+# Users whose features are kept; the least recently active are evicted first
+MAX_TRACKED_USERS = 100000
+
+REPORTING_THRESHOLD = Decimal("10000")
+
+
+def amount_bands(amount: Any) -> List[str]:
+    """
+    Histogram bands an amount falls into
+
+    Args:
+        amount: Transaction amount (number or numeric string)
+
+    Returns:
+        Band names: near_reporting_threshold (9,900-9,999), round (multiple of 100, at least 1,000)
+    """
+    try:
+        value = Decimal(str(amount))
+    except (InvalidOperation, ValueError, TypeError):
+        return []
+    bands = []
+    if REPORTING_THRESHOLD - 100 <= value <= REPORTING_THRESHOLD - 1:
+        bands.append("near_reporting_threshold")
+    if value >= 1000 and value % 100 == 0:
+        bands.append("round")
+    return bands
+
+
+def _epoch(timestamp: Optional[datetime]) -> float:
+    if timestamp is None:
+        return datetime.now(timezone.utc).timestamp()
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+class SlidingWindowCounter:
+    """Count and sum of events in a sliding time window, kept in fixed-width buckets"""
+
+    __slots__ = ("bucket_seconds", "bucket_count", "_buckets", "count", "total")
+
+    def __init__(self, window_seconds: int, bucket_seconds: int):
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = max(1, window_seconds // bucket_seconds)
+        self._buckets: deque = deque()  # [bucket index, count, total], oldest first
+        self.count = 0
+        self.total = 0.0
+
+    def _expire(self, current_bucket: int) -> None:
+        oldest = current_bucket - self.bucket_count + 1
+        while self._buckets and self._buckets[0][0] < oldest:
+            _, count, total = self._buckets.popleft()
+            self.count -= count
+            self.total -= total
+        if not self._buckets:
+            self.total = 0.0  # Drop accumulated float error
+
+    def add(self, epoch_seconds: float, amount: float = 0.0) -> None:
+        bucket = int(epoch_seconds // self.bucket_seconds)
+        if self._buckets and bucket < self._buckets[-1][0]:
+            # Late event: find its bucket (at most bucket_count steps)
+            if bucket <= self._buckets[-1][0] - self.bucket_count:
+                return
+            for position in range(len(self._buckets) - 1, -1, -1):
+                entry = self._buckets[position]
+                if entry[0] == bucket:
+                    entry[1] += 1
+                    entry[2] += amount
+                    break
+                if entry[0] < bucket:
+                    self._buckets.insert(position + 1, [bucket, 1, amount])
+                    break
+            else:
+                self._buckets.appendleft([bucket, 1, amount])
+        else:
+            self._expire(bucket)
+            if self._buckets and self._buckets[-1][0] == bucket:
+                self._buckets[-1][1] += 1
+                self._buckets[-1][2] += amount
+            else:
+                self._buckets.append([bucket, 1, amount])
+        self.count += 1
+        self.total += amount
+
+    def query(self, epoch_seconds: float) -> Tuple[int, float]:
+        """(count, sum) of the window ending at epoch_seconds"""
+        self._expire(int(epoch_seconds // self.bucket_seconds))
+        return self.count, self.total
+
+
+class UserFraudFeatures:
+    """Sliding-window counters and amount histograms of one user"""
+
+    def __init__(self):
+        self.windows = {
+            name: SlidingWindowCounter(window_seconds, bucket_seconds)
+            for name, (window_seconds, bucket_seconds) in WINDOWS.items()
+        }
+        self.bands = {
+            name: {
+                band: SlidingWindowCounter(window_seconds, bucket_seconds)
+                for band in ("near_reporting_threshold", "round")
+            }
+            for name, (window_seconds, bucket_seconds) in WINDOWS.items()
+        }
+
+    @classmethod
+    def from_history(cls, transactions: Iterable[Dict[str, Any]]) -> "UserFraudFeatures":
+        """Features of a list of transaction dicts with 'amount' and ISO 'timestamp'"""
+        features = cls()
+        for transaction in transactions:
+            timestamp = transaction.get("timestamp")
+            if not timestamp:
+                continue
+            try:
+                parsed = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+            except ValueError:
+                continue
+            features.observe(transaction.get("amount"), parsed)
+        return features
+
+    def observe(self, amount: Any, timestamp: Optional[datetime] = None) -> None:
+        """Add one transaction"""
+        epoch_seconds = _epoch(timestamp)
+        try:
+            value = float(amount) if amount is not None else 0.0
+        except (ValueError, TypeError):
+            value = 0.0
+        bands = amount_bands(amount) if amount is not None else []
+        for name, counter in self.windows.items():
+            counter.add(epoch_seconds, value)
+            for band in bands:
+                self.bands[name][band].add(epoch_seconds, value)
+
+    def snapshot(self, now: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Current window features
+
+        Returns:
+            Window name -> {"count", "sum", "bands": {band: count}}
+        """
+        epoch_seconds = _epoch(now)
+        result = {}
+        for name, counter in self.windows.items():
+            count, total = counter.query(epoch_seconds)
+            result[name] = {
+                "count": count,
+                "sum": round(total, 2),
+                "bands": {
+                    band: band_counter.query(epoch_seconds)[0]
+                    for band, band_counter in self.bands[name].items()
+                }
+            }
+        return result
+
+
+class FraudFeatureEngine:
+    """Per-user streaming fraud features, bounded to MAX_TRACKED_USERS users"""
+
+    def __init__(self, max_users: int = MAX_TRACKED_USERS):
+        self.max_users = max_users
+        self._users: "OrderedDict[str, UserFraudFeatures]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record_transaction(self, user_id: Any, amount: Any, timestamp: Optional[datetime] = None) -> None:
+        """
+        Add a created transaction to its user's features
+
+        Args:
+            user_id: Owner
+            amount: Transaction amount
+            timestamp: When it was created (defaults to now)
+        """
+        key = str(user_id)
+        with self._lock:
+            features = self._users.get(key)
+            if features is None:
+                features = self._users[key] = UserFraudFeatures()
+                if len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            else:
+                self._users.move_to_end(key)
+            features.observe(amount, timestamp)
+
+    def features(self, user_id: Any, now: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """Current window features of a user (all zero if untracked)"""
+        with self._lock:
+            features = self._users.get(str(user_id))
+            if features is None:
+                return UserFraudFeatures().snapshot(now)
+            return features.snapshot(now)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton finding all keywords in one pass over a text"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = [keyword.lower() for keyword in keywords if keyword]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[str]] = [set()]
+
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(set())
+                state = next_state
+            self._output[state].add(keyword)
+
+        # Breadth-first failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def _states(self, text: str):
+        state = 0
+        for char in text.lower():
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            yield state
+
+    def find(self, text: Optional[str]) -> Set[str]:
+        """All keywords occurring in text (case-insensitive)"""
+        found: Set[str] = set()
+        for state in self._states(text or ""):
+            found |= self._output[state]
+        return found
+
+    def matches(self, text: Optional[str]) -> bool:
+        """Whether any keyword occurs in text (case-insensitive)"""
+        return any(self._output[state] for state in self._states(text or ""))
+
+
+_fraud_feature_engine: Optional[FraudFeatureEngine] = None
+
+
+def get_fraud_feature_engine() -> FraudFeatureEngine:
+    """Get the process-wide fraud feature engine"""
+    global _fraud_feature_engine
+    if _fraud_feature_engine is None:
+        _fraud_feature_engine = FraudFeatureEngine()
+    return _fraud_feature_engine
+
+
+_PENDING_KEY = "pending_fraud_features"
+
+
+def _track_created_transactions(session, flush_context):
+    # Counted once committed, so rolled back imports never reach the windows
+    created = [obj for obj in session.new if isinstance(obj, Transaction)]
+    if created:
+        now = datetime.now(timezone.utc)
+        session.info.setdefault(_PENDING_KEY, []).extend(
+            (transaction.user_id, transaction.amount, now)
+            for transaction in created
+            if transaction.user_id is not None
+        )
+
+
+def _record_created_transactions(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    engine = get_fraud_feature_engine()
+    for user_id, amount, created_at in pending:
+        engine.record_transaction(user_id, amount, created_at)
+
+
+def _discard_created_transactions(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+_SESSION_LISTENERS = (
+    ("after_flush", _track_created_transactions),
+    ("after_commit", _record_created_transactions),
+    ("after_rollback", _discard_created_transactions),
+)
+
+
+def register_listeners() -> None:
+    """Record created transactions on every commit (safe to call more than once)"""
+    for identifier, listener in _SESSION_LISTENERS:
+        if not event.contains(Session, identifier, listener):
+            event.listen(Session, identifier, listener)
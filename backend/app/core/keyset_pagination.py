@@ -0,0 +1,160 @@
+"""
+Keyset (cursor) pagination for FinGood list endpoints.
+
+OFFSET pagination makes the database produce and discard every skipped row,
+so deep pages get slower the further a user scrolls. A keyset cursor
+records the sort value and id of the last row returned; the next page
+starts right after it, served by an index range scan that costs the same on
+page 500 as on page 1.
+
+Cursors are opaque (URL-safe base64 JSON) and bound to the sort field and
+order they were issued for. Rows are ordered by the sort column (NULLs
+last) with the id as tie-breaker in the opposite direction, matching
+composite indexes such as (user_id, date DESC, id).
+"""
+
+import base64
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCursorError(ValueError):
+    """Cursor is malformed or was issued for a different sort."""
+    pass
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column, value: Any) -> Any:
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type in (datetime, date):
+        return python_type.fromisoformat(value)
+    if python_type is float:
+        return float(value)
+    if not isinstance(value, python_type):
+        raise InvalidCursorError("Cursor value has the wrong type")
+    return value
+
+
+def encode_cursor(sort_field: str, sort_order: str, sort_value: Any, row_id: int) -> str:
+    """
+    Build the cursor pointing after a row.
+
+    Args:
+        sort_field: Validated sort field name
+        sort_order: 'asc' or 'desc'
+        sort_value: The row's value of the sort field
+        row_id: The row's primary key
+
+    Returns:
+        Opaque cursor string
+    """
+    payload = {"f": sort_field, "o": sort_order, "v": _encode_value(sort_value), "id": row_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str, sort_order: str, column) -> Tuple[Any, int]:
+    """
+    Decode a cursor issued for the same sort.
+
+    Args:
+        cursor: Cursor from a previous page
+        sort_field: Validated sort field name of this request
+        sort_order: 'asc' or 'desc'
+        column: Model column of the sort field (for value decoding)
+
+    Returns:
+        (sort value, row id) of the last row of the previous page
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or for another sort
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["f"] != sort_field or payload["o"] != sort_order:
+            raise InvalidCursorError("Cursor was issued for a different sort order")
+        row_id = payload["id"]
+        if not isinstance(row_id, int):
+            raise InvalidCursorError("Cursor id is invalid")
+        return _decode_value(column, payload["v"]), row_id
+    except InvalidCursorError:
+        raise
+    except Exception as e:
+        raise InvalidCursorError("Malformed pagination cursor") from e
+
+
+def keyset_order_by(column, id_column, sort_order: str) -> List[Any]:
+    """ORDER BY clauses for a keyset-paginated query."""
+    if sort_order == "asc":
+        ordering = [column.asc(), id_column.desc()]
+    else:
+        ordering = [column.desc(), id_column.asc()]
+    if column.nullable:
+        ordering[0] = ordering[0].nulls_last()
+    return ordering
+
+
+def keyset_after(column, id_column, sort_order: str, sort_value: Any, row_id: int):
+    """
+    WHERE condition selecting the rows after the cursor position.
+
+    Matches the ordering of keyset_order_by().
+    """
+    if sort_order == "asc":
+        beyond, tie_break = column > sort_value, id_column < row_id
+    else:
+        beyond, tie_break = column < sort_value, id_column > row_id
+
+    if sort_value is None:
+        # Only NULLs remain (they sort last)
+        return and_(column.is_(None), tie_break)
+
+    condition = or_(beyond, and_(column == sort_value, tie_break))
+    if column.nullable:
+        return or_(condition, column.is_(None))
+    # Redundant range bound so the index scan starts at the cursor
+    bound = column >= sort_value if sort_order == "asc" else column <= sort_value
+    return and_(bound, condition)
+
+
+async def estimate_row_count(db: AsyncSession, query: Select) -> Optional[int]:
+    """
+    Planner estimate of the rows a query returns (PostgreSQL only).
+
+    Args:
+        db: Async session
+        query: SELECT whose row count to estimate
+
+    Returns:
+        Estimated row count, or None if no estimate is available
+    """
+    dialect = db.get_bind().dialect
+    if dialect.name != "postgresql":
+        return None
+    try:
+        compiled = str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+        # Escape colons in rendered literals (timestamps) so text() sees no bind params
+        statement = text("EXPLAIN (FORMAT JSON) " + compiled.replace(":", "\\:"))
+        plan = (await db.execute(statement)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.warning(f"Row count estimate unavailable: {e}")
+        return None
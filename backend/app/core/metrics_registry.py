@@ -0,0 +1,398 @@
+"""
+Low-overhead Metrics Registry for FinGood Financial Application
+
+This module provides the metrics core used by the performance monitor:
+log-bucketed latency histograms with p50/p95/p99, lock-free counters and
+deterministic sampling for hot operations. Writes go to per-thread shards so
+the hot path never takes a lock; shards are merged only when metrics are read
+(stats endpoints, Prometheus scrapes).
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Tuple, Iterable
+
+
+# Histogram resolution: 2**SUB_BUCKET_BITS linear sub-buckets per power of two,
+# which bounds the relative error of any reported percentile to ~3%.
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+# Values are recorded in microseconds; anything above one hour is clamped.
+MAX_TRACKABLE_MICROS = 3600 * 1_000_000
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+def bucket_index(value_us: int) -> int:
+    """
+    Map a value in microseconds to its log-linear bucket index
+
+    Args:
+        value_us: Non-negative integer value in microseconds
+
+    Returns:
+        Bucket index
+    """
+    if value_us < SUB_BUCKET_COUNT:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS - 1
+    return ((shift + 1) << SUB_BUCKET_BITS) + (value_us >> shift) - SUB_BUCKET_COUNT
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """
+    Get the inclusive [lower, upper] microsecond range covered by a bucket
+
+    Args:
+        index: Bucket index produced by bucket_index()
+
+    Returns:
+        Tuple of (lower, upper) bounds in microseconds
+    """
+    if index < SUB_BUCKET_COUNT:
+        return index, index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = SUB_BUCKET_COUNT + (index & (SUB_BUCKET_COUNT - 1))
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class _HistogramShard:
+    """Single-writer histogram state owned by one thread"""
+
+    __slots__ = ('buckets', 'count', 'sum_us', 'min_us', 'max_us', 'errors', 'last_updated')
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum_us = 0
+        self.min_us = MAX_TRACKABLE_MICROS
+        self.max_us = 0
+        self.errors = 0
+        self.last_updated = 0.0
+
+
+class _ThreadShard:
+    """All metric state written by a single thread"""
+
+    __slots__ = ('histograms', 'counters')
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, str], _HistogramShard] = {}
+        self.counters: Dict[str, int] = {}
+
+
+@dataclass
+class HistogramSnapshot:
+    """Merged, read-only view of a latency histogram"""
+    metric_type: str
+    operation_name: str
+    count: int = 0
+    sum_us: int = 0
+    min_us: int = 0
+    max_us: int = 0
+    errors: int = 0
+    last_updated: float = 0.0
+    buckets: Dict[int, int] = field(default_factory=dict)
+
+    def percentile(self, quantile: float) -> float:
+        """
+        Estimate a percentile from the bucketed distribution
+
+        Args:
+            quantile: Quantile in the range [0, 1]
+
+        Returns:
+            Estimated value in milliseconds
+        """
+        if self.count == 0 or not self.buckets:
+            return 0.0
+
+        total = sum(self.buckets.values())
+        target = max(1, int(quantile * total + 0.5))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                lower, upper = bucket_bounds(index)
+                value = min((lower + upper) / 2, self.max_us)
+                return max(value, self.min_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def to_stats(self) -> Dict[str, Any]:
+        """Convert to the aggregated stats format used by the performance monitor"""
+        if self.count == 0:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'total_duration': self.sum_us / 1000.0,
+            'min_duration': self.min_us / 1000.0,
+            'max_duration': self.max_us / 1000.0,
+            'avg_duration': self.sum_us / self.count / 1000.0,
+            'p50_duration': self.percentile(0.5),
+            'p95_duration': self.percentile(0.95),
+            'p99_duration': self.percentile(0.99),
+            'error_count': self.errors,
+            'error_rate': self.errors / self.count,
+            'last_updated': time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(self.last_updated))
+        }
+
+
+class MetricsRegistry:
+    """
+    Lock-free metrics registry backed by per-thread shards
+
+    Each thread records into its own shard, so observe() and increment()
+    never contend. A lock is taken once per thread (shard registration) and
+    on reads, which merge all shards.
+    """
+
+    def __init__(self, sample_every: int = 1, always_sample_first: int = 100):
+        """
+        Initialize metrics registry
+
+        Args:
+            sample_every: Sample 1 in N observations of an operation once it is hot
+            always_sample_first: Number of observations per operation and thread
+                that are always sampled before sampling kicks in
+        """
+        self.sample_every = max(1, sample_every)
+        self.always_sample_first = always_sample_first
+        self._sampling_overrides: Dict[Tuple[str, str], int] = {}
+        self._local = threading.local()
+        self._shards: List[_ThreadShard] = []
+        self._registry_lock = threading.Lock()
+
+    def _shard(self) -> _ThreadShard:
+        """Get (or lazily register) the calling thread's shard"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = _ThreadShard()
+            with self._registry_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def set_sampling(self, metric_type: str, operation_name: str, sample_every: int):
+        """
+        Override the sampling rate for a specific operation
+
+        Args:
+            metric_type: Metric type value
+            operation_name: Operation name
+            sample_every: Sample 1 in N observations (1 disables sampling)
+        """
+        self._sampling_overrides[(metric_type, operation_name)] = max(1, sample_every)
+
+    def observe(
+        self,
+        metric_type: str,
+        operation_name: str,
+        duration_ms: float,
+        success: bool = True
+    ) -> bool:
+        """
+        Record a latency observation
+
+        Histogram counts, sums and error counts are always exact; the return
+        value tells the caller whether this observation was sampled for
+        expensive follow-up work (full metric objects, structured logging).
+
+        Args:
+            metric_type: Metric type value
+            operation_name: Operation name
+            duration_ms: Duration in milliseconds
+            success: Whether the operation was successful
+
+        Returns:
+            True if the observation was sampled
+        """
+        key = (metric_type, operation_name)
+        histograms = self._shard().histograms
+        hist = histograms.get(key)
+        if hist is None:
+            hist = histograms[key] = _HistogramShard()
+
+        value_us = int(duration_ms * 1000)
+        if value_us < 0:
+            value_us = 0
+        elif value_us > MAX_TRACKABLE_MICROS:
+            value_us = MAX_TRACKABLE_MICROS
+
+        index = bucket_index(value_us)
+        buckets = hist.buckets
+        buckets[index] = buckets.get(index, 0) + 1
+        hist.count += 1
+        hist.sum_us += value_us
+        if value_us < hist.min_us:
+            hist.min_us = value_us
+        if value_us > hist.max_us:
+            hist.max_us = value_us
+        if not success:
+            hist.errors += 1
+        hist.last_updated = time.time()
+
+        if hist.count <= self.always_sample_first:
+            return True
+        sample_every = self._sampling_overrides.get(key, self.sample_every)
+        return hist.count % sample_every == 0
+
+    def increment(self, name: str, amount: int = 1):
+        """
+        Increment a named counter
+
+        Args:
+            name: Counter name
+            amount: Amount to add
+        """
+        counters = self._shard().counters
+        counters[name] = counters.get(name, 0) + amount
+
+    def _all_shards(self) -> List[_ThreadShard]:
+        with self._registry_lock:
+            return list(self._shards)
+
+    def counters(self) -> Dict[str, int]:
+        """Get merged counter values across all threads"""
+        merged: Dict[str, int] = {}
+        for shard in self._all_shards():
+            for name, value in shard.counters.copy().items():
+                merged[name] = merged.get(name, 0) + value
+        return merged
+
+    def counter(self, name: str) -> int:
+        """Get the merged value of a single counter"""
+        return sum(shard.counters.get(name, 0) for shard in self._all_shards())
+
+    def snapshot(
+        self,
+        metric_type: Optional[str] = None,
+        operation_name: Optional[str] = None
+    ) -> Dict[Tuple[str, str], HistogramSnapshot]:
+        """
+        Merge histogram shards into read-only snapshots
+
+        Args:
+            metric_type: Only include this metric type
+            operation_name: Only include this operation
+
+        Returns:
+            Snapshots keyed by (metric_type, operation_name)
+        """
+        merged: Dict[Tuple[str, str], HistogramSnapshot] = {}
+        for shard in self._all_shards():
+            for key, hist in shard.histograms.copy().items():
+                if metric_type is not None and key[0] != metric_type:
+                    continue
+                if operation_name is not None and key[1] != operation_name:
+                    continue
+
+                snap = merged.get(key)
+                if snap is None:
+                    snap = merged[key] = HistogramSnapshot(
+                        metric_type=key[0],
+                        operation_name=key[1],
+                        min_us=hist.min_us,
+                        max_us=hist.max_us
+                    )
+                snap.count += hist.count
+                snap.sum_us += hist.sum_us
+                snap.min_us = min(snap.min_us, hist.min_us)
+                snap.max_us = max(snap.max_us, hist.max_us)
+                snap.errors += hist.errors
+                snap.last_updated = max(snap.last_updated, hist.last_updated)
+                for index, count in hist.buckets.copy().items():
+                    snap.buckets[index] = snap.buckets.get(index, 0) + count
+        return merged
+
+    def error_rate(self, metric_type: str, operation_name: str) -> float:
+        """Get the error rate of an operation without merging bucket data"""
+        key = (metric_type, operation_name)
+        count = errors = 0
+        for shard in self._all_shards():
+            hist = shard.histograms.get(key)
+            if hist is not None:
+                count += hist.count
+                errors += hist.errors
+        return errors / count if count else 0.0
+
+    def histogram(self, metric_type: str, operation_name: str) -> HistogramSnapshot:
+        """Get the merged snapshot for a single operation"""
+        snap = self.snapshot(metric_type, operation_name).get((metric_type, operation_name))
+        return snap or HistogramSnapshot(metric_type=metric_type, operation_name=operation_name)
+
+    def reset(self):
+        """Drop all recorded metrics (shards stay registered)"""
+        for shard in self._all_shards():
+            shard.histograms.clear()
+            shard.counters.clear()
+
+
+def _escape_label(value: str) -> str:
+    """Escape a Prometheus label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sanitize_metric_name(name: str) -> str:
+    """Convert an arbitrary counter name into a valid Prometheus metric name"""
+    return ''.join(c if c.isalnum() or c in '_:' else '_' for c in name)
+
+
+def render_prometheus(
+    registry: MetricsRegistry,
+    namespace: str = 'fingood',
+    quantiles: Iterable[float] = DEFAULT_QUANTILES
+) -> str:
+    """
+    Render the registry in the Prometheus text exposition format (0.0.4)
+
+    Latency histograms are exposed as summaries with pre-computed quantiles,
+    plus a per-operation error counter; plain counters are exposed as-is.
+
+    Args:
+        registry: Metrics registry to render
+        namespace: Metric name prefix
+        quantiles: Quantiles to expose per operation
+
+    Returns:
+        Exposition text
+    """
+    lines: List[str] = []
+    duration_name = f"{namespace}_operation_duration_seconds"
+    errors_name = f"{namespace}_operation_errors_total"
+
+    snapshots = sorted(registry.snapshot().values(), key=lambda s: (s.metric_type, s.operation_name))
+
+    lines.append(f"# HELP {duration_name} Operation latency in seconds")
+    lines.append(f"# TYPE {duration_name} summary")
+    for snap in snapshots:
+        labels = (
+            f'metric_type="{_escape_label(snap.metric_type)}",'
+            f'operation="{_escape_label(snap.operation_name)}"'
+        )
+        for quantile in quantiles:
+            lines.append(
+                f'{duration_name}{{{labels},quantile="{quantile}"}} '
+                f'{snap.percentile(quantile) / 1000.0:.6f}'
+            )
+        lines.append(f"{duration_name}_sum{{{labels}}} {snap.sum_us / 1_000_000:.6f}")
+        lines.append(f"{duration_name}_count{{{labels}}} {snap.count}")
+
+    lines.append(f"# HELP {errors_name} Failed operations")
+    lines.append(f"# TYPE {errors_name} counter")
+    for snap in snapshots:
+        labels = (
+            f'metric_type="{_escape_label(snap.metric_type)}",'
+            f'operation="{_escape_label(snap.operation_name)}"'
+        )
+        lines.append(f"{errors_name}{{{labels}}} {snap.errors}")
+
+    for name, value in sorted(registry.counters().items()):
+        metric_name = f"{namespace}_{_sanitize_metric_name(name)}"
+        if not metric_name.endswith('_total'):
+            metric_name += '_total'
+        lines.append(f"# TYPE {metric_name} counter")
+        lines.append(f"{metric_name} {value}")
+
+    return '\n'.join(lines) + '\n'
@@ -16,11 +16,11 @@ from contextlib import asynccontextmanager
 from dataclasses import dataclass, asdict
 from enum import Enum
 from collections import defaultdict, deque
-import threading
 from functools import wraps
 import inspect
 
 from app.core.logging_config import get_logger, LogCategory
+from app.core.metrics_registry import MetricsRegistry, render_prometheus
 
 
 class MetricType(Enum):
@@ -160,76 +160,90 @@ class PerformanceThresholds:
 class PerformanceCollector:
     """
     Collects and aggregates performance metrics for analysis and alerting
+
+    Latency distributions and counters live in a lock-free MetricsRegistry;
+    only sampled metrics are kept as full PerformanceMetric objects.
     """
     
-    def __init__(self, window_size: int = 1000):
+    def __init__(
+        self,
+        window_size: int = 1000,
+        sample_every: int = 10,
+        always_sample_first: int = 100
+    ):
         """
         Initialize performance collector
         
         Args:
-            window_size: Number of metrics to keep in memory for analysis
+            window_size: Number of sampled metrics to keep in memory per operation
+            sample_every: Keep 1 in N metrics of hot operations as full objects
+            always_sample_first: Observations per operation kept before sampling starts
         """
         self.window_size = window_size
         self.metrics_history = defaultdict(lambda: deque(maxlen=window_size))
-        self.aggregated_stats = defaultdict(dict)
-        self.lock = threading.Lock()
-        
-        # Performance counters
-        self.counters = defaultdict(int)
+        self.registry = MetricsRegistry(
+            sample_every=sample_every,
+            always_sample_first=always_sample_first
+        )
         
         # System monitoring
         self.system_monitor_enabled = True
         self.system_metrics_interval = 60  # seconds
     
+    @property
+    def counters(self) -> Dict[str, int]:
+        """Performance counters merged across threads"""
+        return self.registry.counters()
+    
+    def observe(
+        self,
+        metric_type: MetricType,
+        operation_name: str,
+        duration_ms: float,
+        success: bool = True
+    ) -> bool:
+        """
+        Record a measurement without building a PerformanceMetric
+        
+        Args:
+            metric_type: Type of metric
+            operation_name: Name of the operation
+            duration_ms: Duration in milliseconds
+            success: Whether the operation was successful
+            
+        Returns:
+            True if the measurement was sampled for detailed recording
+        """
+        type_value = metric_type.value
+        self.registry.increment(f"{type_value}_total")
+        if not success:
+            self.registry.increment(f"{type_value}_errors")
+        return self.registry.observe(type_value, operation_name, duration_ms, success)
+    
     def add_metric(self, metric: PerformanceMetric):
         """Add a performance metric to the collector"""
-        with self.lock:
-            # Store in history
-            key = f"{metric.metric_type.value}_{metric.operation_name}"
-            self.metrics_history[key].append(metric)
-            
-            # Update counters
-            self.counters[f"{metric.metric_type.value}_total"] += 1
-            if not metric.success:
-                self.counters[f"{metric.metric_type.value}_errors"] += 1
-            
-            # Update aggregated statistics
-            self._update_aggregated_stats(key, metric)
+        sampled = self.observe(
+            metric.metric_type, metric.operation_name, metric.duration_ms, metric.success
+        )
+        if sampled or not metric.success:
+            self.remember(metric)
     
-    def _update_aggregated_stats(self, key: str, metric: PerformanceMetric):
-        """Update aggregated statistics for a metric type"""
-        if key not in self.aggregated_stats:
-            self.aggregated_stats[key] = {
-                'count': 0,
-                'total_duration': 0,
-                'min_duration': float('inf'),
-                'max_duration': 0,
-                'error_count': 0,
-                'last_updated': datetime.now(timezone.utc).isoformat()
-            }
-        
-        stats = self.aggregated_stats[key]
-        stats['count'] += 1
-        stats['total_duration'] += metric.duration_ms
-        stats['min_duration'] = min(stats['min_duration'], metric.duration_ms)
-        stats['max_duration'] = max(stats['max_duration'], metric.duration_ms)
-        stats['avg_duration'] = stats['total_duration'] / stats['count']
-        stats['last_updated'] = datetime.now(timezone.utc).isoformat()
-        
-        if not metric.success:
-            stats['error_count'] += 1
-            stats['error_rate'] = stats['error_count'] / stats['count']
+    def remember(self, metric: PerformanceMetric):
+        """Keep a full metric in the recent-metrics window (deque.append is atomic)"""
+        key = f"{metric.metric_type.value}_{metric.operation_name}"
+        self.metrics_history[key].append(metric)
+    
+    def set_sampling(self, metric_type: MetricType, operation_name: str, sample_every: int):
+        """Override the sampling rate for a hot operation"""
+        self.registry.set_sampling(metric_type.value, operation_name, sample_every)
     
     def get_stats(self, metric_type: Optional[MetricType] = None) -> Dict[str, Any]:
-        """Get aggregated statistics"""
-        with self.lock:
-            if metric_type:
-                prefix = metric_type.value
-                return {
-                    key: stats for key, stats in self.aggregated_stats.items()
-                    if key.startswith(prefix)
-                }
-            return dict(self.aggregated_stats)
+        """Get aggregated statistics, including p50/p95/p99 durations"""
+        snapshots = self.registry.snapshot(metric_type.value if metric_type else None)
+        return {
+            f"{type_value}_{operation_name}": snapshot.to_stats()
+            for (type_value, operation_name), snapshot in snapshots.items()
+        }
     
     def get_recent_metrics(
         self, 
@@ -237,11 +251,14 @@ class PerformanceCollector:
         operation_name: str,
         limit: int = 100
     ) -> List[PerformanceMetric]:
-        """Get recent metrics for a specific operation"""
+        """Get recent sampled metrics for a specific operation"""
         key = f"{metric_type.value}_{operation_name}"
-        with self.lock:
-            metrics = list(self.metrics_history[key])
-            return metrics[-limit:] if limit else metrics
+        metrics = list(self.metrics_history[key])
+        return metrics[-limit:] if limit else metrics
+    
+    def render_prometheus(self) -> str:
+        """Render collected metrics in the Prometheus text exposition format"""
+        return render_prometheus(self.registry)
     
     def check_performance_alerts(self, metric: PerformanceMetric) -> List[Dict[str, Any]]:
         """Check if metric triggers any performance alerts"""
@@ -262,10 +279,10 @@ class PerformanceCollector:
                 'threshold_exceeded': True
             })
         
-        # Check error rate
-        key = f"{metric.metric_type.value}_{metric.operation_name}"
-        stats = self.aggregated_stats.get(key, {})
-        error_rate = stats.get('error_rate', 0)
+        # Check error rate (only a failure can push it over the threshold)
+        if metric.success:
+            return alerts
+        error_rate = self.registry.error_rate(metric.metric_type.value, metric.operation_name)
         
         if error_rate > 0.1:  # 10% error rate threshold
             alerts.append({
@@ -285,17 +302,24 @@ class PerformanceMonitor:
     Main performance monitoring system with logging and alerting
     """
     
-    def __init__(self, enable_system_monitoring: bool = True):
+    def __init__(self, enable_system_monitoring: bool = True, sample_every: int = 10):
         """
         Initialize performance monitor
         
         Args:
             enable_system_monitoring: Whether to enable system resource monitoring
+            sample_every: Log 1 in N metrics of hot operations
         """
         self.logger = get_logger('fingood.performance', LogCategory.PERFORMANCE)
-        self.collector = PerformanceCollector()
+        self.collector = PerformanceCollector(sample_every=sample_every)
         self.enable_system_monitoring = enable_system_monitoring
         
+        # Operations slower than this are always logged, even when not sampled
+        self.slow_operation_ms = min(
+            PerformanceThresholds.API_THRESHOLDS['poor'],
+            PerformanceThresholds.DB_THRESHOLDS['poor']
+        )
+        
         # System monitoring task
         self._system_monitor_task = None
         
@@ -500,10 +524,17 @@ class PerformanceMonitor:
             **kwargs: Additional metric data
             
         Returns:
-            Metric ID
+            Metric ID, or an empty string if the metric was not sampled
         """
         import uuid
         
+        # Histograms and counters are always updated; the full metric object,
+        # log line and alert checks only happen for sampled, failed or slow
+        # operations so instrumentation stays cheap on hot paths
+        sampled = self.collector.observe(metric_type, operation_name, duration_ms, success)
+        if not (sampled or not success or duration_ms > self.slow_operation_ms):
+            return ""
+        
         metric = PerformanceMetric(
             metric_id=str(uuid.uuid4()),
             timestamp=datetime.now(timezone.utc).isoformat(),
@@ -513,9 +544,7 @@ class PerformanceMonitor:
             success=success,
             **kwargs
         )
-        
-        # Add to collector
-        self.collector.add_metric(metric)
+        self.collector.remember(metric)
         
         # Log the metric
         self.logger.info(
@@ -549,6 +578,7 @@ class PerformanceMonitor:
             Dictionary for storing operation context
         """
         start_time = time.time()
+        start_counter = time.perf_counter()
         context = {'start_time': start_time}
         success = True
         error_message = None
@@ -560,8 +590,7 @@ class PerformanceMonitor:
             error_message = str(e)
             raise
         finally:
-            end_time = time.time()
-            duration_ms = (end_time - start_time) * 1000
+            duration_ms = (time.perf_counter() - start_counter) * 1000
             
             # Record the metric
             await self.record_metric(
@@ -573,31 +602,54 @@ class PerformanceMonitor:
                 **kwargs
             )
     
+    def observe(
+        self,
+        metric_type: MetricType,
+        operation_name: str,
+        duration_ms: float,
+        success: bool = True
+    ):
+        """
+        Record a measurement synchronously (histograms and counters only)
+        
+        Safe to call from sync code and worker threads; costs a few
+        microseconds and never logs.
+        """
+        self.collector.observe(metric_type, operation_name, duration_ms, success)
+    
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get performance statistics"""
         return {
             'aggregated_stats': self.collector.get_stats(),
-            'counters': dict(self.collector.counters),
+            'counters': self.collector.counters,
             'timestamp': datetime.now(timezone.utc).isoformat()
         }
+    
+    def render_prometheus(self) -> str:
+        """Render performance metrics in the Prometheus text exposition format"""
+        return self.collector.render_prometheus()
 
 
 # Global performance monitor instance
 _performance_monitor: Optional[PerformanceMonitor] = None
 
 
-def initialize_performance_monitor(enable_system_monitoring: bool = True) -> PerformanceMonitor:
+def initialize_performance_monitor(
+    enable_system_monitoring: bool = True,
+    sample_every: int = 10
+) -> PerformanceMonitor:
     """
     Initialize global performance monitor
     
     Args:
         enable_system_monitoring: Whether to enable system monitoring
+        sample_every: Log 1 in N metrics of hot operations
         
     Returns:
         PerformanceMonitor instance
     """
     global _performance_monitor
-    _performance_monitor = PerformanceMonitor(enable_system_monitoring)
+    _performance_monitor = PerformanceMonitor(enable_system_monitoring, sample_every)
     return _performance_monitor
 
 
@@ -637,26 +689,25 @@ def measure_performance(
             @wraps(func)
             def sync_wrapper(*args, **kwargs):
                 if _performance_monitor:
-                    start_time = time.time()
+                    start_time = time.perf_counter()
                     success = True
-                    error_message = None
                     
                     try:
                         result = func(*args, **kwargs)
                         return result
-                    except Exception as e:
+                    except Exception:
                         success = False
-                        error_message = str(e)
                         raise
                     finally:
-                        duration_ms = (time.time() - start_time) * 1000
-                        asyncio.create_task(_performance_monitor.record_metric(
+                        # Sync callers may not have a running event loop, so
+                        # record straight into the lock-free collector
+                        duration_ms = (time.perf_counter() - start_time) * 1000
+                        _performance_monitor.observe(
                             metric_type=metric_type,
                             operation_name=name,
                             duration_ms=duration_ms,
-                            success=success,
-                            error_message=error_message
-                        ))
+                            success=success
+                        )
                 else:
                     return func(*args, **kwargs)
             return sync_wrapper
@@ -0,0 +1,185 @@
+"""
+Authenticated principal cache for FinGood cookie authentication.
+
+A dashboard view fans out into a dozen API requests carrying the same
+session cookie, and each one used to verify the JWT, check revocation and
+load the User row before the endpoint ran. The first request now stores the
+decoded claims and a snapshot of the user's columns for a short TTL; the
+following ones find them with a dict lookup and re-attach the snapshot to
+the request's session without a query.
+
+Entries are looked up by a hash of the token itself (possession of the exact
+token is required for a hit) and indexed by JTI and user id for
+invalidation. They never outlive the token, and are dropped on logout,
+revocation and password change. Revocations made by other workers are
+still caught through the in-memory revocation filter; other user changes
+made elsewhere become visible within PRINCIPAL_CACHE_TTL_SECONDS.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.models.user import User
+
+
+@dataclass
+class Principal:
+    """Decoded claims and user snapshot for one session token."""
+    jti: str
+    user_id: int
+    payload: Dict[str, Any]
+    user_state: Dict[str, Any]
+    expires_at: float  # monotonic
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class PrincipalCache:
+    """Short-TTL, size-bounded cache of authenticated principals."""
+
+    def __init__(self):
+        self.enabled = settings.PRINCIPAL_CACHE_ENABLED
+        self.ttl = settings.PRINCIPAL_CACHE_TTL_SECONDS
+        self.max_entries = settings.PRINCIPAL_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[str, Principal]" = OrderedDict()
+        self._by_jti: Dict[str, str] = {}
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hit_count = 0
+        self.miss_count = 0
+        self.invalidation_count = 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        """
+        Look up the principal for a session token.
+
+        Args:
+            token: Raw JWT from the auth cookie
+
+        Returns:
+            Principal, or None if the token must be fully verified
+        """
+        if not self.enabled:
+            return None
+        key = _token_key(token)
+        with self._lock:
+            principal = self._entries.get(key)
+            if principal is not None and principal.expires_at <= time.monotonic():
+                self._remove(key)
+                principal = None
+            if principal is None:
+                self.miss_count += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hit_count += 1
+            return principal
+
+    def put(self, token: str, payload: Dict[str, Any], user: User) -> None:
+        """
+        Cache a verified token and its user.
+
+        Args:
+            token: Raw JWT
+            payload: Verified claims
+            user: Active user loaded for the token
+        """
+        jti = payload.get("jti")
+        if not self.enabled or not jti:
+            return
+        # Never serve a token past its own expiry
+        ttl = min(self.ttl, payload.get("exp", 0) - time.time())
+        if ttl <= 0:
+            return
+
+        user_state = {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs}
+        principal = Principal(
+            jti=jti,
+            user_id=user.id,
+            payload=payload,
+            user_state=user_state,
+            expires_at=time.monotonic() + ttl
+        )
+        key = _token_key(token)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = principal
+            self._by_jti[jti] = key
+            self._by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def attach_user(self, principal: Principal, db: Session) -> User:
+        """
+        Rebuild the cached user as a persistent instance of the session.
+
+        No query is issued; relationships still lazy-load through `db`.
+        """
+        user = User(**principal.user_state)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def _remove(self, key: str) -> None:
+        principal = self._entries.pop(key, None)
+        if principal is None:
+            return
+        self._by_jti.pop(principal.jti, None)
+        keys = self._by_user.get(principal.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[principal.user_id]
+
+    def invalidate_token(self, jti: str) -> None:
+        """Drop the entry for a token (logout, revocation)."""
+        with self._lock:
+            key = self._by_jti.get(jti)
+            if key is not None:
+                self._remove(key)
+                self.invalidation_count += 1
+
+    def invalidate_user(self, user_id: int) -> int:
+        """
+        Drop every entry for a user (password change, mass revocation).
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = list(self._by_user.get(user_id, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidation_count += len(keys)
+            return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hit_count + self.miss_count
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hit_count,
+            "misses": self.miss_count,
+            "hit_rate": round(self.hit_count / total, 4) if total else 0.0,
+            "invalidations": self.invalidation_count,
+            "ttl_seconds": self.ttl,
+        }
+
+
+_principal_cache: Optional[PrincipalCache] = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    """Get the process-wide principal cache."""
+    global _principal_cache
+    if _principal_cache is None:
+        _principal_cache = PrincipalCache()
+    return _principal_cache
@@ -0,0 +1,198 @@
+"""
+Shared Request Body View for FinGood ASGI Middlewares
+
+Middlewares that need to look at the request body (logging, validation)
+share a single RequestBodyView stored in the request state. The body is read
+from the ASGI receive channel at most once, only up to a size cap, and parsed
+lazily; the buffered messages are then replayed to the downstream app, so the
+endpoint receives the original bytes without extra copies.
+
+Upload routes and multipart/binary bodies are never buffered: the view hands
+the original receive channel straight through.
+"""
+
+import json
+from collections import deque
+from typing import Any, Deque, Optional
+
+from starlette.datastructures import Headers
+from starlette.types import Message, Receive, Scope
+
+# Methods that may carry a request body worth inspecting
+BODY_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# Routes whose bodies are file uploads and must stream straight through
+UPLOAD_PATH_PREFIXES = ("/api/v1/upload",)
+
+# Content types that are never buffered for inspection
+STREAMED_CONTENT_TYPES = (
+    "multipart/form-data",
+    "application/octet-stream",
+    "text/csv",
+    "application/vnd.ms-excel",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+)
+
+DEFAULT_MAX_INSPECTED_BODY_SIZE = 1024 * 1024  # 1MB
+
+_UNSET = object()
+
+
+class RequestBodyView:
+    """
+    Lazily read, size-capped view of the request body shared by middlewares
+
+    Obtain it with RequestBodyView.from_scope() in every middleware and pass
+    view.receive to the downstream app instead of the original receive.
+    """
+
+    STATE_KEY = "body_view"
+
+    def __init__(self, scope: Scope, receive: Receive, max_size: int = DEFAULT_MAX_INSPECTED_BODY_SIZE):
+        self._receive = receive
+        self.max_size = max_size
+        self.method: str = scope.get("method", "GET")
+        self.path: str = scope.get("path", "")
+
+        headers = Headers(scope=scope)
+        self.content_type = headers.get("content-type", "").lower()
+        try:
+            self.content_length: Optional[int] = int(headers["content-length"])
+        except (KeyError, ValueError):
+            self.content_length = None
+
+        self._replay: Deque[Message] = deque()
+        self._filled = False
+        self._complete = False
+        self._too_large = False
+        self._body: Optional[bytes] = None
+        self._text: Any = _UNSET
+        self._json: Any = _UNSET
+        self._json_error: Optional[ValueError] = None
+
+    @classmethod
+    def from_scope(
+        cls,
+        scope: Scope,
+        receive: Receive,
+        max_size: int = DEFAULT_MAX_INSPECTED_BODY_SIZE
+    ) -> "RequestBodyView":
+        """
+        Get the view shared through request state, creating it on first use
+
+        Args:
+            scope: ASGI connection scope
+            receive: ASGI receive channel (only used when creating the view)
+            max_size: Maximum number of bytes to buffer for inspection
+
+        Returns:
+            Shared RequestBodyView
+        """
+        state = scope.setdefault("state", {})
+        view = state.get(cls.STATE_KEY)
+        if view is None:
+            view = cls(scope, receive, max_size)
+            state[cls.STATE_KEY] = view
+        return view
+
+    @property
+    def is_upload(self) -> bool:
+        """True for file upload routes and binary/multipart payloads"""
+        return (
+            self.path.startswith(UPLOAD_PATH_PREFIXES)
+            or self.content_type.startswith(STREAMED_CONTENT_TYPES)
+        )
+
+    @property
+    def inspectable(self) -> bool:
+        """True if middlewares may buffer and inspect this body"""
+        return self.method in BODY_METHODS and not self.is_upload
+
+    @property
+    def too_large(self) -> bool:
+        """True if the body exceeded the inspection cap"""
+        return self._too_large
+
+    async def _fill(self):
+        """Pull body messages from the server until complete or over the cap"""
+        if self._filled:
+            return
+        self._filled = True
+
+        if not self.inspectable:
+            return
+        if self.content_length is not None and self.content_length > self.max_size:
+            self._too_large = True
+            return
+
+        size = 0
+        chunks = []
+        while True:
+            message = await self._receive()
+            if message["type"] != "http.request":
+                # Client disconnected; let the app see it too
+                self._replay.append(message)
+                return
+
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            chunks.append(chunk)
+
+            if not message.get("more_body", False):
+                self._complete = True
+                # b"".join returns the chunk itself when there is only one
+                self._body = b"".join(chunks)
+                self._replay.append({"type": "http.request", "body": self._body, "more_body": False})
+                return
+
+            if size > self.max_size:
+                # Stop buffering; replay what we have and stream the rest
+                self._too_large = True
+                self._replay.extend(
+                    {"type": "http.request", "body": c, "more_body": True} for c in chunks
+                )
+                return
+
+    async def body(self) -> Optional[bytes]:
+        """
+        Get the raw body
+
+        Returns:
+            Body bytes, or None if the body is not inspectable or too large
+        """
+        await self._fill()
+        return self._body if self._complete else None
+
+    async def text(self) -> Optional[str]:
+        """Get the body decoded as UTF-8 (invalid bytes replaced)"""
+        if self._text is _UNSET:
+            body = await self.body()
+            self._text = body.decode("utf-8", errors="replace") if body else None
+        return self._text
+
+    async def json(self) -> Any:
+        """
+        Get the body parsed as JSON (parsed once, then cached)
+
+        Returns:
+            Parsed JSON, or None for an empty or non-inspectable body
+
+        Raises:
+            ValueError: If the body is not valid UTF-8 JSON
+        """
+        if self._json_error is not None:
+            raise self._json_error
+        if self._json is _UNSET:
+            body = await self.body()
+            try:
+                self._json = json.loads(body) if body else None
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                self._json_error = e
+                raise
+        return self._json
+
+    async def receive(self) -> Message:
+        """ASGI receive channel for downstream apps: replays buffered messages first"""
+        if self._replay:
+            return self._replay.popleft()
+        return await self._receive()
@@ -10,12 +10,11 @@ import json
 import time
 import uuid
 import asyncio
-from typing import Callable, Dict, Any, Optional, Set, List
+from typing import Dict, Any, Optional, Set, List
 from datetime import datetime, timezone
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.requests import Request
-from starlette.responses import Response, StreamingResponse
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 
 from app.core.logging_config import (
@@ -26,13 +25,19 @@ from app.core.logging_config import (
     SensitiveDataFilter
 )
 from app.core.performance_monitor import measure_api_request, MetricType
+from app.core.request_body import RequestBodyView
+from app.core.security_scanner import request_scanner, security_tool_scanner
 from app.core.transaction_audit import TransactionType, TransactionOutcome
 
 
-class RequestResponseLoggingMiddleware(BaseHTTPMiddleware):
+class RequestResponseLoggingMiddleware:
     """
     Comprehensive request/response logging middleware for financial applications.
     Provides audit trails, performance monitoring, and security event logging.
+    
+    Implemented as a pure ASGI middleware: the request body is only read through
+    the shared RequestBodyView (never for uploads) and response bodies stream
+    through untouched.
     """
     
     def __init__(
@@ -63,7 +68,7 @@ class RequestResponseLoggingMiddleware(BaseHTTPMiddleware):
             excluded_user_agents: User agents to exclude from logging
             log_level: Logging level
         """
-        super().__init__(app)
+        self.app = app
         self.log_requests = log_requests
         self.log_responses = log_responses
         self.log_request_body = log_request_body
@@ -85,21 +90,30 @@ class RequestResponseLoggingMiddleware(BaseHTTPMiddleware):
         # Request tracking
         self.active_requests: Dict[str, Dict[str, Any]] = {}
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Process request and response with comprehensive logging
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         # Generate request ID and set context
         request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
+        scope.setdefault("state", {})["request_id"] = request_id
+        request = Request(scope, receive)
         
         # Check if request should be logged
         if self._should_exclude_request(request):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
+        
+        body_view = RequestBodyView.from_scope(scope, receive, self.max_body_size)
         
         # Extract request information
         start_time = time.time()
-        request_info = await self._extract_request_info(request)
+        start_counter = time.perf_counter()
+        request_info = await self._extract_request_info(request, body_view)
         
         # Set request context for logging correlation
         set_request_context(
@@ -116,20 +130,29 @@ class RequestResponseLoggingMiddleware(BaseHTTPMiddleware):
             'method': request.method
         }
         
+        response_start: Dict[str, Message] = {}
+        
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_start["message"] = message
+            await send(message)
+        
         try:
             # Log incoming request
             if self.log_requests:
                 await self._log_request(request_info)
             
-            # Process the request
-            response = await call_next(request)
+            # Process the request (response bodies stream straight through)
+            await self.app(scope, body_view.receive, send_wrapper)
             
             # Calculate processing time
-            end_time = time.time()
-            duration_ms = (end_time - start_time) * 1000
+            duration_ms = (time.perf_counter() - start_counter) * 1000
+            
+            if "message" not in response_start:
+                return
             
             # Extract response information
-            response_info = await self._extract_response_info(response, duration_ms)
+            response_info = self._extract_response_info(response_start["message"], duration_ms)
             
             # Log outgoing response
             if self.log_responses:
@@ -141,12 +164,9 @@ class RequestResponseLoggingMiddleware(BaseHTTPMiddleware):
             # Log security events if needed
             await self._log_security_events(request_info, response_info)
             
-            return response
-            
         except Exception as e:
             # Log error
-            end_time = time.time()
-            duration_ms = (end_time - start_time) * 1000
+            duration_ms = (time.perf_counter() - start_counter) * 1000
             
             await self._log_error(request_info, str(e), duration_ms)
             raise
@@ -175,7 +195,7 @@ class RequestResponseLoggingMiddleware(BaseHTTPMiddleware):
         
         return False
     
-    async def _extract_request_info(self, request: Request) -> Dict[str, Any]:
+    async def _extract_request_info(self, request: Request, body_view: RequestBodyView) -> Dict[str, Any]:
         """Extract comprehensive request information"""
         
         # Basic request info
@@ -205,12 +225,13 @@ class RequestResponseLoggingMiddleware(BaseHTTPMiddleware):
         # Add request body if enabled and appropriate
         if (self.log_request_body and 
             request.method in ['POST', 'PUT', 'PATCH'] and
+            not body_view.is_upload and
             self._is_safe_to_log_body(request)):
             
             try:
-                body = await self._read_request_body(request)
-                if body and len(body) <= self.max_body_size:
-                    request_info['body'] = body[:self.max_body_size]
+                body = await body_view.text()
+                if body:
+                    request_info['body'] = body
             except Exception as e:
                 request_info['body_error'] = str(e)
         
@@ -220,29 +241,20 @@ class RequestResponseLoggingMiddleware(BaseHTTPMiddleware):
         
         return request_info
     
-    async def _extract_response_info(self, response: Response, duration_ms: float) -> Dict[str, Any]:
-        """Extract response information"""
+    def _extract_response_info(self, start_message: Message, duration_ms: float) -> Dict[str, Any]:
+        """Extract response information from the http.response.start message"""
         
+        headers = Headers(raw=start_message.get("headers", []))
         response_info = {
-            'status_code': response.status_code,
-            'headers': dict(response.headers),
+            'status_code': start_message["status"],
+            'headers': dict(headers),
             'duration_ms': duration_ms,
-            'content_type': response.headers.get('content-type'),
-            'content_length': response.headers.get('content-length'),
+            'content_type': headers.get('content-type'),
+            'content_length': headers.get('content-length'),
         }
         
-        # Add response body if enabled and appropriate
-        if (self.log_response_body and 
-            self._is_safe_to_log_response_body(response)):
-            
-            try:
-                # For streaming responses, we can't easily capture the body
-                if not isinstance(response, StreamingResponse):
-                    # This is complex and potentially memory-intensive
-                    # In production, consider logging only specific responses
-                    pass
-            except Exception as e:
-                response_info['body_error'] = str(e)
+        # Response bodies are never buffered here so that streaming responses
+        # pass through untouched, even when log_response_body is enabled
         
         return response_info
     
@@ -425,24 +437,14 @@ class RequestResponseLoggingMiddleware(BaseHTTPMiddleware):
         # Generally safe for JSON and form data (with masking)
         return content_type.startswith(('application/json', 'application/x-www-form-urlencoded'))
     
-    def _is_safe_to_log_response_body(self, response: Response) -> bool:
+    def _is_safe_to_log_response_body(self, headers: Headers) -> bool:
         """Check if it's safe to log response body"""
         
-        content_type = response.headers.get('content-type', '').lower()
+        content_type = headers.get('content-type', '').lower()
         
         # Only log JSON responses
         return content_type.startswith('application/json')
     
-    async def _read_request_body(self, request: Request) -> Optional[str]:
-        """Read and return request body"""
-        try:
-            body = await request.body()
-            if body:
-                return body.decode('utf-8', errors='replace')
-        except Exception:
-            pass
-        return None
-    
     def _parse_content_length(self, content_length: Optional[str]) -> Optional[int]:
         """Parse content length header"""
         if content_length:
@@ -456,26 +458,17 @@ class RequestResponseLoggingMiddleware(BaseHTTPMiddleware):
         """Check if request has suspicious patterns"""
         
         # Check for common attack patterns in URL
-        path = request_info['path'].lower()
-        suspicious_patterns = [
-            '../', '..\\', 'union select', 'script>', '<iframe',
-            'javascript:', 'vbscript:', 'onload=', 'onerror=',
-            'eval(', 'alert(', 'document.cookie', 'base64'
-        ]
-        
-        if any(pattern in path for pattern in suspicious_patterns):
+        if request_scanner.is_suspicious(request_info['path']):
             return True
         
         # Check query parameters
         query_params = request_info.get('query_params', {})
         for value in query_params.values():
-            if isinstance(value, str) and any(pattern in value.lower() for pattern in suspicious_patterns):
+            if isinstance(value, str) and request_scanner.is_suspicious(value):
                 return True
         
         # Check user agent for known bad patterns
-        user_agent = request_info.get('user_agent', '').lower()
-        suspicious_agents = ['sqlmap', 'nikto', 'burp', 'nmap', 'masscan']
-        if any(agent in user_agent for agent in suspicious_agents):
+        if security_tool_scanner.is_suspicious(request_info.get('user_agent') or ''):
             return True
         
         return False
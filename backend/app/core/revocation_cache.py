@@ -0,0 +1,265 @@
+"""
+In-memory revoked-token filter for FinGood JWT verification.
+
+Almost no token presented to the API has been revoked, yet every
+authenticated request used to query the revoked_tokens table (and failed
+closed whenever the database was slow). Each process now keeps:
+
+- a Bloom filter of revoked JTIs: a miss proves the token was never revoked,
+  only hits are confirmed against the database
+- an exact map of each user's latest mass-revocation time
+
+Both are loaded on first use and kept fresh by polling revoked_tokens
+incrementally by revoked_at. Revocations made by this process are applied
+immediately; revocations made by other workers become visible within
+REVOCATION_CACHE_REFRESH_SECONDS. If the cache cannot be refreshed for
+longer than REVOCATION_CACHE_MAX_STALENESS_SECONDS, callers fall back to
+the database checks.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import RevokedToken
+
+revocation_logger = logging.getLogger("fingood.revocation_cache")
+
+MASS_REVOCATION_PREFIX = "MASS_REVOKE_"
+
+# Re-read rows revoked slightly before the last poll (commits landing late)
+POLL_OVERLAP = timedelta(seconds=5)
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """Normalize timestamps to naive UTC (the convention used by the auth code)."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of strings.
+
+    No false negatives; false positives at roughly `error_rate` while
+    holding up to `capacity` items.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        """Add an item; `count` only grows for items not already present."""
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationCache:
+    """
+    Per-process view of revoked_tokens.
+
+    Query methods return None when the cache is not usable (disabled, never
+    loaded or too stale); callers must then ask the database.
+    """
+
+    def __init__(self):
+        self.enabled = settings.REVOCATION_CACHE_ENABLED
+        self._lock = threading.Lock()
+        self._filter: Optional[BloomFilter] = None
+        self._mass_revocations: Dict[int, datetime] = {}
+        self._high_water: Optional[datetime] = None
+        self._last_refresh = 0.0  # monotonic time of the last successful poll
+        self._last_rebuild = 0.0
+        self.filter_hits = 0
+        self.filter_misses = 0
+
+    # Loading
+
+    def _rebuild(self, db: Session) -> None:
+        """Load every unexpired revocation into a fresh filter."""
+        now = datetime.utcnow()
+        active = db.query(func.count(RevokedToken.id)).filter(RevokedToken.expires_at > now).scalar() or 0
+        capacity = max(settings.REVOCATION_FILTER_CAPACITY, active * 2)
+        bloom = BloomFilter(capacity, settings.REVOCATION_FILTER_ERROR_RATE)
+        mass_revocations: Dict[int, datetime] = {}
+        high_water = None
+
+        rows = db.query(
+            RevokedToken.jti, RevokedToken.user_id, RevokedToken.revoked_at
+        ).filter(RevokedToken.expires_at > now).yield_per(10000)
+        for jti, user_id, revoked_at in rows:
+            high_water = self._apply(bloom, mass_revocations, high_water, jti, user_id, revoked_at)
+
+        self._filter = bloom
+        self._mass_revocations = mass_revocations
+        self._high_water = high_water or now
+        self._last_rebuild = time.monotonic()
+        revocation_logger.info(
+            f"Revocation cache loaded - {bloom.count} revoked tokens, "
+            f"{len(mass_revocations)} users with mass revocations"
+        )
+
+    def _poll(self, db: Session) -> None:
+        """Apply revocations recorded since the last poll."""
+        since = self._high_water - POLL_OVERLAP
+        rows = db.query(
+            RevokedToken.jti, RevokedToken.user_id, RevokedToken.revoked_at
+        ).filter(
+            RevokedToken.revoked_at >= since,
+            RevokedToken.expires_at > datetime.utcnow()
+        ).all()
+        high_water = self._high_water
+        for jti, user_id, revoked_at in rows:
+            high_water = self._apply(self._filter, self._mass_revocations, high_water, jti, user_id, revoked_at)
+        self._high_water = high_water
+
+    @staticmethod
+    def _apply(
+        bloom: BloomFilter,
+        mass_revocations: Dict[int, datetime],
+        high_water: Optional[datetime],
+        jti: str,
+        user_id: int,
+        revoked_at: Optional[datetime]
+    ) -> Optional[datetime]:
+        revoked_at = _utc_naive(revoked_at) if revoked_at else datetime.utcnow()
+        if jti.startswith(MASS_REVOCATION_PREFIX):
+            if revoked_at > mass_revocations.get(user_id, datetime.min):
+                mass_revocations[user_id] = revoked_at
+        else:
+            bloom.add(jti)
+        return revoked_at if high_water is None or revoked_at > high_water else high_water
+
+    def refresh(self, db: Session, force: bool = False) -> None:
+        """
+        Bring the cache up to date if the refresh interval has passed.
+
+        Args:
+            db: Database session used for polling
+            force: Poll even if the interval has not passed
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if (not force and self._filter is not None and
+                now - self._last_refresh < settings.REVOCATION_CACHE_REFRESH_SECONDS):
+            return
+        if not self._lock.acquire(blocking=self._filter is None):
+            return  # Another thread is refreshing; keep serving the current view
+        try:
+            if (not force and self._filter is not None and
+                    time.monotonic() - self._last_refresh < settings.REVOCATION_CACHE_REFRESH_SECONDS):
+                return  # Refreshed by another thread while waiting for the lock
+            if (self._filter is None or
+                    now - self._last_rebuild > settings.REVOCATION_CACHE_REBUILD_SECONDS or
+                    self._filter.count > self._filter.capacity):
+                # Periodic rebuild drops expired entries (Bloom filters cannot delete)
+                self._rebuild(db)
+            else:
+                self._poll(db)
+            self._last_refresh = time.monotonic()
+        except Exception as e:
+            revocation_logger.error(f"Failed to refresh revocation cache: {str(e)}")
+        finally:
+            self._lock.release()
+
+    def _usable(self) -> bool:
+        return (self.enabled and self._filter is not None and
+                time.monotonic() - self._last_refresh <= settings.REVOCATION_CACHE_MAX_STALENESS_SECONDS)
+
+    # Queries
+
+    def might_be_revoked(self, jti: str, db: Session) -> Optional[bool]:
+        """
+        Check a JTI against the filter.
+
+        Returns:
+            False if the token is definitely not revoked, True if it may be
+            (confirm against the database), None if the cache is unusable
+        """
+        self.refresh(db)
+        if not self._usable():
+            return None
+        if jti in self._filter:
+            self.filter_hits += 1
+            return True
+        self.filter_misses += 1
+        return False
+
+    def mass_revoked_after(self, user_id: int, issued_at: datetime, db: Session) -> Optional[bool]:
+        """
+        Check whether all of a user's tokens issued before a revocation are invalid.
+
+        Returns:
+            True/False from the exact in-memory map, None if the cache is unusable
+        """
+        self.refresh(db)
+        if not self._usable():
+            return None
+        revoked_at = self._mass_revocations.get(user_id)
+        return revoked_at is not None and revoked_at > _utc_naive(issued_at)
+
+    # Local writes
+
+    def add_revoked(self, jti: str) -> None:
+        """Make a revocation committed by this process visible immediately."""
+        if self._filter is not None:
+            self._filter.add(jti)
+
+    def add_mass_revocation(self, user_id: int, revoked_at: Optional[datetime] = None) -> None:
+        revoked_at = _utc_naive(revoked_at) if revoked_at else datetime.utcnow()
+        if revoked_at > self._mass_revocations.get(user_id, datetime.min):
+            self._mass_revocations[user_id] = revoked_at
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "loaded": self._filter is not None,
+            "revoked_tokens": self._filter.count if self._filter else 0,
+            "filter_bits": self._filter.size if self._filter else 0,
+            "users_with_mass_revocation": len(self._mass_revocations),
+            "filter_hits": self.filter_hits,
+            "filter_misses": self.filter_misses,
+            "seconds_since_refresh": round(time.monotonic() - self._last_refresh, 1) if self._last_refresh else None,
+        }
+
+
+_revocation_cache: Optional[RevocationCache] = None
+
+
+def get_revocation_cache() -> RevocationCache:
+    """Get the process-wide revocation cache."""
+    global _revocation_cache
+    if _revocation_cache is None:
+        _revocation_cache = RevocationCache()
+    return _revocation_cache
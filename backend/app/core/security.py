@@ -16,6 +16,8 @@ from fastapi import HTTPException, status, Request
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.principal_cache import get_principal_cache
+from app.core.revocation_cache import get_revocation_cache
 from app.models.user import RevokedToken
 
 # Configure security logging
@@ -277,6 +279,8 @@ class JWTManager:
             
             db.add(revoked_token)
             db.commit()
+            get_revocation_cache().add_revoked(jti)
+            get_principal_cache().invalidate_token(jti)
             
             security_logger.info(
                 f"JWT token revoked - JTI: {jti}, User: {user_id}, "
@@ -373,6 +377,10 @@ class JWTManager:
         if not jti:
             return False
         
+        # Only filter hits (or an unusable cache) need the database
+        if get_revocation_cache().might_be_revoked(jti, db) is False:
+            return False
+        
         try:
             token_hash = self._hash_token(token)
             
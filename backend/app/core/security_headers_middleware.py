@@ -8,16 +8,17 @@ CRITICAL SECURITY: This middleware ensures all responses include security header
 required for financial applications and regulatory compliance.
 """
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
 from starlette.responses import RedirectResponse
-from typing import Callable, Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional
 import logging
 from urllib.parse import urlparse
 
 from app.core.logging_config import get_logger, LogCategory
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """
     Comprehensive Security Headers Middleware for Financial Applications
     
@@ -30,11 +31,14 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     - Referrer-Policy for privacy protection
     - Secure cookie enforcement
     - Financial application specific security configurations
+    
+    Implemented as a pure ASGI middleware that rewrites only the response
+    start message, so streaming responses are never buffered.
     """
     
     def __init__(
         self,
-        app,
+        app: ASGIApp,
         enforce_https: bool = True,
         hsts_max_age: int = 31536000,  # 1 year
         hsts_include_subdomains: bool = True,
@@ -44,7 +48,7 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         referrer_policy: str = "strict-origin-when-cross-origin",
         enable_security_logging: bool = True
     ):
-        super().__init__(app)
+        self.app = app
         self.enforce_https = enforce_https
         self.hsts_max_age = hsts_max_age
         self.hsts_include_subdomains = hsts_include_subdomains
@@ -224,8 +228,13 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
                 'host': request.headers.get('host', 'unknown')
             })
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request and add security headers to response."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request = Request(scope, receive)
         
         # Check if HTTPS enforcement is needed
         is_https = self._is_https_request(request)
@@ -236,16 +245,31 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
                 "http_access_attempt", 
                 "HTTP request to financial application blocked"
             )
-            return self._create_https_redirect(request)
+            await self._create_https_redirect(request)(scope, receive, send)
+            return
+        
+        security_headers = self._get_security_headers(is_https=is_https)
+        
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                
+                # Add security headers to response
+                for header_name, header_value in security_headers.items():
+                    headers[header_name] = header_value
+                
+                # Secure cookie enforcement
+                if is_https:
+                    self._enforce_secure_cookies(headers)
+            await send(message)
         
         # Process the request
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             # Simplified error logging to avoid datetime serialization issues
             # Just log basic info without extra fields that might contain datetime objects
             try:
-                import logging
                 simple_logger = logging.getLogger('simple_error')
                 simple_logger.error(f"Request processing error: {type(e).__name__} at {request.method} {request.url.path}")
             except:
@@ -253,16 +277,6 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
                 pass
             raise
         
-        # Add security headers to response
-        security_headers = self._get_security_headers(is_https=is_https)
-        
-        for header_name, header_value in security_headers.items():
-            response.headers[header_name] = header_value
-        
-        # Secure cookie enforcement
-        if is_https:
-            self._enforce_secure_cookies(response)
-        
         # Log successful security header application (debug level)
         if self.enable_security_logging:
             self.logger.debug("Security headers applied", extra={
@@ -270,25 +284,23 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
                 'is_https': is_https,
                 'headers_applied': list(security_headers.keys())
             })
-        
-        return response
     
-    def _enforce_secure_cookies(self, response: Response):
-        """Enforce secure cookie settings for HTTPS responses."""
+    def _enforce_secure_cookies(self, headers: MutableHeaders):
+        """Enforce secure cookie settings on the response headers."""
         # Check if response has Set-Cookie headers
-        set_cookie_headers = response.headers.getlist("set-cookie")
+        set_cookie_headers = headers.getlist("set-cookie")
         
         if not set_cookie_headers:
             return
         
         # Remove existing Set-Cookie headers
-        del response.headers["set-cookie"]
+        del headers["set-cookie"]
         
         # Re-add with secure flags
         for cookie_header in set_cookie_headers:
             # Parse and modify cookie
             secure_cookie = self._make_cookie_secure(cookie_header)
-            response.headers.append("set-cookie", secure_cookie)
+            headers.append("set-cookie", secure_cookie)
     
     def _make_cookie_secure(self, cookie_header: str) -> str:
         """Make a cookie header secure by adding necessary flags."""
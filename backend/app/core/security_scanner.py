@@ -0,0 +1,259 @@
+"""
+Precompiled Multi-pattern Security Scanner for FinGood
+
+All attack signatures of a rule set are compiled once, at import time, into a
+single alternation regex so a value is scanned in one pass instead of one
+search per pattern. Scanners keep an LRU of recently seen short values (most
+traffic repeats the same vendors, categories and query values), and expose a
+vectorized entry point that scans whole pandas columns at once.
+
+Shared by the request logging middleware, the validation middleware,
+security_utils and the CSV parser.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+
+# Only values up to this length are kept in the LRU of scan results
+MAX_CACHED_VALUE_LENGTH = 256
+
+
+@dataclass(frozen=True)
+class Signature:
+    """A single attack signature"""
+    name: str
+    pattern: str
+    category: str = "generic"
+    flags: int = re.IGNORECASE
+
+    @property
+    def inline_flags(self) -> str:
+        """Flags as a scoped inline group prefix, e.g. 'is'"""
+        letters = ""
+        if self.flags & re.IGNORECASE:
+            letters += "i"
+        if self.flags & re.MULTILINE:
+            letters += "m"
+        if self.flags & re.DOTALL:
+            letters += "s"
+        return letters
+
+
+class SecurityScanner:
+    """
+    Scans values against a rule set compiled into one combined regex
+
+    Each signature keeps its own flags through scoped inline flag groups, so
+    combining never changes what an individual signature matches.
+    """
+
+    def __init__(self, name: str, signatures: Sequence[Signature], cache_size: int = 8192):
+        """
+        Compile a scanner
+
+        Args:
+            name: Scanner name (for logging/metrics)
+            signatures: Signatures to compile
+            cache_size: Number of recently scanned short values to remember
+        """
+        self.name = name
+        self.signatures: List[Signature] = list(signatures)
+        self._by_group: Dict[str, Signature] = {}
+
+        alternatives = []
+        for index, signature in enumerate(self.signatures):
+            group = f"s{index}"
+            self._by_group[group] = signature
+            flags = signature.inline_flags
+            body = f"(?{flags}:{signature.pattern})" if flags else f"(?:{signature.pattern})"
+            alternatives.append(f"(?P<{group}>{body})")
+
+        self.pattern_string = "|".join(alternatives) if alternatives else r"(?!x)x"
+        self.pattern = re.compile(self.pattern_string)
+        self._compiled = [re.compile(s.pattern, s.flags) for s in self.signatures]
+        self._cached_first_match = lru_cache(maxsize=cache_size)(self._first_match_uncached)
+
+    def _first_match_uncached(self, value: str) -> Optional[Signature]:
+        match = self.pattern.search(value)
+        if match is None:
+            return None
+        return self._by_group[match.lastgroup]
+
+    def first_match(self, value: str) -> Optional[Signature]:
+        """
+        Get the signature whose match starts earliest in a value
+
+        Args:
+            value: String to scan
+
+        Returns:
+            Matching signature, or None if the value is clean
+        """
+        if not isinstance(value, str) or not value:
+            return None
+        if len(value) <= MAX_CACHED_VALUE_LENGTH:
+            return self._cached_first_match(value)
+        return self._first_match_uncached(value)
+
+    def is_suspicious(self, value: str) -> bool:
+        """Check whether any signature matches a value"""
+        return self.first_match(value) is not None
+
+    def find_all(self, value: str) -> List[Signature]:
+        """
+        Get every signature matching a value
+
+        Only values that hit the combined pattern are checked per signature,
+        so this is as cheap as is_suspicious() for clean input.
+
+        Args:
+            value: String to scan
+
+        Returns:
+            List of matching signatures (in rule set order)
+        """
+        if self.first_match(value) is None:
+            return []
+        return [
+            signature for signature, compiled in zip(self.signatures, self._compiled)
+            if compiled.search(value)
+        ]
+
+    def scan_series(self, series: pd.Series) -> pd.Series:
+        """
+        Vectorized scan of a pandas column
+
+        Values are stringified and de-duplicated before matching, so repeated
+        vendors/descriptions are scanned once.
+
+        Args:
+            series: Column to scan
+
+        Returns:
+            Boolean Series (same index) that is True for suspicious cells
+        """
+        present = series.dropna()
+        if present.empty:
+            return pd.Series(False, index=series.index)
+
+        as_text = present.astype(str)
+        # The per-value search str.contains would run, without its warning
+        # about the named groups of the combined pattern
+        search = self.pattern.search
+        hits = {value for value in as_text.unique() if search(value)}
+        if not hits:
+            return pd.Series(False, index=series.index)
+
+        return as_text.isin(hits).reindex(series.index, fill_value=False)
+
+    def cache_info(self):
+        """LRU statistics for monitoring"""
+        return self._cached_first_match.cache_info()
+
+
+def _literal(name: str, text: str, category: str) -> Signature:
+    """Case-insensitive substring signature"""
+    return Signature(name=name, pattern=re.escape(text), category=category)
+
+
+# ================================
+# Rule sets
+# ================================
+
+# Request URL/query patterns checked by the request logging middleware
+REQUEST_SIGNATURES = [
+    _literal("path_traversal_unix", "../", "path_traversal"),
+    _literal("path_traversal_windows", "..\\", "path_traversal"),
+    _literal("union_select", "union select", "sql_injection"),
+    _literal("script_tag", "script>", "xss"),
+    _literal("iframe_tag", "<iframe", "xss"),
+    _literal("javascript_protocol", "javascript:", "xss"),
+    _literal("vbscript_protocol", "vbscript:", "xss"),
+    _literal("onload_handler", "onload=", "xss"),
+    _literal("onerror_handler", "onerror=", "xss"),
+    _literal("eval_call", "eval(", "xss"),
+    _literal("alert_call", "alert(", "xss"),
+    _literal("cookie_access", "document.cookie", "xss"),
+    _literal("base64", "base64", "encoding"),
+]
+
+# Known attack tool user agents
+SECURITY_TOOL_SIGNATURES = [
+    _literal(tool, tool, "security_tool")
+    for tool in ("sqlmap", "nikto", "burp", "nmap", "masscan")
+]
+
+# Patterns used by the validation middleware's SQLInjectionDetector
+SQL_INJECTION_SIGNATURES = [
+    Signature("quote_injection", r"('|(\\'))+.*(\\')?(;|--|\s)", "sql_injection"),
+    Signature("sql_keyword", r"(;|\s)(union|select|insert|update|delete|drop|create|alter|exec|execute)\s", "sql_injection"),
+    Signature("boolean_injection", r"(;|\s)(or|and)\s+\d+\s*=\s*\d+", "sql_injection"),
+    Signature("time_based", r"(;|\s)(waitfor|delay)\s+", "sql_injection"),
+    Signature("file_operation", r"(;|\s)(load_file|into\s+outfile|dumpfile)\s+", "sql_injection"),
+    Signature("performance_function", r"(;|\s)(benchmark|sleep)\s*\(", "sql_injection"),
+    Signature("block_comment", r"\/\*.*\*\/", "sql_injection"),
+    Signature("line_comment", r"--\s.*", "sql_injection"),
+    Signature("assignment_comment", r"(;|\s)(\w+\s*=\s*\w+\s*--)", "sql_injection"),
+]
+
+# Suspicious CSV header names
+CSV_COLUMN_SIGNATURES = [
+    Signature(pattern, pattern, "script_injection")
+    for pattern in [
+        r'<script.*?>',
+        r'javascript:',
+        r'<\?php',
+        r'<%.*%>',
+        r'eval\s*\(',
+        r'exec\s*\(',
+        r'system\s*\(',
+        r'shell_exec\s*\(',
+    ]
+]
+
+# Script injection inside CSV cells
+CSV_SCRIPT_SIGNATURES = [
+    Signature(pattern, pattern, "script_injection", re.IGNORECASE | re.DOTALL)
+    for pattern in [
+        r'<script.*?>.*?</script>',
+        r'javascript:',
+        r'vbscript:',
+        r'<\?php.*?\?>',
+        r'<%.*?%>',
+        r'eval\s*\(',
+        r'document\.cookie',
+        r'window\.location',
+        r'alert\s*\(',
+    ]
+]
+
+# SQL injection inside CSV cells
+CSV_SQL_SIGNATURES = [
+    Signature(pattern, pattern, "sql_injection")
+    for pattern in [
+        r'union\s+select',
+        r'insert\s+into',
+        r'delete\s+from',
+        r'update\s+.*\s+set',
+        r'drop\s+table',
+        r'create\s+table',
+        r'alter\s+table',
+        r'exec\s*\(',
+        r'sp_executesql',
+        r'xp_cmdshell',
+    ]
+]
+
+
+# Scanners are compiled once at import (application startup)
+request_scanner = SecurityScanner("request", REQUEST_SIGNATURES)
+security_tool_scanner = SecurityScanner("security_tool", SECURITY_TOOL_SIGNATURES)
+sql_injection_scanner = SecurityScanner("sql_injection", SQL_INJECTION_SIGNATURES)
+csv_column_scanner = SecurityScanner("csv_column", CSV_COLUMN_SIGNATURES)
+csv_script_scanner = SecurityScanner("csv_script", CSV_SCRIPT_SIGNATURES)
+csv_sql_scanner = SecurityScanner("csv_sql", CSV_SQL_SIGNATURES)
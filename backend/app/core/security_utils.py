@@ -23,6 +23,7 @@ from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.exceptions import ValidationException
+from app.core.security_scanner import SecurityScanner, Signature
 from app.schemas.error import FieldError
 
 logger = logging.getLogger(__name__)
@@ -81,11 +82,11 @@ class SQLInjectionPrevention:
             r"this\.|Object\.|eval\(",  # JavaScript injection in NoSQL
         ]
         
-        # Pre-compile patterns for performance
-        self.compiled_patterns = [
-            re.compile(pattern, re.IGNORECASE | re.MULTILINE | re.DOTALL) 
+        # Pre-compile patterns into one combined scanner for performance
+        self.scanner = SecurityScanner("sql_injection_prevention", [
+            Signature(pattern, pattern, "sql_injection", re.IGNORECASE | re.MULTILINE | re.DOTALL)
             for pattern in self.injection_patterns
-        ]
+        ])
         
         # Dangerous SQL keywords that should never appear in user input
         self.dangerous_keywords = {
@@ -114,13 +115,13 @@ class SQLInjectionPrevention:
         normalized = value.lower().strip()
         
         # Check against compiled patterns
-        for pattern in self.compiled_patterns:
-            if pattern.search(normalized):
-                logger.warning(
-                    f"SQL injection pattern detected: {pattern.pattern}",
-                    extra={"input_value": value[:100], "pattern_matched": True}
-                )
-                return True
+        signature = self.scanner.first_match(normalized)
+        if signature is not None:
+            logger.warning(
+                f"SQL injection pattern detected: {signature.pattern}",
+                extra={"input_value": value[:100], "pattern_matched": True}
+            )
+            return True
         
         # Keyword-based detection
         if strict_mode:
@@ -271,10 +272,10 @@ class XSSPrevention:
             r'url\s*\(\s*[\'"]?javascript:',  # CSS javascript URLs
         ]
         
-        self.compiled_xss_patterns = [
-            re.compile(pattern, re.IGNORECASE | re.DOTALL) 
+        self.scanner = SecurityScanner("xss", [
+            Signature(pattern, pattern, "xss", re.IGNORECASE | re.DOTALL)
             for pattern in self.xss_patterns
-        ]
+        ])
     
     def is_xss_attempt(self, value: str) -> bool:
         """Detect potential XSS attempts"""
@@ -283,11 +284,7 @@ class XSSPrevention:
             return False
         
         # Check for XSS patterns
-        for pattern in self.compiled_xss_patterns:
-            if pattern.search(value):
-                return True
-        
-        return False
+        return self.scanner.is_suspicious(value)
     
     def sanitize_html_input(self, value: str, allow_basic_formatting: bool = False) -> str:
         """
@@ -10,15 +10,16 @@ This middleware provides comprehensive validation for all API endpoints with:
 """
 
 import re
-import json
 import html
 import logging
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Union, Callable
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
-from fastapi import Request, Response, HTTPException, status
+from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from pydantic import BaseModel, ValidationError, Field, field_validator
 from sqlalchemy import text
 import bleach
@@ -28,83 +29,112 @@ from app.schemas.error import (
     ErrorCategory, ErrorSeverity
 )
 from app.core.exceptions import ValidationException
+from app.core.request_body import RequestBodyView, DEFAULT_MAX_INSPECTED_BODY_SIZE
+from app.core.security_scanner import MAX_CACHED_VALUE_LENGTH, sql_injection_scanner
 
 logger = logging.getLogger(__name__)
 
+# Text that sanitization would return unchanged: no markup/entity characters,
+# no control characters, single spaces only and no surrounding whitespace
+SAFE_TEXT_PATTERN = re.compile(r'[^\s&<>\x00-\x1f\x7f]+(?: [^\s&<>\x00-\x1f\x7f]+)*')
+CONTROL_CHARACTER_PATTERN = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
 
-class ValidationMiddleware(BaseHTTPMiddleware):
+
+class ValidationMiddleware:
     """
     Comprehensive validation middleware for request/response processing
     with financial data security focus.
+    
+    Implemented as a pure ASGI middleware that reads the body through the
+    shared RequestBodyView; upload bodies are never buffered or parsed here.
     """
     
     def __init__(
         self, 
-        app,
+        app: ASGIApp,
         enable_request_validation: bool = True,
         enable_response_validation: bool = True,
         enable_sql_injection_check: bool = True,
         enable_xss_protection: bool = True,
-        log_validation_errors: bool = True
+        log_validation_errors: bool = True,
+        max_body_size: int = DEFAULT_MAX_INSPECTED_BODY_SIZE
     ):
-        super().__init__(app)
+        self.app = app
         self.enable_request_validation = enable_request_validation
         self.enable_response_validation = enable_response_validation
         self.enable_sql_injection_check = enable_sql_injection_check
         self.enable_xss_protection = enable_xss_protection
         self.log_validation_errors = log_validation_errors
+        self.max_body_size = max_body_size
         
         # Initialize validators
         self.input_sanitizer = InputSanitizer()
         self.financial_validator = FinancialDataValidator()
         self.sql_injection_detector = SQLInjectionDetector()
         
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request through validation pipeline"""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request = Request(scope, receive)
+        body_view = RequestBodyView.from_scope(scope, receive, self.max_body_size)
         
         # Validate and sanitize request
         if self.enable_request_validation:
+            error_response = None
             try:
-                await self._validate_request(request)
+                await self._validate_request(request, body_view)
             except ValidationException as e:
-                return self._create_validation_error_response(e, request)
+                error_response = self._create_validation_error_response(e, request)
             except Exception as e:
                 logger.error(f"Unexpected validation error: {str(e)}")
-                return self._create_system_error_response(request)
+                error_response = self._create_system_error_response(request)
+            
+            if error_response is not None:
+                await error_response(scope, receive, send)
+                return
+        
+        response_started = False
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                # Validate response if needed
+                if self.enable_response_validation:
+                    try:
+                        await self._validate_response(Headers(raw=message.get("headers", [])), request)
+                    except Exception as e:
+                        logger.error(f"Response validation error: {str(e)}")
+                        # Don't fail the request for response validation errors
+                        # but log them for monitoring
+            await send(message)
         
         # Process request
         try:
-            response = await call_next(request)
+            await self.app(scope, body_view.receive, send_wrapper)
         except Exception as e:
             logger.error(f"Request processing error: {str(e)}")
-            return self._create_system_error_response(request)
-        
-        # Validate response if needed
-        if self.enable_response_validation and hasattr(response, 'body'):
-            try:
-                await self._validate_response(response, request)
-            except Exception as e:
-                logger.error(f"Response validation error: {str(e)}")
-                # Don't fail the request for response validation errors
-                # but log them for monitoring
-        
-        return response
+            if response_started:
+                raise
+            await self._create_system_error_response(request)(scope, receive, send)
     
-    async def _validate_request(self, request: Request):
+    async def _validate_request(self, request: Request, body_view: RequestBodyView):
         """Validate incoming request data"""
         
         # Skip validation for certain endpoints
         if self._should_skip_validation(request):
             return
         
-        # Get request body if available
+        # Get request body if available (uploads are streamed, never parsed here)
         body = None
-        if request.method in ["POST", "PUT", "PATCH"]:
+        if request.method in ["POST", "PUT", "PATCH"] and body_view.inspectable:
             try:
-                body = await request.body()
-                if body:
-                    body = json.loads(body.decode('utf-8'))
-            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                body = await body_view.json()
+            except ValueError as e:
                 raise ValidationException(
                     message="Invalid JSON in request body",
                     field_errors=[FieldError(
@@ -114,6 +144,17 @@ class ValidationMiddleware(BaseHTTPMiddleware):
                         value=str(e)
                     )]
                 )
+            # Only known once the body was read: chunked bodies have no Content-Length
+            if body_view.too_large:
+                raise ValidationException(
+                    message="Request body too large",
+                    field_errors=[FieldError(
+                        field="body",
+                        message=f"Request body must not exceed {body_view.max_size} bytes",
+                        code="BODY_TOO_LARGE",
+                        value=None
+                    )]
+                )
         
         # Validate query parameters
         query_params = dict(request.query_params)
@@ -133,7 +174,7 @@ class ValidationMiddleware(BaseHTTPMiddleware):
                 ))
         
         # Validate request body
-        if body:
+        if body and isinstance(body, dict):
             try:
                 validated_body = self._validate_body(body, request.url.path)
                 # Store validated data back in request state for use by endpoints
@@ -163,11 +204,11 @@ class ValidationMiddleware(BaseHTTPMiddleware):
                 field_errors=field_errors
             )
     
-    async def _validate_response(self, response: Response, request: Request):
-        """Validate outgoing response data"""
+    async def _validate_response(self, headers: Headers, request: Request):
+        """Validate outgoing response metadata (bodies are streamed, not buffered)"""
         
         # Only validate JSON responses
-        if not response.headers.get('content-type', '').startswith('application/json'):
+        if not headers.get('content-type', '').startswith('application/json'):
             return
         
         try:
@@ -346,7 +387,7 @@ class ValidationMiddleware(BaseHTTPMiddleware):
         
         return JSONResponse(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            content=error_response.dict()
+            content=error_response.model_dump(mode="json")
         )
     
     def _create_system_error_response(self, request: Request) -> JSONResponse:
@@ -368,18 +409,20 @@ class ValidationMiddleware(BaseHTTPMiddleware):
         
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content=error_response.dict()
+            content=error_response.model_dump(mode="json")
         )
 
 
 class InputSanitizer:
     """Input sanitization utilities for XSS prevention and data cleaning"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 8192):
         # Configure bleach for HTML sanitization
         self.allowed_tags = []  # No HTML tags allowed in financial data
         self.allowed_attributes = {}
         self.allowed_protocols = ['http', 'https', 'mailto']
+        # Recently sanitized values (vendors, categories and descriptions repeat a lot)
+        self._cached_clean = lru_cache(maxsize=cache_size)(self._clean)
     
     def sanitize_string(self, value: str, max_length: int = 1000) -> str:
         """Sanitize string input for XSS prevention"""
@@ -390,6 +433,17 @@ class InputSanitizer:
         if len(value) > max_length:
             raise ValueError(f"Input too long (max {max_length} characters)")
         
+        # Plain text without markup, entities, control characters or extra
+        # whitespace is already clean
+        if SAFE_TEXT_PATTERN.fullmatch(value):
+            return value
+        
+        if len(value) <= MAX_CACHED_VALUE_LENGTH:
+            return self._cached_clean(value)
+        return self._clean(value)
+    
+    def _clean(self, value: str) -> str:
+        """Full sanitization pipeline"""
         # HTML entity decode first
         value = html.unescape(value)
         
@@ -403,10 +457,10 @@ class InputSanitizer:
         )
         
         # Remove null bytes and control characters
-        value = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', value)
+        value = CONTROL_CHARACTER_PATTERN.sub('', value)
         
         # Normalize whitespace
-        value = re.sub(r'\s+', ' ', value).strip()
+        value = WHITESPACE_PATTERN.sub(' ', value).strip()
         
         return value
     
@@ -535,21 +589,9 @@ class SQLInjectionDetector:
     """SQL injection pattern detection for enhanced security"""
     
     def __init__(self):
-        # Common SQL injection patterns
-        self.sql_patterns = [
-            r"('|(\\'))+.*(\\')?(;|--|\s)",  # Quote-based injection
-            r"(;|\s)(union|select|insert|update|delete|drop|create|alter|exec|execute)\s",  # SQL keywords
-            r"(;|\s)(or|and)\s+\d+\s*=\s*\d+",  # Boolean injection
-            r"(;|\s)(waitfor|delay)\s+",  # Time-based injection
-            r"(;|\s)(load_file|into\s+outfile|dumpfile)\s+",  # File operations
-            r"(;|\s)(benchmark|sleep)\s*\(",  # Performance functions
-            r"\/\*.*\*\/",  # SQL comments
-            r"--\s.*",  # SQL line comments
-            r"(;|\s)(\w+\s*=\s*\w+\s*--)",  # Assignment with comment
-        ]
-        
-        # Compile patterns for performance
-        self.compiled_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in self.sql_patterns]
+        # Common SQL injection patterns, compiled once into a combined scanner
+        self.scanner = sql_injection_scanner
+        self.sql_patterns = [signature.pattern for signature in self.scanner.signatures]
     
     def is_suspicious(self, value: str) -> bool:
         """Check if string contains potential SQL injection patterns"""
@@ -557,12 +599,7 @@ class SQLInjectionDetector:
         if not isinstance(value, str) or len(value) < 3:
             return False
         
-        # Check against all patterns
-        for pattern in self.compiled_patterns:
-            if pattern.search(value):
-                return True
-        
-        return False
+        return self.scanner.is_suspicious(value)
     
     def sanitize_sql_identifier(self, identifier: str) -> str:
         """Sanitize SQL identifier (table/column names)"""
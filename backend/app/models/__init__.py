@@ -7,8 +7,12 @@ and relationship resolution.
 
 # Import models in the correct order to resolve relationships
 from app.models.user import User, RevokedToken, PasswordResetToken
-from app.models.transaction import Transaction, Category, CategorizationRule
+from app.models.transaction import Transaction, ImportBatch, Category, CategorizationRule, RuleMatch
 from app.models.export_job import ExportJob, ExportTemplate
+from app.models.bulk_operation import BulkOperationJournal
+from app.models.pattern_statistics import PatternStatistic
+from app.models.pattern_analysis import PatternAnalysis
+from app.models.duplicate_group import DuplicateGroupRecord, DuplicateScan
 from app.models.budget import (
     Budget, BudgetItem, BudgetActual, BudgetVarianceReport, 
     BudgetTemplate, BudgetGoal
@@ -17,8 +21,10 @@ from app.models.budget import (
 # Export all models for easy importing
 __all__ = [
     "User", "RevokedToken", "PasswordResetToken",
-    "Transaction", "Category", "CategorizationRule", 
+    "Transaction", "ImportBatch", "Category", "CategorizationRule", "RuleMatch",
     "ExportJob", "ExportTemplate",
+    "BulkOperationJournal", "PatternStatistic", "PatternAnalysis",
+    "DuplicateGroupRecord", "DuplicateScan",
     "Budget", "BudgetItem", "BudgetActual", "BudgetVarianceReport",
     "BudgetTemplate", "BudgetGoal"
 ]
\ No newline at end of file
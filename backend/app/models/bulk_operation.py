@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class BulkOperationJournal(Base):
+    """
+    Undo journal of bulk transaction operations.
+
+    Stores the before-images of the rows an operation changed in a compact
+    column/row layout so the operation can be reverted with one set-based
+    statement, from any request or worker.
+    """
+    __tablename__ = "bulk_operation_journal"
+
+    id = Column(Integer, primary_key=True, index=True)
+    operation_id = Column(String(100), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    operation_type = Column(String(50), nullable=False)  # BulkOperationType value
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+    # {"columns": ["id", ...], "rows": [[1, ...], ...]}
+    before_images = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    undone_at = Column(DateTime(timezone=True), nullable=True)  # Set once reverted
+
+    __table_args__ = (
+        Index('idx_bulk_operation_journal_user_created', 'user_id', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<BulkOperationJournal(operation_id='{self.operation_id}', type='{self.operation_type}')>"
@@ -0,0 +1,81 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Index, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class DuplicateGroupRecord(Base):
+    """
+    Persisted group of potentially duplicate transactions.
+
+    Written by the background duplicate scans (after each import and
+    nightly), so the duplicates endpoints only read stored groups. The
+    group key is derived from the member ids: a group found again by a
+    later scan keeps its review status, while a group that gains or loses
+    members is replaced by a new pending one.
+    """
+    __tablename__ = "duplicate_groups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    group_key = Column(String(64), nullable=False)  # SHA256 of the sorted member ids
+
+    transaction_ids = Column(JSON, nullable=False)  # Sorted member ids
+    primary_transaction_id = Column(Integer, nullable=False)  # Kept when the group is merged
+    transactions = Column(JSON, nullable=False)  # Member snapshots at scan time
+    confidence_score = Column(Float, nullable=False)
+    match_type = Column(String(20), nullable=False)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    date_start = Column(DateTime, nullable=False)  # Earliest member date
+    date_end = Column(DateTime, nullable=False)  # Latest member date
+
+    review_status = Column(String(20), nullable=False, default="pending")  # DuplicateReviewStatus values
+    reviewed_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'group_key', name='uq_duplicate_groups_user_key'),
+        Index('idx_duplicate_groups_user_status', 'user_id', 'review_status', 'confidence_score'),
+        Index('idx_duplicate_groups_user_dates', 'user_id', 'date_start', 'date_end'),
+    )
+
+    def __repr__(self):
+        return f"<DuplicateGroupRecord(id={self.id}, user_id={self.user_id}, status='{self.review_status}')>"
+
+
+class DuplicateScan(Base):
+    """
+    One background duplicate scan of a user's transactions.
+
+    Import scans compare only the imported rows against the date window
+    they overlap; full scans (nightly or on request) rescan the last
+    MAX_COMPARISON_DAYS days.
+    """
+    __tablename__ = "duplicate_scans"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scan_id = Column(String(36), unique=True, nullable=False)  # UUID, also the RQ job id
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    scan_type = Column(String(20), nullable=False)  # import, full, nightly
+    batch_id = Column(String(100), nullable=True)  # Import batch of an import scan
+
+    status = Column(String(20), nullable=False, default="pending")  # pending, processing, completed, failed
+    error_message = Column(Text, nullable=True)
+
+    transactions_scanned = Column(Integer, nullable=False, default=0)
+    groups_found = Column(Integer, nullable=False, default=0)
+    groups_created = Column(Integer, nullable=False, default=0)
+    groups_removed = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('idx_duplicate_scans_user_created', 'user_id', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<DuplicateScan(scan_id='{self.scan_id}', user_id={self.user_id}, status='{self.status}')>"
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class PatternAnalysis(Base):
+    """
+    Persisted result of one pattern analysis run.
+
+    Analyses run as background jobs and are versioned by a fingerprint of
+    the data they were computed from, so repeat views are served from here
+    and suggested rules stay available until the user applies them.
+    """
+    __tablename__ = "pattern_analyses"
+
+    id = Column(Integer, primary_key=True, index=True)
+    analysis_id = Column(String(36), unique=True, nullable=False)  # UUID, also the RQ job id
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    # Version of the analysed data plus the analysis parameters
+    fingerprint = Column(String(64), nullable=False)
+    parameters = Column(JSON, nullable=False)  # date_range_days, include_uncategorized, focus_corrections, generation_strategy
+
+    status = Column(String(20), nullable=False, default="pending")  # pending, processing, completed, failed
+    error_message = Column(Text, nullable=True)
+
+    # Results
+    summary = Column(JSON, nullable=True)  # Counts, accuracy improvements, duration
+    patterns = Column(JSON, nullable=True)  # Serialized RecognizedPattern list
+    suggested_rules = Column(JSON, nullable=True)  # Serialized PatternRule list
+    supporting_transactions = Column(JSON, nullable=True)  # Rule id -> [[first_id, last_id], ...]
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('idx_pattern_analyses_user_fingerprint', 'user_id', 'fingerprint'),
+        Index('idx_pattern_analyses_user_status', 'user_id', 'status', 'completed_at'),
+    )
+
+    def __repr__(self):
+        return f"<PatternAnalysis(analysis_id='{self.analysis_id}', user_id={self.user_id}, status='{self.status}')>"
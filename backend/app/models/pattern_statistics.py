@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class PatternStatistic(Base):
+    """
+    Co-occurrence count of one transaction feature with one category.
+
+    Sufficient statistics for pattern discovery, maintained incrementally
+    as transactions are imported, categorized, corrected and deleted.
+    """
+    __tablename__ = "pattern_statistics"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    # vendor, token, amount, weekday, recurring, category, manual, correction
+    feature_type = Column(String(20), nullable=False)
+    feature_value = Column(String(255), nullable=False, default="")
+    category = Column(String(255), nullable=False)  # "original->corrected" for corrections
+    subcategory = Column(String(100), nullable=False, default="")
+
+    # Sums over the contributing transactions
+    count = Column(Integer, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0)  # Confidence (category) or day number (recurring)
+    value_sq_sum = Column(Float, nullable=False, default=0.0)
+    first_seen = Column(DateTime, nullable=True)  # Earliest transaction date
+    last_seen = Column(DateTime, nullable=True)  # Latest transaction date
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint(
+            'user_id', 'feature_type', 'feature_value', 'category', 'subcategory',
+            name='uq_pattern_statistics_feature'
+        ),
+        Index('idx_pattern_statistics_user_type', 'user_id', 'feature_type'),
+    )
+
+    def __repr__(self):
+        return f"<PatternStatistic({self.feature_type}='{self.feature_value}', category='{self.category}', count={self.count})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, JSON, ForeignKey, Index, UniqueConstraint, DDL, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -43,9 +43,72 @@ class Transaction(Base):
     # Relationships
     user = relationship("User", back_populates="transactions")
     
+    # Composite indexes for per-user listings (keyset pagination) and filters
+    __table_args__ = (
+        Index('idx_transactions_user_date_id', user_id, date.desc(), id),
+        Index('idx_transactions_user_categorized', user_id, is_categorized),
+        Index('idx_transactions_user_batch', user_id, import_batch),
+        Index('idx_transactions_user_category_date', user_id, category, date),
+        # Trigram indexes serve ILIKE '%term%' and similarity search (PostgreSQL)
+        Index(
+            'idx_transactions_description_trgm', description,
+            postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}
+        ).ddl_if(dialect='postgresql'),
+        Index(
+            'idx_transactions_vendor_trgm', vendor,
+            postgresql_using='gin', postgresql_ops={'vendor': 'gin_trgm_ops'}
+        ).ddl_if(dialect='postgresql'),
+    )
+    
     def __repr__(self):
         return f"<Transaction(id={self.id}, amount={self.amount}, description='{self.description[:50]}...')>"
 
+# The trigram indexes need the pg_trgm extension
+event.listen(
+    Transaction.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+class ImportBatch(Base):
+    """
+    One imported file and the aggregates of its transactions.
+
+    Written when the file is ingested and kept current by operations that
+    delete transactions or change their amounts, so batch listings and
+    deletes never need to scan the transactions table.
+    """
+    __tablename__ = "import_batches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    batch_id = Column(String(100), nullable=False)  # Matches Transaction.import_batch
+    
+    # Source file
+    filename = Column(String(255), nullable=True)
+    file_hash = Column(String(64), nullable=True)  # SHA256 of the uploaded file
+    source = Column(String(50), nullable=False, default="csv")
+    status = Column(String(20), nullable=False, default="completed")  # completed, partial
+    
+    # Aggregates over the batch's transactions
+    transaction_count = Column(Integer, nullable=False, default=0)
+    rejected_count = Column(Integer, nullable=False, default=0)  # Rows not imported
+    total_amount = Column(Float, nullable=False, default=0.0)
+    first_transaction_date = Column(DateTime, nullable=True)
+    last_transaction_date = Column(DateTime, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'batch_id', name='uq_import_batches_user_batch'),
+        Index('idx_import_batches_user_created', user_id, created_at.desc()),
+    )
+    
+    def __repr__(self):
+        return f"<ImportBatch(batch_id='{self.batch_id}', transactions={self.transaction_count})>"
+
 class Category(Base):
     __tablename__ = "categories"
     
@@ -76,8 +139,44 @@ class CategorizationRule(Base):
     priority = Column(Integer, default=1)  # Higher priority rules applied first
     is_active = Column(Boolean, default=True)
     
+    # Performance counters, maintained as the rule categorizes transactions
+    match_count = Column(Integer, nullable=False, default=0, server_default='0')
+    override_count = Column(Integer, nullable=False, default=0, server_default='0')  # Matches later recategorized
+    last_matched_at = Column(DateTime(timezone=True), nullable=True)
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     def __repr__(self):
         return f"<CategorizationRule(id={self.id}, pattern='{self.pattern}', category='{self.category}')>"
+
+class RuleMatch(Base):
+    """
+    The rule that categorized a transaction.
+
+    One row per rule-categorized transaction, written at categorization
+    time. overridden_at is set once the transaction is moved to another
+    category, so rule accuracy is an aggregate over this table (or the
+    counters on CategorizationRule) rather than a replay of every rule.
+    """
+    __tablename__ = "rule_matches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    rule_id = Column(Integer, ForeignKey("categorization_rules.id", ondelete="CASCADE"), nullable=False)
+    transaction_id = Column(Integer, ForeignKey("transactions.id", ondelete="CASCADE"), nullable=False, unique=True)
+    
+    # Category the rule assigned
+    category = Column(String(100), nullable=False)
+    subcategory = Column(String(100), nullable=True)
+    
+    matched_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    overridden_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index('idx_rule_matches_rule_matched', 'rule_id', 'matched_at'),
+        Index('idx_rule_matches_user_rule', 'user_id', 'rule_id'),
+    )
+    
+    def __repr__(self):
+        return f"<RuleMatch(rule_id={self.rule_id}, transaction_id={self.transaction_id})>"
@@ -125,6 +125,30 @@ class RuleTestResponse(BaseModel):
     sample_matches: List[TransactionMatch]
     potential_conflicts: List[Dict[str, Any]]
 
+# Rule simulation schemas
+class RuleSimulationRequest(BaseModel):
+    rules: List[RuleBase] = Field(..., min_items=1, max_items=100, description="Draft rules to replay")
+    include_existing_rules: bool = Field(True, description="Replay together with the user's active rules")
+    only_uncategorized: bool = Field(False, description="Leave already categorized transactions untouched")
+    sample_limit: int = Field(50, ge=0, le=500, description="Max number of changed transactions to return")
+
+class RuleSimulationResponse(BaseModel):
+    total_transactions: int
+    eligible_transactions: int
+    rules_evaluated: int
+    transactions_matched: int
+    coverage: float
+    changed_count: int
+    newly_categorized: int
+    recategorized: int
+    uncategorized_after: int
+    category_transitions: List[Dict[str, Any]]
+    rules: List[Dict[str, Any]]
+    conflicts: List[Dict[str, Any]]
+    changes: List[Dict[str, Any]]
+    errors: List[Dict[str, Any]]
+    simulation_time_ms: int
+
 # Bulk operations schemas
 class BulkRuleCreate(BaseModel):
     rules: List[RuleCreate] = Field(..., min_items=1, max_items=100)
@@ -39,6 +39,7 @@ from app.core.config import settings
 from app.core.exceptions import ValidationException, SystemException
 from app.models.transaction import Transaction, Category, CategorizationRule
 from app.models.user import User
+from app.services.transaction_records import TxRecord, load_tx_records
 
 logger = logging.getLogger(__name__)
 
@@ -1102,11 +1103,13 @@ class AnalyticsEngine:
         """
         try:
             # Get historical data for analysis
-            transactions = self.db.query(Transaction).filter(
-                Transaction.user_id == user_id,
+            transactions = load_tx_records(
+                self.db,
+                user_id,
                 Transaction.date >= date_range.start_date,
-                Transaction.date <= date_range.end_date
-            ).order_by(Transaction.date).all()
+                Transaction.date <= date_range.end_date,
+                order_by=(Transaction.date,)
+            )
 
             if not transactions:
                 return {"insights": [], "predictions": {}, "anomalies": []}
@@ -1136,7 +1139,7 @@ class AnalyticsEngine:
             logger.error(f"Failed to get predictive insights for user {user_id}: {e}")
             return {"error": "Failed to generate predictive insights"}
 
-    async def _analyze_spending_patterns(self, transactions: List[Transaction]) -> List[Dict[str, Any]]:
+    async def _analyze_spending_patterns(self, transactions: List[TxRecord]) -> List[Dict[str, Any]]:
         """Analyze spending patterns for insights."""
         insights = []
 
@@ -1204,7 +1207,7 @@ class AnalyticsEngine:
 
         return insights
 
-    async def _generate_spending_predictions(self, transactions: List[Transaction]) -> Dict[str, Any]:
+    async def _generate_spending_predictions(self, transactions: List[TxRecord]) -> Dict[str, Any]:
         """Generate spending predictions based on historical data."""
         predictions = {}
 
@@ -1229,7 +1232,7 @@ class AnalyticsEngine:
 
         return predictions
 
-    async def _detect_spending_anomalies(self, transactions: List[Transaction]) -> List[Dict[str, Any]]:
+    async def _detect_spending_anomalies(self, transactions: List[TxRecord]) -> List[Dict[str, Any]]:
         """Detect spending anomalies in transaction data."""
         anomalies = []
 
@@ -1,6 +1,10 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.database import run_concurrently
 from app.models.transaction import Transaction, CategorizationRule
 from app.services.ml_categorization import MLCategorizationService, MLCategoryPrediction
+from app.services.rule_match_index import note_rule_match, record_rule_overrides
 from app.core.audit_logger import security_audit_logger
 import re
 import logging
@@ -9,6 +13,70 @@ from typing import Optional, Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
+
+def _merge_category_pairs(*pair_lists) -> dict:
+    """Merge (category, subcategory) rows into {category: [subcategories]}"""
+    categories = {}
+    for pairs in pair_lists:
+        for category, subcategory in pairs:
+            if not category:
+                continue
+            subcategories = categories.setdefault(category, set())
+            if subcategory:
+                subcategories.add(subcategory)
+    
+    # Convert sets to lists for JSON serialization
+    return {
+        category: list(subcategories)
+        for category, subcategories in categories.items()
+    }
+
+
+async def get_available_categories_async(user_id: int) -> dict:
+    """
+    Non-blocking variant of CategorizationService.get_available_categories
+    
+    The transaction and rule lookups are independent and run concurrently.
+    """
+    async def transaction_pairs(session: AsyncSession):
+        result = await session.execute(
+            select(Transaction.category, Transaction.subcategory).where(
+                Transaction.user_id == user_id,
+                Transaction.category.isnot(None)
+            ).distinct()
+        )
+        return result.all()
+    
+    async def rule_pairs(session: AsyncSession):
+        result = await session.execute(
+            select(CategorizationRule.category, CategorizationRule.subcategory).where(
+                CategorizationRule.user_id == user_id,
+                CategorizationRule.is_active == True
+            ).distinct()
+        )
+        return result.all()
+    
+    return _merge_category_pairs(*await run_concurrently(transaction_pairs, rule_pairs))
+
+
+async def get_categorization_performance_async(
+    db: AsyncSession,
+    user_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Non-blocking variant of CategorizationService.get_categorization_performance"""
+    query = select(Transaction).where(Transaction.user_id == user_id)
+    
+    if start_date:
+        query = query.where(Transaction.date >= start_date)
+    if end_date:
+        query = query.where(Transaction.date <= end_date)
+    
+    result = await db.execute(query)
+    return CategorizationService._summarize_categorization_performance(result.scalars().all())
+
+
 class CategorizationService:
     def __init__(self, db: Session):
         self.db = db
@@ -101,6 +169,7 @@ class CategorizationService:
                 transaction.subcategory = rule.subcategory
                 transaction.is_categorized = True
                 transaction.confidence_score = 0.9  # High confidence for rule-based
+                note_rule_match(self.db, rule, transaction)
                 return True
         
         return False
@@ -216,39 +285,22 @@ class CategorizationService:
     def get_available_categories(self, user_id: int) -> dict:
         """Get all available categories and subcategories for a user"""
         # Get categories from existing transactions
-        transactions = self.db.query(Transaction).filter(
+        transaction_pairs = self.db.query(
+            Transaction.category, Transaction.subcategory
+        ).filter(
             Transaction.user_id == user_id,
             Transaction.category.isnot(None)
-        ).all()
+        ).distinct().all()
         
         # Get categories from categorization rules
-        rules = self.db.query(CategorizationRule).filter(
+        rule_pairs = self.db.query(
+            CategorizationRule.category, CategorizationRule.subcategory
+        ).filter(
             CategorizationRule.user_id == user_id,
             CategorizationRule.is_active == True
-        ).all()
-        
-        categories = {}
-        
-        # Add categories from transactions
-        for transaction in transactions:
-            if transaction.category:
-                if transaction.category not in categories:
-                    categories[transaction.category] = set()
-                if transaction.subcategory:
-                    categories[transaction.category].add(transaction.subcategory)
+        ).distinct().all()
         
-        # Add categories from rules
-        for rule in rules:
-            if rule.category not in categories:
-                categories[rule.category] = set()
-            if rule.subcategory:
-                categories[rule.category].add(rule.subcategory)
-        
-        # Convert sets to lists for JSON serialization
-        return {
-            category: list(subcategories) 
-            for category, subcategories in categories.items()
-        }
+        return _merge_category_pairs(transaction_pairs, rule_pairs)
     
     async def update_transaction_category(self, user_id: int, transaction_id: int, 
                                         category: str, subcategory: str = None) -> dict:
@@ -282,6 +334,10 @@ class CategorizationService:
             # User confirmed ML categorization - track as correct prediction
             await self.ml_service.track_prediction_accuracy(transaction_id, user_correction=False)
         
+        # A rule's result being changed counts against the rule's accuracy
+        if is_correction:
+            record_rule_overrides(self.db, user_id, [transaction_id], category, subcategory)
+        
         # Update transaction
         original_category = transaction.category
         transaction.category = category
@@ -422,6 +478,7 @@ class CategorizationService:
                 transaction.subcategory = rule.subcategory
                 transaction.is_categorized = True
                 transaction.confidence_score = 0.9  # High confidence for rule-based
+                note_rule_match(self.db, rule, transaction)
                 categorized_count += 1
         
         self.db.commit()
@@ -900,8 +957,11 @@ class CategorizationService:
         if end_date:
             query = query.filter(Transaction.date <= end_date)
         
-        transactions = query.all()
-        
+        return self._summarize_categorization_performance(query.all())
+    
+    @staticmethod
+    def _summarize_categorization_performance(transactions: List[Transaction]) -> Dict[str, Any]:
+        """Compute categorization performance metrics for a set of transactions"""
         if not transactions:
             return {
                 'overall': {},
@@ -1,12 +1,21 @@
 import pandas as pd
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterator, Tuple
 from datetime import datetime
+from itertools import islice
 import re
 import logging
 from dataclasses import dataclass
 
+from app.core.security_scanner import csv_column_scanner, csv_script_scanner, csv_sql_scanner
+
 logger = logging.getLogger(__name__)
 
+# Stop collecting per-cell security issues once this many are found
+MAX_REPORTED_SECURITY_ISSUES = 100
+
+# Non-printable characters (tab, newline and carriage return are allowed)
+NON_PRINTABLE_PATTERN = r'[\x00-\x08\x0B\x0C\x0E-\x1F]'
+
 @dataclass
 class ParsingResult:
     """Result of CSV parsing with detailed statistics"""
@@ -78,9 +87,16 @@ class CSVParser:
             })
             return ParsingResult(transactions, errors, warnings, self._get_statistics(transactions, errors, warnings))
         
+        suspicious_rows = self._find_suspicious_rows(df)
+        if suspicious_rows:
+            logger.warning(f"Skipping {len(suspicious_rows)} CSV rows with suspicious content")
+        
         # Process each row
         for index, row in df.iterrows():
             row_number = index + 1
+            if index in suspicious_rows:
+                errors.append(suspicious_rows[index])
+                continue
             try:
                 transaction = self._parse_row(row, column_mapping, row_number)
                 if transaction:
@@ -131,109 +147,20 @@ class CSVParser:
             })
         
         # Check for suspicious column names
-        suspicious_column_patterns = [
-            r'<script.*?>',
-            r'javascript:',
-            r'<?php',
-            r'<%.*%>',
-            r'eval\s*\(',
-            r'exec\s*\(',
-            r'system\s*\(',
-            r'shell_exec\s*\(',
-        ]
-        
         for col in df.columns:
-            col_str = str(col).lower()
-            for pattern in suspicious_column_patterns:
-                if re.search(pattern, col_str, re.IGNORECASE):
-                    security_errors.append({
-                        'type': 'security_violation',
-                        'message': f"Suspicious column name detected: {col}",
-                        'details': {'column_name': col, 'pattern': pattern}
-                    })
-        
-        # Check for suspicious data patterns in first few rows (sample check)
-        sample_size = min(10, len(df))
-        if sample_size > 0:
-            sample_df = df.head(sample_size)
-            
-            for index, row in sample_df.iterrows():
-                for col, value in row.items():
-                    if pd.isna(value):
-                        continue
-                    
-                    value_str = str(value).lower()
-                    
-                    # Check for script injections
-                    script_patterns = [
-                        r'<script.*?>.*?</script>',
-                        r'javascript:',
-                        r'vbscript:',
-                        r'<?php.*?\?>',
-                        r'<%.*?%>',
-                        r'eval\s*\(',
-                        r'document\.cookie',
-                        r'window\.location',
-                        r'alert\s*\(',
-                    ]
-                    
-                    for pattern in script_patterns:
-                        if re.search(pattern, value_str, re.IGNORECASE | re.DOTALL):
-                            security_errors.append({
-                                'type': 'security_violation',
-                                'message': f"Suspicious content detected in row {index + 1}, column '{col}': {pattern}",
-                                'details': {
-                                    'row_number': index + 1,
-                                    'column': col,
-                                    'pattern': pattern,
-                                    'value_sample': value_str[:100]  # First 100 chars
-                                }
-                            })
-                    
-                    # Check for SQL injection patterns
-                    sql_patterns = [
-                        r'union\s+select',
-                        r'insert\s+into',
-                        r'delete\s+from',
-                        r'update\s+.*\s+set',
-                        r'drop\s+table',
-                        r'create\s+table',
-                        r'alter\s+table',
-                        r'exec\s*\(',
-                        r'sp_executesql',
-                        r'xp_cmdshell',
-                    ]
-                    
-                    for pattern in sql_patterns:
-                        if re.search(pattern, value_str, re.IGNORECASE):
-                            security_errors.append({
-                                'type': 'security_violation',
-                                'message': f"Potential SQL injection detected in row {index + 1}, column '{col}': {pattern}",
-                                'details': {
-                                    'row_number': index + 1,
-                                    'column': col,
-                                    'pattern': pattern,
-                                    'value_sample': value_str[:100]
-                                }
-                            })
-                    
-                    # Check for excessive binary data in text fields
-                    if isinstance(value, str) and len(value) > 0:
-                        try:
-                            # Check for high ratio of non-printable characters
-                            non_printable = sum(1 for c in value if ord(c) < 32 and c not in '\t\n\r')
-                            if len(value) > 0 and (non_printable / len(value)) > 0.1:
-                                security_errors.append({
-                                    'type': 'security_violation',
-                                    'message': f"High ratio of non-printable characters in row {index + 1}, column '{col}'",
-                                    'details': {
-                                        'row_number': index + 1,
-                                        'column': col,
-                                        'non_printable_ratio': non_printable / len(value)
-                                    }
-                                })
-                        except:
-                            pass  # Skip if unable to analyze
+            for signature in csv_column_scanner.find_all(str(col)):
+                security_errors.append({
+                    'type': 'security_violation',
+                    'message': f"Suspicious column name detected: {col}",
+                    'details': {'column_name': col, 'pattern': signature.pattern}
+                })
+        
+        # Scan text cells, stopping as soon as enough issues were found
+        cell_issues = list(islice(self._scan_cell_values(df), MAX_REPORTED_SECURITY_ISSUES + 1))
+        if len(cell_issues) > MAX_REPORTED_SECURITY_ISSUES:
+            logger.warning(f"CSV security scan stopped after {MAX_REPORTED_SECURITY_ISSUES} issues")
+            del cell_issues[MAX_REPORTED_SECURITY_ISSUES:]
+        security_errors.extend(cell_issues)
         
         # Check for column name collisions with system fields
         system_reserved_names = [
@@ -252,6 +179,77 @@ class CSVParser:
         
         return security_errors
     
+    def _text_columns(self, df: pd.DataFrame) -> Iterator[Tuple[Any, pd.Series]]:
+        """Yield (column, non-null values as str) for each text column"""
+        for col in df.columns:
+            values = df[col].dropna()
+            if values.empty or not (values.dtype == object or pd.api.types.is_string_dtype(values)):
+                continue
+            yield col, values.astype(str)
+    
+    def _scan_cell_values(self, df: pd.DataFrame) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the security issues that reject the whole file, column by column
+        
+        Each column is matched in one vectorized pass and only hits are
+        examined per signature. Scanning stops when the caller stops iterating.
+        """
+        for col, values in self._text_columns(df):
+            hits = values[csv_script_scanner.scan_series(values)]
+            for index, value in hits.items():
+                value_str = value.lower()
+                for signature in csv_script_scanner.find_all(value_str):
+                    yield {
+                        'type': 'security_violation',
+                        'message': f"Suspicious content detected in row {index + 1}, column '{col}': {signature.pattern}",
+                        'details': {
+                            'row_number': index + 1,
+                            'column': col,
+                            'pattern': signature.pattern,
+                            'value_sample': value_str[:100]  # First 100 chars
+                        }
+                    }
+            
+            # Check for excessive binary data in text fields
+            non_printable_ratio = values.str.count(NON_PRINTABLE_PATTERN) / values.str.len()
+            for index, ratio in non_printable_ratio[non_printable_ratio > 0.1].items():
+                yield {
+                    'type': 'security_violation',
+                    'message': f"High ratio of non-printable characters in row {index + 1}, column '{col}'",
+                    'details': {
+                        'row_number': index + 1,
+                        'column': col,
+                        'non_printable_ratio': ratio
+                    }
+                }
+    
+    def _find_suspicious_rows(self, df: pd.DataFrame) -> Dict[Any, Dict[str, Any]]:
+        """
+        Rows with SQL-like text, keyed by DataFrame index
+        
+        Bank descriptions can legitimately read like SQL ("UPDATE ... SET"),
+        so these rows are skipped and reported instead of rejecting the file.
+        """
+        suspicious = {}
+        for col, values in self._text_columns(df):
+            hits = values[csv_sql_scanner.scan_series(values)]
+            for index, value in hits.items():
+                if index in suspicious:
+                    continue
+                value_str = value.lower()
+                pattern = csv_sql_scanner.first_match(value_str).pattern
+                suspicious[index] = {
+                    'row_number': index + 1,
+                    'error_type': 'SuspiciousContent',
+                    'message': f"Row skipped: potential SQL injection in column '{col}': {pattern}",
+                    'details': {
+                        'column': col,
+                        'pattern': pattern,
+                        'value_sample': value_str[:100]
+                    }
+                }
+        return suspicious
+    
     def _check_for_warnings(self, transaction: Dict[str, Any], row_number: int) -> List[Dict[str, Any]]:
         """Check for potential issues and return warnings"""
         warnings = []
@@ -8,8 +8,9 @@ confidence-based scoring, and automated merge suggestions with user review workf
 from typing import List, Dict, Any, Optional, Set, Tuple, Union
 from datetime import datetime, timedelta
 from decimal import Decimal
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, text
+from sqlalchemy import or_, func, text
 from sqlalchemy.exc import SQLAlchemyError
 import json
 import logging
@@ -25,6 +26,7 @@ from app.core.exceptions import ValidationException, BusinessLogicException
 from app.core.security_utils import input_sanitizer
 from app.core.audit_logger import security_audit_logger
 from app.services.transaction_operations import TransactionBulkOperations, BulkUpdateRequest, BulkOperationType
+from app.services.transaction_records import TxRecord, load_tx_records_async
 
 
 class DuplicateConfidenceLevel(Enum):
@@ -113,10 +115,10 @@ class DuplicateDetectionService:
     with confidence scoring and automated merge suggestions.
     """
     
-    def __init__(self, db: Session, user: User):
+    def __init__(self, db: Union[Session, AsyncSession], user: User):
         self.db = db
         self.user = user
-        self.audit_logger = security_audit_logger
+        self.audit_logger = security_audit_logger.logger
         
         # Initialize fuzzy matching components
         self._stop_words = {
@@ -227,43 +229,57 @@ class DuplicateDetectionService:
                     "user_id": self.user.id
                 }
             )
-            raise BusinessLogicException(f"Failed to scan for duplicates: {str(e)}")
+            raise BusinessLogicException(f"Failed to scan for duplicates: {str(e)}", code="DUPLICATE_SCAN_FAILED")
     
-    async def _get_transactions_for_analysis(self, cutoff_date: datetime) -> List[Transaction]:
+    async def _get_transactions_for_analysis(self, cutoff_date: datetime) -> List[TxRecord]:
         """Get transactions for duplicate analysis with user isolation"""
         try:
-            transactions = self.db.query(Transaction).filter(
-                and_(
-                    Transaction.user_id == self.user.id,
-                    Transaction.date >= cutoff_date,
-                    Transaction.amount.isnot(None),
-                    func.abs(Transaction.amount) >= DuplicateDetectionLimits.MIN_AMOUNT_THRESHOLD
-                )
-            ).order_by(Transaction.date.desc()).limit(
-                DuplicateDetectionLimits.MAX_DUPLICATES_PER_SCAN
-            ).all()
-            
-            return transactions
+            return await load_tx_records_async(
+                self.db,
+                self.user.id,
+                Transaction.date >= cutoff_date,
+                Transaction.amount.isnot(None),
+                func.abs(Transaction.amount) >= DuplicateDetectionLimits.MIN_AMOUNT_THRESHOLD,
+                order_by=(Transaction.date.desc(),),
+                limit=DuplicateDetectionLimits.MAX_DUPLICATES_PER_SCAN
+            )
             
         except SQLAlchemyError as e:
-            raise BusinessLogicException(f"Database error while fetching transactions: {str(e)}")
+            raise BusinessLogicException(
+                f"Database error while fetching transactions: {str(e)}", code="DUPLICATE_SCAN_FAILED"
+            )
     
     async def _find_duplicate_matches(
         self, 
-        transactions: List[Transaction], 
-        min_confidence: float
+        transactions: List[TxRecord], 
+        min_confidence: float,
+        candidate_ids: Optional[Set[int]] = None
     ) -> List[DuplicateMatch]:
-        """Find potential duplicate matches using multiple algorithms"""
+        """
+        Find potential duplicate matches using multiple algorithms
+        
+        Args:
+            transactions: Transactions to compare with each other
+            min_confidence: Minimum confidence score of a match
+            candidate_ids: Only compare pairs involving one of these transactions
+            
+        Returns:
+            Matches between transactions at most a week apart
+        """
         matches = []
         
         # Sort transactions by date for efficient comparison
         sorted_transactions = sorted(transactions, key=lambda t: t.date)
         
         for i, txn1 in enumerate(sorted_transactions):
-            for j, txn2 in enumerate(sorted_transactions[i+1:], i+1):
-                # Skip if transactions are too far apart
+            for j in range(i + 1, len(sorted_transactions)):
+                txn2 = sorted_transactions[j]
+                # Later transactions are only further apart
                 date_diff = abs((txn1.date - txn2.date).days)
                 if date_diff > 7:  # Only compare transactions within a week
+                    break
+                
+                if candidate_ids is not None and txn1.id not in candidate_ids and txn2.id not in candidate_ids:
                     continue
                 
                 # Calculate duplicate confidence using multiple algorithms
@@ -288,8 +304,8 @@ class DuplicateDetectionService:
     
     async def _calculate_duplicate_confidence(
         self, 
-        txn1: Transaction, 
-        txn2: Transaction
+        txn1: TxRecord, 
+        txn2: TxRecord
     ) -> Tuple[float, DuplicateMatchType, List[str]]:
         """Calculate confidence score for potential duplicate using multiple factors"""
         reasons = []
@@ -473,7 +489,7 @@ class DuplicateDetectionService:
     async def _create_duplicate_groups(
         self, 
         matches: List[DuplicateMatch],
-        transactions: List[Transaction]
+        transactions: List[TxRecord]
     ) -> List[DuplicateGroup]:
         """Group duplicate matches into logical groups"""
         # Create transaction lookup
@@ -545,7 +561,7 @@ class DuplicateDetectionService:
         
         return groups
     
-    def _transaction_to_dict(self, transaction: Transaction) -> Dict[str, Any]:
+    def _transaction_to_dict(self, transaction: Union[Transaction, TxRecord]) -> Dict[str, Any]:
         """Convert transaction to dictionary for serialization"""
         return {
             'id': transaction.id,
@@ -655,7 +671,8 @@ class DuplicateDetectionService:
         
         if result.failed_count > 0:
             raise BusinessLogicException(
-                f"Failed to merge {result.failed_count} transactions: {result.errors}"
+                f"Failed to merge {result.failed_count} transactions: {result.errors}",
+                code="DUPLICATE_MERGE_FAILED"
             )
         
         return {
@@ -710,4 +727,4 @@ class DuplicateDetectionService:
                 f"Failed to get duplicate statistics",
                 extra={'error': str(e), 'user_id': self.user.id}
             )
-            raise BusinessLogicException(f"Failed to get duplicate statistics: {str(e)}")
\ No newline at end of file
+            raise BusinessLogicException(f"Failed to get duplicate statistics: {str(e)}", code="DUPLICATE_STATS_FAILED")
\ No newline at end of file
@@ -0,0 +1,666 @@
+"""
+Background Duplicate Scans for FinGood
+
+Duplicate detection runs as background jobs on the RQ queues and its
+groups are stored in duplicate_groups, so the duplicates endpoints only
+read results:
+
+- after each import, the imported rows are compared against the
+  transactions in the date window they overlap (a week either side);
+  pairs of two older transactions are not compared again
+- nightly, every user with recent transactions gets a full scan of the
+  last MAX_COMPARISON_DAYS days; users are scanned in a process pool
+- a user can also request a full scan of their own data
+
+Scans are not capped by row count. A newly found match that touches a
+stored group is merged into it; the merged group gets a new key and is
+pending review again. A group found unchanged keeps its review status.
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.core.background_jobs import job_manager, JobPriority, JobResult
+from app.core.config import settings
+from app.core.db_routing import get_background_session
+from app.core.exceptions import SystemException
+from app.models.duplicate_group import DuplicateGroupRecord, DuplicateScan
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.duplicate_detection import (
+    DuplicateDetectionLimits, DuplicateDetectionService, DuplicateGroup, DuplicateMatch, DuplicateReviewStatus
+)
+from app.services.transaction_records import TxRecord, load_tx_records
+
+logger = logging.getLogger(__name__)
+
+# Transactions further apart than this are never compared
+MATCH_WINDOW_DAYS = 7
+
+# A queued or running scan older than this is considered lost
+SCAN_JOB_TIMEOUT_MINUTES = 60
+NIGHTLY_JOB_TIMEOUT_HOURS = 6
+
+SCAN_IMPORT = "import"
+SCAN_FULL = "full"
+SCAN_NIGHTLY = "nightly"
+
+PENDING_STATUSES = ("pending", "processing")
+
+# Groups whose duplicates were deleted; never rebuilt or replaced by a scan
+_CLOSED_STATUSES = (DuplicateReviewStatus.MERGED.value, DuplicateReviewStatus.AUTO_MERGED.value)
+
+
+def group_key(transaction_ids: Iterable[int]) -> str:
+    """Key of a duplicate group: SHA-256 of its sorted member ids"""
+    return hashlib.sha256(",".join(str(i) for i in sorted(set(transaction_ids))).encode()).hexdigest()
+
+
+def _analysis_conditions() -> List[Any]:
+    """Filters of the transactions duplicate detection considers"""
+    return [
+        Transaction.amount.isnot(None),
+        func.abs(Transaction.amount) >= DuplicateDetectionLimits.MIN_AMOUNT_THRESHOLD
+    ]
+
+
+def _find_scan(db: Session, user_id: int, scan_type: str, batch_id: Optional[str]) -> Optional[DuplicateScan]:
+    """Queued or running scan of the same kind that has not been lost"""
+    lost_before = datetime.now(timezone.utc) - timedelta(minutes=SCAN_JOB_TIMEOUT_MINUTES)
+    scans = db.query(DuplicateScan).filter(
+        DuplicateScan.user_id == user_id,
+        DuplicateScan.scan_type == scan_type,
+        DuplicateScan.batch_id == batch_id if batch_id is not None else DuplicateScan.batch_id.is_(None),
+        DuplicateScan.status.in_(PENDING_STATUSES)
+    ).order_by(DuplicateScan.id.desc()).all()
+    for scan in scans:
+        created_at = scan.created_at
+        if created_at is not None and created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        if created_at is None or created_at >= lost_before:
+            return scan
+    return None
+
+
+def request_duplicate_scan(
+    db: Session,
+    user_id: int,
+    scan_type: str = SCAN_FULL,
+    batch_id: Optional[str] = None,
+    priority: JobPriority = JobPriority.LOW
+) -> Tuple[DuplicateScan, bool]:
+    """
+    Queue a duplicate scan unless the same scan is already queued or running
+
+    Args:
+        db: Session
+        user_id: User to scan
+        scan_type: SCAN_IMPORT (requires batch_id) or SCAN_FULL
+        batch_id: Import batch whose rows an import scan compares
+        priority: Queue for the scan job
+
+    Returns:
+        (scan, queued): queued is True if a new job was enqueued
+
+    Raises:
+        SystemException: The job could not be queued
+    """
+    existing = _find_scan(db, user_id, scan_type, batch_id)
+    if existing is not None:
+        return existing, False
+
+    scan = DuplicateScan(
+        scan_id=str(uuid.uuid4()),
+        user_id=user_id,
+        scan_type=scan_type,
+        batch_id=batch_id,
+        status="pending"
+    )
+    db.add(scan)
+    db.commit()
+
+    job_data = {
+        'scan_id': scan.scan_id,
+        'user_id': user_id,
+        'created_at': datetime.utcnow().isoformat()
+    }
+    try:
+        queue = job_manager.queues[priority]
+        queue.enqueue(
+            process_duplicate_scan_job,
+            job_data,
+            job_id=scan.scan_id,
+            job_timeout=f'{SCAN_JOB_TIMEOUT_MINUTES}m',
+            meta={'user_id': user_id, 'job_type': 'duplicate_scan', 'scan_type': scan_type}
+        )
+    except Exception as e:
+        scan.status = "failed"
+        scan.error_message = "Duplicate scan could not be queued"
+        db.commit()
+        logger.error(f"Failed to queue duplicate scan {scan.scan_id}: {e}")
+        raise SystemException("Duplicate scan could not be queued", code="DUPLICATE_SCAN_QUEUE_FAILED")
+
+    logger.info(f"Queued {scan_type} duplicate scan {scan.scan_id} for user {user_id}")
+    return scan, True
+
+
+def queue_import_duplicate_scan(db: Session, user_id: int, batch_id: str) -> None:
+    """
+    Queue the duplicate scan of a committed import; failures are only logged
+
+    The nightly scan picks up imports whose scan could not be queued.
+    """
+    try:
+        request_duplicate_scan(db, user_id, SCAN_IMPORT, batch_id=batch_id)
+    except Exception as e:
+        logger.warning(f"Duplicate scan for import {batch_id} of user {user_id} not queued: {e}")
+
+
+def get_scan(db: Session, user_id: int, scan_id: str) -> Optional[DuplicateScan]:
+    """A user's duplicate scan by id"""
+    return db.query(DuplicateScan).filter(
+        DuplicateScan.user_id == user_id,
+        DuplicateScan.scan_id == scan_id
+    ).first()
+
+
+def get_latest_scan(db: Session, user_id: int) -> Optional[DuplicateScan]:
+    """A user's most recently completed duplicate scan"""
+    return db.query(DuplicateScan).filter(
+        DuplicateScan.user_id == user_id,
+        DuplicateScan.status == "completed"
+    ).order_by(DuplicateScan.completed_at.desc(), DuplicateScan.id.desc()).first()
+
+
+def list_duplicate_groups(
+    db: Session,
+    user_id: int,
+    min_confidence: float = DuplicateDetectionLimits.MIN_CONFIDENCE_THRESHOLD,
+    review_statuses: Optional[List[str]] = None,
+    date_from: Optional[datetime] = None
+) -> List[DuplicateGroupRecord]:
+    """
+    A user's stored duplicate groups, most confident first
+
+    Args:
+        db: Session
+        user_id: Owner
+        min_confidence: Minimum group confidence
+        review_statuses: Statuses to include (all if omitted)
+        date_from: Only groups with a member on or after this date
+
+    Returns:
+        DuplicateGroupRecord list
+    """
+    query = db.query(DuplicateGroupRecord).filter(
+        DuplicateGroupRecord.user_id == user_id,
+        DuplicateGroupRecord.confidence_score >= min_confidence
+    )
+    if review_statuses:
+        query = query.filter(DuplicateGroupRecord.review_status.in_(review_statuses))
+    if date_from is not None:
+        query = query.filter(DuplicateGroupRecord.date_end >= date_from)
+    return query.order_by(DuplicateGroupRecord.confidence_score.desc(), DuplicateGroupRecord.id).all()
+
+
+def set_review_status(db: Session, user_id: int, group_id: int, review_status: DuplicateReviewStatus) -> Optional[DuplicateGroupRecord]:
+    """
+    Record the review of a stored group (not committed)
+
+    Args:
+        db: Session
+        user_id: Owner
+        group_id: DuplicateGroupRecord.id
+        review_status: New status
+
+    Returns:
+        The updated group, or None if the user has no such group
+    """
+    group = db.query(DuplicateGroupRecord).filter(
+        DuplicateGroupRecord.user_id == user_id,
+        DuplicateGroupRecord.id == group_id
+    ).first()
+    if group is None:
+        return None
+    group.review_status = review_status.value
+    group.reviewed_at = datetime.now(timezone.utc)
+    return group
+
+
+def to_duplicate_group(record: DuplicateGroupRecord) -> DuplicateGroup:
+    """Stored group as the service's DuplicateGroup (group_id is the record id)"""
+    return DuplicateGroup(
+        group_id=str(record.id),
+        transactions=record.transactions,
+        confidence_score=record.confidence_score,
+        primary_transaction_id=record.primary_transaction_id,
+        duplicate_count=len(record.transaction_ids),
+        total_amount=Decimal(str(record.total_amount)),
+        date_range={
+            'start_date': record.date_start.isoformat(),
+            'end_date': record.date_end.isoformat()
+        },
+        review_status=DuplicateReviewStatus(record.review_status)
+    )
+
+
+def duplicate_statistics(db: Session, user_id: int) -> Dict[str, Any]:
+    """
+    Statistics of a user's open (pending or reviewed) stored groups
+
+    Same keys as DuplicateDetectionService.get_duplicate_statistics, from
+    one grouped query over duplicate_groups.
+    """
+    open_statuses = (DuplicateReviewStatus.PENDING.value, DuplicateReviewStatus.REVIEWED.value)
+    rows = db.query(
+        DuplicateGroupRecord.match_type,
+        func.count(DuplicateGroupRecord.id),
+        func.sum(case((DuplicateGroupRecord.confidence_score >= 0.85, 1), else_=0)),
+        func.sum(case((DuplicateGroupRecord.confidence_score >= 0.8, 1), else_=0)),
+        func.sum(case((DuplicateGroupRecord.confidence_score >= 0.7, 1), else_=0)),
+        func.sum(case((DuplicateGroupRecord.confidence_score >= 0.5, 1), else_=0)),
+        func.sum(case(
+            (DuplicateGroupRecord.confidence_score >= DuplicateDetectionLimits.AUTO_MERGE_THRESHOLD, 1), else_=0
+        ))
+    ).filter(
+        DuplicateGroupRecord.user_id == user_id,
+        DuplicateGroupRecord.review_status.in_(open_statuses)
+    ).group_by(DuplicateGroupRecord.match_type).all()
+
+    totals = [0] * 6
+    match_types = {}
+    for match_type, *counts in rows:
+        counts = [int(count or 0) for count in counts]
+        match_types[match_type] = counts[0]
+        totals = [total + count for total, count in zip(totals, counts)]
+    total, very_high, high_confidence, at_least_high, at_least_medium, auto_merge = totals
+
+    latest_scan = get_latest_scan(db, user_id)
+    return {
+        'total_transactions_analyzed': latest_scan.transactions_scanned if latest_scan else 0,
+        'potential_duplicates_found': total,
+        'high_confidence_duplicates': high_confidence,
+        'auto_merge_candidates': auto_merge,
+        'match_types': match_types,
+        'confidence_distribution': {
+            'very_high': very_high,
+            'high': at_least_high - very_high,
+            'medium': at_least_medium - at_least_high,
+            'low': total - at_least_medium
+        },
+        'last_scan_at': latest_scan.completed_at.isoformat() if latest_scan and latest_scan.completed_at else None
+    }
+
+
+class _Components:
+    """Union-find over transaction ids"""
+
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+
+    def find(self, transaction_id: int) -> int:
+        self.parent.setdefault(transaction_id, transaction_id)
+        root = transaction_id
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[transaction_id] != root:
+            self.parent[transaction_id], transaction_id = root, self.parent[transaction_id]
+        return root
+
+    def union(self, first: int, second: int) -> None:
+        self.parent[self.find(first)] = self.find(second)
+
+    def groups(self) -> List[List[int]]:
+        members: Dict[int, List[int]] = {}
+        for transaction_id in list(self.parent):
+            members.setdefault(self.find(transaction_id), []).append(transaction_id)
+        return list(members.values())
+
+
+def _store_groups(
+    db: Session,
+    service: DuplicateDetectionService,
+    user_id: int,
+    records: Dict[int, TxRecord],
+    matches: List[DuplicateMatch],
+    retire: List[DuplicateGroupRecord]
+) -> Tuple[int, int, int]:
+    """
+    Merge new matches into the stored groups (not committed)
+
+    Args:
+        db: Session
+        service: Scoring service of the user
+        user_id: Owner
+        records: Scanned transactions by id
+        matches: Matches found by the scan
+        retire: Stored groups the scan covered; removed unless found again
+
+    Returns:
+        (groups found, groups created, groups removed)
+    """
+    components = _Components()
+    # Strongest evidence per transaction: (confidence, primary id, match type)
+    evidence: Dict[int, Tuple[float, int, str]] = {}
+
+    def note(transaction_id: int, confidence: float, primary_id: int, match_type: str) -> None:
+        if transaction_id not in evidence or confidence > evidence[transaction_id][0]:
+            evidence[transaction_id] = (confidence, primary_id, match_type)
+
+    for match in matches:
+        components.union(match.primary_transaction_id, match.duplicate_transaction_id)
+        for transaction_id in (match.primary_transaction_id, match.duplicate_transaction_id):
+            note(transaction_id, match.confidence_score, match.primary_transaction_id, match.match_type.value)
+
+    # Stored groups sharing a transaction with a match are merged with it
+    touched: List[DuplicateGroupRecord] = []
+    matched_ids = set(components.parent)
+    if matched_ids:
+        dates = [records[i].date for i in matched_ids if i in records]
+        candidates = db.query(DuplicateGroupRecord).filter(
+            DuplicateGroupRecord.user_id == user_id,
+            DuplicateGroupRecord.review_status.notin_(_CLOSED_STATUSES),
+            DuplicateGroupRecord.date_start <= max(dates) + timedelta(days=MATCH_WINDOW_DAYS),
+            DuplicateGroupRecord.date_end >= min(dates) - timedelta(days=MATCH_WINDOW_DAYS)
+        ).all() if dates else []
+        for group in candidates:
+            if matched_ids.intersection(group.transaction_ids):
+                touched.append(group)
+                for transaction_id in group.transaction_ids:
+                    components.union(group.transaction_ids[0], transaction_id)
+                    note(transaction_id, group.confidence_score, group.primary_transaction_id, group.match_type)
+
+    # Members of merged groups outside the scanned rows; deleted ones drop out
+    missing = [i for i in components.parent if i not in records]
+    if missing:
+        for record in load_tx_records(db, user_id, Transaction.id.in_(missing)):
+            records[record.id] = record
+
+    existing = {group.group_key: group for group in touched + retire}
+    found = created = 0
+    for member_ids in components.groups():
+        members = sorted((records[i] for i in member_ids if i in records), key=lambda r: (r.date, r.id))
+        if len(members) < 2:
+            continue
+        found += 1
+        ids = [record.id for record in members]
+        key = group_key(ids)
+        confidence, primary_id, match_type = max(evidence[i] for i in ids if i in evidence)
+        if primary_id not in ids:
+            primary_id = ids[0]
+
+        group = existing.pop(key, None)
+        if group is None:
+            group = db.query(DuplicateGroupRecord).filter(
+                DuplicateGroupRecord.user_id == user_id,
+                DuplicateGroupRecord.group_key == key
+            ).first()
+        if group is None:
+            group = DuplicateGroupRecord(
+                user_id=user_id,
+                group_key=key,
+                review_status=DuplicateReviewStatus.PENDING.value
+            )
+            db.add(group)
+            created += 1
+
+        group.transaction_ids = sorted(ids)
+        group.primary_transaction_id = primary_id
+        group.transactions = [service._transaction_to_dict(record) for record in members]
+        group.confidence_score = confidence
+        group.match_type = match_type
+        group.total_amount = float(sum(record.amount for record in members))
+        group.date_start = members[0].date
+        group.date_end = members[-1].date
+
+    removed = 0
+    for group in existing.values():
+        db.delete(group)
+        removed += 1
+    return found, created, removed
+
+
+def run_duplicate_scan(db: Session, scan: DuplicateScan) -> None:
+    """
+    Execute a queued scan and store its groups (commits)
+
+    Args:
+        db: Session
+        scan: Pending DuplicateScan
+    """
+    user = db.query(User).filter(User.id == scan.user_id).first()
+    if not user:
+        raise ValueError("User not found")
+
+    scan.status = "processing"
+    scan.started_at = datetime.now(timezone.utc)
+    db.commit()
+
+    service = DuplicateDetectionService(db, user)
+    min_confidence = DuplicateDetectionLimits.MIN_CONFIDENCE_THRESHOLD
+    retire: List[DuplicateGroupRecord] = []
+
+    if scan.scan_type == SCAN_IMPORT:
+        new_records = load_tx_records(
+            db, user.id, Transaction.import_batch == scan.batch_id, *_analysis_conditions()
+        )
+        scanned: List[TxRecord] = []
+        if new_records:
+            window = timedelta(days=MATCH_WINDOW_DAYS)
+            scanned = load_tx_records(
+                db, user.id,
+                Transaction.date >= min(record.date for record in new_records) - window,
+                Transaction.date <= max(record.date for record in new_records) + window,
+                *_analysis_conditions()
+            )
+        candidate_ids: Optional[Set[int]] = {record.id for record in new_records}
+    else:
+        window_start = datetime.utcnow() - timedelta(days=DuplicateDetectionLimits.MAX_COMPARISON_DAYS)
+        scanned = load_tx_records(db, user.id, Transaction.date >= window_start, *_analysis_conditions())
+        candidate_ids = None
+        # Groups entirely inside the window are rebuilt from this scan
+        retire = db.query(DuplicateGroupRecord).filter(
+            DuplicateGroupRecord.user_id == user.id,
+            DuplicateGroupRecord.review_status.notin_(_CLOSED_STATUSES),
+            DuplicateGroupRecord.date_start >= window_start
+        ).all()
+
+    matches = asyncio.run(service._find_duplicate_matches(scanned, min_confidence, candidate_ids)) if scanned else []
+    found, created, removed = _store_groups(
+        db, service, user.id, {record.id: record for record in scanned}, matches, retire
+    )
+
+    scan.transactions_scanned = len(scanned)
+    scan.groups_found = found
+    scan.groups_created = created
+    scan.groups_removed = removed
+    scan.status = "completed"
+    scan.completed_at = datetime.now(timezone.utc)
+    db.commit()
+
+
+def _execute_scan(db: Session, scan_id: str) -> DuplicateScan:
+    """Run a scan by id, recording a failure on the scan row"""
+    scan = db.query(DuplicateScan).filter(DuplicateScan.scan_id == scan_id).first()
+    if not scan:
+        raise ValueError("Duplicate scan not found")
+    try:
+        run_duplicate_scan(db, scan)
+    except Exception as e:
+        db.rollback()
+        scan.status = "failed"
+        scan.error_message = str(e)
+        scan.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        raise
+    return scan
+
+
+# Background job worker functions
+def process_duplicate_scan_job(job_data: Dict[str, Any]) -> JobResult:
+    """
+    Background worker function for one user's duplicate scan.
+
+    Args:
+        job_data: scan_id and user_id of the queued scan
+
+    Returns:
+        JobResult: Structured result with success/failure information
+    """
+    start_time = datetime.utcnow()
+    scan_id = job_data['scan_id']
+    logger.info(f"Starting duplicate scan job {scan_id} for user {job_data['user_id']}")
+
+    db = get_background_session()
+    try:
+        scan = _execute_scan(db, scan_id)
+        logger.info(
+            f"Completed duplicate scan job {scan_id}: {scan.transactions_scanned} transactions, "
+            f"{scan.groups_found} groups ({scan.groups_created} new, {scan.groups_removed} removed)"
+        )
+        return JobResult(
+            success=True,
+            data={
+                'scan_id': scan_id,
+                'transactions_scanned': scan.transactions_scanned,
+                'groups_found': scan.groups_found
+            },
+            processing_time=(datetime.utcnow() - start_time).total_seconds()
+        )
+    except Exception as e:
+        logger.error(f"Duplicate scan job {scan_id} failed: {e}")
+        return JobResult(
+            success=False,
+            error_message=str(e),
+            error_code="DUPLICATE_SCAN_FAILED",
+            correlation_id=scan_id,
+            processing_time=(datetime.utcnow() - start_time).total_seconds()
+        )
+    finally:
+        db.close()
+
+
+def _scan_in_process(scan_id: str) -> Tuple[str, Optional[str]]:
+    """Process pool entry point: run one scan in a fresh session"""
+    db = get_background_session()
+    try:
+        _execute_scan(db, scan_id)
+        return scan_id, None
+    except Exception as e:
+        return scan_id, str(e)
+    finally:
+        db.close()
+
+
+def process_nightly_duplicate_scan_job(job_data: Dict[str, Any]) -> JobResult:
+    """
+    Background worker function scanning every user with recent transactions.
+
+    Users are scanned in a pool of settings.DUPLICATE_SCAN_WORKERS processes
+    (in this process when 0). The next nightly run is scheduled when done.
+
+    Args:
+        job_data: run_id of the nightly run
+
+    Returns:
+        JobResult: Structured result with success/failure information
+    """
+    start_time = datetime.utcnow()
+    run_id = job_data.get('run_id', 'nightly')
+    logger.info(f"Starting nightly duplicate scan {run_id}")
+
+    try:
+        db = get_background_session()
+        try:
+            window_start = datetime.utcnow() - timedelta(days=DuplicateDetectionLimits.MAX_COMPARISON_DAYS)
+            user_ids = [row[0] for row in db.query(Transaction.user_id).filter(
+                Transaction.date >= window_start
+            ).distinct().all()]
+
+            scan_ids = []
+            for user_id in user_ids:
+                scan = DuplicateScan(
+                    scan_id=str(uuid.uuid4()),
+                    user_id=user_id,
+                    scan_type=SCAN_NIGHTLY,
+                    status="pending"
+                )
+                db.add(scan)
+                scan_ids.append(scan.scan_id)
+            db.commit()
+        finally:
+            db.close()
+
+        if settings.DUPLICATE_SCAN_WORKERS > 0 and len(scan_ids) > 1:
+            # Spawned workers do not inherit the worker's connections or locks
+            with ProcessPoolExecutor(
+                max_workers=settings.DUPLICATE_SCAN_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                outcomes = list(pool.map(_scan_in_process, scan_ids))
+        else:
+            outcomes = [_scan_in_process(scan_id) for scan_id in scan_ids]
+
+        failures = {scan_id: error for scan_id, error in outcomes if error}
+        for scan_id, error in failures.items():
+            logger.error(f"Nightly duplicate scan {scan_id} failed: {error}")
+
+        logger.info(f"Completed nightly duplicate scan {run_id}: {len(scan_ids)} users, {len(failures)} failed")
+        return JobResult(
+            success=not failures,
+            data={'run_id': run_id, 'users_scanned': len(scan_ids), 'failed_scans': list(failures)},
+            error_message=f"{len(failures)} user scans failed" if failures else None,
+            processing_time=(datetime.utcnow() - start_time).total_seconds()
+        )
+    except Exception as e:
+        logger.error(f"Nightly duplicate scan {run_id} failed: {e}")
+        return JobResult(
+            success=False,
+            error_message=str(e),
+            error_code="NIGHTLY_DUPLICATE_SCAN_FAILED",
+            correlation_id=run_id,
+            processing_time=(datetime.utcnow() - start_time).total_seconds()
+        )
+    finally:
+        schedule_nightly_duplicate_scan()
+
+
+def schedule_nightly_duplicate_scan() -> Optional[str]:
+    """
+    Schedule the next nightly duplicate scan on the RQ scheduler
+
+    The job id is derived from the run date, so every worker calling this
+    at startup schedules the same job once.
+
+    Returns:
+        The scheduled job id, or None if it could not be scheduled
+    """
+    now = datetime.now(timezone.utc)
+    run_at = now.replace(hour=settings.DUPLICATE_NIGHTLY_SCAN_HOUR, minute=0, second=0, microsecond=0)
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    run_id = f"nightly_duplicate_scan_{run_at:%Y%m%d}"
+    try:
+        job_manager.queues[JobPriority.LOW].enqueue_at(
+            run_at,
+            process_nightly_duplicate_scan_job,
+            {'run_id': run_id},
+            job_id=run_id,
+            job_timeout=f'{NIGHTLY_JOB_TIMEOUT_HOURS}h',
+            meta={'job_type': 'duplicate_scan', 'scan_type': SCAN_NIGHTLY}
+        )
+    except Exception as e:
+        logger.error(f"Failed to schedule nightly duplicate scan: {e}")
+        return None
+    logger.info(f"Scheduled nightly duplicate scan {run_id} at {run_at.isoformat()}")
+    return run_id
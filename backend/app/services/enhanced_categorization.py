@@ -4,7 +4,10 @@ from app.models.transaction import Transaction, CategorizationRule, Category
 from app.schemas.category import (
     RuleTestRequest, RuleTestResponse, TransactionMatch,
     RuleValidationResult, RuleConflictInfo, PerformanceAnalytics,
-    RulePerformance, BulkOperationResponse
+    RulePerformance, BulkOperationResponse, RuleSimulationRequest
+)
+from app.services.rule_simulation import (
+    SimulatedRule, active_rules_for_simulation, load_snapshot, rule_mask, simulate_rules
 )
 from typing import List, Dict, Any, Optional, Tuple
 import re
@@ -12,6 +15,7 @@ import logging
 from datetime import datetime, timedelta
 from collections import defaultdict
 import json
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -73,44 +77,36 @@ class EnhancedCategorizationService:
     
     def test_rule(self, user_id: int, test_request: RuleTestRequest) -> RuleTestResponse:
         """Test a rule against existing transactions"""
-        # Get user's transactions
-        query = self.db.query(Transaction).filter(Transaction.user_id == user_id)
-        
         # Apply specific test filters if provided
+        filters = []
         if test_request.test_description:
-            query = query.filter(
-                Transaction.description.ilike(f"%{test_request.test_description}%")
-            )
+            filters.append(Transaction.description.ilike(f"%{test_request.test_description}%"))
         
         if test_request.test_vendor:
-            query = query.filter(
-                Transaction.vendor.ilike(f"%{test_request.test_vendor}%")
-            )
+            filters.append(Transaction.vendor.ilike(f"%{test_request.test_vendor}%"))
         
-        all_transactions = query.all()
-        total_transactions = len(all_transactions)
+        # Columnar snapshot of the user's transactions, matched in one pass
+        snapshot = load_snapshot(self.db, user_id, *filters)
+        total_transactions = len(snapshot)
         
-        # Find matches
-        matches = []
-        for transaction in all_transactions:
-            if self._pattern_matches(
-                test_request.pattern, 
-                test_request.pattern_type, 
-                transaction
-            ):
-                matches.append(transaction)
+        try:
+            matched = rule_mask(snapshot, test_request.pattern, test_request.pattern_type)
+        except re.error as e:
+            logger.warning(f"Pattern matching error: {str(e)}")
+            matched = np.zeros(total_transactions, dtype=bool)
+        matches = snapshot[matched]
         
         # Prepare sample matches
         sample_matches = []
-        for transaction in matches[:test_request.limit]:
+        for row in matches.head(test_request.limit).itertuples(index=False):
             match = TransactionMatch(
-                id=transaction.id,
-                description=transaction.description,
-                vendor=transaction.vendor,
-                amount=transaction.amount,
-                date=transaction.date,
-                current_category=transaction.category,
-                current_subcategory=transaction.subcategory,
+                id=int(row.id),
+                description=row.description,
+                vendor=row.vendor,
+                amount=float(row.amount),
+                date=row.date,
+                current_category=row.category,
+                current_subcategory=row.subcategory,
                 confidence=0.95 if test_request.pattern_type == 'exact' else 0.8
             )
             sample_matches.append(match)
@@ -132,51 +128,44 @@ class EnhancedCategorizationService:
             potential_conflicts=[conflict.dict() for conflict in conflicts]
         )
     
+    def simulate_rules(self, user_id: int, simulation_request: RuleSimulationRequest) -> Dict[str, Any]:
+        """Replay draft rules (with the user's active rules) against existing transactions"""
+        rules = [
+            SimulatedRule(
+                key=f"draft:{index}",
+                pattern=draft.pattern,
+                pattern_type=draft.pattern_type,
+                category=draft.category,
+                subcategory=draft.subcategory,
+                priority=draft.priority
+            )
+            for index, draft in enumerate(simulation_request.rules)
+        ]
+        if simulation_request.include_existing_rules:
+            rules = active_rules_for_simulation(self.db, user_id) + rules
+        
+        snapshot = load_snapshot(self.db, user_id)
+        return simulate_rules(
+            snapshot,
+            rules,
+            only_uncategorized=simulation_request.only_uncategorized,
+            sample_limit=simulation_request.sample_limit
+        )
+    
     def get_rule_performance_analytics(self, user_id: int) -> PerformanceAnalytics:
         """Get comprehensive rule performance analytics"""
-        # Get all rules for user
+        # Get all rules for user; match counters are maintained by the rule match index
         rules = self.db.query(CategorizationRule).filter(
             CategorizationRule.user_id == user_id
         ).all()
         
-        # Get categorized transactions
-        categorized_transactions = self.db.query(Transaction).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.is_categorized == True,
-                Transaction.category.isnot(None)
-            )
-        ).all()
-        
-        rule_performances = []
+        rule_performances = self._rule_performances(rules)
         category_distribution = defaultdict(int)
         total_matches = 0
         
-        for rule in rules:
-            matches = self._get_rule_matches(rule, categorized_transactions)
-            accuracy_rate = self._calculate_rule_accuracy(rule, matches)
-            
-            last_match_date = None
-            if matches:
-                last_match_date = max(t.updated_at or t.created_at for t in matches)
-            
-            effectiveness_score = self._calculate_effectiveness_score(
-                rule, len(matches), accuracy_rate
-            )
-            
-            performance = RulePerformance(
-                rule_id=rule.id,
-                rule_pattern=rule.pattern,
-                rule_category=rule.category,
-                matches_count=len(matches),
-                accuracy_rate=accuracy_rate,
-                last_match_date=last_match_date,
-                effectiveness_score=effectiveness_score
-            )
-            rule_performances.append(performance)
-            
-            category_distribution[rule.category] += len(matches)
-            total_matches += len(matches)
+        for rule, performance in zip(rules, rule_performances):
+            category_distribution[rule.category] += performance.matches_count
+            total_matches += performance.matches_count
         
         # Sort by effectiveness
         rule_performances.sort(key=lambda x: x.effectiveness_score, reverse=True)
@@ -294,9 +283,11 @@ class EnhancedCategorizationService:
             CategorizationRule.is_active == True
         ).order_by(CategorizationRule.priority.desc()).all()
         
-        # Get performance data
-        analytics = self.get_rule_performance_analytics(user_id)
-        performance_map = {p.rule_id: p for p in analytics.top_performing_rules}
+        # Get performance data from the rule counters
+        effectiveness = {
+            performance.rule_id: performance.effectiveness_score
+            for performance in self._rule_performances(rules)
+        }
         
         optimized_count = 0
         changes = []
@@ -304,7 +295,7 @@ class EnhancedCategorizationService:
         # Sort rules by effectiveness score
         rules_by_effectiveness = sorted(
             rules, 
-            key=lambda r: performance_map.get(r.id, type('obj', (object,), {'effectiveness_score': 0})()).effectiveness_score,
+            key=lambda r: effectiveness.get(r.id, 0),
             reverse=True
         )
         
@@ -433,57 +424,54 @@ class EnhancedCategorizationService:
         return False
     
     def _estimate_rule_matches(self, user_id: int, pattern: str, pattern_type: str) -> int:
-        """Estimate how many transactions would match this rule"""
-        transactions = self.db.query(Transaction).filter(
-            Transaction.user_id == user_id
-        ).limit(1000).all()  # Sample for estimation
-        
-        matches = 0
-        for transaction in transactions:
-            if self._pattern_matches(pattern, pattern_type, transaction):
-                matches += 1
-        
-        return matches
+        """Count the transactions this rule would match"""
+        snapshot = load_snapshot(self.db, user_id)
+        try:
+            return int(rule_mask(snapshot, pattern, pattern_type).sum())
+        except re.error as e:
+            logger.warning(f"Pattern matching error: {str(e)}")
+            return 0
     
     def _get_user_categories(self, user_id: int) -> Dict[str, List[str]]:
         """Get user's categories and subcategories"""
-        transactions = self.db.query(Transaction).filter(
+        pairs = self.db.query(Transaction.category, Transaction.subcategory).filter(
             and_(
                 Transaction.user_id == user_id,
                 Transaction.category.isnot(None)
             )
-        ).all()
+        ).distinct().all()
         
         categories = defaultdict(set)
         
-        for transaction in transactions:
-            if transaction.category:
-                categories[transaction.category].add(transaction.subcategory or '')
+        for category, subcategory in pairs:
+            if category:
+                categories[category].add(subcategory or '')
         
         return {cat: list(subcats) for cat, subcats in categories.items()}
     
-    def _get_rule_matches(self, rule: CategorizationRule, transactions: List[Transaction]) -> List[Transaction]:
-        """Get transactions that match a specific rule"""
-        matches = []
-        for transaction in transactions:
-            if (transaction.category == rule.category and 
-                transaction.subcategory == rule.subcategory):
-                if self._pattern_matches(rule.pattern, rule.pattern_type, transaction):
-                    matches.append(transaction)
-        
-        return matches
+    def _rule_performances(self, rules: List[CategorizationRule]) -> List[RulePerformance]:
+        """Performance of each rule from its match counters"""
+        performances = []
+        for rule in rules:
+            matches_count = rule.match_count or 0
+            accuracy_rate = self._calculate_rule_accuracy(rule)
+            performances.append(RulePerformance(
+                rule_id=rule.id,
+                rule_pattern=rule.pattern,
+                rule_category=rule.category,
+                matches_count=matches_count,
+                accuracy_rate=accuracy_rate,
+                last_match_date=rule.last_matched_at,
+                effectiveness_score=self._calculate_effectiveness_score(rule, matches_count, accuracy_rate)
+            ))
+        return performances
     
-    def _calculate_rule_accuracy(self, rule: CategorizationRule, matches: List[Transaction]) -> float:
-        """Calculate accuracy rate for a rule"""
-        if not matches:
+    def _calculate_rule_accuracy(self, rule: CategorizationRule) -> float:
+        """Share of a rule's matches that were not recategorized afterwards"""
+        if not rule.match_count:
             return 0.0
         
-        correct_matches = len([
-            t for t in matches 
-            if t.category == rule.category and t.subcategory == rule.subcategory
-        ])
-        
-        return correct_matches / len(matches)
+        return max(rule.match_count - (rule.override_count or 0), 0) / rule.match_count
     
     def _calculate_effectiveness_score(self, rule: CategorizationRule, matches_count: int, 
                                      accuracy_rate: float) -> float:
@@ -37,7 +37,7 @@ from sqlalchemy.orm import Session
 from app.core.audit_logger import security_audit_logger
 from app.core.background_jobs import job_manager, JobType, JobState, JobProgress, JobResult, JobPriority
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.db_routing import Workload, database_router, get_export_read_session
 from app.core.security_utils import input_sanitizer
 from app.models.export_job import ExportJob, ExportTemplate
 from app.models.transaction import Transaction, Category
@@ -637,7 +637,9 @@ def process_export_job(job_data: Dict[str, Any]) -> JobResult:
     
     logger.info(f"Starting export job {job_id} for user {user_id}")
     
-    db = next(get_db())
+    db = database_router.session(Workload.EXPORT)
+    # Transaction data is read through the replica when one is configured
+    read_db = get_export_read_session(user_id)
     try:
         # Get export job from database
         export_job = db.query(ExportJob).filter(ExportJob.id == export_job_id).first()
@@ -649,11 +651,11 @@ def process_export_job(job_data: Dict[str, Any]) -> JobResult:
         db.commit()
         
         # Create formatters
-        formatters = ExportFormatters(db, user_id)
+        formatters = ExportFormatters(read_db, user_id)
         
         # Build query and get transactions
         from app.services.export_service import ExportGenerator
-        generator = ExportGenerator(db, user_id)
+        generator = ExportGenerator(read_db, user_id)
         
         filters = ExportFilterParams(**job_data['filters']) if job_data['filters'] else None
         query = generator.build_query(filters)
@@ -780,4 +782,5 @@ def process_export_job(job_data: Dict[str, Any]) -> JobResult:
         )
     
     finally:
+        read_db.close()
         db.close()
\ No newline at end of file
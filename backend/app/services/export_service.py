@@ -30,6 +30,7 @@ from app.core.audit_logger import security_audit_logger as security_logger
 from app.core.security_utils import input_sanitizer
 from app.models.transaction import Transaction, Category
 from app.models.user import User
+from app.services.transaction_search import contains_filter
 from app.schemas.export import (
     ExportFormat, ExportStatus, ExportFilterParams, ExportColumnsConfig,
     ExportOptionsConfig, ExportSummary, ExportProgress
@@ -562,9 +563,9 @@ class ExportGenerator:
         
         # Text filters
         if filters.vendor_contains:
-            query = query.filter(Transaction.vendor.ilike(f"%{filters.vendor_contains}%"))
+            query = query.filter(contains_filter(Transaction.vendor, filters.vendor_contains))
         if filters.description_contains:
-            query = query.filter(Transaction.description.ilike(f"%{filters.description_contains}%"))
+            query = query.filter(contains_filter(Transaction.description, filters.description_contains))
         
         # Import batch filter
         if filters.import_batch:
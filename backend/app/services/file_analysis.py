@@ -0,0 +1,321 @@
+"""
+Single-pass File Analysis Kernel for FinGood
+
+Uploaded files used to be inspected byte by byte several times: every
+security service computed its own entropy, digests and signature searches.
+This kernel walks the content once, in fixed-size chunks (memory-mapped when
+analyzing a file on disk), and produces a FileFingerprint with:
+
+- MD5, SHA-1 and SHA-256 digests
+- byte histogram (NumPy bincount), global, head and windowed Shannon entropy
+- occurrence counts and positions of every registered byte pattern
+  (exact and case-insensitive), including magic numbers of embedded files
+- line statistics
+
+FileValidator, MalwareScanner and LightweightSandbox consume the same
+fingerprint. Services register the patterns they look for at import time via
+register_patterns(), so one analysis answers all of their questions.
+"""
+
+import hashlib
+import mmap
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Bytes processed per step (kept cache-friendly for the pattern searches)
+CHUNK_SIZE = 1024 * 1024
+
+# Window size for windowed entropy (detects encrypted/compressed regions)
+ENTROPY_WINDOW_SIZE = 64 * 1024
+
+# Leading bytes covered by head_entropy
+HEAD_SIZE = 4096
+
+# Number of leading match positions remembered per pattern
+MAX_POSITIONS = 5
+
+PatternKey = Tuple[bytes, bool]  # (pattern, case_insensitive)
+
+# Patterns searched by every analysis (services add theirs via register_patterns)
+_EXACT_PATTERNS: Dict[bytes, None] = {}
+_FOLDED_PATTERNS: Dict[bytes, None] = {}
+
+
+def register_patterns(exact: Iterable[bytes] = (), nocase: Iterable[bytes] = ()) -> None:
+    """
+    Register byte patterns to be located by every analysis
+
+    Args:
+        exact: Case-sensitive patterns (magic numbers, binary signatures)
+        nocase: Case-insensitive ASCII patterns (script and API names)
+    """
+    for pattern in exact:
+        if pattern:
+            _EXACT_PATTERNS[bytes(pattern)] = None
+    for pattern in nocase:
+        if pattern:
+            _FOLDED_PATTERNS[bytes(pattern).lower()] = None
+
+
+def registered_patterns() -> Tuple[Tuple[bytes, ...], Tuple[bytes, ...]]:
+    """
+    Snapshot of the registered (exact, case-insensitive) patterns
+
+    Pass it to analyze_file_content() in worker processes, where the services
+    that register patterns may not have been imported.
+    """
+    return tuple(_EXACT_PATTERNS), tuple(_FOLDED_PATTERNS)
+
+
+def entropy_from_counts(counts: np.ndarray) -> float:
+    """Shannon entropy (bits per byte) of a byte histogram"""
+    total = int(counts.sum())
+    if total == 0:
+        return 0.0
+    probabilities = counts[counts > 0] / total
+    return float(-(probabilities * np.log2(probabilities)).sum())
+
+
+def shannon_entropy(data: bytes) -> float:
+    """Shannon entropy (bits per byte) of a buffer"""
+    if not data:
+        return 0.0
+    return entropy_from_counts(np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256))
+
+
+@dataclass
+class FileFingerprint:
+    """Result of a single analysis pass over a file"""
+    size: int
+    md5: str
+    sha1: str
+    sha256: str
+    byte_counts: np.ndarray
+    entropy: float
+    head_entropy: float
+    window_entropies: List[float]
+    line_count: int
+    max_line_length: int
+    pattern_counts: Dict[PatternKey, int] = field(default_factory=dict)
+    pattern_positions: Dict[PatternKey, List[int]] = field(default_factory=dict)
+    pattern_last_positions: Dict[PatternKey, int] = field(default_factory=dict)
+
+    @property
+    def hashes(self) -> Dict[str, str]:
+        return {'md5': self.md5, 'sha1': self.sha1, 'sha256': self.sha256}
+
+    @property
+    def max_window_entropy(self) -> float:
+        return max(self.window_entropies, default=0.0)
+
+    @property
+    def null_ratio(self) -> float:
+        return int(self.byte_counts[0]) / self.size if self.size else 0.0
+
+    @property
+    def non_printable_count(self) -> int:
+        """Control bytes other than tab, newline and carriage return"""
+        control = int(self.byte_counts[:32].sum())
+        return control - int(self.byte_counts[9]) - int(self.byte_counts[10]) - int(self.byte_counts[13])
+
+    @property
+    def non_printable_ratio(self) -> float:
+        return self.non_printable_count / self.size if self.size else 0.0
+
+    def _key(self, pattern: bytes, nocase: bool) -> PatternKey:
+        key = (pattern.lower() if nocase else pattern, nocase)
+        if key not in self.pattern_counts:
+            raise KeyError(f"Pattern {pattern!r} was not registered for analysis")
+        return key
+
+    def count(self, pattern: bytes, nocase: bool = False) -> int:
+        """Number of (non-overlapping) occurrences of a registered pattern"""
+        return self.pattern_counts[self._key(pattern, nocase)]
+
+    def contains(self, pattern: bytes, nocase: bool = False) -> bool:
+        """Whether a registered pattern occurs anywhere in the file"""
+        return self.count(pattern, nocase) > 0
+
+    def positions(self, pattern: bytes, nocase: bool = False) -> List[int]:
+        """Offsets of the first MAX_POSITIONS occurrences of a registered pattern"""
+        return self.pattern_positions[self._key(pattern, nocase)]
+
+    def first_position(self, pattern: bytes, nocase: bool = False) -> int:
+        """Offset of the first occurrence, or -1"""
+        positions = self.positions(pattern, nocase)
+        return positions[0] if positions else -1
+
+    def last_position(self, pattern: bytes, nocase: bool = False) -> int:
+        """Offset of the last occurrence, or -1"""
+        return self.pattern_last_positions[self._key(pattern, nocase)]
+
+
+class _PatternTracker:
+    """Counts and locates one pattern across chunk boundaries"""
+
+    __slots__ = ('pattern', 'length', 'count', 'positions', 'last')
+
+    def __init__(self, pattern: bytes):
+        self.pattern = pattern
+        self.length = len(pattern)
+        self.count = 0
+        self.positions: List[int] = []
+        self.last = -1
+
+    def scan(self, window: bytes, tail_length: int, window_offset: int):
+        """
+        Scan a window made of the previous chunk's tail plus the current chunk
+
+        Matches lying entirely inside the tail were already seen in the
+        previous window and are skipped.
+        """
+        pattern = self.pattern
+        count = window.count(pattern)
+        if count == 0:
+            return
+        if tail_length >= self.length:
+            count -= window.count(pattern, 0, tail_length)
+            if count == 0:
+                return
+        self.count += count
+
+        # Only matches ending after the tail are new
+        first_new = max(0, tail_length - self.length + 1)
+        if len(self.positions) < MAX_POSITIONS:
+            position = window.find(pattern, first_new)
+            while position != -1 and len(self.positions) < MAX_POSITIONS:
+                self.positions.append(window_offset + position)
+                position = window.find(pattern, position + 1)
+
+        position = window.rfind(pattern, first_new)
+        if position != -1:
+            self.last = window_offset + position
+
+
+def _iter_chunks(data) -> Iterable[memoryview]:
+    view = memoryview(data)
+    for start in range(0, len(view), CHUNK_SIZE):
+        yield view[start:start + CHUNK_SIZE]
+
+
+def analyze_file_content(
+    source: Union[bytes, bytearray, memoryview, str, Path],
+    patterns: Optional[Tuple[Tuple[bytes, ...], Tuple[bytes, ...]]] = None
+) -> FileFingerprint:
+    """
+    Analyze file content in a single pass
+
+    Args:
+        source: File content, or a path to a file on disk (memory-mapped)
+        patterns: (exact, case-insensitive) patterns; defaults to registered_patterns()
+
+    Returns:
+        FileFingerprint shared by the upload security services
+    """
+    exact, folded = patterns if patterns is not None else registered_patterns()
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as handle:
+            if Path(source).stat().st_size == 0:
+                return _analyze(b'', exact, folded)
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return _analyze(mapped, exact, folded)
+    return _analyze(source, exact, folded)
+
+
+def _analyze(data, exact_patterns: Iterable[bytes], folded_patterns: Iterable[bytes]) -> FileFingerprint:
+    md5 = hashlib.md5()
+    sha1 = hashlib.sha1()
+    sha256 = hashlib.sha256()
+    byte_counts = np.zeros(256, dtype=np.int64)
+    window_counts = np.zeros(256, dtype=np.int64)
+    window_filled = 0
+    window_entropies: List[float] = []
+    head_entropy = 0.0
+
+    exact = [_PatternTracker(p) for p in exact_patterns]
+    folded = [_PatternTracker(p.lower()) for p in folded_patterns]
+    overlap = max((t.length for t in exact + folded), default=1) - 1
+
+    line_count = 0
+    max_line_length = 0
+    current_line_length = 0
+    size = 0
+    tail = b''
+
+    for chunk in _iter_chunks(data):
+        chunk_bytes = chunk.tobytes()
+        arr = np.frombuffer(chunk_bytes, dtype=np.uint8)
+
+        md5.update(chunk)
+        sha1.update(chunk)
+        sha256.update(chunk)
+
+        if size == 0:
+            head_entropy = shannon_entropy(chunk_bytes[:HEAD_SIZE])
+
+        # Windowed histograms; the global histogram is their sum
+        position = 0
+        while position < len(arr):
+            take = min(ENTROPY_WINDOW_SIZE - window_filled, len(arr) - position)
+            counts = np.bincount(arr[position:position + take], minlength=256)
+            window_counts += counts
+            byte_counts += counts
+            window_filled += take
+            position += take
+            if window_filled == ENTROPY_WINDOW_SIZE:
+                window_entropies.append(entropy_from_counts(window_counts))
+                window_counts[:] = 0
+                window_filled = 0
+
+        # Line statistics
+        newlines = np.flatnonzero(arr == 10)
+        if len(newlines):
+            line_count += len(newlines)
+            first_line = current_line_length + int(newlines[0])
+            inner = int(np.diff(newlines).max()) - 1 if len(newlines) > 1 else 0
+            max_line_length = max(max_line_length, first_line, inner)
+            current_line_length = len(arr) - int(newlines[-1]) - 1
+        else:
+            current_line_length += len(arr)
+
+        # Pattern search over the previous tail plus this chunk
+        window = tail + chunk_bytes
+        window_offset = size - len(tail)
+        for tracker in exact:
+            tracker.scan(window, len(tail), window_offset)
+        if folded:
+            lowered = window.lower()
+            for tracker in folded:
+                tracker.scan(lowered, len(tail), window_offset)
+
+        size += len(arr)
+        tail = window[-overlap:] if overlap else b''
+
+    if window_filled:
+        window_entropies.append(entropy_from_counts(window_counts))
+    if current_line_length:
+        line_count += 1
+        max_line_length = max(max_line_length, current_line_length)
+
+    fingerprint = FileFingerprint(
+        size=size,
+        md5=md5.hexdigest(),
+        sha1=sha1.hexdigest(),
+        sha256=sha256.hexdigest(),
+        byte_counts=byte_counts,
+        entropy=entropy_from_counts(byte_counts),
+        head_entropy=head_entropy,
+        window_entropies=window_entropies,
+        line_count=line_count,
+        max_line_length=max_line_length
+    )
+    for trackers, nocase in ((exact, False), (folded, True)):
+        for tracker in trackers:
+            key = (tracker.pattern, nocase)
+            fingerprint.pattern_counts[key] = tracker.count
+            fingerprint.pattern_positions[key] = tracker.positions
+            fingerprint.pattern_last_positions[key] = tracker.last
+    return fingerprint
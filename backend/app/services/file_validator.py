@@ -10,12 +10,10 @@ try:
 except ImportError:
     MAGIC_AVAILABLE = False
     magic = None
-import hashlib
 import os
 import tempfile
 import subprocess
 import time
-import math
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any, BinaryIO
 from dataclasses import dataclass
@@ -28,6 +26,7 @@ from datetime import datetime, timedelta
 
 from app.core.config import settings
 from app.core.audit_logger import SecurityAuditLogger as AuditLogger
+from app.services.file_analysis import FileFingerprint, analyze_file_content, register_patterns, shannon_entropy
 
 logger = logging.getLogger(__name__)
 
@@ -146,6 +145,54 @@ class FileValidator:
         b'seed phrase',
     ]
     
+    # Personal/banking data identifiers harvested by banking trojans
+    BANKING_TROJAN_PATTERNS = [
+        b'account number',
+        b'social security',
+        b'credit card',
+        b'pin number',
+        b'routing number',
+        b'swift code',
+        b'iban',
+    ]
+    
+    # Cryptocurrency threat indicators
+    CRYPTO_PATTERNS = [
+        b'bitcoin address',
+        b'ethereum wallet',
+        b'crypto wallet',
+        b'mining pool',
+        b'blockchain',
+        b'cryptocurrency exchange',
+    ]
+    
+    # Embedded executable and code patterns (case-sensitive)
+    EMBEDDED_CODE_PATTERNS = [
+        b'MZ\x90\x00',  # PE header
+        b'\x7fELF',     # ELF header
+        b'#!/bin/sh',   # Shell script
+        b'#!/bin/bash', # Bash script
+        b'<script',     # JavaScript
+        b'<?php',       # PHP
+        b'<%@',         # JSP/ASP
+        b'eval(',       # Code evaluation
+        b'exec(',       # Code execution
+        b'system(',     # System calls
+        b'shell_exec(', # Shell execution
+    ]
+    
+    # Polyglot files (valid in multiple formats)
+    POLYGLOT_SIGNATURES = [
+        (b'PK\x03\x04', b'%PDF'),  # ZIP + PDF
+        (b'GIF8', b'<script'),      # GIF + JavaScript
+        (b'\xff\xd8\xff', b'<?php'), # JPEG + PHP
+        (b'%PDF', b'<script'),      # PDF + JavaScript
+        (b'\x89PNG', b'<?php'),     # PNG + PHP
+    ]
+    
+    ARCHIVE_SIGNATURES = [b'PK\x03\x04', b'PK\x05\x06']
+    MACRO_SIGNATURES = [b'vbaProject', b'macros/']
+    
     # Maximum file sizes by type (bytes)
     MAX_FILE_SIZES = {
         'csv': 50 * 1024 * 1024,  # 50MB for CSV
@@ -174,7 +221,8 @@ class FileValidator:
         self, 
         file_content: bytes, 
         filename: str,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        fingerprint: Optional[FileFingerprint] = None
     ) -> FileValidationResult:
         """
         Comprehensive file validation pipeline.
@@ -183,6 +231,7 @@ class FileValidator:
             file_content: Raw file content
             filename: Original filename
             user_id: User ID for audit logging
+            fingerprint: Precomputed single-pass analysis of file_content
             
         Returns:
             FileValidationResult with comprehensive validation details
@@ -210,8 +259,12 @@ class FileValidator:
                 timestamp=datetime.utcnow()
             )
             
+            # Hashes, entropy and pattern positions come from one pass
+            if fingerprint is None:
+                fingerprint = analyze_file_content(file_content)
+            
             # Step 1: Basic file validation
-            await self._validate_basic_properties(file_content, filename, result)
+            await self._validate_basic_properties(file_content, filename, result, fingerprint)
             
             # Step 2: Magic number validation
             await self._validate_magic_numbers(file_content, filename, result)
@@ -220,7 +273,7 @@ class FileValidator:
             await self._validate_content_type(file_content, filename, result)
             
             # Step 4: Malware scanning
-            await self._scan_for_malware(file_content, filename, result)
+            await self._scan_for_malware(fingerprint, filename, result)
             
             # Step 5: CSV structure validation (if applicable)
             if self._is_csv_file(filename):
@@ -230,20 +283,20 @@ class FileValidator:
             await self._validate_file_size(file_content, filename, result)
             
             # Step 7: Financial threat detection
-            await self._detect_financial_threats(file_content, filename, result)
+            await self._detect_financial_threats(fingerprint, filename, result)
             
             # Step 8: Steganography detection
-            await self._detect_steganography(file_content, filename, result)
+            await self._detect_steganography(file_content, filename, result, fingerprint)
             
             # Step 9: Suspicious content detection
-            await self._detect_suspicious_content(file_content, result)
+            await self._detect_suspicious_content(fingerprint, result)
             
             # Calculate final threat level and validation result
             self._calculate_final_result(result)
             
             # Handle quarantine if needed
             if result.validation_result == ValidationResult.QUARANTINED:
-                result.quarantine_id = await self._quarantine_file(file_content, filename)
+                result.quarantine_id = await self._quarantine_file(file_content, filename, fingerprint)
             
             result.scan_duration = time.time() - start_time
             
@@ -284,7 +337,8 @@ class FileValidator:
         self, 
         file_content: bytes, 
         filename: str, 
-        result: FileValidationResult
+        result: FileValidationResult,
+        fingerprint: FileFingerprint
     ) -> None:
         """Validate basic file properties"""
         
@@ -319,8 +373,8 @@ class FileValidator:
             'filename': filename,
             'size': file_size,
             'extension': file_ext,
-            'md5': hashlib.md5(file_content).hexdigest(),
-            'sha256': hashlib.sha256(file_content).hexdigest()
+            'md5': fingerprint.md5,
+            'sha256': fingerprint.sha256
         })
     
     async def _validate_magic_numbers(
@@ -431,30 +485,16 @@ class FileValidator:
     
     async def _scan_for_malware(
         self, 
-        file_content: bytes, 
+        fingerprint: FileFingerprint, 
         filename: str, 
         result: FileValidationResult
     ) -> None:
         """Basic malware detection and suspicious content scanning"""
         
         # Check for embedded executables
-        suspicious_patterns = [
-            b'MZ\x90\x00',  # PE header
-            b'\x7fELF',     # ELF header
-            b'#!/bin/sh',   # Shell script
-            b'#!/bin/bash', # Bash script
-            b'<script',     # JavaScript
-            b'<?php',       # PHP
-            b'<%@',         # JSP/ASP
-            b'eval(',       # Code evaluation
-            b'exec(',       # Code execution
-            b'system(',     # System calls
-            b'shell_exec(', # Shell execution
-        ]
-        
         malware_detected = False
-        for pattern in suspicious_patterns:
-            if pattern in file_content:
+        for pattern in self.EMBEDDED_CODE_PATTERNS:
+            if fingerprint.contains(pattern):
                 result.errors.append(f"Suspicious content pattern detected")
                 malware_detected = True
                 break
@@ -462,18 +502,16 @@ class FileValidator:
         # Check for excessive binary content in text files
         file_ext = Path(filename).suffix.lower().lstrip('.')
         if file_ext == 'csv':
-            # Count non-printable characters
-            non_printable = sum(1 for byte in file_content if byte < 32 and byte not in [9, 10, 13])
-            if len(file_content) > 0:
-                non_printable_ratio = non_printable / len(file_content)
-                if non_printable_ratio > 0.1:  # More than 10% non-printable
+            # Ratio of non-printable characters (from the byte histogram)
+            if fingerprint.size > 0:
+                if fingerprint.non_printable_ratio > 0.1:  # More than 10% non-printable
                     result.warnings.append("High ratio of non-printable characters detected")
                     result.validation_checks['text_file_integrity'] = False
                 else:
                     result.validation_checks['text_file_integrity'] = True
         
         # Check file entropy (basic detection of compressed/encrypted content)
-        entropy = self._calculate_entropy(file_content[:4096])  # Check first 4KB
+        entropy = fingerprint.head_entropy  # First 4KB
         if entropy > 7.5:  # High entropy suggests encrypted/compressed content
             result.warnings.append("High entropy detected - file may be compressed or encrypted")
         
@@ -574,18 +612,17 @@ class FileValidator:
     
     async def _detect_financial_threats(
         self,
-        file_content: bytes,
+        fingerprint: FileFingerprint,
         filename: str,
         result: FileValidationResult
     ) -> None:
         """Detect financial sector specific threats"""
         
-        content_lower = file_content.lower()
         threats_found = []
         
         # Check for financial malware indicators
         for pattern in self.FINANCIAL_THREAT_PATTERNS:
-            if pattern in content_lower:
+            if fingerprint.contains(pattern, nocase=True):
                 threats_found.append(pattern.decode('utf-8', errors='ignore'))
         
         if threats_found:
@@ -595,19 +632,9 @@ class FileValidator:
             result.validation_checks['no_financial_threats'] = True
         
         # Check for banking trojan signatures
-        banking_trojan_patterns = [
-            b'account number',
-            b'social security',
-            b'credit card',
-            b'pin number',
-            b'routing number',
-            b'swift code',
-            b'iban',
-        ]
-        
         suspicious_financial_data = []
-        for pattern in banking_trojan_patterns:
-            if pattern in content_lower:
+        for pattern in self.BANKING_TROJAN_PATTERNS:
+            if fingerprint.contains(pattern, nocase=True):
                 suspicious_financial_data.append(pattern.decode('utf-8', errors='ignore'))
         
         if len(suspicious_financial_data) > 3:  # Multiple financial identifiers
@@ -617,18 +644,9 @@ class FileValidator:
             result.validation_checks['financial_data_patterns'] = True
         
         # Check for cryptocurrency threats
-        crypto_patterns = [
-            b'bitcoin address',
-            b'ethereum wallet',
-            b'crypto wallet',
-            b'mining pool',
-            b'blockchain',
-            b'cryptocurrency exchange',
-        ]
-        
         crypto_indicators = []
-        for pattern in crypto_patterns:
-            if pattern in content_lower:
+        for pattern in self.CRYPTO_PATTERNS:
+            if fingerprint.contains(pattern, nocase=True):
                 crypto_indicators.append(pattern.decode('utf-8', errors='ignore'))
         
         if crypto_indicators:
@@ -638,7 +656,8 @@ class FileValidator:
         self,
         file_content: bytes,
         filename: str,
-        result: FileValidationResult
+        result: FileValidationResult,
+        fingerprint: FileFingerprint
     ) -> None:
         """Detect potential steganography in files"""
         
@@ -647,11 +666,11 @@ class FileValidator:
         # For image files, check for hidden data
         if file_ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp']:
             # Check for unusual file size ratios
-            if len(file_content) > 1024 * 1024:  # Files larger than 1MB
+            if fingerprint.size > 1024 * 1024:  # Files larger than 1MB
                 result.warnings.append("Large image file - potential steganography risk")
             
             # Check for embedded ZIP archives in images
-            if b'PK\x03\x04' in file_content[100:]:  # ZIP signature not at beginning
+            if fingerprint.last_position(b'PK\x03\x04') >= 100:  # ZIP signature not at beginning
                 result.warnings.append("Embedded archive detected in image file")
                 result.validation_checks['no_embedded_archives'] = False
             else:
@@ -679,28 +698,20 @@ class FileValidator:
         # Check for ZIP files with suspicious content
         elif file_ext in ['.zip', '.xlsx', '.docx']:
             # Look for multiple embedded files (potential data hiding)
-            zip_entries = file_content.count(b'PK\x03\x04')
+            zip_entries = fingerprint.count(b'PK\x03\x04')
             if zip_entries > 50:  # Many embedded files
                 result.warnings.append(f"Archive contains {zip_entries} files - potential data hiding")
     
     async def _detect_suspicious_content(
         self, 
-        file_content: bytes, 
+        fingerprint: FileFingerprint, 
         result: FileValidationResult
     ) -> None:
         """Advanced suspicious content detection"""
         
         # Check for polyglot files (files that are valid in multiple formats)
-        polyglot_signatures = [
-            (b'PK\x03\x04', b'%PDF'),  # ZIP + PDF
-            (b'GIF8', b'<script'),      # GIF + JavaScript
-            (b'\xff\xd8\xff', b'<?php'), # JPEG + PHP
-            (b'%PDF', b'<script'),      # PDF + JavaScript
-            (b'\x89PNG', b'<?php'),     # PNG + PHP
-        ]
-        
-        for sig1, sig2 in polyglot_signatures:
-            if sig1 in file_content and sig2 in file_content:
+        for sig1, sig2 in self.POLYGLOT_SIGNATURES:
+            if fingerprint.contains(sig1) and fingerprint.contains(sig2):
                 result.errors.append("Polyglot file detected - potential security risk")
                 result.validation_checks['no_polyglot'] = False
                 return
@@ -708,17 +719,15 @@ class FileValidator:
         result.validation_checks['no_polyglot'] = True
         
         # Check for unusual file structure
-        if len(file_content) > 1024:
+        if fingerprint.size > 1024:
             # Look for embedded files
-            zip_signatures = [b'PK\x03\x04', b'PK\x05\x06']
-            for sig in zip_signatures:
-                positions = [i for i in range(len(file_content) - len(sig)) if file_content[i:i+len(sig)] == sig]
-                if len(positions) > 1:  # Multiple zip signatures
+            for sig in self.ARCHIVE_SIGNATURES:
+                if fingerprint.count(sig) > 1:  # Multiple zip signatures
                     result.warnings.append("Multiple archive signatures detected")
                     break
         
         # Check for macro-enabled files disguised as regular files
-        if b'vbaProject' in file_content or b'macros/' in file_content:
+        if any(fingerprint.contains(sig) for sig in self.MACRO_SIGNATURES):
             result.errors.append("Macro content detected in file")
             result.validation_checks['no_macros'] = False
         else:
@@ -726,23 +735,7 @@ class FileValidator:
     
     def _calculate_entropy(self, data: bytes) -> float:
         """Calculate Shannon entropy of data"""
-        if not data:
-            return 0
-        
-        # Count frequency of each byte value
-        byte_counts = [0] * 256
-        for byte in data:
-            byte_counts[byte] += 1
-        
-        # Calculate entropy
-        entropy = 0
-        data_len = len(data)
-        for count in byte_counts:
-            if count > 0:
-                probability = count / data_len
-                entropy -= probability * math.log2(probability)
-        
-        return entropy
+        return shannon_entropy(data)
     
     def _calculate_final_result(self, result: FileValidationResult) -> None:
         """Calculate final validation result based on all checks"""
@@ -779,11 +772,16 @@ class FileValidator:
         # Final validation decision
         result.is_valid = result.validation_result == ValidationResult.APPROVED
     
-    async def _quarantine_file(self, file_content: bytes, filename: str) -> str:
+    async def _quarantine_file(
+        self,
+        file_content: bytes,
+        filename: str,
+        fingerprint: FileFingerprint
+    ) -> str:
         """Quarantine suspicious file"""
         
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        quarantine_id = f"{timestamp}_{hashlib.md5(file_content).hexdigest()[:8]}"
+        quarantine_id = f"{timestamp}_{fingerprint.md5[:8]}"
         
         quarantine_path = self.quarantine_dir / f"{quarantine_id}_{filename}"
         
@@ -796,8 +794,8 @@ class FileValidator:
                 'original_filename': filename,
                 'quarantine_timestamp': timestamp,
                 'file_size': len(file_content),
-                'md5': hashlib.md5(file_content).hexdigest(),
-                'sha256': hashlib.sha256(file_content).hexdigest(),
+                'md5': fingerprint.md5,
+                'sha256': fingerprint.sha256,
             }
             
             metadata_path = self.quarantine_dir / f"{quarantine_id}_metadata.json"
@@ -867,6 +865,21 @@ class FileValidator:
             return False
 
 
+register_patterns(
+    exact=(
+        FileValidator.EMBEDDED_CODE_PATTERNS
+        + [sig for pair in FileValidator.POLYGLOT_SIGNATURES for sig in pair]
+        + FileValidator.ARCHIVE_SIGNATURES
+        + FileValidator.MACRO_SIGNATURES
+    ),
+    nocase=(
+        FileValidator.FINANCIAL_THREAT_PATTERNS
+        + FileValidator.BANKING_TROJAN_PATTERNS
+        + FileValidator.CRYPTO_PATTERNS
+    )
+)
+
+
 class FileValidationMonitor:
     """Monitor file validation metrics and trends"""
     
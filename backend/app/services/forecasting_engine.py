@@ -22,6 +22,7 @@ import joblib
 import os
 
 from app.models.transaction import Transaction
+from app.services.transaction_records import load_tx_records
 from app.models.user import User
 from app.core.exceptions import ValidationException, BusinessLogicException
 from app.core.security_utils import input_sanitizer
@@ -241,17 +242,17 @@ class ForecastingEngine:
         lookback_days = max(90, horizon_days * 3)
         start_date = datetime.utcnow() - timedelta(days=lookback_days)
         
-        query = (
-            self.db.query(Transaction)
-            .filter(Transaction.user_id == user_id)
-            .filter(Transaction.date >= start_date)
-            .order_by(Transaction.date)
-        )
-        
+        conditions = [Transaction.date >= start_date]
         if category_filter:
-            query = query.filter(Transaction.category == category_filter)
-        
-        transactions = query.limit(ForecastingLimits.MAX_TRANSACTIONS_ANALYZE).all()
+            conditions.append(Transaction.category == category_filter)
+        
+        transactions = load_tx_records(
+            self.db,
+            user_id,
+            *conditions,
+            order_by=(Transaction.date,),
+            limit=ForecastingLimits.MAX_TRANSACTIONS_ANALYZE
+        )
         
         # Convert to DataFrame for time series analysis
         data = []
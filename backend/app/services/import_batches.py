@@ -0,0 +1,201 @@
+"""
+Import Batch Bookkeeping for FinGood
+
+Every uploaded file gets one row in import_batches holding its filename,
+hash, status and the aggregates of its transactions (count, total, date
+range). The row is written in the same database transaction as the
+imported rows and kept current by operations that delete transactions or
+change their amounts, so:
+
+- listing a user's uploads reads one row per file instead of grouping all
+  of the user's transactions, and
+- deleting a batch is a single set-based DELETE; the counts reported back
+  come from the batch row instead of loading the transactions.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.transaction import ImportBatch, Transaction
+from app.services.pattern_statistics import apply_row_changes, fetch_feature_rows
+
+logger = logging.getLogger(__name__)
+
+STATUS_COMPLETED = "completed"
+STATUS_PARTIAL = "partial"  # Some rows of the file were rejected
+
+
+def record_import_batch(
+    db: Session,
+    user_id: int,
+    batch_id: str,
+    filename: Optional[str],
+    file_hash: Optional[str],
+    transactions: List[Transaction],
+    rejected_count: int = 0,
+    source: str = "csv"
+) -> ImportBatch:
+    """
+    Write the batch row for freshly imported transactions (not committed)
+
+    Aggregates are computed from the new Transaction objects, so no query
+    over the transactions table is needed. Importing into an existing
+    batch id adds to its aggregates.
+
+    Args:
+        db: Session holding the imported transactions
+        user_id: Owner of the batch
+        batch_id: Value stored in Transaction.import_batch
+        filename: Original file name
+        file_hash: SHA256 of the uploaded file
+        transactions: Transactions added to the session for this batch
+        rejected_count: Rows of the file that were not imported
+        source: Import source ('csv', ...)
+
+    Returns:
+        The ImportBatch row
+    """
+    batch = db.query(ImportBatch).filter(
+        ImportBatch.user_id == user_id,
+        ImportBatch.batch_id == batch_id
+    ).first()
+    if batch is None:
+        batch = ImportBatch(
+            user_id=user_id,
+            batch_id=batch_id,
+            filename=filename,
+            file_hash=file_hash,
+            source=source,
+            transaction_count=0,
+            rejected_count=0,
+            total_amount=0.0
+        )
+        db.add(batch)
+
+    dates = [t.date for t in transactions if t.date is not None]
+    if dates:
+        first, last = min(dates), max(dates)
+        if batch.first_transaction_date is None or first < batch.first_transaction_date:
+            batch.first_transaction_date = first
+        if batch.last_transaction_date is None or last > batch.last_transaction_date:
+            batch.last_transaction_date = last
+
+    batch.transaction_count = (batch.transaction_count or 0) + len(transactions)
+    batch.rejected_count = (batch.rejected_count or 0) + rejected_count
+    batch.total_amount = float(batch.total_amount or 0) + sum(float(t.amount) for t in transactions)
+    batch.status = STATUS_PARTIAL if batch.rejected_count else STATUS_COMPLETED
+    return batch
+
+
+def refresh_import_batches(db: Session, user_id: int, batch_ids: Iterable[Optional[str]]) -> None:
+    """
+    Recompute the aggregates of batches whose transactions changed
+
+    One grouped query over the (user_id, import_batch) index covering only
+    the given batches. Batches left without transactions keep their row
+    (with zero counts) so an undone bulk delete can restore them; they are
+    hidden from listings.
+
+    Args:
+        db: Session with the pending changes
+        user_id: Owner of the batches
+        batch_ids: Affected Transaction.import_batch values (None is ignored)
+    """
+    batch_ids = {batch_id for batch_id in batch_ids if batch_id}
+    if not batch_ids:
+        return
+
+    db.flush()
+    aggregates = {
+        row.import_batch: row
+        for row in db.query(
+            Transaction.import_batch,
+            func.count(Transaction.id).label("transaction_count"),
+            func.coalesce(func.sum(Transaction.amount), 0).label("total_amount"),
+            func.min(Transaction.date).label("first_date"),
+            func.max(Transaction.date).label("last_date")
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.import_batch.in_(batch_ids)
+        ).group_by(Transaction.import_batch)
+    }
+
+    batches = db.query(ImportBatch).filter(
+        ImportBatch.user_id == user_id,
+        ImportBatch.batch_id.in_(batch_ids)
+    ).all()
+    for batch in batches:
+        row = aggregates.get(batch.batch_id)
+        if row is None:
+            batch.transaction_count = 0
+            batch.total_amount = 0.0
+            batch.first_transaction_date = None
+            batch.last_transaction_date = None
+            continue
+        batch.transaction_count = row.transaction_count
+        batch.total_amount = float(row.total_amount)
+        batch.first_transaction_date = row.first_date
+        batch.last_transaction_date = row.last_date
+
+
+def list_user_import_batches(db: Session, user_id: int) -> List[ImportBatch]:
+    """Import batches of a user that still have transactions, newest first"""
+    return db.query(ImportBatch).filter(
+        ImportBatch.user_id == user_id,
+        ImportBatch.transaction_count > 0
+    ).order_by(ImportBatch.created_at.desc(), ImportBatch.id.desc()).all()
+
+
+def delete_import_batch(db: Session, user_id: int, batch_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Delete a batch and all of its transactions (not committed)
+
+    Args:
+        db: Session (caller owns the transaction)
+        user_id: Owner of the batch
+        batch_id: Batch to delete
+
+    Returns:
+        Dict with deleted_count, total_count and total_amount, or None if
+        the user has no transactions in the batch
+    """
+    batch = db.query(ImportBatch).filter(
+        ImportBatch.user_id == user_id,
+        ImportBatch.batch_id == batch_id
+    ).first()
+
+    total_amount = batch.total_amount if batch else None
+    if batch is None:
+        # Batch imported before import_batches existed
+        total_amount = db.query(func.coalesce(func.sum(Transaction.amount), 0)).filter(
+            Transaction.user_id == user_id,
+            Transaction.import_batch == batch_id
+        ).scalar()
+
+    # Pattern statistics lose the batch's categorized rows
+    categorized = fetch_feature_rows(
+        db, user_id, Transaction.import_batch == batch_id, Transaction.is_categorized == True
+    )
+
+    deleted_count = db.query(Transaction).filter(
+        Transaction.user_id == user_id,
+        Transaction.import_batch == batch_id
+    ).delete(synchronize_session=False)
+
+    if batch is not None:
+        db.delete(batch)
+
+    if categorized:
+        apply_row_changes(db, user_id, removed=categorized.values(), events=True)
+
+    if not deleted_count:
+        return None
+
+    return {
+        "deleted_count": deleted_count,
+        "total_count": batch.transaction_count if batch else deleted_count,
+        "total_amount": float(total_amount or 0)
+    }
@@ -4,7 +4,10 @@ Implements multiple scanning engines and detection methods for comprehensive sec
 """
 
 import subprocess
+import socket
+import struct
 import tempfile
+import threading
 import os
 import hashlib
 import time
@@ -22,10 +25,13 @@ except ImportError:
     yara = None
 import requests
 from datetime import datetime, timedelta
-import math
 
 from app.core.config import settings
 from app.core.audit_logger import security_audit_logger
+from app.services.file_analysis import (
+    FileFingerprint, analyze_file_content, register_patterns, registered_patterns, shannon_entropy
+)
+from app.services.scan_orchestrator import EngineRun, get_scan_orchestrator
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +81,7 @@ class ComprehensiveScanResult:
     highest_confidence: float
     scan_duration: float
     metadata: Dict[str, Any]
+    scan_complete: bool = True  # False if an engine timed out, was cancelled or failed
 
 
 class MalwareScanner:
@@ -96,6 +103,57 @@ class MalwareScanner:
         '.jar', '.php', '.asp', '.jsp', '.py', '.pl', '.rb', '.sh'
     }
     
+    # Script injection patterns (case-insensitive)
+    SCRIPT_PATTERNS = [
+        b'<script',
+        b'javascript:',
+        b'vbscript:',
+        b'<?php',
+        b'<%@',
+        b'eval(',
+        b'exec(',
+        b'system(',
+    ]
+    
+    # File signatures used for polyglot detection
+    COMMON_SIGNATURES = [
+        (b'%PDF', 'PDF'),
+        (b'PK\x03\x04', 'ZIP'),
+        (b'\xff\xd8\xff', 'JPEG'),
+        (b'GIF8', 'GIF'),
+        (b'MZ', 'PE'),
+        (b'\x7fELF', 'ELF')
+    ]
+    
+    # Suspicious strings in non-executable files (case-insensitive)
+    SUSPICIOUS_STRINGS = [
+        b'cmd.exe', b'powershell', b'rundll32', b'regsvr32',
+        b'wscript', b'cscript', b'mshta', b'certutil'
+    ]
+    
+    # Seconds between checks of the signature database version
+    SIGNATURE_VERSION_CHECK_INTERVAL = 300
+    
+    # Per-engine timeouts in seconds (all capped by MALWARE_SCAN_BUDGET_SECONDS)
+    ENGINE_TIMEOUTS = {
+        'hash': 2.0,
+        'signature': 2.0,
+        'behavioral': 2.0,
+        'yara': 15.0,
+        'clamav': 30.0,
+    }
+    
+    ENGINE_TYPES = {
+        'hash': ScanEngine.SIGNATURE,
+        'signature': ScanEngine.SIGNATURE,
+        'behavioral': ScanEngine.BEHAVIORAL,
+        'yara': ScanEngine.YARA,
+        'clamav': ScanEngine.CLAMAV,
+    }
+    
+    # Bytes per INSTREAM chunk sent to clamd
+    CLAMD_CHUNK_SIZE = 64 * 1024
+    
     # YARA rules for detecting suspicious patterns
     YARA_RULES = """
     rule SuspiciousScripts {
@@ -157,6 +215,12 @@ class MalwareScanner:
         self.clamav_available = self._check_clamav_availability()
         self.yara_available = self._initialize_yara()
         self.virustotal_api_key = getattr(settings, 'VIRUSTOTAL_API_KEY', None)
+        # The ClamAV database version is read here and refreshed off-thread,
+        # never on the request path
+        self._clamav_version = self._clamav_database_version() if self.clamav_available else None
+        self._signature_version = self._compute_signature_version()
+        self._signature_version_checked = time.time()
+        self._signature_refresh: Optional[threading.Thread] = None
         
         # Create temporary scan directory
         self.temp_dir = Path(tempfile.gettempdir()) / "fingood_scans"
@@ -168,7 +232,8 @@ class MalwareScanner:
         self, 
         file_content: bytes, 
         filename: str,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        fingerprint: Optional[FileFingerprint] = None
     ) -> ComprehensiveScanResult:
         """
         Perform comprehensive malware scan using multiple engines.
@@ -177,6 +242,7 @@ class MalwareScanner:
             file_content: Raw file content
             filename: Original filename
             user_id: User ID for audit logging
+            fingerprint: Precomputed single-pass analysis of file_content
             
         Returns:
             ComprehensiveScanResult with detailed scan information
@@ -185,19 +251,55 @@ class MalwareScanner:
         scan_results = []
         
         try:
-            # Calculate file hashes for lookup
-            file_hashes = {
-                'md5': hashlib.md5(file_content).hexdigest(),
-                'sha1': hashlib.sha1(file_content).hexdigest(),
-                'sha256': hashlib.sha256(file_content).hexdigest()
-            }
+            orchestrator = get_scan_orchestrator()
+            
+            # Hashes, entropy and signature positions come from one pass
+            if fingerprint is None:
+                fingerprint = await orchestrator.run_cpu(
+                    analyze_file_content, file_content, registered_patterns()
+                )
+            file_hashes = fingerprint.hashes
+            
+            # 1-5. Independent engines run concurrently: hash lookup, signature
+            # and behavioral checks on the fingerprint, YARA in the process
+            # pool and ClamAV over its socket/subprocess
+            engines = [
+                EngineRun('hash', lambda: self._scan_known_hashes(file_hashes, filename), self.ENGINE_TIMEOUTS['hash']),
+                EngineRun('signature', lambda: self._scan_signatures(fingerprint, filename), self.ENGINE_TIMEOUTS['signature']),
+                EngineRun('behavioral', lambda: self._scan_behavioral(fingerprint, filename), self.ENGINE_TIMEOUTS['behavioral']),
+            ]
+            if self.yara_available:
+                engines.append(EngineRun('yara', lambda: self._scan_yara(file_content, filename), self.ENGINE_TIMEOUTS['yara']))
+            if self.clamav_available:
+                engines.append(EngineRun('clamav', lambda: self._scan_clamav(file_content, filename), self.ENGINE_TIMEOUTS['clamav']))
             
-            # 1. Hash-based detection (fastest)
-            hash_result = await self._scan_known_hashes(file_hashes, filename)
-            scan_results.append(hash_result)
+            early_exit_confidence = settings.MALWARE_SCAN_EARLY_EXIT_CONFIDENCE
+            outcomes = await orchestrator.run_engines(
+                engines,
+                budget=settings.MALWARE_SCAN_BUDGET_SECONDS,
+                stop_when=lambda r: r.threat_detected and r.confidence_score >= early_exit_confidence
+            )
+            
+            engines_cancelled = []
+            engines_incomplete = []
+            for outcome in outcomes:
+                if outcome.cancelled or outcome.error or (outcome.result is not None and outcome.result.error):
+                    engines_incomplete.append(outcome.name)
+                if outcome.cancelled:
+                    engines_cancelled.append(outcome.name)
+                elif outcome.result is not None:
+                    scan_results.append(outcome.result)
+                else:
+                    scan_results.append(ScanResult(
+                        is_clean=True,
+                        engine=self.ENGINE_TYPES[outcome.name],
+                        threat_detected=False,
+                        error=outcome.error,
+                        scan_duration=outcome.duration
+                    ))
             
-            # If known malicious hash, skip other scans
-            if hash_result.threat_detected:
+            hash_result = outcomes[0].result
+            if hash_result is not None and hash_result.threat_detected:
                 logger.warning(f"Known malicious hash detected: {filename}")
                 security_audit_logger.log_malware_detected(
                     user_id=user_id,
@@ -206,24 +308,6 @@ class MalwareScanner:
                     signature=hash_result.threat_name
                 )
             
-            # 2. Signature-based detection
-            signature_result = await self._scan_signatures(file_content, filename)
-            scan_results.append(signature_result)
-            
-            # 3. YARA rules scan
-            if self.yara_available:
-                yara_result = await self._scan_yara(file_content, filename)
-                scan_results.append(yara_result)
-            
-            # 4. ClamAV scan (if available)
-            if self.clamav_available:
-                clamav_result = await self._scan_clamav(file_content, filename)
-                scan_results.append(clamav_result)
-            
-            # 5. Behavioral analysis
-            behavioral_result = await self._scan_behavioral(file_content, filename)
-            scan_results.append(behavioral_result)
-            
             # 6. VirusTotal scan (if API key available and file is suspicious)
             if self.virustotal_api_key and any(r.threat_detected for r in scan_results):
                 vt_result = await self._scan_virustotal(file_hashes, filename)
@@ -235,8 +319,11 @@ class MalwareScanner:
             engines_clean = len([r for r in scan_results if not r.threat_detected and not r.error])
             highest_confidence = max([r.confidence_score for r in threats_detected], default=0.0)
             
-            # Determine overall result
-            is_clean = len(threats_detected) == 0
+            # Determine overall result: a file is only clean if every engine finished
+            scan_complete = not engines_incomplete
+            is_clean = len(threats_detected) == 0 and scan_complete
+            if not threats_detected and not scan_complete:
+                logger.warning(f"Malware scan of {filename} incomplete: {', '.join(engines_incomplete)}")
             
             scan_duration = time.time() - start_time
             
@@ -251,16 +338,19 @@ class MalwareScanner:
                     'file_hashes': file_hashes,
                     'filename': filename,
                     'file_size': len(file_content),
-                    'scan_timestamp': datetime.utcnow().isoformat()
-                }
+                    'scan_timestamp': datetime.utcnow().isoformat(),
+                    'engines_cancelled': engines_cancelled,
+                    'engines_incomplete': engines_incomplete
+                },
+                scan_complete=scan_complete
             )
             
             # Log scan results
-            if not is_clean:
+            if threats_detected:
                 security_audit_logger.log_malware_detected(
                     user_id=user_id,
                     filename=filename,
-                    malware_type=threats_detected[0].threat_type.value if threats_detected else "unknown",
+                    malware_type=threats_detected[0].threat_type.value if threats_detected[0].threat_type else "unknown",
                     signature=threats_detected[0].threat_name or "unknown"
                 )
             
@@ -275,7 +365,8 @@ class MalwareScanner:
                 threats_detected=[],
                 highest_confidence=0.0,
                 scan_duration=time.time() - start_time,
-                metadata={'error': str(e)}
+                metadata={'error': str(e)},
+                scan_complete=False
             )
     
     async def _scan_known_hashes(
@@ -308,7 +399,7 @@ class MalwareScanner:
             details={'hashes_checked': list(file_hashes.keys())}
         )
     
-    async def _scan_signatures(self, file_content: bytes, filename: str) -> ScanResult:
+    async def _scan_signatures(self, fingerprint: FileFingerprint, filename: str) -> ScanResult:
         """Scan for suspicious signatures and patterns"""
         start_time = time.time()
         
@@ -329,7 +420,7 @@ class MalwareScanner:
         # Check for embedded executables in non-executable files
         if file_ext in ['.csv', '.txt', '.xml']:
             # Look for PE headers
-            if b'MZ' in file_content[:1024] or b'\x7fELF' in file_content[:1024]:
+            if any(0 <= fingerprint.first_position(sig) <= 1024 - len(sig) for sig in (b'MZ', b'\x7fELF')):
                 return ScanResult(
                     is_clean=False,
                     engine=ScanEngine.SIGNATURE,
@@ -342,19 +433,8 @@ class MalwareScanner:
                 )
         
         # Check for script injections
-        script_patterns = [
-            b'<script',
-            b'javascript:',
-            b'vbscript:',
-            b'<?php',
-            b'<%@',
-            b'eval(',
-            b'exec(',
-            b'system(',
-        ]
-        
-        for pattern in script_patterns:
-            if pattern in file_content.lower():
+        for pattern in self.SCRIPT_PATTERNS:
+            if fingerprint.contains(pattern, nocase=True):
                 return ScanResult(
                     is_clean=False,
                     engine=ScanEngine.SIGNATURE,
@@ -372,7 +452,7 @@ class MalwareScanner:
             threat_detected=False,
             confidence_score=0.0,
             scan_duration=time.time() - start_time,
-            details={'patterns_checked': len(script_patterns)}
+            details={'patterns_checked': len(self.SCRIPT_PATTERNS)}
         )
     
     async def _scan_yara(self, file_content: bytes, filename: str) -> ScanResult:
@@ -388,12 +468,13 @@ class MalwareScanner:
         start_time = time.time()
         
         try:
-            matches = self.yara_rules.match(data=file_content)
+            # Matching is CPU-bound: run it in the scan process pool
+            matches = await get_scan_orchestrator().run_cpu(_yara_match, file_content)
             
             if matches:
                 # Get the highest severity match
                 highest_severity = max(
-                    [m.meta.get('severity', 'low') for m in matches],
+                    [meta.get('severity', 'low') for _, meta in matches],
                     key=lambda x: {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}.get(x, 1)
                 )
                 
@@ -404,11 +485,11 @@ class MalwareScanner:
                     engine=ScanEngine.YARA,
                     threat_detected=True,
                     threat_type=ThreatType.SUSPICIOUS,
-                    threat_name=f"YARA rule match: {matches[0].rule}",
+                    threat_name=f"YARA rule match: {matches[0][0]}",
                     confidence_score=confidence_map.get(highest_severity, 0.5),
                     scan_duration=time.time() - start_time,
                     details={
-                        'rules_matched': [m.rule for m in matches],
+                        'rules_matched': [rule for rule, _ in matches],
                         'highest_severity': highest_severity
                     }
                 )
@@ -433,7 +514,7 @@ class MalwareScanner:
             )
     
     async def _scan_clamav(self, file_content: bytes, filename: str) -> ScanResult:
-        """Scan using ClamAV"""
+        """Scan using ClamAV (clamd socket when configured, clamscan otherwise)"""
         if not self.clamav_available:
             return ScanResult(
                 is_clean=True,
@@ -444,83 +525,113 @@ class MalwareScanner:
         
         start_time = time.time()
         
-        # Create temporary file
-        temp_file = self.temp_dir / f"scan_{int(time.time())}_{hashlib.md5(filename.encode()).hexdigest()[:8]}"
-        
         try:
-            # Write content to temporary file
-            with open(temp_file, 'wb') as f:
-                f.write(file_content)
-            
-            # Run ClamAV scan
-            result = subprocess.run(
-                ['clamscan', '--no-summary', str(temp_file)],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            # Parse results
-            if result.returncode == 0:
-                # Clean file
-                return ScanResult(
-                    is_clean=True,
-                    engine=ScanEngine.CLAMAV,
-                    threat_detected=False,
-                    confidence_score=0.0,
-                    scan_duration=time.time() - start_time,
-                    details={'clamav_output': result.stdout}
-                )
-            elif result.returncode == 1:
-                # Malware detected
-                output_lines = result.stdout.strip().split('\n')
-                threat_line = next((line for line in output_lines if 'FOUND' in line), '')
-                threat_name = threat_line.split(':')[-1].strip() if threat_line else 'Unknown'
-                
-                return ScanResult(
-                    is_clean=False,
-                    engine=ScanEngine.CLAMAV,
-                    threat_detected=True,
-                    threat_type=ThreatType.VIRUS,
-                    threat_name=threat_name,
-                    confidence_score=0.95,
-                    scan_duration=time.time() - start_time,
-                    details={'clamav_output': result.stdout}
-                )
+            if settings.CLAMAV_SOCKET:
+                infected, output = await self._clamd_instream(file_content)
             else:
-                # Error occurred
-                return ScanResult(
-                    is_clean=True,
-                    engine=ScanEngine.CLAMAV,
-                    threat_detected=False,
-                    error=f"ClamAV error: {result.stderr}",
-                    scan_duration=time.time() - start_time
-                )
-                
-        except subprocess.TimeoutExpired:
+                infected, output = await self._clamscan_subprocess(file_content, filename)
+        except Exception as e:
             return ScanResult(
                 is_clean=True,
                 engine=ScanEngine.CLAMAV,
                 threat_detected=False,
-                error="ClamAV scan timeout",
+                error=f"ClamAV error: {e}",
                 scan_duration=time.time() - start_time
             )
-        except Exception as e:
+        
+        if infected:
+            threat_line = next((line for line in output.split('\n') if 'FOUND' in line), '')
+            threat_name = threat_line.split(':')[-1].replace('FOUND', '').strip() if threat_line else 'Unknown'
+            
             return ScanResult(
-                is_clean=True,
+                is_clean=False,
                 engine=ScanEngine.CLAMAV,
-                threat_detected=False,
-                error=str(e),
-                scan_duration=time.time() - start_time
+                threat_detected=True,
+                threat_type=ThreatType.VIRUS,
+                threat_name=threat_name,
+                confidence_score=0.95,
+                scan_duration=time.time() - start_time,
+                details={'clamav_output': output}
+            )
+        
+        return ScanResult(
+            is_clean=True,
+            engine=ScanEngine.CLAMAV,
+            threat_detected=False,
+            confidence_score=0.0,
+            scan_duration=time.time() - start_time,
+            details={'clamav_output': output}
+        )
+    
+    async def _clamd_instream(self, file_content: bytes) -> Tuple[bool, str]:
+        """
+        Stream content to clamd (INSTREAM) without touching the disk
+        
+        Returns:
+            (infected, clamd reply)
+        """
+        reader, writer = await self._open_clamd_connection()
+        try:
+            writer.write(b'zINSTREAM\0')
+            for offset in range(0, len(file_content), self.CLAMD_CHUNK_SIZE):
+                chunk = file_content[offset:offset + self.CLAMD_CHUNK_SIZE]
+                writer.write(struct.pack('!I', len(chunk)) + chunk)
+                await writer.drain()
+            writer.write(struct.pack('!I', 0))
+            await writer.drain()
+            
+            reply = (await reader.read()).rstrip(b'\0').decode('utf-8', errors='ignore').strip()
+        finally:
+            writer.close()
+        
+        if reply.endswith('ERROR'):
+            raise RuntimeError(reply)
+        return reply.endswith('FOUND'), reply
+    
+    async def _open_clamd_connection(self):
+        """Connect to clamd over a unix socket path or host:port"""
+        address = settings.CLAMAV_SOCKET
+        if address.startswith('/'):
+            return await asyncio.open_unix_connection(address)
+        host, _, port = address.rpartition(':')
+        return await asyncio.open_connection(host, int(port))
+    
+    async def _clamscan_subprocess(self, file_content: bytes, filename: str) -> Tuple[bool, str]:
+        """
+        Scan with the clamscan CLI without blocking the event loop
+        
+        Returns:
+            (infected, clamscan output)
+        """
+        temp_file = self.temp_dir / f"scan_{time.time_ns()}_{hashlib.md5(filename.encode()).hexdigest()[:8]}"
+        process = None
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(file_content)
+            
+            process = await asyncio.create_subprocess_exec(
+                'clamscan', '--no-summary', str(temp_file),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
+            stdout, stderr = await process.communicate()
+            output = stdout.decode('utf-8', errors='ignore')
+            
+            if process.returncode == 0:
+                return False, output
+            if process.returncode == 1:
+                return True, output
+            raise RuntimeError(stderr.decode('utf-8', errors='ignore'))
         finally:
-            # Clean up temporary file
+            # Timeouts and early exit cancel the scan: stop clamscan too
+            if process is not None and process.returncode is None:
+                process.kill()
             try:
                 temp_file.unlink()
-            except:
+            except OSError:
                 pass
     
-    async def _scan_behavioral(self, file_content: bytes, filename: str) -> ScanResult:
+    async def _scan_behavioral(self, fingerprint: FileFingerprint, filename: str) -> ScanResult:
         """Behavioral analysis of file content"""
         start_time = time.time()
         
@@ -528,32 +639,20 @@ class MalwareScanner:
         confidence_score = 0.0
         
         # Check file entropy (high entropy may indicate encryption/compression)
-        entropy = self._calculate_entropy(file_content)
+        entropy = fingerprint.entropy
         if entropy > 7.5:
             suspicious_indicators.append(f"High entropy: {entropy:.2f}")
             confidence_score += 0.2
         
         # Check for multiple file signatures (polyglot)
-        signatures_found = 0
-        common_signatures = [
-            (b'%PDF', 'PDF'),
-            (b'PK\x03\x04', 'ZIP'),
-            (b'\xff\xd8\xff', 'JPEG'),
-            (b'GIF8', 'GIF'),
-            (b'MZ', 'PE'),
-            (b'\x7fELF', 'ELF')
-        ]
-        
-        for sig, name in common_signatures:
-            if sig in file_content:
-                signatures_found += 1
+        signatures_found = sum(1 for sig, name in self.COMMON_SIGNATURES if fingerprint.contains(sig))
         
         if signatures_found > 1:
             suspicious_indicators.append(f"Multiple file signatures detected: {signatures_found}")
             confidence_score += 0.3
         
         # Check for excessive null bytes (may indicate padding/evasion)
-        null_ratio = file_content.count(b'\x00') / len(file_content) if file_content else 0
+        null_ratio = fingerprint.null_ratio
         if null_ratio > 0.1:
             suspicious_indicators.append(f"High null byte ratio: {null_ratio:.2f}")
             confidence_score += 0.1
@@ -561,13 +660,8 @@ class MalwareScanner:
         # Check for suspicious strings in non-executable files
         file_ext = Path(filename).suffix.lower()
         if file_ext in ['.csv', '.txt', '.xml']:
-            suspicious_strings = [
-                b'cmd.exe', b'powershell', b'rundll32', b'regsvr32',
-                b'wscript', b'cscript', b'mshta', b'certutil'
-            ]
-            
-            for sus_str in suspicious_strings:
-                if sus_str in file_content.lower():
+            for sus_str in self.SUSPICIOUS_STRINGS:
+                if fingerprint.contains(sus_str, nocase=True):
                     suspicious_indicators.append(f"Suspicious string: {sus_str.decode()}")
                     confidence_score += 0.2
         
@@ -668,26 +762,92 @@ class MalwareScanner:
     
     def _calculate_entropy(self, data: bytes) -> float:
         """Calculate Shannon entropy of data"""
-        if not data:
-            return 0
-        
-        # Count frequency of each byte value
-        byte_counts = [0] * 256
-        for byte in data:
-            byte_counts[byte] += 1
-        
-        # Calculate entropy
-        entropy = 0
-        data_len = len(data)
-        for count in byte_counts:
-            if count > 0:
-                probability = count / data_len
-                entropy -= probability * math.log2(probability)
+        return shannon_entropy(data)
+    
+    def signature_version(self) -> str:
+        """
+        Version of the active detection rules and signature databases
         
-        return entropy
+        Changes whenever the YARA rules, built-in signatures, enabled engines
+        or the ClamAV database change. The ClamAV database is rechecked in a
+        background thread every SIGNATURE_VERSION_CHECK_INTERVAL seconds; until
+        that finishes the previous version is returned.
+        """
+        now = time.time()
+        if (now - self._signature_version_checked > self.SIGNATURE_VERSION_CHECK_INTERVAL and
+                (self._signature_refresh is None or not self._signature_refresh.is_alive())):
+            self._signature_version_checked = now
+            self._signature_refresh = threading.Thread(
+                target=self._refresh_signature_version,
+                name="malware-signature-version",
+                daemon=True
+            )
+            self._signature_refresh.start()
+        return self._signature_version
+    
+    def _refresh_signature_version(self) -> None:
+        """Re-read the ClamAV database version (runs in a background thread)"""
+        if self.clamav_available:
+            self._clamav_version = self._clamav_database_version()
+        self._signature_version = self._compute_signature_version()
+    
+    def _compute_signature_version(self) -> str:
+        parts = [
+            self.YARA_RULES,
+            repr(sorted(self.HIGH_RISK_EXTENSIONS)),
+            repr(self.SCRIPT_PATTERNS),
+            repr(self.COMMON_SIGNATURES),
+            repr(self.SUSPICIOUS_STRINGS),
+            f"yara={self.yara_available}",
+            f"clamav={self._clamav_version}",
+            f"virustotal={bool(self.virustotal_api_key)}",
+        ]
+        return hashlib.sha256('\n'.join(parts).encode()).hexdigest()[:16]
+    
+    def _clamav_database_version(self) -> str:
+        """ClamAV engine and signature database version (e.g. 'ClamAV 1.0.1/26912/...')"""
+        try:
+            if settings.CLAMAV_SOCKET:
+                return self._clamd_command(b'zVERSION\0')
+            result = subprocess.run(
+                ['clamscan', '--version'],
+                capture_output=True,
+                timeout=5
+            )
+            return result.stdout.decode('utf-8', errors='ignore').strip()
+        except Exception:
+            return 'unknown'
+    
+    def _clamd_command(self, command: bytes) -> str:
+        """Send a short command to clamd synchronously (startup/version checks)"""
+        address = settings.CLAMAV_SOCKET
+        if address.startswith('/'):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            target = address
+        else:
+            host, _, port = address.rpartition(':')
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            target = (host, int(port))
+        with sock:
+            sock.settimeout(5)
+            sock.connect(target)
+            sock.sendall(command)
+            reply = b''
+            while True:
+                data = sock.recv(4096)
+                if not data:
+                    break
+                reply += data
+        return reply.rstrip(b'\0').decode('utf-8', errors='ignore').strip()
     
     def _check_clamav_availability(self) -> bool:
         """Check if ClamAV is available"""
+        if settings.CLAMAV_SOCKET:
+            try:
+                return self._clamd_command(b'zPING\0') == 'PONG'
+            except Exception as e:
+                logger.warning(f"clamd not reachable at {settings.CLAMAV_SOCKET}: {e}")
+                return False
         try:
             result = subprocess.run(
                 ['clamscan', '--version'],
@@ -712,6 +872,25 @@ class MalwareScanner:
             return False
 
 
+# YARA rules compiled once per scan worker process
+_worker_yara_rules = None
+
+
+def _yara_match(file_content: bytes) -> List[Tuple[str, Dict[str, Any]]]:
+    """Match the YARA rules against content (runs in the scan process pool)"""
+    global _worker_yara_rules
+    if _worker_yara_rules is None:
+        import yara
+        _worker_yara_rules = yara.compile(source=MalwareScanner.YARA_RULES)
+    return [(match.rule, dict(match.meta)) for match in _worker_yara_rules.match(data=file_content)]
+
+
+register_patterns(
+    exact=[sig for sig, _ in MalwareScanner.COMMON_SIGNATURES],
+    nocase=MalwareScanner.SCRIPT_PATTERNS + MalwareScanner.SUSPICIOUS_STRINGS
+)
+
+
 class MalwareScannerFactory:
     """Factory for creating malware scanner instances"""
     
@@ -729,7 +908,8 @@ class MalwareScannerFactory:
 async def scan_file_for_malware(
     file_content: bytes, 
     filename: str,
-    user_id: Optional[str] = None
+    user_id: Optional[str] = None,
+    fingerprint: Optional[FileFingerprint] = None
 ) -> ComprehensiveScanResult:
     """
     Convenience function to scan a file for malware.
@@ -738,9 +918,10 @@ async def scan_file_for_malware(
         file_content: Raw file content
         filename: Original filename
         user_id: User ID for audit logging
+        fingerprint: Precomputed single-pass analysis of file_content
         
     Returns:
         ComprehensiveScanResult
     """
     scanner = MalwareScannerFactory.get_scanner()
-    return await scanner.comprehensive_scan(file_content, filename, user_id)
\ No newline at end of file
+    return await scanner.comprehensive_scan(file_content, filename, user_id, fingerprint)
\ No newline at end of file
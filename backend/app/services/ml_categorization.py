@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 
 from app.models.transaction import Transaction, CategorizationRule
+from app.services.transaction_records import load_tx_records
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -174,11 +175,14 @@ class MLCategorizationService:
     async def _get_user_context(self, user_id: int) -> Dict[str, Any]:
         """Get user's transaction history for few-shot learning context."""
         # Get recent categorized transactions for context
-        recent_transactions = self.db.query(Transaction).filter(
-            Transaction.user_id == user_id,
+        recent_transactions = load_tx_records(
+            self.db,
+            user_id,
             Transaction.is_categorized == True,
-            Transaction.confidence_score >= 0.8
-        ).order_by(desc(Transaction.created_at)).limit(20).all()
+            Transaction.confidence_score >= 0.8,
+            order_by=(desc(Transaction.created_at),),
+            limit=20
+        )
         
         # Get user's categorization rules
         rules = self.db.query(CategorizationRule).filter(
@@ -459,11 +463,14 @@ Important guidelines:
     
     async def generate_training_data(self, user_id: int) -> List[Dict[str, Any]]:
         """Generate training data from user's categorized transactions."""
-        categorized_transactions = self.db.query(Transaction).filter(
-            Transaction.user_id == user_id,
+        categorized_transactions = load_tx_records(
+            self.db,
+            user_id,
             Transaction.is_categorized == True,
-            Transaction.confidence_score >= 0.8
-        ).order_by(desc(Transaction.updated_at)).limit(100).all()
+            Transaction.confidence_score >= 0.8,
+            order_by=(desc(Transaction.updated_at),),
+            limit=100
+        )
         
         training_data = []
         for tx in categorized_transactions:
@@ -15,6 +15,7 @@ from app.models.user import User, PasswordResetToken
 from app.services.email_service import get_email_service, EmailServiceException
 from app.core.config import settings
 from app.core.audit_logger import get_audit_logger
+from app.core.principal_cache import get_principal_cache
 from app.core.audit_logger import security_audit_logger as security_logger
 
 logger = logging.getLogger(__name__)
@@ -472,6 +473,9 @@ class PasswordResetService:
             
             db.commit()
             
+            # Sessions authenticated before the change must reload the user
+            get_principal_cache().invalidate_user(user.id)
+            
             # Log successful password reset
             audit_logger.log_security_event(
                 event_type="password_reset_completed",
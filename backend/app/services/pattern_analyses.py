@@ -0,0 +1,390 @@
+"""
+Persisted Pattern Analyses for FinGood
+
+Pattern analysis runs as a background job on the RQ queues and its result
+(patterns, suggested rules and the ids of the transactions supporting each
+rule) is stored in pattern_analyses. Every analysis is versioned by a
+fingerprint of the data it was computed from plus its parameters:
+
+- a request whose fingerprint matches a completed analysis is served from
+  storage without running the engine again
+- a request whose fingerprint matches a queued or running analysis joins it
+- anything else queues a new analysis
+
+Suggested rules are looked up in the stored analyses, so applying the rules
+a user just reviewed never needs a re-analysis. Supporting transaction ids
+are stored as sorted [first, last] id ranges, which keeps a rule matching
+thousands of consecutively imported transactions to a handful of pairs.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from rq import Retry
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.background_jobs import job_manager, JobPriority, JobResult
+from app.core.db_routing import get_background_session
+from app.core.exceptions import SystemException
+from app.models.pattern_analysis import PatternAnalysis
+from app.models.pattern_statistics import PatternStatistic
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.rule_simulation import load_snapshot, rule_mask
+
+logger = logging.getLogger(__name__)
+
+# Completed analyses kept per user; older ones are pruned when a new one completes
+ANALYSES_KEPT_PER_USER = 5
+
+# A queued or running analysis older than this is considered lost
+ANALYSIS_JOB_TIMEOUT_MINUTES = 30
+
+PENDING_STATUSES = ("pending", "processing")
+
+IdRanges = List[List[int]]
+
+
+def compress_ids(ids: Iterable[int]) -> IdRanges:
+    """
+    Compress transaction ids into sorted [first, last] ranges
+
+    Args:
+        ids: Transaction ids (any order, duplicates allowed)
+
+    Returns:
+        Inclusive id ranges, e.g. [1, 2, 3, 7] -> [[1, 3], [7, 7]]
+    """
+    ranges: IdRanges = []
+    for transaction_id in sorted(set(ids)):
+        if ranges and transaction_id == ranges[-1][1] + 1:
+            ranges[-1][1] = transaction_id
+        else:
+            ranges.append([transaction_id, transaction_id])
+    return ranges
+
+
+def expand_ids(ranges: Optional[IdRanges]) -> List[int]:
+    """Transaction ids of ranges produced by compress_ids()"""
+    return [transaction_id for first, last in ranges or [] for transaction_id in range(first, last + 1)]
+
+
+def count_ids(ranges: Optional[IdRanges]) -> int:
+    """Number of transaction ids in ranges produced by compress_ids()"""
+    return sum(last - first + 1 for first, last in ranges or [])
+
+
+def analysis_fingerprint(db: Session, user_id: int, parameters: Dict[str, Any]) -> str:
+    """
+    Version of a user's analysis inputs
+
+    Changes whenever the user's transactions or pattern statistics change,
+    when the analysis window moves to a new day, or when the parameters
+    differ. Two aggregate queries; no rows are loaded.
+
+    Args:
+        db: Session
+        user_id: Owner of the data
+        parameters: Analysis parameters
+
+    Returns:
+        Hex SHA-256 fingerprint
+    """
+    transactions = db.query(
+        func.count(Transaction.id),
+        func.max(Transaction.id),
+        func.max(Transaction.updated_at)
+    ).filter(Transaction.user_id == user_id).one()
+    statistics = db.query(
+        func.count(PatternStatistic.id),
+        func.coalesce(func.sum(PatternStatistic.count), 0),
+        func.max(PatternStatistic.updated_at)
+    ).filter(PatternStatistic.user_id == user_id).one()
+
+    window_start = datetime.utcnow() - timedelta(days=parameters["date_range_days"])
+    version = {
+        "transactions": [str(value) for value in transactions],
+        "statistics": [str(value) for value in statistics],
+        "window_start": window_start.date().isoformat(),
+        "parameters": parameters
+    }
+    return hashlib.sha256(json.dumps(version, sort_keys=True).encode()).hexdigest()
+
+
+def find_analysis(db: Session, user_id: int, fingerprint: str) -> Optional[PatternAnalysis]:
+    """
+    Completed or still running analysis for a fingerprint
+
+    Args:
+        db: Session
+        user_id: Owner
+        fingerprint: From analysis_fingerprint()
+
+    Returns:
+        The newest matching analysis, or None
+    """
+    lost_before = datetime.now(timezone.utc) - timedelta(minutes=ANALYSIS_JOB_TIMEOUT_MINUTES)
+    candidates = db.query(PatternAnalysis).filter(
+        PatternAnalysis.user_id == user_id,
+        PatternAnalysis.fingerprint == fingerprint,
+        PatternAnalysis.status.in_(("completed",) + PENDING_STATUSES)
+    ).order_by(PatternAnalysis.id.desc()).all()
+
+    for analysis in candidates:
+        if analysis.status == "completed":
+            return analysis
+    for analysis in candidates:
+        created_at = analysis.created_at
+        if created_at is not None and created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        if created_at is None or created_at >= lost_before:
+            return analysis
+    return None
+
+
+def get_analysis(db: Session, user_id: int, analysis_id: Optional[str] = None) -> Optional[PatternAnalysis]:
+    """
+    A user's analysis by id, or their latest completed analysis
+
+    Args:
+        db: Session
+        user_id: Owner
+        analysis_id: Analysis to fetch (latest completed if omitted)
+
+    Returns:
+        PatternAnalysis or None
+    """
+    query = db.query(PatternAnalysis).filter(PatternAnalysis.user_id == user_id)
+    if analysis_id is not None:
+        return query.filter(PatternAnalysis.analysis_id == analysis_id).first()
+    return query.filter(PatternAnalysis.status == "completed").order_by(
+        PatternAnalysis.completed_at.desc(), PatternAnalysis.id.desc()
+    ).first()
+
+
+def request_pattern_analysis(
+    db: Session,
+    user: User,
+    parameters: Dict[str, Any],
+    priority: JobPriority = JobPriority.NORMAL
+) -> Tuple[PatternAnalysis, bool]:
+    """
+    Serve a stored analysis for the current data or queue a new one
+
+    Args:
+        db: Session
+        user: User to analyse
+        parameters: date_range_days, include_uncategorized, focus_corrections
+            and generation_strategy
+        priority: Queue for a new analysis job
+
+    Returns:
+        (analysis, queued): queued is True if a new job was enqueued
+
+    Raises:
+        SystemException: The job could not be queued
+    """
+    fingerprint = analysis_fingerprint(db, user.id, parameters)
+    existing = find_analysis(db, user.id, fingerprint)
+    if existing is not None:
+        return existing, False
+
+    analysis = PatternAnalysis(
+        analysis_id=str(uuid.uuid4()),
+        user_id=user.id,
+        fingerprint=fingerprint,
+        parameters=parameters,
+        status="pending"
+    )
+    db.add(analysis)
+    db.commit()
+
+    job_data = {
+        'analysis_id': analysis.analysis_id,
+        'user_id': user.id,
+        'parameters': parameters,
+        'created_at': datetime.utcnow().isoformat()
+    }
+    try:
+        queue = job_manager.queues[priority]
+        queue.enqueue(
+            process_pattern_analysis_job,
+            job_data,
+            job_id=analysis.analysis_id,
+            job_timeout=f'{ANALYSIS_JOB_TIMEOUT_MINUTES}m',
+            retry=Retry(max=1),
+            meta={'user_id': user.id, 'job_type': 'pattern_analysis'}
+        )
+    except Exception as e:
+        analysis.status = "failed"
+        analysis.error_message = "Pattern analysis could not be queued"
+        db.commit()
+        logger.error(f"Failed to queue pattern analysis {analysis.analysis_id}: {e}")
+        raise SystemException("Pattern analysis could not be queued", code="PATTERN_ANALYSIS_QUEUE_FAILED")
+
+    logger.info(f"Queued pattern analysis {analysis.analysis_id} for user {user.id} with priority {priority.value}")
+    return analysis, True
+
+
+def find_suggested_rule(db: Session, user_id: int, rule_id: str) -> Optional[Dict[str, Any]]:
+    """
+    A suggested rule from the user's stored analyses
+
+    Args:
+        db: Session
+        user_id: Owner
+        rule_id: PatternRule.rule_id
+
+    Returns:
+        Serialized PatternRule, or None if no kept analysis suggested it
+    """
+    analyses = db.query(PatternAnalysis).filter(
+        PatternAnalysis.user_id == user_id,
+        PatternAnalysis.status == "completed"
+    ).order_by(PatternAnalysis.completed_at.desc()).limit(ANALYSES_KEPT_PER_USER).all()
+    for analysis in analyses:
+        for rule in analysis.suggested_rules or []:
+            if rule.get("rule_id") == rule_id:
+                return rule
+    return None
+
+
+def _supporting_transactions(db: Session, user_id: int, rules: List[Dict[str, Any]], date_range_days: int) -> Dict[str, IdRanges]:
+    """Ids of the categorized transactions each suggested rule matches with the same category"""
+    if not rules:
+        return {}
+    cutoff_date = datetime.utcnow() - timedelta(days=date_range_days)
+    frame = load_snapshot(db, user_id, Transaction.is_categorized == True, Transaction.date >= cutoff_date)
+    if frame.empty:
+        return {}
+    categories = frame["category"].fillna("").to_numpy(dtype=object)
+    ids = frame["id"].to_numpy()
+
+    supporting = {}
+    for rule in rules:
+        try:
+            mask = rule_mask(frame, rule["rule_pattern"], rule["rule_type"])
+        except re.error:
+            continue
+        supporting[rule["rule_id"]] = compress_ids(ids[mask & (categories == rule["category"])].tolist())
+    return supporting
+
+
+def _prune_analyses(db: Session, user_id: int) -> None:
+    """Drop completed and failed analyses beyond the newest ANALYSES_KEPT_PER_USER"""
+    kept = db.query(PatternAnalysis.id).filter(
+        PatternAnalysis.user_id == user_id,
+        PatternAnalysis.status == "completed"
+    ).order_by(PatternAnalysis.completed_at.desc()).limit(ANALYSES_KEPT_PER_USER).subquery()
+    db.query(PatternAnalysis).filter(
+        PatternAnalysis.user_id == user_id,
+        PatternAnalysis.status.in_(("completed", "failed")),
+        PatternAnalysis.id.notin_(select(kept.c.id))
+    ).delete(synchronize_session=False)
+
+
+# Background job worker function
+def process_pattern_analysis_job(job_data: Dict[str, Any]) -> JobResult:
+    """
+    Background worker function for pattern analysis.
+
+    Args:
+        job_data: analysis_id, user_id and parameters of the queued analysis
+
+    Returns:
+        JobResult: Structured result with success/failure information
+    """
+    # Imported here: the engine looks up stored suggested rules in this module
+    from app.services.pattern_recognition import PatternRecognitionEngine, RuleGenerationStrategy
+
+    start_time = datetime.utcnow()
+    analysis_id = job_data['analysis_id']
+    user_id = job_data['user_id']
+    parameters = job_data['parameters']
+
+    logger.info(f"Starting pattern analysis job {analysis_id} for user {user_id}")
+
+    db = get_background_session()
+    try:
+        analysis = db.query(PatternAnalysis).filter(PatternAnalysis.analysis_id == analysis_id).first()
+        if not analysis:
+            raise ValueError("Pattern analysis not found")
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise ValueError("User not found")
+
+        analysis.status = "processing"
+        analysis.started_at = datetime.now(timezone.utc)
+        db.commit()
+
+        try:
+            engine = PatternRecognitionEngine(db, user)
+            engine.analysis_config["generation_strategy"] = RuleGenerationStrategy(parameters['generation_strategy'])
+            result = asyncio.run(engine.analyze_user_patterns(
+                date_range_days=parameters['date_range_days'],
+                include_uncategorized=parameters['include_uncategorized'],
+                focus_corrections=parameters['focus_corrections']
+            ))
+
+            # Version the result by the data it was computed from, which may have
+            # changed since the request (the engine backfills missing statistics)
+            analysis.fingerprint = analysis_fingerprint(db, user_id, parameters)
+            rules = [rule.to_dict() for rule in result.suggested_rules]
+            analysis.summary = {
+                "total_transactions_analyzed": result.total_transactions_analyzed,
+                "patterns_discovered": result.patterns_discovered,
+                "rules_suggested": result.rules_suggested,
+                "high_confidence_patterns": result.high_confidence_patterns,
+                "analysis_duration_ms": result.analysis_duration_ms,
+                "accuracy_improvements": result.accuracy_improvements,
+                "started_at": result.started_at.isoformat(),
+                "completed_at": result.completed_at.isoformat()
+            }
+            analysis.patterns = [pattern.to_dict() for pattern in result.discovered_patterns]
+            analysis.suggested_rules = rules
+            analysis.supporting_transactions = _supporting_transactions(
+                db, user_id, rules, parameters['date_range_days']
+            )
+            analysis.status = "completed"
+            analysis.completed_at = datetime.now(timezone.utc)
+            db.flush()
+            _prune_analyses(db, user_id)
+            db.commit()
+
+        except Exception as e:
+            db.rollback()
+            analysis.status = "failed"
+            analysis.error_message = str(e)
+            analysis.completed_at = datetime.now(timezone.utc)
+            db.commit()
+            raise
+
+        logger.info(f"Completed pattern analysis job {analysis_id}: {len(rules)} rules suggested")
+        return JobResult(
+            success=True,
+            data={
+                'analysis_id': analysis_id,
+                'patterns_discovered': result.patterns_discovered,
+                'rules_suggested': result.rules_suggested
+            },
+            processing_time=(datetime.utcnow() - start_time).total_seconds()
+        )
+
+    except Exception as e:
+        logger.error(f"Pattern analysis job {analysis_id} failed: {e}")
+        return JobResult(
+            success=False,
+            error_message=str(e),
+            error_code="PATTERN_ANALYSIS_FAILED",
+            correlation_id=analysis_id,
+            processing_time=(datetime.utcnow() - start_time).total_seconds()
+        )
+    finally:
+        db.close()
@@ -0,0 +1,496 @@
+"""
+Pattern Mining Statistics for FinGood
+
+Sufficient statistics for the PatternRecognitionEngine, kept per user in the
+pattern_statistics table. Each row counts how often one transaction feature
+co-occurs with one category:
+
+- vendor, description token, amount bucket and weekday
+- recurring payee, with day-number sums for interval regularity
+- per-category totals (with confidence sums) for the behavior profile
+- manual categorizations and corrections ("original->corrected")
+
+The store is maintained incrementally. ORM flushes that insert, recategorize
+or delete transactions are picked up by a session listener (installed by
+register_listeners() at startup, see app.core.database); set-based
+statements (bulk operations, batch deletes) report their rows through
+apply_row_changes(). Pattern discovery reads the rows instead of reloading
+transactions, so it costs the same for one month of history as for ten
+years.
+
+Counts are order-independent sums, so a transaction can be removed as
+easily as it was added. Manual/correction counts record events: they grow
+when a categorization is made and shrink only when the transaction is
+deleted.
+
+first_seen/last_seen can only widen incrementally. A marker row
+(feature_type "state") records that a user's statistics were rebuilt from
+their transactions; it is dropped when categorized transactions are
+deleted, and users without it (history predating the store, or a first
+import seen only incrementally) are rebuilt before their next analysis.
+Recategorizing leaves the old category's first_seen/last_seen wider than
+its remaining transactions until that rebuild.
+"""
+
+import logging
+import re
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, event, func, inspect, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, attributes
+
+from app.models.pattern_statistics import PatternStatistic
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+# Feature types
+VENDOR = "vendor"
+TOKEN = "token"
+AMOUNT = "amount"
+WEEKDAY = "weekday"
+RECURRING = "recurring"
+CATEGORY = "category"
+MANUAL = "manual"
+CORRECTION = "correction"
+STATE = "state"
+
+# Bump to rebuild every user's statistics on their next analysis
+STATISTICS_VERSION = "1"
+
+# Features that describe the whole history rather than recent activity
+LIFETIME_FEATURES = (CATEGORY, MANUAL, CORRECTION)
+
+# Transaction columns the features are derived from
+FEATURE_COLUMNS = (
+    "category", "subcategory", "is_categorized", "vendor", "description",
+    "amount", "date", "confidence_score", "meta_data"
+)
+_CATEGORIZATION_COLUMNS = ("category", "subcategory", "is_categorized")
+
+TOKENS_PER_TRANSACTION = 3
+STREAM_BATCH_SIZE = 2000
+
+# Day numbers for recurring payees are counted from here to keep sums small
+_DAY_ZERO = date(2000, 1, 1).toordinal()
+
+_STOP_WORDS = {
+    'payment', 'purchase', 'transaction', 'debit', 'credit', 'card', 'pos',
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'up', 'about', 'into', 'over', 'after'
+}
+_WORD_PATTERN = re.compile(r'\b[a-zA-Z0-9]{3,}\b')
+
+# (feature_type, feature_value, category, subcategory) -> [count, value_sum, value_sq_sum, first_seen, last_seen]
+Deltas = Dict[Tuple[str, str, str, str], List[Any]]
+
+
+def extract_significant_words(text: Optional[str]) -> List[str]:
+    """Significant words of a description (3+ characters, no stop words), at most 5"""
+    if not text:
+        return []
+    words = _WORD_PATTERN.findall(text.lower())
+    return [w for w in words if w not in _STOP_WORDS][:5]
+
+
+def amount_range(amount) -> str:
+    """Amount bucket used by amount patterns"""
+    amount_abs = abs(amount)
+    if amount_abs < 10:
+        return "0-10"
+    elif amount_abs < 25:
+        return "10-25"
+    elif amount_abs < 50:
+        return "25-50"
+    elif amount_abs < 100:
+        return "50-100"
+    elif amount_abs < 250:
+        return "100-250"
+    elif amount_abs < 500:
+        return "250-500"
+    elif amount_abs < 1000:
+        return "500-1000"
+    return "1000+"
+
+
+def description_key(description: Optional[str]) -> str:
+    """Normalized description key (first significant words) for frequency analysis"""
+    return " ".join(extract_significant_words(description)[:3])
+
+
+def day_number(value: datetime) -> int:
+    """Days since 2000-01-01"""
+    return value.toordinal() - _DAY_ZERO
+
+
+def _state_features(row: Dict[str, Any]) -> List[Tuple[str, str, str, str, float]]:
+    """(type, value, category, subcategory, measure) a categorized transaction contributes"""
+    category = row.get("category")
+    if not row.get("is_categorized") or not category:
+        return []
+    subcategory = row.get("subcategory") or ""
+    vendor = (row.get("vendor") or "").lower().strip()
+    when = row.get("date")
+
+    features = [(CATEGORY, "", category, subcategory, float(row.get("confidence_score") or 0.0))]
+    if vendor:
+        features.append((VENDOR, vendor, category, subcategory, 0.0))
+    for word in dict.fromkeys(extract_significant_words(row.get("description"))[:TOKENS_PER_TRANSACTION]):
+        features.append((TOKEN, word, category, subcategory, 0.0))
+    if row.get("amount"):
+        features.append((AMOUNT, amount_range(row["amount"]), category, subcategory, 0.0))
+    if when is not None:
+        features.append((WEEKDAY, when.strftime('%A'), category, "", 0.0))
+        payee = (row.get("vendor") or description_key(row.get("description"))).lower()
+        if payee:
+            features.append((RECURRING, payee, category, "", float(day_number(when))))
+    return features
+
+
+def _event_features(row: Dict[str, Any]) -> List[Tuple[str, str, str, str, float]]:
+    """Manual categorization and correction events recorded in meta_data"""
+    category = row.get("category")
+    meta = row.get("meta_data") or {}
+    if not row.get("is_categorized") or not category or not isinstance(meta, dict):
+        return []
+
+    features = []
+    if meta.get("categorization_method") == "manual":
+        features.append((MANUAL, "", category, "", 0.0))
+    original = meta.get("original_ml_category")
+    if meta.get("manual_correction") and original:
+        if row.get("vendor"):
+            source = f"vendor:{row['vendor'].lower()}"
+        else:
+            source = f"desc:{' '.join(extract_significant_words(row.get('description'))[:2])}"
+        features.append((CORRECTION, source, f"{original}->{category}", "", 0.0))
+    return features
+
+
+def accumulate(deltas: Deltas, row: Dict[str, Any], sign: int, state: bool = True, events: bool = False) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) a transaction's contribution
+
+    Args:
+        deltas: Pending changes, updated in place
+        row: Transaction column values (see FEATURE_COLUMNS)
+        sign: 1 to add, -1 to remove
+        state: Include features of the transaction's current state
+        events: Include manual/correction event features
+    """
+    features = (_state_features(row) if state else []) + (_event_features(row) if events else [])
+    when = row.get("date")
+    for feature_type, feature_value, category, subcategory, measure in features:
+        key = (feature_type, feature_value[:255], category[:255], subcategory[:100])
+        entry = deltas.setdefault(key, [0, 0.0, 0.0, None, None])
+        entry[0] += sign
+        entry[1] += sign * measure
+        entry[2] += sign * measure * measure
+        if sign > 0 and when is not None:
+            entry[3] = when if entry[3] is None else min(entry[3], when)
+            entry[4] = when if entry[4] is None else max(entry[4], when)
+
+
+def apply_deltas(connection, user_id: int, deltas: Deltas) -> None:
+    """
+    Upsert pending changes and drop rows whose count reached zero
+
+    Args:
+        connection: Connection of the current transaction
+        user_id: Owner of the statistics
+        deltas: Changes from accumulate()
+    """
+    records = [
+        {
+            "user_id": user_id,
+            "feature_type": key[0],
+            "feature_value": key[1],
+            "category": key[2],
+            "subcategory": key[3],
+            "count": entry[0],
+            "value_sum": entry[1],
+            "value_sq_sum": entry[2],
+            "first_seen": entry[3],
+            "last_seen": entry[4]
+        }
+        for key, entry in deltas.items()
+        if entry[0] or entry[1] or entry[2]
+    ]
+    if not records:
+        return
+
+    table = PatternStatistic.__table__
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        statement = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table)
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                table.c.user_id, table.c.feature_type, table.c.feature_value,
+                table.c.category, table.c.subcategory
+            ],
+            set_={
+                "count": table.c.count + excluded.count,
+                "value_sum": table.c.value_sum + excluded.value_sum,
+                "value_sq_sum": table.c.value_sq_sum + excluded.value_sq_sum,
+                "first_seen": case(
+                    (excluded.first_seen < table.c.first_seen, excluded.first_seen),
+                    else_=func.coalesce(table.c.first_seen, excluded.first_seen)
+                ),
+                "last_seen": case(
+                    (excluded.last_seen > table.c.last_seen, excluded.last_seen),
+                    else_=func.coalesce(table.c.last_seen, excluded.last_seen)
+                ),
+                "updated_at": func.now()
+            }
+        )
+        connection.execute(statement, records)
+    else:
+        for record in records:
+            key_condition = [
+                table.c.user_id == user_id,
+                table.c.feature_type == record["feature_type"],
+                table.c.feature_value == record["feature_value"],
+                table.c.category == record["category"],
+                table.c.subcategory == record["subcategory"]
+            ]
+            values = {
+                "count": table.c.count + record["count"],
+                "value_sum": table.c.value_sum + record["value_sum"],
+                "value_sq_sum": table.c.value_sq_sum + record["value_sq_sum"],
+                "updated_at": func.now()
+            }
+            if record["first_seen"] is not None:
+                values["first_seen"] = func.coalesce(
+                    case((table.c.first_seen < record["first_seen"], table.c.first_seen)), record["first_seen"]
+                )
+                values["last_seen"] = func.coalesce(
+                    case((table.c.last_seen > record["last_seen"], table.c.last_seen)), record["last_seen"]
+                )
+            result = connection.execute(update(table).where(*key_condition).values(values))
+            if result.rowcount == 0 and record["count"] > 0:
+                connection.execute(table.insert().values(record))
+
+    connection.execute(delete(table).where(table.c.user_id == user_id, table.c.count <= 0))
+
+
+def _drop_markers(connection, user_ids: Iterable[int]) -> None:
+    """Mark users' statistics for a rebuild before their next analysis"""
+    table = PatternStatistic.__table__
+    connection.execute(delete(table).where(table.c.user_id.in_(list(user_ids)), table.c.feature_type == STATE))
+
+
+def _write(connection, changes: Dict[int, Deltas], shrunk: Iterable[int] = ()) -> None:
+    """
+    Apply per-user changes in a savepoint; statistics never fail the caller's transaction
+
+    Args:
+        connection: Connection of the current transaction
+        changes: Deltas per user
+        shrunk: Users who lost categorized transactions (first/last seen need a rebuild)
+    """
+    shrunk = set(shrunk)
+    if not any(changes.values()) and not shrunk:
+        return
+    try:
+        with connection.begin_nested():
+            for user_id, deltas in changes.items():
+                apply_deltas(connection, user_id, deltas)
+            if shrunk:
+                _drop_markers(connection, shrunk)
+    except Exception as e:
+        logger.warning(f"Pattern statistics update skipped: {e}")
+
+
+def apply_row_changes(
+    db: Session,
+    user_id: int,
+    removed: Iterable[Dict[str, Any]] = (),
+    added: Iterable[Dict[str, Any]] = (),
+    events: bool = False
+) -> None:
+    """
+    Update statistics for transactions changed by set-based statements
+
+    Args:
+        db: Session whose transaction made the change
+        user_id: Owner of the transactions
+        removed: Column values of deleted rows or of rows before the change
+        added: Column values of inserted rows or of rows after the change
+        events: Also add/remove manual and correction events (inserts and deletes)
+    """
+    deltas: Deltas = {}
+    shrunk = False
+    for row in removed:
+        accumulate(deltas, row, -1, events=events)
+        shrunk = shrunk or (events and bool(row.get("is_categorized")))
+    for row in added:
+        accumulate(deltas, row, 1, events=events)
+    _write(db.connection(), {user_id: deltas}, shrunk=[user_id] if shrunk else ())
+
+
+def fetch_feature_rows(db: Session, user_id: int, *conditions) -> Dict[int, Dict[str, Any]]:
+    """
+    Feature columns of a user's transactions matching conditions
+
+    Returns:
+        Transaction id -> column values
+    """
+    table = Transaction.__table__
+    rows = db.execute(
+        select(table.c.id, *(table.c[name] for name in FEATURE_COLUMNS)).where(
+            table.c.user_id == user_id, *conditions
+        )
+    ).mappings()
+    return {row["id"]: dict(row) for row in rows}
+
+
+def rebuild_user_statistics(db: Session, user_id: int) -> int:
+    """
+    Recompute a user's statistics from all categorized transactions
+
+    Used for users without a current marker (see statistics_current); the
+    marker is written with the rebuilt rows.
+
+    Returns:
+        Number of transactions scanned
+    """
+    table = Transaction.__table__
+    deltas: Deltas = {}
+    scanned = 0
+    rows = db.execute(
+        select(*(table.c[name] for name in FEATURE_COLUMNS)).where(
+            table.c.user_id == user_id,
+            table.c.is_categorized == True
+        ).execution_options(yield_per=STREAM_BATCH_SIZE)
+    ).mappings()
+    for row in rows:
+        accumulate(deltas, row, 1, events=True)
+        scanned += 1
+
+    deltas[(STATE, STATISTICS_VERSION, "", "")] = [1, 0.0, 0.0, None, None]
+
+    connection = db.connection()
+    connection.execute(delete(PatternStatistic.__table__).where(PatternStatistic.user_id == user_id))
+    apply_deltas(connection, user_id, deltas)
+    logger.info(f"Rebuilt pattern statistics for user {user_id} from {scanned} transactions")
+    return scanned
+
+
+def statistics_current(db: Session, user_id: int) -> bool:
+    """Whether the user's statistics were rebuilt at the current version and have not lost rows since"""
+    return db.query(PatternStatistic.id).filter(
+        PatternStatistic.user_id == user_id,
+        PatternStatistic.feature_type == STATE,
+        PatternStatistic.feature_value == STATISTICS_VERSION
+    ).first() is not None
+
+
+def load_user_statistics(db: Session, user_id: int, since: Optional[datetime] = None) -> List[PatternStatistic]:
+    """
+    Statistics rows of a user
+
+    Args:
+        db: Session
+        user_id: Owner
+        since: Only features seen on or after this date (lifetime totals always included)
+
+    Returns:
+        PatternStatistic rows
+    """
+    query = db.query(PatternStatistic).filter(
+        PatternStatistic.user_id == user_id,
+        PatternStatistic.feature_type != STATE
+    )
+    if since is not None:
+        query = query.filter(or_(
+            PatternStatistic.last_seen >= since,
+            PatternStatistic.feature_type.in_(LIFETIME_FEATURES)
+        ))
+    return query.all()
+
+
+# ---------------------------------------------------------------------------
+# ORM change tracking
+# ---------------------------------------------------------------------------
+
+def _loaded_state(obj: Transaction) -> Dict[str, Any]:
+    # Only what is loaded: a deleted row can no longer be refreshed
+    loaded = inspect(obj).dict
+    return {name: loaded.get(name) for name in FEATURE_COLUMNS}
+
+
+def _current_state(obj: Transaction) -> Dict[str, Any]:
+    return {name: getattr(obj, name) for name in FEATURE_COLUMNS}
+
+
+def _keep_previous_value(target, value, oldvalue, initiator):
+    """No-op; registered only for its active_history"""
+
+
+def _previous_state(obj: Transaction) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Pre-flush values of a modified transaction and whether its category changed"""
+    previous = {}
+    changed = False
+    recategorized = False
+    for name in FEATURE_COLUMNS:
+        history = attributes.get_history(obj, name)
+        if history.deleted:
+            previous[name] = history.deleted[0]
+        elif history.unchanged:
+            previous[name] = history.unchanged[0]
+        elif history.added:
+            previous[name] = None  # Previous value was never loaded
+        else:
+            previous[name] = getattr(obj, name)
+        if history.added or history.deleted:
+            changed = True
+            recategorized = recategorized or name in _CATEGORIZATION_COLUMNS
+    return (previous if changed else None), recategorized
+
+
+def _track_transaction_statistics(session, flush_context):
+    changes: Dict[int, Deltas] = defaultdict(dict)
+    shrunk = set()
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            accumulate(changes[obj.user_id], _current_state(obj), 1, events=True)
+
+    for obj in session.deleted:
+        user_id = inspect(obj).dict.get("user_id") if isinstance(obj, Transaction) else None
+        if user_id is not None:
+            row = _loaded_state(obj)
+            accumulate(changes[user_id], row, -1, events=True)
+            if row.get("is_categorized"):
+                shrunk.add(user_id)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Transaction) or obj in session.deleted:
+            continue
+        previous, recategorized = _previous_state(obj)
+        if previous is None:
+            continue
+        current = _current_state(obj)
+        accumulate(changes[obj.user_id], previous, -1)
+        accumulate(changes[obj.user_id], current, 1)
+        if recategorized:
+            accumulate(changes[obj.user_id], current, 1, state=False, events=True)
+
+    if changes:
+        _write(session.connection(), changes, shrunk)
+
+
+def register_listeners() -> None:
+    """Keep the statistics current on every ORM flush (safe to call more than once)"""
+    # Load the replaced value even when the instance was expired (e.g. after
+    # a commit), so the previous state can be subtracted
+    for name in FEATURE_COLUMNS:
+        attribute = getattr(Transaction, name)
+        if not event.contains(attribute, "set", _keep_previous_value):
+            event.listen(attribute, "set", _keep_previous_value, active_history=True)
+    if not event.contains(Session, "after_flush", _track_transaction_statistics):
+        event.listen(Session, "after_flush", _track_transaction_statistics)
@@ -0,0 +1,213 @@
+"""
+Rule Match Index for FinGood
+
+Records which categorization rule categorized each transaction and keeps
+per-rule counters current, so rule performance analytics and priority
+optimization are aggregate reads instead of replaying every rule against
+every transaction.
+
+- rule_matches holds one row per rule-categorized transaction (rule,
+  assigned category, matched_at, overridden_at).
+- CategorizationRule.match_count / override_count / last_matched_at are
+  incremented as rules match and as their results are recategorized.
+
+Rule matches found one transaction at a time are queued on the session
+with note_rule_match() and written set-based when the session commits,
+so the categorization loop itself issues no extra statements.
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.transaction import CategorizationRule, RuleMatch, Transaction
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_CHUNK_SIZE = 5000
+
+_PENDING_KEY = "pending_rule_matches"
+
+# transaction id -> (rule id, user id, category, subcategory)
+Matches = Dict[int, Tuple[int, int, str, Optional[str]]]
+
+
+def _chunks(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _same_category(category_a, subcategory_a, category_b, subcategory_b) -> bool:
+    return (category_a, subcategory_a or "") == (category_b, subcategory_b or "")
+
+
+def note_rule_match(db: Session, rule: CategorizationRule, transaction: Transaction) -> None:
+    """
+    Queue a rule match; it is indexed when the session commits
+
+    Args:
+        db: Session holding the categorized transaction
+        rule: Rule that matched
+        transaction: Transaction the rule categorized (may not be flushed yet)
+    """
+    db.info.setdefault(_PENDING_KEY, []).append(
+        (rule.id, rule.user_id, rule.category, rule.subcategory, transaction)
+    )
+
+
+def _increment_rule_counters(connection, column: str, counts: Dict[int, int], matched_at: Optional[datetime] = None) -> None:
+    if not counts:
+        return
+    table = CategorizationRule.__table__
+    values = {column: table.c[column] + bindparam("b_count")}
+    if matched_at is not None:
+        values["last_matched_at"] = matched_at
+    connection.execute(
+        update(table).where(table.c.id == bindparam("b_id")).values(values),
+        [{"b_id": rule_id, "b_count": count} for rule_id, count in counts.items()]
+    )
+
+
+def record_rule_matches(db: Session, matches: Matches, matched_at: Optional[datetime] = None) -> int:
+    """
+    Index rule matches and update the rules' counters
+
+    A transaction keeps one attribution: a new match replaces the previous
+    one, and counts as an override of the previous rule if the category
+    changed.
+
+    Args:
+        db: Session (caller owns the transaction)
+        matches: Transaction id -> (rule id, user id, category, subcategory)
+        matched_at: Match time (defaults to now)
+
+    Returns:
+        Number of new attributions
+    """
+    if not matches:
+        return 0
+    matched_at = matched_at or datetime.now(timezone.utc)
+    connection = db.connection()
+    table = RuleMatch.__table__
+
+    hits = Counter()
+    overrides = Counter()
+    for chunk in _chunks(list(matches), STATEMENT_CHUNK_SIZE):
+        previous = connection.execute(
+            select(table.c.transaction_id, table.c.rule_id, table.c.category, table.c.subcategory).where(
+                table.c.transaction_id.in_(chunk),
+                table.c.overridden_at.is_(None)
+            )
+        ).all()
+        unchanged = set()
+        for row in previous:
+            rule_id, _, category, subcategory = matches[row.transaction_id]
+            if row.rule_id == rule_id and _same_category(row.category, row.subcategory, category, subcategory):
+                unchanged.add(row.transaction_id)
+            elif not _same_category(row.category, row.subcategory, category, subcategory):
+                overrides[row.rule_id] += 1
+
+        changed = [transaction_id for transaction_id in chunk if transaction_id not in unchanged]
+        if not changed:
+            continue
+        connection.execute(delete(table).where(table.c.transaction_id.in_(changed)))
+        connection.execute(insert(table), [
+            {
+                "transaction_id": transaction_id,
+                "rule_id": matches[transaction_id][0],
+                "user_id": matches[transaction_id][1],
+                "category": matches[transaction_id][2],
+                "subcategory": matches[transaction_id][3],
+                "matched_at": matched_at
+            }
+            for transaction_id in changed
+        ])
+        hits.update(matches[transaction_id][0] for transaction_id in changed)
+
+    _increment_rule_counters(connection, "match_count", hits, matched_at)
+    _increment_rule_counters(connection, "override_count", overrides)
+    return sum(hits.values())
+
+
+def record_rule_overrides(
+    db: Session,
+    user_id: int,
+    transaction_ids: Iterable[int],
+    category: str,
+    subcategory: Optional[str] = None,
+    compare_subcategory: bool = True
+) -> int:
+    """
+    Mark rule attributions overridden by a recategorization
+
+    Args:
+        db: Session (caller owns the transaction)
+        user_id: Owner of the transactions
+        transaction_ids: Recategorized transactions
+        category: New category
+        subcategory: New subcategory
+        compare_subcategory: Also treat a subcategory change as an override
+
+    Returns:
+        Number of attributions marked overridden
+    """
+    transaction_ids = list(dict.fromkeys(transaction_ids))
+    if not transaction_ids:
+        return 0
+    connection = db.connection()
+    table = RuleMatch.__table__
+    now = datetime.now(timezone.utc)
+
+    overrides = Counter()
+    overridden_ids = []
+    for chunk in _chunks(transaction_ids, STATEMENT_CHUNK_SIZE):
+        rows = connection.execute(
+            select(table.c.id, table.c.rule_id, table.c.category, table.c.subcategory).where(
+                table.c.user_id == user_id,
+                table.c.transaction_id.in_(chunk),
+                table.c.overridden_at.is_(None)
+            )
+        ).all()
+        for row in rows:
+            if compare_subcategory:
+                overridden = not _same_category(row.category, row.subcategory, category, subcategory)
+            else:
+                overridden = row.category != category
+            if overridden:
+                overrides[row.rule_id] += 1
+                overridden_ids.append(row.id)
+
+    for chunk in _chunks(overridden_ids, STATEMENT_CHUNK_SIZE):
+        connection.execute(update(table).where(table.c.id.in_(chunk)).values(overridden_at=now))
+    _increment_rule_counters(connection, "override_count", overrides)
+    return len(overridden_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_rule_matches(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    session.flush()  # Assign ids to newly imported transactions
+
+    # The last match of a transaction wins, as it did on the row itself
+    matches: Matches = {}
+    for rule_id, user_id, category, subcategory, transaction in pending:
+        if transaction.id is not None:
+            matches[transaction.id] = (rule_id, user_id, category, subcategory)
+
+    # The index never fails the categorization being committed
+    try:
+        with session.begin_nested():
+            record_rule_matches(session, matches)
+    except Exception as e:
+        logger.warning(f"Rule match index update skipped: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_rule_matches(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,308 @@
+"""
+Rule Impact Simulation for FinGood
+
+Replays a set of categorization rules against a columnar snapshot of a
+user's transactions and reports exactly what would change:
+
+- before/after category for every transaction a rule would recategorize
+- per-rule matches, wins and rows lost to higher-priority rules
+- conflicts: rows claimed by rules with different target categories
+- coverage of the rule set
+
+Rules are evaluated in the order CategorizationService applies them
+(priority descending, first match wins). Each rule is one vectorized
+pass over the lower-cased description/vendor columns instead of a
+Python-level check per transaction. For larger rule sets, all literal
+patterns are first combined into one alternation per column, so each
+rule is only tested on rows that matched some literal.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.transaction import CategorizationRule, Transaction
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_COLUMNS = ("id", "description", "vendor", "amount", "date", "category", "subcategory", "is_categorized")
+
+# Literal pattern types and the snapshot column they match against
+_LITERAL_COLUMNS = {
+    "keyword": "description_lower",
+    "contains": "description_lower",
+    "exact": "description_lower",
+    "vendor": "vendor_lower",
+}
+
+# Rule sets at least this large get a combined literal prefilter
+PREFILTER_MIN_RULES = 8
+
+
+@dataclass
+class SimulatedRule:
+    """A rule to replay: an existing CategorizationRule, a suggested rule or a draft"""
+    key: str
+    pattern: str
+    pattern_type: str
+    category: str
+    subcategory: Optional[str] = None
+    priority: int = 1
+    source: str = "draft"  # existing, suggested, draft
+
+    @classmethod
+    def from_db_rule(cls, rule: CategorizationRule) -> "SimulatedRule":
+        return cls(
+            key=f"rule:{rule.id}",
+            pattern=rule.pattern,
+            pattern_type=rule.pattern_type,
+            category=rule.category,
+            subcategory=rule.subcategory,
+            priority=rule.priority or 0,
+            source="existing"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "pattern": self.pattern,
+            "pattern_type": self.pattern_type,
+            "category": self.category,
+            "subcategory": self.subcategory,
+            "priority": self.priority,
+            "source": self.source
+        }
+
+
+def load_snapshot(db: Session, user_id: int, *conditions) -> pd.DataFrame:
+    """
+    Columnar snapshot of a user's transactions for rule matching
+
+    Args:
+        db: Session
+        user_id: Owner of the transactions
+        *conditions: Extra filters on Transaction columns
+
+    Returns:
+        DataFrame with SNAPSHOT_COLUMNS plus lower-cased description/vendor
+    """
+    table = Transaction.__table__
+    rows = db.execute(
+        select(*(table.c[name] for name in SNAPSHOT_COLUMNS)).where(
+            table.c.user_id == user_id, *conditions
+        ).order_by(table.c.id)
+    ).all()
+    frame = pd.DataFrame.from_records(rows, columns=list(SNAPSHOT_COLUMNS))
+    frame["description_lower"] = frame["description"].fillna("").str.lower()
+    frame["vendor_lower"] = frame["vendor"].fillna("").str.lower()
+    frame["is_categorized"] = frame["is_categorized"].fillna(False).astype(bool)
+    return frame
+
+
+def rule_mask(frame: pd.DataFrame, pattern: str, pattern_type: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Boolean match vector of one rule, with CategorizationService semantics
+
+    Args:
+        frame: Snapshot from load_snapshot()
+        pattern: Rule pattern
+        pattern_type: keyword, contains, exact, vendor or regex
+        rows: Only test these positions (others are False)
+
+    Returns:
+        Boolean array aligned with frame
+
+    Raises:
+        re.error: Invalid regex pattern
+    """
+    mask = np.zeros(len(frame), dtype=bool)
+    if rows is not None and not rows.any():
+        return mask
+    subset = frame if rows is None else frame[rows]
+    needle = pattern.lower()
+
+    if pattern_type in ("keyword", "contains"):
+        matched = subset["description_lower"].str.contains(needle, regex=False)
+    elif pattern_type == "exact":
+        matched = subset["description_lower"] == needle
+    elif pattern_type == "vendor":
+        matched = subset["vendor"].notna() & subset["vendor_lower"].str.contains(needle, regex=False)
+    elif pattern_type == "regex":
+        compiled = re.compile(pattern, re.IGNORECASE)
+        matched = subset["description"].fillna("").str.contains(compiled, regex=True)
+    else:
+        return mask
+
+    if rows is None:
+        return matched.to_numpy(dtype=bool)
+    mask[rows] = matched.to_numpy(dtype=bool)
+    return mask
+
+
+def _literal_prefilter(frame: pd.DataFrame, rules: Sequence[SimulatedRule]) -> Dict[str, np.ndarray]:
+    """Rows of each column that contain at least one literal pattern (one pass per column)"""
+    needles: Dict[str, set] = {}
+    for rule in rules:
+        column = _LITERAL_COLUMNS.get(rule.pattern_type)
+        if column:
+            needles.setdefault(column, set()).add(re.escape(rule.pattern.lower()))
+
+    candidates = {}
+    for column, patterns in needles.items():
+        # Longest first so the alternation prefers the most specific literal
+        alternation = "|".join(sorted(patterns, key=len, reverse=True))
+        candidates[column] = frame[column].str.contains(alternation, regex=True).to_numpy(dtype=bool)
+    return candidates
+
+
+def simulate_rules(
+    frame: pd.DataFrame,
+    rules: Sequence[SimulatedRule],
+    only_uncategorized: bool = False,
+    sample_limit: int = 50
+) -> Dict[str, Any]:
+    """
+    Replay rules against a snapshot and report the category changes
+
+    Args:
+        frame: Snapshot from load_snapshot()
+        rules: Rules to replay; applied by priority descending, then list order
+        only_uncategorized: Leave already categorized transactions untouched
+            (what automatic categorization does)
+        sample_limit: Maximum number of per-transaction changes to return
+
+    Returns:
+        Dict with totals, coverage, category transitions, per-rule results,
+        conflicts and a sample of changed transactions
+    """
+    started = time.perf_counter()
+    ordered = sorted(enumerate(rules), key=lambda item: (-(item[1].priority or 0), item[0]))
+    ordered_rules = [rule for _, rule in ordered]
+    total = len(frame)
+
+    winner = np.full(total, -1, dtype=np.int64)
+    is_categorized = frame["is_categorized"].to_numpy(dtype=bool)
+    eligible = ~is_categorized if only_uncategorized else np.ones(total, dtype=bool)
+    candidates = _literal_prefilter(frame, ordered_rules) if len(ordered_rules) >= PREFILTER_MIN_RULES else {}
+
+    rule_results = []
+    conflicts = []
+    errors = []
+    for position, rule in enumerate(ordered_rules):
+        column = _LITERAL_COLUMNS.get(rule.pattern_type)
+        rows = candidates.get(column) if column else None
+        try:
+            matched = rule_mask(frame, rule.pattern, rule.pattern_type, rows) & eligible
+        except re.error as e:
+            errors.append({"rule": rule.key, "error": f"Invalid regex pattern: {e}"})
+            matched = np.zeros(total, dtype=bool)
+
+        claimed = matched & (winner >= 0)
+        won = matched & (winner < 0)
+        winner[won] = position
+
+        # Rows a higher-priority rule already claimed
+        shadowed_by = {}
+        if claimed.any():
+            positions, counts = np.unique(winner[claimed], return_counts=True)
+            for other_position, count in zip(positions.tolist(), counts.tolist()):
+                other = ordered_rules[other_position]
+                shadowed_by[other.key] = count
+                if (other.category, other.subcategory or "") != (rule.category, rule.subcategory or ""):
+                    conflicts.append({
+                        "rule": rule.key,
+                        "overridden_by": other.key,
+                        "transactions": count,
+                        "rule_category": rule.category,
+                        "winning_category": other.category
+                    })
+
+        rule_results.append({
+            **rule.to_dict(),
+            "matches": int(matched.sum()),
+            "applied": int(won.sum()),
+            "shadowed": int(claimed.sum()),
+            "shadowed_by": shadowed_by
+        })
+
+    # After-state: the winning rule's category, otherwise unchanged
+    applied = winner >= 0
+    before_category = frame["category"].fillna("").to_numpy(dtype=object)
+    before_subcategory = frame["subcategory"].fillna("").to_numpy(dtype=object)
+    after_category = before_category.copy()
+    after_subcategory = before_subcategory.copy()
+    if ordered_rules:
+        rule_categories = np.array([rule.category for rule in ordered_rules], dtype=object)
+        rule_subcategories = np.array([rule.subcategory or "" for rule in ordered_rules], dtype=object)
+        after_category[applied] = rule_categories[winner[applied]]
+        after_subcategory[applied] = rule_subcategories[winner[applied]]
+
+    changed = applied & (~is_categorized | (after_category != before_category) | (after_subcategory != before_subcategory))
+    newly_categorized = changed & ~is_categorized
+    recategorized = changed & is_categorized
+
+    changed_by_rule = np.bincount(winner[changed], minlength=len(ordered_rules)) if ordered_rules else []
+    newly_by_rule = np.bincount(winner[newly_categorized], minlength=len(ordered_rules)) if ordered_rules else []
+    for position, result in enumerate(rule_results):
+        result["changes"] = int(changed_by_rule[position])
+        result["newly_categorized"] = int(newly_by_rule[position])
+
+    # Uncategorized rows transition from None (not NaN, which is not valid JSON)
+    transition_counts = Counter(zip(
+        [category if categorized else None
+         for category, categorized in zip(before_category[changed], is_categorized[changed])],
+        after_category[changed]
+    ))
+    transitions = [
+        {"from_category": from_category, "to_category": to_category, "transactions": count}
+        for (from_category, to_category), count in transition_counts.most_common()
+    ]
+
+    sample = []
+    for index in np.flatnonzero(changed)[:sample_limit]:
+        sample.append({
+            "transaction_id": int(frame["id"].iat[index]),
+            "description": frame["description"].iat[index],
+            "vendor": frame["vendor"].iat[index],
+            "before_category": before_category[index] if is_categorized[index] else None,
+            "before_subcategory": (before_subcategory[index] or None) if is_categorized[index] else None,
+            "after_category": after_category[index],
+            "after_subcategory": after_subcategory[index] or None,
+            "rule": ordered_rules[winner[index]].key
+        })
+
+    matched_any = int(applied.sum())
+    return {
+        "total_transactions": total,
+        "eligible_transactions": int(eligible.sum()),
+        "rules_evaluated": len(ordered_rules),
+        "transactions_matched": matched_any,
+        "coverage": matched_any / total if total else 0.0,
+        "changed_count": int(changed.sum()),
+        "newly_categorized": int(newly_categorized.sum()),
+        "recategorized": int(recategorized.sum()),
+        "uncategorized_after": int((~is_categorized & ~applied).sum()),
+        "category_transitions": transitions,
+        "rules": rule_results,
+        "conflicts": conflicts,
+        "changes": sample,
+        "errors": errors,
+        "simulation_time_ms": int((time.perf_counter() - started) * 1000)
+    }
+
+
+def active_rules_for_simulation(db: Session, user_id: int) -> List[SimulatedRule]:
+    """The user's active rules, in the order categorization applies them"""
+    rules = db.query(CategorizationRule).filter(
+        CategorizationRule.user_id == user_id,
+        CategorizationRule.is_active == True
+    ).order_by(CategorizationRule.priority.desc(), CategorizationRule.id).all()
+    return [SimulatedRule.from_db_rule(rule) for rule in rules]
@@ -7,7 +7,6 @@ import tempfile
 import subprocess
 import os
 import time
-import hashlib
 import json
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any, Union
@@ -18,13 +17,13 @@ from datetime import datetime, timedelta
 import docker
 import zipfile
 import tarfile
-import math
 import mimetypes
 import io
 import pandas as pd
 
 from app.core.config import settings
 from app.core.audit_logger import security_audit_logger
+from app.services.file_analysis import FileFingerprint, analyze_file_content, register_patterns, shannon_entropy
 
 logger = logging.getLogger(__name__)
 
@@ -89,6 +88,28 @@ class LightweightSandbox:
         '/Applications/', '/System/', '/Library/'
     }
     
+    # Malware family names
+    MALWARE_FAMILIES = [
+        'zeus', 'carbanak', 'dridex', 'emotet', 'trickbot',
+        'bankbot', 'shylock', 'dyre', 'neverquest'
+    ]
+    
+    # Dangerous APIs
+    DANGEROUS_APIS = [
+        'createprocess', 'shellexecute', 'winexec', 'virtualalloc',
+        'writeprocessmemory', 'createthread', 'loadlibrary'
+    ]
+    
+    # Common file signatures for embedded file detection
+    EMBEDDED_FILE_SIGNATURES = [
+        (b'MZ', 'PE Executable'),
+        (b'\x7fELF', 'ELF Executable'),
+        (b'%PDF', 'PDF Document'),
+        (b'PK\x03\x04', 'ZIP Archive'),
+        (b'\xff\xd8\xff', 'JPEG Image'),
+        (b'\x89PNG', 'PNG Image'),
+    ]
+    
     def __init__(self):
         self.temp_dir = Path(tempfile.gettempdir()) / "fingood_sandbox"
         self.temp_dir.mkdir(exist_ok=True, parents=True)
@@ -106,7 +127,8 @@ class LightweightSandbox:
         file_content: bytes,
         filename: str,
         user_id: Optional[str] = None,
-        analysis_type: AnalysisType = AnalysisType.STATIC
+        analysis_type: AnalysisType = AnalysisType.STATIC,
+        fingerprint: Optional[FileFingerprint] = None
     ) -> SandboxResult:
         """
         Perform sandbox analysis on file content.
@@ -116,6 +138,7 @@ class LightweightSandbox:
             filename: Original filename
             user_id: User ID for audit logging
             analysis_type: Type of analysis to perform
+            fingerprint: Precomputed single-pass analysis of file_content
             
         Returns:
             SandboxResult with analysis findings
@@ -131,6 +154,9 @@ class LightweightSandbox:
                 analysis_type=analysis_type.value
             )
             
+            if fingerprint is None:
+                fingerprint = analyze_file_content(file_content)
+            
             # Initialize result
             result = SandboxResult(
                 is_safe=True,
@@ -146,23 +172,23 @@ class LightweightSandbox:
                 metadata={
                     'filename': filename,
                     'file_size': len(file_content),
-                    'file_hash': hashlib.sha256(file_content).hexdigest()
+                    'file_hash': fingerprint.sha256
                 },
                 errors=[]
             )
             
             # Perform analysis based on type
             if analysis_type == AnalysisType.STATIC:
-                await self._static_analysis(file_content, filename, result)
+                await self._static_analysis(file_content, filename, result, fingerprint)
             elif analysis_type == AnalysisType.BEHAVIORAL:
-                await self._behavioral_analysis(file_content, filename, result)
+                await self._behavioral_analysis(file_content, filename, result, fingerprint)
             elif analysis_type == AnalysisType.CONTAINER and self.docker_available:
-                await self._container_analysis(file_content, filename, result)
+                await self._container_analysis(file_content, filename, result, fingerprint)
             elif analysis_type == AnalysisType.EMULATION:
-                await self._emulation_analysis(file_content, filename, result)
+                await self._emulation_analysis(file_content, filename, result, fingerprint)
             else:
                 # Fallback to static analysis
-                await self._static_analysis(file_content, filename, result)
+                await self._static_analysis(file_content, filename, result, fingerprint)
             
             # Calculate final risk level
             self._calculate_risk_level(result)
@@ -211,7 +237,8 @@ class LightweightSandbox:
         self,
         file_content: bytes,
         filename: str,
-        result: SandboxResult
+        result: SandboxResult,
+        fingerprint: FileFingerprint
     ) -> None:
         """Perform static analysis without execution"""
         
@@ -219,11 +246,11 @@ class LightweightSandbox:
         
         # Analyze file structure
         result.static_analysis['file_type'] = file_ext
-        result.static_analysis['entropy'] = self._calculate_entropy(file_content)
-        result.static_analysis['suspicious_strings'] = self._find_suspicious_strings(file_content)
+        result.static_analysis['entropy'] = fingerprint.entropy
+        result.static_analysis['suspicious_strings'] = self._find_suspicious_strings(fingerprint)
         
         # Check for embedded content
-        embedded_files = self._detect_embedded_files(file_content)
+        embedded_files = self._detect_embedded_files(fingerprint)
         if embedded_files:
             result.static_analysis['embedded_files'] = embedded_files
             result.behavioral_indicators.append(f"Contains {len(embedded_files)} embedded files")
@@ -260,12 +287,13 @@ class LightweightSandbox:
         self,
         file_content: bytes,
         filename: str,
-        result: SandboxResult
+        result: SandboxResult,
+        fingerprint: FileFingerprint
     ) -> None:
         """Analyze potential behavior without execution"""
         
         # First run static analysis
-        await self._static_analysis(file_content, filename, result)
+        await self._static_analysis(file_content, filename, result, fingerprint)
         
         # Analyze strings for behavioral indicators
         content_str = file_content.decode('utf-8', errors='ignore').lower()
@@ -314,13 +342,14 @@ class LightweightSandbox:
         self,
         file_content: bytes,
         filename: str,
-        result: SandboxResult
+        result: SandboxResult,
+        fingerprint: FileFingerprint
     ) -> None:
         """Analyze file in isolated Docker container"""
         
         if not self.docker_available:
             result.errors.append("Docker not available for container analysis")
-            await self._static_analysis(file_content, filename, result)
+            await self._static_analysis(file_content, filename, result, fingerprint)
             return
         
         try:
@@ -364,18 +393,19 @@ class LightweightSandbox:
                 pass
         
         # Fallback to static analysis
-        await self._static_analysis(file_content, filename, result)
+        await self._static_analysis(file_content, filename, result, fingerprint)
     
     async def _emulation_analysis(
         self,
         file_content: bytes,
         filename: str,
-        result: SandboxResult
+        result: SandboxResult,
+        fingerprint: FileFingerprint
     ) -> None:
         """Emulate file processing to detect dangerous operations"""
         
         # Start with behavioral analysis
-        await self._behavioral_analysis(file_content, filename, result)
+        await self._behavioral_analysis(file_content, filename, result, fingerprint)
         
         file_ext = Path(filename).suffix.lower()
         
@@ -406,81 +436,36 @@ class LightweightSandbox:
     
     def _calculate_entropy(self, data: bytes) -> float:
         """Calculate Shannon entropy of data"""
-        if not data:
-            return 0
-        
-        byte_counts = [0] * 256
-        for byte in data:
-            byte_counts[byte] += 1
-        
-        entropy = 0
-        data_len = len(data)
-        for count in byte_counts:
-            if count > 0:
-                probability = count / data_len
-                entropy -= probability * math.log2(probability)
-        
-        return entropy
+        return shannon_entropy(data)
     
-    def _find_suspicious_strings(self, file_content: bytes) -> List[str]:
+    def _find_suspicious_strings(self, fingerprint: FileFingerprint) -> List[str]:
         """Find suspicious strings in file content"""
         
-        content_str = file_content.decode('utf-8', errors='ignore').lower()
         suspicious = []
         
-        # Malware family names
-        malware_families = [
-            'zeus', 'carbanak', 'dridex', 'emotet', 'trickbot',
-            'bankbot', 'shylock', 'dyre', 'neverquest'
-        ]
-        
-        for family in malware_families:
-            if family in content_str:
+        for family in self.MALWARE_FAMILIES:
+            if fingerprint.contains(family.encode(), nocase=True):
                 suspicious.append(f"Malware family reference: {family}")
         
-        # Dangerous APIs
-        dangerous_apis = [
-            'createprocess', 'shellexecute', 'winexec', 'virtualalloc',
-            'writeprocessmemory', 'createthread', 'loadlibrary'
-        ]
-        
-        for api in dangerous_apis:
-            if api in content_str:
+        for api in self.DANGEROUS_APIS:
+            if fingerprint.contains(api.encode(), nocase=True):
                 suspicious.append(f"Dangerous API: {api}")
         
         return suspicious
     
-    def _detect_embedded_files(self, file_content: bytes) -> List[Dict[str, Any]]:
+    def _detect_embedded_files(self, fingerprint: FileFingerprint) -> List[Dict[str, Any]]:
         """Detect embedded files within the content"""
         
         embedded = []
         
-        # Common file signatures
-        signatures = [
-            (b'MZ', 'PE Executable'),
-            (b'\x7fELF', 'ELF Executable'),
-            (b'%PDF', 'PDF Document'),
-            (b'PK\x03\x04', 'ZIP Archive'),
-            (b'\xff\xd8\xff', 'JPEG Image'),
-            (b'\x89PNG', 'PNG Image'),
-        ]
-        
-        for sig, file_type in signatures:
-            positions = []
-            start = 0
-            while True:
-                pos = file_content.find(sig, start)
-                if pos == -1:
-                    break
-                positions.append(pos)
-                start = pos + 1
-            
-            if len(positions) > 1:  # Multiple instances suggest embedded files
+        for sig, file_type in self.EMBEDDED_FILE_SIGNATURES:
+            count = fingerprint.count(sig)
+            if count > 1:  # Multiple instances suggest embedded files
                 embedded.append({
                     'type': file_type,
                     'signature': sig.hex(),
-                    'positions': positions[:5],  # Limit to first 5
-                    'count': len(positions)
+                    'positions': fingerprint.positions(sig),  # First 5
+                    'count': count
                 })
         
         return embedded
@@ -778,13 +763,20 @@ class LightweightSandbox:
         return analyzers
 
 
+register_patterns(
+    exact=[sig for sig, _ in LightweightSandbox.EMBEDDED_FILE_SIGNATURES],
+    nocase=[s.encode() for s in LightweightSandbox.MALWARE_FAMILIES + LightweightSandbox.DANGEROUS_APIS]
+)
+
+
 # Convenience function
 async def analyze_file_in_sandbox(
     file_content: bytes,
     filename: str,
     user_id: Optional[str] = None,
-    analysis_type: AnalysisType = AnalysisType.STATIC
+    analysis_type: AnalysisType = AnalysisType.STATIC,
+    fingerprint: Optional[FileFingerprint] = None
 ) -> SandboxResult:
     """Convenience function to analyze file in sandbox"""
     sandbox = LightweightSandbox()
-    return await sandbox.analyze_file(file_content, filename, user_id, analysis_type)
\ No newline at end of file
+    return await sandbox.analyze_file(file_content, filename, user_id, analysis_type, fingerprint)
\ No newline at end of file
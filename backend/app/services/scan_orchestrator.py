@@ -0,0 +1,180 @@
+"""
+Scan Engine Orchestrator for FinGood
+
+Runs independent malware scan engines concurrently instead of one after
+another, so upload scanning takes as long as the slowest engine rather than
+the sum of all of them:
+
+- CPU-bound work (content fingerprinting, YARA matching) runs in a process
+  pool and never blocks the API event loop
+- I/O-bound engines (clamd socket, clamscan subprocess) run as coroutines
+- every engine gets its own timeout, capped by an overall scan budget
+- as soon as an engine reports a threat at or above the early-exit
+  confidence, the remaining engines are cancelled
+
+Work already running in a pool process cannot be interrupted; cancelling
+its engine discards the result and frees the request immediately.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EngineRun:
+    """An engine to run as part of a scan"""
+    name: str
+    start: Callable[[], Awaitable[Any]]
+    timeout: float
+
+
+@dataclass
+class EngineOutcome:
+    """What happened to one engine during a scan"""
+    name: str
+    result: Any = None
+    error: Optional[str] = None
+    timed_out: bool = False
+    cancelled: bool = False
+    duration: float = 0.0
+
+
+class ScanOrchestrator:
+    """Concurrent engine runner backed by a lazily created process pool"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> Optional[Executor]:
+        """Process pool for CPU-bound work (None = default thread pool)"""
+        if self.max_workers <= 0:
+            return None
+        if self._pool is None:
+            # Spawned workers do not inherit the server's threads or locks
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def run_cpu(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Run a CPU-bound, picklable function off the event loop
+
+        Args:
+            fn: Module-level function
+            *args: Picklable arguments
+
+        Returns:
+            The function's return value
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor(), fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); recreate the pool on next use
+            logger.error("Scan process pool broken; recreating")
+            self._pool = None
+            return await loop.run_in_executor(self._executor(), fn, *args)
+
+    async def run_engines(
+        self,
+        engines: List[EngineRun],
+        budget: float,
+        stop_when: Callable[[Any], bool]
+    ) -> List[EngineOutcome]:
+        """
+        Run engines concurrently
+
+        Args:
+            engines: Engines to run
+            budget: Overall deadline in seconds (caps every engine timeout)
+            stop_when: Predicate on an engine result; when true, remaining
+                engines are cancelled
+
+        Returns:
+            One EngineOutcome per engine, in the order given
+        """
+        outcomes: Dict[str, EngineOutcome] = {e.name: EngineOutcome(name=e.name) for e in engines}
+        started = time.monotonic()
+
+        async def run(engine: EngineRun) -> str:
+            outcome = outcomes[engine.name]
+            engine_start = time.monotonic()
+            try:
+                outcome.result = await asyncio.wait_for(engine.start(), timeout=min(engine.timeout, budget))
+            except asyncio.TimeoutError:
+                outcome.timed_out = True
+                outcome.error = f"{engine.name} timed out"
+            except asyncio.CancelledError:
+                outcome.cancelled = True
+                raise
+            except Exception as e:
+                logger.error(f"Scan engine {engine.name} failed: {e}")
+                outcome.error = str(e)
+            finally:
+                outcome.duration = time.monotonic() - engine_start
+            return engine.name
+
+        pending = {asyncio.ensure_future(run(engine)) for engine in engines}
+        stopped_early = False
+        try:
+            while pending:
+                remaining = budget - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if any(
+                    outcomes[task.result()].result is not None and stop_when(outcomes[task.result()].result)
+                    for task in done
+                ):
+                    stopped_early = True
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if not stopped_early:
+            # Engines still running when the budget ran out
+            for outcome in outcomes.values():
+                if outcome.cancelled:
+                    outcome.cancelled = False
+                    outcome.timed_out = True
+                    outcome.error = f"{outcome.name} exceeded the scan budget"
+
+        return [outcomes[e.name] for e in engines]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_scan_orchestrator: Optional[ScanOrchestrator] = None
+
+
+def get_scan_orchestrator() -> ScanOrchestrator:
+    """Get the global scan orchestrator"""
+    global _scan_orchestrator
+    if _scan_orchestrator is None:
+        _scan_orchestrator = ScanOrchestrator(settings.MALWARE_SCAN_WORKERS)
+    return _scan_orchestrator
+
+
+def shutdown_scan_orchestrator():
+    """Stop the scan process pool (application shutdown)"""
+    if _scan_orchestrator is not None:
+        _scan_orchestrator.shutdown()
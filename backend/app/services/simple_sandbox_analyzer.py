@@ -8,6 +8,9 @@ from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Reported with every analysis; bump when the checks below change
+SANDBOX_VERSION = "simple_fallback_1.0"
+
 class AnalysisType(Enum):
     STATIC = "static"
     DYNAMIC = "dynamic"
@@ -33,7 +36,7 @@ async def analyze_file_in_sandbox(
         "file_modifications": [],
         "registry_changes": [],
         "analysis_duration": 0.001,
-        "sandbox_version": "simple_fallback_1.0",
+        "sandbox_version": SANDBOX_VERSION,
         "analysis_timestamp": None,
         "recommendations": ["File appears safe based on basic analysis"]
     }
\ No newline at end of file
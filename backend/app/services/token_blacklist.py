@@ -13,7 +13,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 
 from app.models.user import RevokedToken
-from app.core.security import jwt_manager
+from app.core.principal_cache import get_principal_cache
+from app.core.revocation_cache import MASS_REVOCATION_PREFIX, get_revocation_cache
 
 # Configure service logging
 blacklist_logger = logging.getLogger("fingood.token_blacklist")
@@ -99,6 +100,8 @@ class TokenBlacklistService:
             
             db.add(revoked_token)
             db.commit()
+            get_revocation_cache().add_revoked(jti)
+            get_principal_cache().invalidate_token(jti)
             
             self.logger.info(
                 f"Token revoked by JTI - JTI: {jti}, User: {user_id}, "
@@ -123,6 +126,10 @@ class TokenBlacklistService:
         Returns:
             True if token is revoked, False otherwise
         """
+        # Tokens missing from the revocation filter were never revoked
+        if get_revocation_cache().might_be_revoked(jti, db) is False:
+            return False
+        
         try:
             revoked = db.query(RevokedToken).filter(
                 and_(
@@ -161,7 +168,8 @@ class TokenBlacklistService:
         try:
             # Create a mass revocation marker
             # This uses a special JTI pattern to mark all tokens for the user as invalid
-            mass_revocation_jti = f"MASS_REVOKE_{user_id}_{datetime.utcnow().isoformat()}"
+            revoked_at = datetime.utcnow()
+            mass_revocation_jti = f"{MASS_REVOCATION_PREFIX}{user_id}_{revoked_at.isoformat()}"
             
             revoked_token = RevokedToken(
                 jti=mass_revocation_jti,
@@ -175,6 +183,8 @@ class TokenBlacklistService:
             
             db.add(revoked_token)
             db.commit()
+            get_revocation_cache().add_mass_revocation(user_id, revoked_at)
+            get_principal_cache().invalidate_user(user_id)
             
             self.logger.warning(
                 f"Mass token revocation - User: {user_id}, Reason: {reason}, "
@@ -200,11 +210,16 @@ class TokenBlacklistService:
         Returns:
             True if token is affected by mass revocation
         """
+        # The cache holds every user's latest mass revocation exactly
+        cached = get_revocation_cache().mass_revoked_after(user_id, issued_at, db)
+        if cached is not None:
+            return cached
+        
         try:
             mass_revocation = db.query(RevokedToken).filter(
                 and_(
                     RevokedToken.user_id == user_id,
-                    RevokedToken.jti.like(f"MASS_REVOKE_{user_id}_%"),
+                    RevokedToken.jti.like(f"{MASS_REVOCATION_PREFIX}{user_id}_%"),
                     RevokedToken.revoked_at > issued_at,
                     RevokedToken.expires_at > datetime.utcnow()
                 )
@@ -220,16 +235,16 @@ class TokenBlacklistService:
     def get_user_revoked_tokens(
         self, 
         user_id: int, 
-        limit: int = 50, 
-        db: Session
+        db: Session,
+        limit: int = 50
     ) -> List[TokenRevocationInfo]:
         """
         Get revoked tokens for a specific user.
         
         Args:
             user_id: User ID to get revoked tokens for
-            limit: Maximum number of records to return
             db: Database session
+            limit: Maximum number of records to return
             
         Returns:
             List of token revocation information
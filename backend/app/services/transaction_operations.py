@@ -3,42 +3,57 @@ Transaction Bulk Operations Service
 
 Handles multi-select transaction operations with comprehensive validation,
 audit logging, and undo/redo capabilities for enhanced user productivity.
+
+Operations are set-based: the sanitized values are applied with one UPDATE
+(or DELETE) per chunk of ids that also returns the rows' previous values.
+The before-images are written to the bulk_operation_journal table, so undo
+works across requests and runs as the inverse set-based statement.
 """
 
 from typing import List, Dict, Any, Optional, Set, Tuple, Union
 from datetime import datetime, timedelta
 from decimal import Decimal
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, text
+from sqlalchemy import (
+    DateTime, Integer, and_, any_, bindparam, cast, column, delete, func, insert,
+    select, update, values
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import SQLAlchemyError
 import json
 import logging
+import uuid
 from dataclasses import dataclass, asdict
 from enum import Enum
 
 # Configuration constants
 class BulkOperationLimits:
-    MAX_TRANSACTIONS_PER_OPERATION = 1000
+    MAX_TRANSACTIONS_PER_OPERATION = 10000
     MAX_TRANSACTIONS_DELETE = 500
     MAX_CATEGORY_LENGTH = 100
     MAX_SUBCATEGORY_LENGTH = 100
     MAX_DESCRIPTION_LENGTH = 500
     MAX_VENDOR_LENGTH = 200
     MAX_UNDO_OPERATIONS = 50
+    STATEMENT_CHUNK_SIZE = 10000  # Transaction ids per UPDATE/DELETE statement
 
 from app.models.transaction import Transaction
+from app.models.bulk_operation import BulkOperationJournal
 from app.models.user import User
 from app.core.exceptions import ValidationException, BusinessLogicException
 from app.core.financial_validators import FinancialAmount, TransactionValidator
 from app.core.security_utils import input_sanitizer
 from app.core.audit_logger import security_audit_logger
 from app.core.transaction_manager import TransactionManager
+from app.services.import_batches import refresh_import_batches
+from app.services.pattern_statistics import apply_row_changes, fetch_feature_rows
+from app.services.rule_match_index import record_rule_overrides
 
 
 class BulkOperationType(Enum):
     """Supported bulk operation types"""
     UPDATE_CATEGORY = "update_category"
-    UPDATE_SUBCATEGORY = "update_subcategory" 
+    UPDATE_SUBCATEGORY = "update_subcategory"
     UPDATE_DESCRIPTION = "update_description"
     UPDATE_VENDOR = "update_vendor"
     UPDATE_AMOUNT = "update_amount"
@@ -73,7 +88,7 @@ class BulkOperationResult:
     completed_at: Optional[datetime] = None
 
 
-@dataclass 
+@dataclass
 class BulkUpdateRequest:
     """Request for bulk update operations"""
     transaction_ids: List[int]
@@ -83,14 +98,45 @@ class BulkUpdateRequest:
     create_backup: bool = True
 
 
-@dataclass
-class UndoOperation:
-    """Information needed to undo a bulk operation"""
-    operation_id: str
-    original_data: Dict[int, Dict[str, Any]]  # transaction_id -> original_values
-    operation_type: BulkOperationType
-    timestamp: datetime
-    user_id: int
+# Columns recorded in the before-image of each update type. "import_batch"
+# is kept alongside so batch aggregates can be refreshed after an undo.
+_SNAPSHOT_KEYS = ("id", "import_batch")
+_UPDATED_COLUMNS = {
+    BulkOperationType.UPDATE_CATEGORY: ("category", "is_categorized", "confidence_score"),
+    BulkOperationType.UPDATE_SUBCATEGORY: ("subcategory",),
+    BulkOperationType.UPDATE_DESCRIPTION: ("description",),
+    BulkOperationType.UPDATE_VENDOR: ("vendor",),
+    BulkOperationType.UPDATE_AMOUNT: ("amount",),
+}
+
+# Operations that change import batch aggregates
+_BATCH_AGGREGATE_OPERATIONS = (BulkOperationType.DELETE, BulkOperationType.UPDATE_AMOUNT)
+
+
+def _chunks(items: List[Any], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _to_journal_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _sanitize_text(value: Any, field_name: str) -> Optional[str]:
+    """Sanitize a user-supplied text value; None stays None"""
+    if value is None:
+        return None
+    return input_sanitizer.sanitize_financial_input(value, field_name, remove_pii=False)
+
+
+def _from_journal_value(table_column, value: Any) -> Any:
+    if value is not None and isinstance(table_column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
 
 
 class TransactionBulkOperations:
@@ -98,35 +144,36 @@ class TransactionBulkOperations:
     Service for handling bulk transaction operations with comprehensive
     validation, audit logging, and undo/redo capabilities.
     """
-    
+
     def __init__(self, db: Session, user: User):
         self.db = db
         self.user = user
-        self.audit_logger = security_audit_logger
+        self.audit_logger = security_audit_logger.logger
         self.transaction_manager = TransactionManager(db)
         self.validator = TransactionValidator()
-        
-        # In-memory undo stack (in production, this would be Redis/database)
-        self._undo_stack: List[UndoOperation] = []
         self.max_undo_operations = BulkOperationLimits.MAX_UNDO_OPERATIONS
-    
+
     async def execute_bulk_update(self, request: BulkUpdateRequest) -> BulkOperationResult:
         """
         Execute bulk update operation on multiple transactions
-        
+
+        The change and its undo journal entry are committed together.
+
         Args:
             request: BulkUpdateRequest containing operation details
-            
+
         Returns:
             BulkOperationResult with execution details
-            
+
         Raises:
             ValidationException: If validation fails
             BusinessLogicException: If business rules are violated
         """
-        operation_id = f"bulk_{request.operation_type.value}_{datetime.utcnow().isoformat()}"
+        operation_id = (
+            f"bulk_{request.operation_type.value}_{datetime.utcnow().isoformat()}_{uuid.uuid4().hex[:8]}"
+        )
         start_time = datetime.utcnow()
-        
+
         self.audit_logger.info(
             f"Starting bulk operation: {operation_id}",
             extra={
@@ -137,7 +184,7 @@ class TransactionBulkOperations:
                 "updates": request.updates
             }
         )
-        
+
         # Initialize result
         result = BulkOperationResult(
             operation_id=operation_id,
@@ -150,50 +197,51 @@ class TransactionBulkOperations:
             affected_transaction_ids=[],
             started_at=start_time
         )
-        
+
         try:
             result.status = BulkOperationStatus.IN_PROGRESS
-            
-            # Validate request
-            await self._validate_bulk_request(request)
-            
-            # Get target transactions with user isolation
-            transactions = await self._get_user_transactions(request.transaction_ids)
-            
-            if not transactions:
+
+            # Validate request; values are sanitized once for all rows
+            new_values = await self._validate_bulk_request(request)
+            transaction_ids = list(dict.fromkeys(request.transaction_ids))
+            categorized_before = self._categorized_feature_rows(transaction_ids)
+
+            if request.operation_type == BulkOperationType.DELETE:
+                columns, rows = self._delete_rows(transaction_ids, full_rows=request.create_backup)
+            else:
+                columns, rows = self._update_rows(transaction_ids, request.operation_type, new_values)
+
+            if not rows:
                 raise ValidationException("No valid transactions found for the provided IDs")
-            
-            # Create backup for undo if requested
-            backup_data = {}
-            if request.create_backup:
-                backup_data = await self._create_backup(transactions)
-            
-            # Execute the bulk operation
-            successful_ids, errors = await self._execute_operation(
-                transactions, 
-                request.operation_type, 
-                request.updates
-            )
-            
-            result.successful_count = len(successful_ids)
-            result.failed_count = len(errors)
-            result.errors = errors
-            result.affected_transaction_ids = successful_ids
-            result.status = BulkOperationStatus.COMPLETED if not errors else BulkOperationStatus.FAILED
-            
-            # Store undo information if backup was created
-            if request.create_backup and backup_data:
-                self._store_undo_operation(
-                    operation_id, 
-                    backup_data, 
-                    request.operation_type
+
+            self._update_pattern_statistics(request.operation_type, transaction_ids, categorized_before)
+
+            if request.operation_type == BulkOperationType.UPDATE_CATEGORY:
+                record_rule_overrides(
+                    self.db, self.user.id, [row[0] for row in rows], new_values["category"],
+                    compare_subcategory=False
                 )
-            
+
+            if request.operation_type in _BATCH_AGGREGATE_OPERATIONS:
+                batch_index = columns.index("import_batch")
+                refresh_import_batches(self.db, self.user.id, {row[batch_index] for row in rows})
+
+            # Persist before-images for undo
+            if request.create_backup:
+                self._write_journal(operation_id, request.operation_type, columns, rows)
+
+            self.db.commit()
+
+            result.successful_count = len(rows)
+            result.failed_count = 0
+            result.affected_transaction_ids = [row[0] for row in rows]
+            result.status = BulkOperationStatus.COMPLETED
+
             result.completed_at = datetime.utcnow()
             result.execution_time_ms = int(
                 (result.completed_at - start_time).total_seconds() * 1000
             )
-            
+
             self.audit_logger.info(
                 f"Bulk operation completed: {operation_id}",
                 extra={
@@ -204,10 +252,11 @@ class TransactionBulkOperations:
                     "execution_time_ms": result.execution_time_ms
                 }
             )
-            
+
             return result
-            
+
         except Exception as e:
+            self.db.rollback()
             result.status = BulkOperationStatus.FAILED
             result.completed_at = datetime.utcnow()
             result.errors.append({
@@ -215,7 +264,7 @@ class TransactionBulkOperations:
                 "type": type(e).__name__,
                 "timestamp": datetime.utcnow().isoformat()
             })
-            
+
             self.audit_logger.error(
                 f"Bulk operation failed: {operation_id}",
                 extra={
@@ -224,80 +273,89 @@ class TransactionBulkOperations:
                     "user_id": self.user.id
                 }
             )
-            
+
             raise
-    
-    async def _validate_bulk_request(self, request: BulkUpdateRequest) -> None:
-        """Validate bulk operation request"""
-        
+
+    async def _validate_bulk_request(self, request: BulkUpdateRequest) -> Dict[str, Any]:
+        """Validate bulk operation request and return the column values to set"""
+
         # Validate transaction IDs
         if not request.transaction_ids:
             raise ValidationException("Transaction IDs list cannot be empty")
-        
+
         if len(request.transaction_ids) > BulkOperationLimits.MAX_TRANSACTIONS_PER_OPERATION:
             raise ValidationException(f"Bulk operations limited to {BulkOperationLimits.MAX_TRANSACTIONS_PER_OPERATION} transactions at once")
-        
+
         # Remove duplicates and validate IDs
         unique_ids = list(set(request.transaction_ids))
         invalid_ids = [
-            tid for tid in unique_ids 
+            tid for tid in unique_ids
             if not isinstance(tid, int) or tid <= 0 or tid > 2**31 - 1  # Reasonable upper limit
         ]
         if invalid_ids:
             raise ValidationException(f"Invalid transaction IDs: {invalid_ids}")
-        
+
         # Validate operation type and updates
-        await self._validate_operation_updates(request.operation_type, request.updates)
-    
+        return await self._validate_operation_updates(request.operation_type, request.updates)
+
     async def _validate_operation_updates(
-        self, 
-        operation_type: BulkOperationType, 
+        self,
+        operation_type: BulkOperationType,
         updates: Dict[str, Any]
-    ) -> None:
-        """Validate updates for specific operation type"""
-        
+    ) -> Dict[str, Any]:
+        """Validate and sanitize updates for specific operation type"""
+
         if operation_type == BulkOperationType.UPDATE_CATEGORY:
             if "category" not in updates:
                 raise ValidationException("Category update requires 'category' field")
-            
-            category = input_sanitizer.sanitize_string(updates["category"])
+
+            category = _sanitize_text(updates["category"], "category")
             if not category or len(category.strip()) == 0:
                 raise ValidationException("Category cannot be empty")
-            
+
             if len(category) > BulkOperationLimits.MAX_CATEGORY_LENGTH:
                 raise ValidationException(f"Category name too long (max {BulkOperationLimits.MAX_CATEGORY_LENGTH} characters)")
-        
+
+            # Manual categorization
+            return {"category": category, "is_categorized": True, "confidence_score": 1.0}
+
         elif operation_type == BulkOperationType.UPDATE_SUBCATEGORY:
             if "subcategory" not in updates:
                 raise ValidationException("Subcategory update requires 'subcategory' field")
-            
-            subcategory = input_sanitizer.sanitize_string(updates["subcategory"])
+
+            subcategory = _sanitize_text(updates["subcategory"], "subcategory")
             if subcategory and len(subcategory) > BulkOperationLimits.MAX_SUBCATEGORY_LENGTH:
                 raise ValidationException(f"Subcategory name too long (max {BulkOperationLimits.MAX_SUBCATEGORY_LENGTH} characters)")
-        
+
+            return {"subcategory": subcategory}
+
         elif operation_type == BulkOperationType.UPDATE_DESCRIPTION:
             if "description" not in updates:
                 raise ValidationException("Description update requires 'description' field")
-            
-            description = input_sanitizer.sanitize_string(updates["description"])
+
+            description = _sanitize_text(updates["description"], "description")
             if not description or len(description.strip()) == 0:
                 raise ValidationException("Description cannot be empty")
-            
+
             if len(description) > BulkOperationLimits.MAX_DESCRIPTION_LENGTH:
                 raise ValidationException(f"Description too long (max {BulkOperationLimits.MAX_DESCRIPTION_LENGTH} characters)")
-        
+
+            return {"description": description}
+
         elif operation_type == BulkOperationType.UPDATE_VENDOR:
             if "vendor" not in updates:
                 raise ValidationException("Vendor update requires 'vendor' field")
-            
-            vendor = input_sanitizer.sanitize_string(updates["vendor"])
+
+            vendor = _sanitize_text(updates["vendor"], "vendor")
             if vendor and len(vendor) > BulkOperationLimits.MAX_VENDOR_LENGTH:
                 raise ValidationException(f"Vendor name too long (max {BulkOperationLimits.MAX_VENDOR_LENGTH} characters)")
-        
+
+            return {"vendor": vendor}
+
         elif operation_type == BulkOperationType.UPDATE_AMOUNT:
             if "amount" not in updates:
                 raise ValidationException("Amount update requires 'amount' field")
-            
+
             try:
                 from decimal import InvalidOperation
                 amount = Decimal(str(updates["amount"]))
@@ -309,205 +367,291 @@ class TransactionBulkOperations:
                     raise ValidationException("Amount exceeds maximum allowed value")
             except (ValueError, TypeError, InvalidOperation):
                 raise ValidationException("Invalid amount format")
-        
+
+            return {"amount": float(amount)}
+
         elif operation_type == BulkOperationType.DELETE:
             # No additional validation needed for delete
-            pass
-        
+            return {}
+
         else:
             raise ValidationException(f"Unsupported operation type: {operation_type}")
-    
-    async def _get_user_transactions(self, transaction_ids: List[int]) -> List[Transaction]:
-        """Get transactions with user isolation"""
+
+    def _id_filter(self, transaction_ids: List[int]):
+        """Ownership-scoped id condition; id = ANY(:ids) on PostgreSQL"""
+        table = Transaction.__table__
+        if self.db.get_bind().dialect.name == "postgresql":
+            ids = any_(bindparam("ids", transaction_ids, type_=ARRAY(Integer)))
+            return and_(table.c.id == ids, table.c.user_id == self.user.id)
+        return and_(table.c.id.in_(transaction_ids), table.c.user_id == self.user.id)
+
+    def _update_rows(
+        self,
+        transaction_ids: List[int],
+        operation_type: BulkOperationType,
+        new_values: Dict[str, Any]
+    ) -> Tuple[List[str], List[List[Any]]]:
+        """
+        Apply new values with one UPDATE per chunk
+
+        Returns:
+            (column names, before-image rows) of the updated transactions
+        """
+        table = Transaction.__table__
+        columns = [*_SNAPSHOT_KEYS, *_UPDATED_COLUMNS[operation_type]]
+        new_values = {**new_values, "updated_at": datetime.utcnow()}
+        # Only PostgreSQL evaluates the joined subquery before the update, so
+        # RETURNING old.* yields the previous values. SQLite also accepts
+        # UPDATE ... FROM ... RETURNING but returns the new ones there.
+        snapshot_join = self.db.get_bind().dialect.name == "postgresql"
+
+        rows = []
         try:
-            transactions = self.db.query(Transaction).filter(
-                and_(
-                    Transaction.id.in_(transaction_ids),
-                    Transaction.user_id == self.user.id
-                )
-            ).all()
-            
-            return transactions
-            
+            for chunk in _chunks(transaction_ids, BulkOperationLimits.STATEMENT_CHUNK_SIZE):
+                if snapshot_join:
+                    # Join a locked snapshot of the rows so RETURNING yields the old values
+                    old = select(*(table.c[name] for name in columns)).where(
+                        self._id_filter(chunk)
+                    ).with_for_update().subquery("old")
+                    statement = update(table).where(
+                        table.c.id == old.c.id,
+                        table.c.user_id == self.user.id
+                    ).values(new_values).returning(*(old.c[name] for name in columns))
+                    rows.extend(self.db.execute(statement).all())
+                else:
+                    condition = self._id_filter(chunk)
+                    rows.extend(self.db.execute(
+                        select(*(table.c[name] for name in columns)).where(condition).with_for_update()
+                    ).all())
+                    self.db.execute(update(table).where(condition).values(new_values))
         except SQLAlchemyError as e:
-            raise BusinessLogicException(f"Database error while fetching transactions: {str(e)}")
-    
-    async def _create_backup(self, transactions: List[Transaction]) -> Dict[int, Dict[str, Any]]:
-        """Create backup of transaction data for undo functionality"""
-        backup = {}
-        
-        for transaction in transactions:
-            backup[transaction.id] = {
-                "category": transaction.category,
-                "subcategory": transaction.subcategory,
-                "description": transaction.description,
-                "vendor": transaction.vendor,
-                "amount": str(transaction.amount),
-                "is_categorized": transaction.is_categorized,
-                "categorization_confidence": transaction.confidence_score,
-                "updated_at": transaction.updated_at.isoformat() if transaction.updated_at else None
-            }
-        
-        return backup
-    
-    async def _execute_operation(
+            raise BusinessLogicException(
+                f"Database error while updating transactions: {str(e)}", code="BULK_UPDATE_FAILED"
+            )
+
+        return columns, [list(row) for row in rows]
+
+    def _delete_rows(
+        self,
+        transaction_ids: List[int],
+        full_rows: bool
+    ) -> Tuple[List[str], List[List[Any]]]:
+        """
+        Delete transactions with one DELETE per chunk
+
+        Args:
+            transaction_ids: Transactions to delete
+            full_rows: Return complete rows (needed to undo the delete)
+
+        Returns:
+            (column names, before-image rows) of the deleted transactions
+        """
+        table = Transaction.__table__
+        selected = list(table.columns) if full_rows else [table.c[name] for name in _SNAPSHOT_KEYS]
+        delete_returning = self.db.get_bind().dialect.delete_returning
+
+        rows = []
+        try:
+            for chunk in _chunks(transaction_ids, BulkOperationLimits.STATEMENT_CHUNK_SIZE):
+                condition = self._id_filter(chunk)
+                if delete_returning:
+                    rows.extend(self.db.execute(delete(table).where(condition).returning(*selected)).all())
+                else:
+                    rows.extend(self.db.execute(select(*selected).where(condition)).all())
+                    self.db.execute(delete(table).where(condition))
+        except SQLAlchemyError as e:
+            raise BusinessLogicException(
+                f"Database error while deleting transactions: {str(e)}", code="BULK_DELETE_FAILED"
+            )
+
+        return [c.name for c in selected], [list(row) for row in rows]
+
+    def _categorized_feature_rows(self, transaction_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Pattern feature columns of the categorized transactions among transaction_ids"""
+        rows = {}
+        for chunk in _chunks(transaction_ids, BulkOperationLimits.STATEMENT_CHUNK_SIZE):
+            rows.update(fetch_feature_rows(
+                self.db, self.user.id, self._id_filter(chunk), Transaction.__table__.c.is_categorized == True
+            ))
+        return rows
+
+    def _update_pattern_statistics(
         self,
-        transactions: List[Transaction], 
         operation_type: BulkOperationType,
-        updates: Dict[str, Any]
-    ) -> Tuple[List[int], List[Dict[str, Any]]]:
-        """Execute the bulk operation on transactions"""
-        
-        successful_ids = []
-        errors = []
-        
-        for transaction in transactions:
-            try:
-                if operation_type == BulkOperationType.UPDATE_CATEGORY:
-                    transaction.category = input_sanitizer.sanitize_string(updates["category"])
-                    transaction.is_categorized = True
-                    transaction.confidence_score = 1.0  # Manual categorization
-                
-                elif operation_type == BulkOperationType.UPDATE_SUBCATEGORY:
-                    transaction.subcategory = input_sanitizer.sanitize_string(
-                        updates.get("subcategory")
-                    )
-                
-                elif operation_type == BulkOperationType.UPDATE_DESCRIPTION:
-                    transaction.description = input_sanitizer.sanitize_string(updates["description"])
-                
-                elif operation_type == BulkOperationType.UPDATE_VENDOR:
-                    transaction.vendor = input_sanitizer.sanitize_string(
-                        updates.get("vendor")
-                    )
-                
-                elif operation_type == BulkOperationType.UPDATE_AMOUNT:
-                    transaction.amount = Decimal(str(updates["amount"]))
-                
-                elif operation_type == BulkOperationType.DELETE:
-                    self.db.delete(transaction)
-                    successful_ids.append(transaction.id)
-                    continue  # Skip the update timestamp for deleted records
-                
-                # Update timestamp for non-delete operations
-                transaction.updated_at = datetime.utcnow()
-                
-                successful_ids.append(transaction.id)
-                
-            except Exception as e:
-                errors.append({
-                    "transaction_id": transaction.id,
-                    "error": str(e),
-                    "type": type(e).__name__
-                })
-        
-        return successful_ids, errors
-    
-    def _store_undo_operation(
+        transaction_ids: List[int],
+        categorized_before: Dict[int, Dict[str, Any]]
+    ) -> None:
+        """Move pattern statistics from the rows' previous state to their current one"""
+        categorized_after = self._categorized_feature_rows(transaction_ids)
+        if categorized_before or categorized_after:
+            apply_row_changes(
+                self.db,
+                self.user.id,
+                removed=categorized_before.values(),
+                added=categorized_after.values(),
+                events=operation_type == BulkOperationType.DELETE
+            )
+
+    def _write_journal(
         self,
         operation_id: str,
-        backup_data: Dict[int, Dict[str, Any]], 
-        operation_type: BulkOperationType
+        operation_type: BulkOperationType,
+        columns: List[str],
+        rows: List[List[Any]]
     ) -> None:
-        """Store undo operation information"""
-        
-        undo_op = UndoOperation(
+        """Store before-images and keep only the most recent entries per user"""
+        self.db.add(BulkOperationJournal(
             operation_id=operation_id,
-            original_data=backup_data,
-            operation_type=operation_type,
-            timestamp=datetime.utcnow(),
-            user_id=self.user.id
+            user_id=self.user.id,
+            operation_type=operation_type.value,
+            transaction_count=len(rows),
+            before_images={
+                "columns": columns,
+                "rows": [[_to_journal_value(value) for value in row] for row in rows]
+            }
+        ))
+        self.db.flush()
+
+        stale = select(BulkOperationJournal.id).where(
+            BulkOperationJournal.user_id == self.user.id
+        ).order_by(
+            BulkOperationJournal.created_at.desc(), BulkOperationJournal.id.desc()
+        ).offset(self.max_undo_operations)
+        self.db.execute(
+            delete(BulkOperationJournal.__table__).where(BulkOperationJournal.id.in_(stale))
         )
-        
-        # Add to undo stack
-        self._undo_stack.append(undo_op)
-        
-        # Keep only the most recent operations
-        if len(self._undo_stack) > self.max_undo_operations:
-            self._undo_stack.pop(0)
-    
+
+    def _restore_updated(self, columns: List[str], rows: List[List[Any]]) -> List[int]:
+        """Write before-images back with one UPDATE per chunk"""
+        table = Transaction.__table__
+        restored = [name for name in columns if name not in _SNAPSHOT_KEYS]
+        id_index = columns.index("id")
+        now = datetime.utcnow()
+
+        restored_ids = []
+        for chunk in _chunks(rows, BulkOperationLimits.STATEMENT_CHUNK_SIZE):
+            records = [
+                {name: _from_journal_value(table.c[name], value) for name, value in zip(columns, row)}
+                for row in chunk
+            ]
+            if self.db.get_bind().dialect.name == "postgresql":
+                # UPDATE ... FROM (VALUES ...) joining each row to its old values
+                previous = values(
+                    *(column(name, table.c[name].type) for name in ["id", *restored]),
+                    name="previous"
+                ).data([tuple(record[name] for name in ["id", *restored]) for record in records])
+                statement = update(table).where(
+                    table.c.id == previous.c.id,
+                    table.c.user_id == self.user.id
+                ).values({
+                    **{name: cast(previous.c[name], table.c[name].type) for name in restored},
+                    "updated_at": now
+                }).returning(table.c.id)
+                restored_ids.extend(self.db.execute(statement).scalars().all())
+            else:
+                statement = update(table).where(
+                    table.c.id == bindparam("b_id"),
+                    table.c.user_id == self.user.id
+                ).values({
+                    **{name: bindparam(f"b_{name}") for name in restored},
+                    "updated_at": now
+                })
+                self.db.execute(statement, [
+                    {f"b_{name}": record[name] for name in ["id", *restored]}
+                    for record in records
+                ])
+                restored_ids.extend(row[id_index] for row in chunk)
+
+        return restored_ids
+
+    def _restore_deleted(self, columns: List[str], rows: List[List[Any]]) -> List[int]:
+        """Re-insert deleted rows (multi-row INSERT per chunk)"""
+        table = Transaction.__table__
+        id_index = columns.index("id")
+
+        for chunk in _chunks(rows, BulkOperationLimits.STATEMENT_CHUNK_SIZE):
+            self.db.execute(insert(table), [
+                {name: _from_journal_value(table.c[name], value) for name, value in zip(columns, row)}
+                for row in chunk
+            ])
+
+        return [row[id_index] for row in rows]
+
     async def undo_last_operation(self) -> BulkOperationResult:
-        """Undo the last bulk operation"""
-        
-        if not self._undo_stack:
-            raise BusinessLogicException("No operations available to undo")
-        
-        undo_op = self._undo_stack.pop()
-        operation_id = f"undo_{undo_op.operation_id}"
+        """Undo the most recent journaled bulk operation of the user"""
+
+        entry = self.db.query(BulkOperationJournal).filter(
+            BulkOperationJournal.user_id == self.user.id,
+            BulkOperationJournal.undone_at.is_(None)
+        ).order_by(
+            BulkOperationJournal.created_at.desc(), BulkOperationJournal.id.desc()
+        ).first()
+
+        if entry is None:
+            raise BusinessLogicException("No operations available to undo", code="NO_UNDO_AVAILABLE")
+
+        operation_type = BulkOperationType(entry.operation_type)
+        operation_id = f"undo_{entry.operation_id}"
         start_time = datetime.utcnow()
-        
+
         self.audit_logger.info(
             f"Starting undo operation: {operation_id}",
             extra={
                 "operation_id": operation_id,
-                "original_operation": undo_op.operation_id,
+                "original_operation": entry.operation_id,
                 "user_id": self.user.id
             }
         )
-        
+
         result = BulkOperationResult(
             operation_id=operation_id,
-            operation_type=undo_op.operation_type,
+            operation_type=operation_type,
             status=BulkOperationStatus.IN_PROGRESS,
-            total_transactions=len(undo_op.original_data),
+            total_transactions=entry.transaction_count,
             successful_count=0,
             failed_count=0,
             errors=[],
             affected_transaction_ids=[],
             started_at=start_time
         )
-        
+
         try:
-            transaction_ids = list(undo_op.original_data.keys())
-            
-            if undo_op.operation_type == BulkOperationType.DELETE:
-                # For delete operations, we can't undo (transactions are gone)
-                raise BusinessLogicException("Cannot undo delete operations")
-            
-            # Get current transactions
-            transactions = await self._get_user_transactions(transaction_ids)
-            
-            successful_ids = []
-            errors = []
-            
-            for transaction in transactions:
-                try:
-                    original_data = undo_op.original_data.get(transaction.id)
-                    if not original_data:
-                        continue
-                    
-                    # Restore original values
-                    transaction.category = original_data.get("category")
-                    transaction.subcategory = original_data.get("subcategory")
-                    transaction.description = original_data.get("description")
-                    transaction.vendor = original_data.get("vendor")
-                    if original_data.get("amount"):
-                        transaction.amount = Decimal(original_data["amount"])
-                    transaction.is_categorized = original_data.get("is_categorized", False)
-                    transaction.confidence_score = original_data.get(
-                        "categorization_confidence", 0.0
-                    )
-                    transaction.updated_at = datetime.utcnow()
-                    
-                    successful_ids.append(transaction.id)
-                    
-                except Exception as e:
-                    errors.append({
-                        "transaction_id": transaction.id,
-                        "error": str(e),
-                        "type": type(e).__name__
-                    })
-            
-            result.successful_count = len(successful_ids)
-            result.failed_count = len(errors)
-            result.errors = errors
-            result.affected_transaction_ids = successful_ids
-            result.status = BulkOperationStatus.COMPLETED if not errors else BulkOperationStatus.FAILED
+            columns = entry.before_images["columns"]
+            rows = entry.before_images["rows"]
+
+            id_index = columns.index("id")
+            categorized_before = self._categorized_feature_rows([row[id_index] for row in rows])
+
+            # Inverse set-based statement
+            if operation_type == BulkOperationType.DELETE:
+                restored_ids = self._restore_deleted(columns, rows)
+            else:
+                restored_ids = self._restore_updated(columns, rows)
+
+            self._update_pattern_statistics(operation_type, restored_ids, categorized_before)
+
+            if operation_type in _BATCH_AGGREGATE_OPERATIONS:
+                batch_index = columns.index("import_batch")
+                refresh_import_batches(self.db, self.user.id, {row[batch_index] for row in rows})
+
+            entry.undone_at = datetime.utcnow()
+            self.db.commit()
+
+            result.successful_count = len(restored_ids)
+            result.failed_count = entry.transaction_count - len(restored_ids)
+            if result.failed_count:
+                # Rows deleted since the operation cannot be restored
+                result.errors.append({
+                    "error": f"{result.failed_count} transactions no longer exist",
+                    "type": "TransactionNotFound"
+                })
+            result.affected_transaction_ids = restored_ids
+            result.status = BulkOperationStatus.COMPLETED if not result.failed_count else BulkOperationStatus.FAILED
             result.completed_at = datetime.utcnow()
             result.execution_time_ms = int(
                 (result.completed_at - start_time).total_seconds() * 1000
             )
-            
+
             self.audit_logger.info(
                 f"Undo operation completed: {operation_id}",
                 extra={
@@ -517,10 +661,11 @@ class TransactionBulkOperations:
                     "failed_count": result.failed_count
                 }
             )
-            
+
             return result
-            
+
         except Exception as e:
+            self.db.rollback()
             result.status = BulkOperationStatus.FAILED
             result.completed_at = datetime.utcnow()
             result.errors.append({
@@ -528,7 +673,7 @@ class TransactionBulkOperations:
                 "type": type(e).__name__,
                 "timestamp": datetime.utcnow().isoformat()
             })
-            
+
             self.audit_logger.error(
                 f"Undo operation failed: {operation_id}",
                 extra={
@@ -537,45 +682,57 @@ class TransactionBulkOperations:
                     "user_id": self.user.id
                 }
             )
-            
+
             raise
-    
+
     def get_undo_history(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get list of operations that can be undone"""
-        
-        recent_operations = self._undo_stack[-limit:] if limit else self._undo_stack
-        
+
+        query = self.db.query(
+            BulkOperationJournal.operation_id,
+            BulkOperationJournal.operation_type,
+            BulkOperationJournal.created_at,
+            BulkOperationJournal.transaction_count
+        ).filter(
+            BulkOperationJournal.user_id == self.user.id,
+            BulkOperationJournal.undone_at.is_(None)
+        ).order_by(
+            BulkOperationJournal.created_at.desc(), BulkOperationJournal.id.desc()
+        )
+        if limit:
+            query = query.limit(limit)
+
         return [
             {
-                "operation_id": op.operation_id,
-                "operation_type": op.operation_type.value,
-                "timestamp": op.timestamp.isoformat(),
-                "transaction_count": len(op.original_data),
-                "can_undo": True  # In this simple implementation, all operations can be undone
+                "operation_id": entry.operation_id,
+                "operation_type": entry.operation_type,
+                "timestamp": entry.created_at.isoformat() if entry.created_at else None,
+                "transaction_count": entry.transaction_count,
+                "can_undo": True  # Undo restores the journaled before-images
             }
-            for op in reversed(recent_operations)
+            for entry in query.all()
         ]
-    
+
     async def get_bulk_operation_stats(self) -> Dict[str, Any]:
         """Get statistics about bulk operations for the user"""
-        
-        # In a real implementation, this would query from database/Redis
-        # For now, return basic stats from in-memory undo stack
-        
-        total_operations = len(self._undo_stack)
-        
-        operation_counts = {}
-        total_transactions_affected = 0
-        
-        for op in self._undo_stack:
-            op_type = op.operation_type.value
-            operation_counts[op_type] = operation_counts.get(op_type, 0) + 1
-            total_transactions_affected += len(op.original_data)
-        
+
+        rows = self.db.query(
+            BulkOperationJournal.operation_type,
+            func.count(BulkOperationJournal.id),
+            func.coalesce(func.sum(BulkOperationJournal.transaction_count), 0)
+        ).filter(
+            BulkOperationJournal.user_id == self.user.id,
+            BulkOperationJournal.undone_at.is_(None)
+        ).group_by(BulkOperationJournal.operation_type).all()
+
+        operation_counts = {op_type: count for op_type, count, _ in rows}
+        total_operations = sum(operation_counts.values())
+        total_transactions_affected = sum(int(affected) for _, _, affected in rows)
+
         return {
             "total_bulk_operations": total_operations,
             "operations_by_type": operation_counts,
             "total_transactions_affected": total_transactions_affected,
             "undo_operations_available": total_operations,
             "max_undo_operations": self.max_undo_operations
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,112 @@
+"""
+Compact Transaction Read Model
+
+Duplicate detection, forecasting, predictive insights and the ML
+categorization context only read a few columns of each transaction. Loading
+them as ORM instances pays for identity-map tracking, attribute history and
+the JSON raw_data/meta_data payloads of every row. TxRecord is a plain
+NamedTuple of the columns those services use, selected directly from the
+transactions table and streamed in batches.
+
+TxRecord exposes the same attribute names as Transaction, so code that only
+reads these fields works with either.
+"""
+
+from datetime import datetime
+from typing import AsyncIterator, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.transaction import Transaction
+
+STREAM_BATCH_SIZE = 2000
+
+
+class TxRecord(NamedTuple):
+    """Read-only transaction fields used by the analysis services"""
+    id: int
+    date: datetime
+    amount: float
+    description: Optional[str]
+    vendor: Optional[str]
+    category: Optional[str]
+    subcategory: Optional[str]
+    is_income: bool
+    is_categorized: bool
+    confidence_score: Optional[float]
+
+
+TX_RECORD_COLUMNS = TxRecord._fields
+
+
+def tx_record_query(user_id: int, *conditions, order_by: Sequence = (), limit: Optional[int] = None):
+    """
+    Select of the TxRecord columns of a user's transactions
+
+    Args:
+        user_id: Owner of the transactions
+        *conditions: Extra filters on Transaction columns
+        order_by: Sort expressions
+        limit: Maximum number of rows
+
+    Returns:
+        Select statement streaming STREAM_BATCH_SIZE rows at a time
+    """
+    table = Transaction.__table__
+    query = select(*(table.c[name] for name in TX_RECORD_COLUMNS)).where(
+        table.c.user_id == user_id, *conditions
+    )
+    if order_by:
+        query = query.order_by(*order_by)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.execution_options(yield_per=STREAM_BATCH_SIZE)
+
+
+def iter_tx_records(
+    db: Session,
+    user_id: int,
+    *conditions,
+    order_by: Sequence = (),
+    limit: Optional[int] = None
+) -> Iterator[TxRecord]:
+    """Stream a user's transactions as TxRecords (see tx_record_query)"""
+    for row in db.execute(tx_record_query(user_id, *conditions, order_by=order_by, limit=limit)):
+        yield TxRecord._make(row)
+
+
+def load_tx_records(
+    db: Session,
+    user_id: int,
+    *conditions,
+    order_by: Sequence = (),
+    limit: Optional[int] = None
+) -> List[TxRecord]:
+    """A user's transactions as TxRecords (see tx_record_query)"""
+    return list(iter_tx_records(db, user_id, *conditions, order_by=order_by, limit=limit))
+
+
+async def _stream_tx_records(db: AsyncSession, query) -> AsyncIterator[TxRecord]:
+    result = await db.stream(query)
+    async for row in result:
+        yield TxRecord._make(row)
+
+
+async def load_tx_records_async(
+    db: Union[Session, AsyncSession],
+    user_id: int,
+    *conditions,
+    order_by: Sequence = (),
+    limit: Optional[int] = None
+) -> List[TxRecord]:
+    """
+    load_tx_records for either session type
+
+    Read-only scans may run on an AsyncSession without blocking the event loop.
+    """
+    if not isinstance(db, AsyncSession):
+        return load_tx_records(db, user_id, *conditions, order_by=order_by, limit=limit)
+    query = tx_record_query(user_id, *conditions, order_by=order_by, limit=limit)
+    return [record async for record in _stream_tx_records(db, query)]
@@ -0,0 +1,213 @@
+"""
+Transaction Text Search for FinGood
+
+Description and vendor search backed by an index instead of a sequential
+scan of the user's transactions:
+
+- PostgreSQL: pg_trgm GIN indexes on description and vendor. Plain
+  ILIKE '%term%' filters use them automatically, and ranked search uses
+  word similarity for prefix and typo tolerance ("amzon" finds "AMAZON").
+- SQLite (local runs): an FTS5 trigram table kept in sync by triggers,
+  ranked with bm25. Substring and prefix matches are supported; typo
+  tolerance is not.
+- Other databases fall back to ILIKE ordered by date.
+"""
+
+import logging
+from typing import List, Optional
+
+from sqlalchemy import event, func, literal_column, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+# Trigram indexes cannot narrow terms shorter than this
+MIN_TRIGRAM_TERM_LENGTH = 3
+
+LIKE_ESCAPE = "\\"
+
+_SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description, vendor,
+        content='transactions', content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, description, vendor)
+        VALUES (new.id, new.description, coalesce(new.vendor, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description, vendor)
+        VALUES ('delete', old.id, old.description, coalesce(old.vendor, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description, vendor ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description, vendor)
+        VALUES ('delete', old.id, old.description, coalesce(old.vendor, ''));
+        INSERT INTO transactions_fts(rowid, description, vendor)
+        VALUES (new.id, new.description, coalesce(new.vendor, ''));
+    END
+    """,
+]
+
+_sqlite_fts_ready: Optional[bool] = None
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so user input matches literally"""
+    return (
+        term.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+
+
+def contains_filter(column, term: str):
+    """
+    Case-insensitive substring condition (index-backed on PostgreSQL)
+
+    Args:
+        column: Text column
+        term: Search term from the user
+
+    Returns:
+        SQLAlchemy condition
+    """
+    return column.ilike(f"%{escape_like(term)}%", escape=LIKE_ESCAPE)
+
+
+def ensure_sqlite_search_index(connection) -> bool:
+    """
+    Create the FTS5 search table and triggers on SQLite (idempotent)
+
+    Args:
+        connection: Synchronous SQLAlchemy connection
+
+    Returns:
+        True if the FTS table is available
+    """
+    global _sqlite_fts_ready
+    if connection.dialect.name != "sqlite":
+        return False
+    try:
+        existed = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='transactions_fts'"
+        ).first() is not None
+        for statement in _SQLITE_FTS_DDL:
+            connection.exec_driver_sql(statement)
+        if not existed:
+            # Index rows that predate the table
+            connection.exec_driver_sql("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+        _sqlite_fts_ready = True
+    except Exception as e:
+        # FTS5 or the trigram tokenizer (SQLite >= 3.34) not available
+        logger.warning(f"SQLite full-text search unavailable, using LIKE: {e}")
+        _sqlite_fts_ready = False
+    return _sqlite_fts_ready
+
+
+@event.listens_for(Transaction.__table__, "after_create")
+def _create_sqlite_search_index(target, connection, **kw):
+    ensure_sqlite_search_index(connection)
+
+
+async def search_transactions(
+    db: AsyncSession,
+    user_id: int,
+    query: str,
+    limit: int = 20
+) -> List[Transaction]:
+    """
+    Ranked search over a user's transaction descriptions and vendors
+
+    Args:
+        db: Async session
+        user_id: Owner of the transactions
+        query: Search text (substring, prefix or misspelled word)
+        limit: Maximum results
+
+    Returns:
+        Transactions, best match first
+    """
+    query = query.strip()
+    if not query:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return await _search_postgresql(db, user_id, query, limit)
+    if dialect == "sqlite" and len(query) >= MIN_TRIGRAM_TERM_LENGTH:
+        if _sqlite_fts_ready is None:
+            await db.run_sync(lambda session: ensure_sqlite_search_index(session.connection()))
+        if _sqlite_fts_ready:
+            return await _search_sqlite(db, user_id, query, limit)
+    return await _search_like(db, user_id, query, limit)
+
+
+async def _search_postgresql(db: AsyncSession, user_id: int, query: str, limit: int) -> List[Transaction]:
+    # Similarity cut-off for the %> operators below (transaction-local)
+    await db.execute(
+        select(func.set_config(
+            "pg_trgm.word_similarity_threshold",
+            str(settings.TRANSACTION_SEARCH_SIMILARITY_THRESHOLD),
+            True
+        ))
+    )
+    description = func.coalesce(Transaction.description, "")
+    vendor = func.coalesce(Transaction.vendor, "")
+    score = func.greatest(func.word_similarity(query, description), func.word_similarity(query, vendor))
+
+    conditions = [contains_filter(Transaction.description, query), contains_filter(Transaction.vendor, query)]
+    if len(query) >= MIN_TRIGRAM_TERM_LENGTH:
+        # col %> q: some word of col is similar to q (typo and prefix tolerant)
+        conditions += [Transaction.description.op("%>")(query), Transaction.vendor.op("%>")(query)]
+
+    statement = (
+        select(Transaction)
+        .where(Transaction.user_id == user_id, or_(*conditions))
+        .order_by(score.desc(), Transaction.date.desc(), Transaction.id.asc())
+        .limit(limit)
+    )
+    return list((await db.execute(statement)).scalars().all())
+
+
+async def _search_sqlite(db: AsyncSession, user_id: int, query: str, limit: int) -> List[Transaction]:
+    # Quoted phrase: trigram tokenizer matches it as a substring
+    match = '"' + query.replace('"', '""') + '"'
+    ranked = (
+        select(literal_column("rowid").label("id"), literal_column("bm25(transactions_fts)").label("rank"))
+        .select_from(text("transactions_fts"))
+        .where(text("transactions_fts MATCH :match"))
+        .subquery()
+    )
+    statement = (
+        select(Transaction)
+        .join(ranked, ranked.c.id == Transaction.id)
+        .where(Transaction.user_id == user_id)
+        .order_by(ranked.c.rank, Transaction.date.desc())
+        .limit(limit)
+        .params(match=match)
+    )
+    return list((await db.execute(statement)).scalars().all())
+
+
+async def _search_like(db: AsyncSession, user_id: int, query: str, limit: int) -> List[Transaction]:
+    statement = (
+        select(Transaction)
+        .where(
+            Transaction.user_id == user_id,
+            or_(contains_filter(Transaction.description, query), contains_filter(Transaction.vendor, query))
+        )
+        .order_by(Transaction.date.desc(), Transaction.id.asc())
+        .limit(limit)
+    )
+    return list((await db.execute(statement)).scalars().all())
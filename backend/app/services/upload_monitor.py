@@ -5,16 +5,15 @@ Tracks upload patterns, detects anomalies, and enforces security policies.
 
 import time
 import hashlib
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
-from collections import defaultdict, deque
 import logging
 from pathlib import Path
-import json
 
 from app.core.config import settings
 from app.core.audit_logger import security_audit_logger
+from app.services.upload_monitor_store import create_upload_monitor_store
 
 logger = logging.getLogger(__name__)
 
@@ -60,16 +59,13 @@ class SecurityAlert:
 class UploadMonitor:
     """
     Monitors file upload patterns and enforces security policies.
+
+    State lives in an UploadMonitorStore (time-bucketed counters and small
+    ring buffers), shared across workers when Redis is available.
     """
     
-    def __init__(self):
-        self.upload_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
-        self.file_hashes: Dict[str, List[UploadAttempt]] = defaultdict(list)
-        self.ip_attempts: Dict[str, deque] = defaultdict(lambda: deque(maxlen=500))
-        self.security_alerts: List[SecurityAlert] = []
-        
-        # Load persistent data if available
-        self._load_persistent_data()
+    def __init__(self, store=None):
+        self.store = store or create_upload_monitor_store()
     
     async def check_upload_permission(
         self,
@@ -148,18 +144,23 @@ class UploadMonitor:
                 error=error
             )
             
-            # Store in memory structures
-            self.upload_history[user_id].append(attempt)
-            self.file_hashes[file_hash].append(attempt)
+            # Typical upload hours, before this attempt is counted
+            typical_hours = self.store.success_hours(user_id)
             
-            if ip_address:
-                self.ip_attempts[ip_address].append(attempt)
+            self.store.record_attempt({
+                'user_id': user_id,
+                'filename': filename,
+                'file_size': file_size,
+                'file_hash': file_hash,
+                'timestamp': time.time(),
+                'success': success,
+                'ip_address': ip_address,
+                'user_agent': user_agent,
+                'error': error
+            })
             
             # Analyze for anomalies
-            await self._analyze_upload_patterns(user_id, attempt)
-            
-            # Save persistent data
-            await self._save_persistent_data()
+            await self._analyze_upload_patterns(user_id, attempt, typical_hours)
             
         except Exception as e:
             logger.error(f"Error recording upload attempt: {e}")
@@ -171,36 +172,29 @@ class UploadMonitor:
     ) -> Tuple[bool, Optional[str]]:
         """Check rate limiting constraints"""
         
-        now = datetime.utcnow()
-        
-        # Check user rate limits
-        user_attempts = self.upload_history[user_id]
-        
         # Hourly limit
-        hour_ago = now - timedelta(hours=1)
-        recent_attempts = [a for a in user_attempts if a.timestamp > hour_ago]
+        attempts_last_hour = self.store.attempt_count("user", user_id, 3600)
         
-        if len(recent_attempts) >= settings.MAX_UPLOADS_PER_HOUR:
+        if attempts_last_hour >= settings.MAX_UPLOADS_PER_HOUR:
             security_audit_logger.log_suspicious_activity(
                 description=f"User {user_id} exceeded hourly upload limit",
                 user_id=user_id,
                 details={
-                    "attempts_last_hour": len(recent_attempts),
+                    "attempts_last_hour": attempts_last_hour,
                     "limit": settings.MAX_UPLOADS_PER_HOUR
                 }
             )
             return False, f"Hourly upload limit exceeded ({settings.MAX_UPLOADS_PER_HOUR} uploads/hour)"
         
         # Daily limit
-        day_ago = now - timedelta(days=1)
-        daily_attempts = [a for a in user_attempts if a.timestamp > day_ago]
+        attempts_last_day = self.store.attempt_count("user", user_id, 24 * 3600)
         
-        if len(daily_attempts) >= settings.MAX_UPLOADS_PER_DAY:
+        if attempts_last_day >= settings.MAX_UPLOADS_PER_DAY:
             security_audit_logger.log_suspicious_activity(
                 description=f"User {user_id} exceeded daily upload limit",
                 user_id=user_id,
                 details={
-                    "attempts_last_day": len(daily_attempts),
+                    "attempts_last_day": attempts_last_day,
                     "limit": settings.MAX_UPLOADS_PER_DAY
                 }
             )
@@ -208,18 +202,17 @@ class UploadMonitor:
         
         # Check IP-based rate limits (if available)
         if ip_address:
-            ip_attempts = self.ip_attempts[ip_address]
-            recent_ip_attempts = [a for a in ip_attempts if a.timestamp > hour_ago]
+            ip_attempts_last_hour = self.store.attempt_count("ip", ip_address, 3600)
             
             # Allow more attempts per IP than per user (multiple users might share IP)
             ip_hourly_limit = settings.MAX_UPLOADS_PER_HOUR * 3
             
-            if len(recent_ip_attempts) >= ip_hourly_limit:
+            if ip_attempts_last_hour >= ip_hourly_limit:
                 security_audit_logger.log_suspicious_activity(
                     description=f"IP {ip_address} exceeded hourly upload limit",
                     details={
                         "ip_address": ip_address,
-                        "attempts_last_hour": len(recent_ip_attempts),
+                        "attempts_last_hour": ip_attempts_last_hour,
                         "limit": ip_hourly_limit
                     }
                 )
@@ -257,20 +250,10 @@ class UploadMonitor:
     ) -> Tuple[bool, Optional[str]]:
         """Check for duplicate file uploads"""
         
-        # Check if this exact file was uploaded recently
-        recent_uploads = self.file_hashes.get(file_hash, [])
-        
-        if recent_uploads:
-            # Check for uploads in the last hour
-            hour_ago = datetime.utcnow() - timedelta(hours=1)
-            recent_same_file = [
-                upload for upload in recent_uploads 
-                if upload.timestamp > hour_ago and upload.user_id == user_id
-            ]
-            
-            if recent_same_file:
-                logger.warning(f"User {user_id} attempting to upload duplicate file: {filename}")
-                return False, "Duplicate file uploaded recently"
+        # Check if this exact file was uploaded by the user in the last hour
+        if self.store.uploaded_recently(user_id, file_hash):
+            logger.warning(f"User {user_id} attempting to upload duplicate file: {filename}")
+            return False, "Duplicate file uploaded recently"
         
         return True, None
     
@@ -284,19 +267,17 @@ class UploadMonitor:
     ) -> Tuple[bool, Optional[str]]:
         """Check for suspicious upload patterns"""
         
-        user_attempts = self.upload_history[user_id]
+        recent_attempts = self.store.recent_attempts(user_id)  # Last 10 (timestamp, size)
         
-        if len(user_attempts) < 2:
+        if len(recent_attempts) < 2:
             return True, None  # Not enough history to analyze
         
-        recent_attempts = list(user_attempts)[-10:]  # Last 10 attempts
-        
         # Check for rapid successive uploads
         if len(recent_attempts) >= 5:
-            time_diffs = []
-            for i in range(1, len(recent_attempts)):
-                diff = (recent_attempts[i].timestamp - recent_attempts[i-1].timestamp).total_seconds()
-                time_diffs.append(diff)
+            time_diffs = [
+                recent_attempts[i][0] - recent_attempts[i-1][0]
+                for i in range(1, len(recent_attempts))
+            ]
             
             avg_interval = sum(time_diffs) / len(time_diffs)
             
@@ -316,7 +297,7 @@ class UploadMonitor:
         
         # Check for unusual file sizes
         if len(recent_attempts) >= 3:
-            sizes = [attempt.file_size for attempt in recent_attempts]
+            sizes = [size for _, size in recent_attempts]
             avg_size = sum(sizes) / len(sizes)
             
             # Flag if current file is significantly larger than typical uploads
@@ -329,7 +310,7 @@ class UploadMonitor:
                     details={
                         "current_size": file_size,
                         "average_size": avg_size,
-                        "size_ratio": file_size / avg_size
+                        "size_ratio": file_size / avg_size if avg_size else None
                     }
                 )
         
@@ -360,43 +341,35 @@ class UploadMonitor:
     async def _analyze_upload_patterns(
         self, 
         user_id: str, 
-        attempt: UploadAttempt
+        attempt: UploadAttempt,
+        typical_hours: Dict[int, int]
     ) -> None:
         """Analyze upload patterns for anomaly detection"""
         
-        user_attempts = self.upload_history[user_id]
-        
         # Check for failed upload patterns
-        recent_failures = [
-            a for a in user_attempts 
-            if not a.success and a.timestamp > datetime.utcnow() - timedelta(hours=1)
-        ]
+        failed_last_hour = self.store.failure_count(user_id, 3600)
         
-        if len(recent_failures) >= 5:
+        if failed_last_hour >= 5:
+            hour_ago = time.time() - 3600
+            last_errors = [error for ts, error in self.store.recent_failures(user_id) if ts > hour_ago]
             await self._create_security_alert(
                 alert_type="multiple_failed_uploads",
                 severity="high",
                 user_id=user_id,
                 description="Multiple failed upload attempts detected",
                 details={
-                    "failed_attempts_last_hour": len(recent_failures),
-                    "last_errors": [a.error for a in recent_failures[-3:]]
+                    "failed_attempts_last_hour": failed_last_hour,
+                    "last_errors": last_errors[-3:]
                 }
             )
         
         # Check for unusual upload times
         upload_hour = attempt.timestamp.hour
         
-        # Get user's typical upload hours
-        successful_attempts = [a for a in user_attempts if a.success and a != attempt]
-        if len(successful_attempts) >= 5:
-            typical_hours = [a.timestamp.hour for a in successful_attempts]
-            hour_counts = defaultdict(int)
-            for hour in typical_hours:
-                hour_counts[hour] += 1
-            
+        # Compare with the user's typical (successful) upload hours
+        if sum(typical_hours.values()) >= 5:
             # If current upload is outside typical hours and it's very late/early
-            if hour_counts.get(upload_hour, 0) == 0 and (upload_hour < 6 or upload_hour > 23):
+            if typical_hours.get(upload_hour, 0) == 0 and (upload_hour < 6 or upload_hour > 23):
                 await self._create_security_alert(
                     alert_type="unusual_upload_time",
                     severity="low",
@@ -404,7 +377,7 @@ class UploadMonitor:
                     description="Upload at unusual time detected",
                     details={
                         "upload_hour": upload_hour,
-                        "typical_hours": list(hour_counts.keys())
+                        "typical_hours": list(typical_hours.keys())
                     }
                 )
     
@@ -418,20 +391,14 @@ class UploadMonitor:
     ) -> None:
         """Create and log security alert"""
         
-        alert = SecurityAlert(
-            alert_type=alert_type,
-            severity=severity,
-            user_id=user_id,
-            description=description,
-            details=details,
-            timestamp=datetime.utcnow()
-        )
-        
-        self.security_alerts.append(alert)
-        
-        # Keep only recent alerts
-        cutoff = datetime.utcnow() - timedelta(days=7)
-        self.security_alerts = [a for a in self.security_alerts if a.timestamp > cutoff]
+        self.store.record_alert({
+            'alert_type': alert_type,
+            'severity': severity,
+            'user_id': user_id,
+            'description': description,
+            'details': details,
+            'timestamp': time.time()
+        })
         
         # Log to audit system
         security_audit_logger.log_suspicious_activity(
@@ -446,6 +413,21 @@ class UploadMonitor:
         
         logger.warning(f"Security alert - {alert_type}: {description} (User: {user_id})")
     
+    @property
+    def security_alerts(self) -> List[SecurityAlert]:
+        """Most recent security alerts"""
+        return [
+            SecurityAlert(
+                alert_type=alert['alert_type'],
+                severity=alert['severity'],
+                user_id=alert['user_id'],
+                description=alert['description'],
+                details=alert['details'],
+                timestamp=datetime.utcfromtimestamp(alert['timestamp'])
+            )
+            for alert in self.store.recent_alerts()
+        ]
+    
     async def get_upload_stats(
         self, 
         user_id: Optional[str] = None, 
@@ -453,112 +435,24 @@ class UploadMonitor:
     ) -> UploadStats:
         """Get upload statistics"""
         
-        cutoff = datetime.utcnow() - timedelta(hours=hours)
-        
-        if user_id:
-            attempts = [a for a in self.upload_history[user_id] if a.timestamp > cutoff]
-        else:
-            attempts = []
-            for user_attempts in self.upload_history.values():
-                attempts.extend([a for a in user_attempts if a.timestamp > cutoff])
+        stats = self.store.window_stats(user_id, hours * 3600)
         
-        if not attempts:
+        if not stats['attempts']:
             return UploadStats(0, 0, 0, 0, 0.0, 0, 0, 0)
         
-        successful = [a for a in attempts if a.success]
-        failed = [a for a in attempts if not a.success]
-        
-        total_bytes = sum(a.file_size for a in successful)
-        unique_hashes = len(set(a.file_hash for a in attempts))
-        
-        # Count suspicious attempts (those with security alerts)
-        suspicious_count = len([
-            alert for alert in self.security_alerts 
-            if alert.timestamp > cutoff and (not user_id or alert.user_id == user_id)
-        ])
+        successful = stats['successes']
+        total_bytes = stats['bytes']
         
         return UploadStats(
-            total_attempts=len(attempts),
-            successful_uploads=len(successful),
-            failed_uploads=len(failed),
+            total_attempts=stats['attempts'],
+            successful_uploads=successful,
+            failed_uploads=stats['failures'],
             total_bytes=total_bytes,
-            average_file_size=total_bytes / len(successful) if successful else 0,
-            unique_files=unique_hashes,
-            suspicious_attempts=suspicious_count,
+            average_file_size=total_bytes / successful if successful else 0,
+            unique_files=stats['unique_files'],
+            suspicious_attempts=stats['alerts'],  # Attempts that raised security alerts
             rate_limit_violations=0  # Would need to track this separately
         )
-    
-    def _load_persistent_data(self) -> None:
-        """Load persistent monitoring data from disk"""
-        try:
-            data_file = Path(settings.UPLOAD_DIR) / "monitor_data.json"
-            if data_file.exists():
-                with open(data_file, 'r') as f:
-                    data = json.load(f)
-                
-                # Load recent upload history (last 7 days)
-                cutoff = datetime.utcnow() - timedelta(days=7)
-                for user_id, attempts_data in data.get('upload_history', {}).items():
-                    for attempt_data in attempts_data:
-                        timestamp = datetime.fromisoformat(attempt_data['timestamp'])
-                        if timestamp > cutoff:
-                            attempt = UploadAttempt(
-                                user_id=attempt_data['user_id'],
-                                filename=attempt_data['filename'],
-                                file_size=attempt_data['file_size'],
-                                file_hash=attempt_data['file_hash'],
-                                timestamp=timestamp,
-                                success=attempt_data['success'],
-                                ip_address=attempt_data.get('ip_address'),
-                                user_agent=attempt_data.get('user_agent'),
-                                error=attempt_data.get('error')
-                            )
-                            self.upload_history[user_id].append(attempt)
-                            self.file_hashes[attempt.file_hash].append(attempt)
-                            
-                            if attempt.ip_address:
-                                self.ip_attempts[attempt.ip_address].append(attempt)
-                
-                logger.info("Loaded persistent upload monitoring data")
-                
-        except Exception as e:
-            logger.warning(f"Could not load persistent monitoring data: {e}")
-    
-    async def _save_persistent_data(self) -> None:
-        """Save monitoring data to disk"""
-        try:
-            # Save only recent data (last 7 days)
-            cutoff = datetime.utcnow() - timedelta(days=7)
-            
-            data = {
-                'upload_history': {},
-                'last_updated': datetime.utcnow().isoformat()
-            }
-            
-            for user_id, attempts in self.upload_history.items():
-                recent_attempts = [a for a in attempts if a.timestamp > cutoff]
-                if recent_attempts:
-                    data['upload_history'][user_id] = [
-                        {
-                            'user_id': a.user_id,
-                            'filename': a.filename,
-                            'file_size': a.file_size,
-                            'file_hash': a.file_hash,
-                            'timestamp': a.timestamp.isoformat(),
-                            'success': a.success,
-                            'ip_address': a.ip_address,
-                            'user_agent': a.user_agent,
-                            'error': a.error
-                        }
-                        for a in recent_attempts
-                    ]
-            
-            data_file = Path(settings.UPLOAD_DIR) / "monitor_data.json"
-            with open(data_file, 'w') as f:
-                json.dump(data, f, indent=2)
-                
-        except Exception as e:
-            logger.error(f"Could not save persistent monitoring data: {e}")
 
 
 # Global monitor instance
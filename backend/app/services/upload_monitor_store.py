@@ -0,0 +1,462 @@
+"""
+Upload Monitoring Store for FinGood
+
+State behind UploadMonitor's rate limits, duplicate checks and anomaly
+detection. Instead of full upload histories that are scanned linearly, the
+store keeps:
+
+- time-bucketed counters (minute buckets for the last hour, hour buckets for
+  the retention window) per user, per IP and globally
+- small ring buffers of each user's latest attempts and failures
+- expiring markers for (user, file hash) duplicate detection
+- a per-user histogram of successful upload hours
+
+Every permission check therefore touches a fixed number of buckets,
+independent of how much history has accumulated.
+
+Two backends share the interface:
+
+- RedisUploadMonitorStore: one key per bucket with a TTL, so Redis expires
+  (compacts) old data on its own and all API workers see the same state
+- LocalUploadMonitorStore: in-process structures persisted to an append-only
+  event log that is replayed on startup and compacted to the retention window
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict, defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MINUTE = 60
+HOUR = 3600
+
+# History kept for statistics (hour buckets)
+RETENTION_SECONDS = 7 * 24 * HOUR
+
+# Duplicate uploads of the same file by a user are rejected within this window
+DUPLICATE_WINDOW_SECONDS = HOUR
+
+# Ring buffer sizes
+RECENT_ATTEMPTS_SIZE = 10
+RECENT_FAILURES_SIZE = 5
+RECENT_ALERTS_SIZE = 100
+
+# Counter metrics
+ATTEMPTS = "attempts"
+SUCCESSES = "successes"
+FAILURES = "failures"
+BYTES = "bytes"
+ALERTS = "alerts"
+
+GLOBAL_SCOPE = ("global", "all")
+
+
+def _bucket_plan(seconds: int, now: float) -> Tuple[str, int, List[int]]:
+    """
+    Buckets covering the last `seconds`
+
+    Windows up to an hour use minute buckets, longer ones hour buckets. The
+    current (partial) bucket is included.
+
+    Returns:
+        (resolution, bucket width, bucket epochs)
+    """
+    if seconds <= HOUR:
+        resolution, width = "m", MINUTE
+    else:
+        resolution, width = "h", HOUR
+    seconds = min(seconds, RETENTION_SECONDS)
+    current = int(now // width)
+    count = max(1, math.ceil(seconds / width))
+    return resolution, width, list(range(current - count + 1, current + 1))
+
+
+class _BucketRing:
+    """Fixed number of time buckets reused round-robin (O(1) updates)"""
+
+    __slots__ = ("width", "slots", "epochs", "values")
+
+    def __init__(self, width: int, slots: int):
+        self.width = width
+        self.slots = slots
+        self.epochs = [-1] * slots
+        self.values = [0] * slots
+
+    def add(self, timestamp: float, amount: int = 1):
+        epoch = int(timestamp // self.width)
+        index = epoch % self.slots
+        if self.epochs[index] != epoch:
+            self.epochs[index] = epoch
+            self.values[index] = 0
+        self.values[index] += amount
+
+    def total(self, epochs: List[int]) -> int:
+        return sum(
+            self.values[epoch % self.slots]
+            for epoch in epochs
+            if self.epochs[epoch % self.slots] == epoch
+        )
+
+
+class _SetRing:
+    """Hour buckets of distinct values (unique file hashes)"""
+
+    __slots__ = ("slots", "epochs", "values")
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.epochs = [-1] * slots
+        self.values: List[Set[str]] = [set() for _ in range(slots)]
+
+    def add(self, timestamp: float, value: str):
+        epoch = int(timestamp // HOUR)
+        index = epoch % self.slots
+        if self.epochs[index] != epoch:
+            self.epochs[index] = epoch
+            self.values[index] = set()
+        self.values[index].add(value)
+
+    def union_size(self, epochs: List[int]) -> int:
+        merged: Set[str] = set()
+        for epoch in epochs:
+            index = epoch % self.slots
+            if self.epochs[index] == epoch:
+                merged |= self.values[index]
+        return len(merged)
+
+
+class LocalUploadMonitorStore:
+    """In-process store persisted to an append-only event log"""
+
+    # Rewrite the log after this many appended events
+    COMPACT_EVERY = 10000
+
+    def __init__(self, log_path: Optional[Path] = None):
+        self.log_path = log_path or Path(settings.UPLOAD_DIR) / "monitor_events.jsonl"
+        self._minute_counters: Dict[Tuple[str, str, str], _BucketRing] = {}
+        self._hour_counters: Dict[Tuple[str, str, str], _BucketRing] = {}
+        self._files: Dict[Tuple[str, str], _SetRing] = {}
+        self._recent: Dict[str, Deque[Tuple[float, int]]] = defaultdict(lambda: deque(maxlen=RECENT_ATTEMPTS_SIZE))
+        self._failures: Dict[str, Deque[Tuple[float, Optional[str]]]] = defaultdict(lambda: deque(maxlen=RECENT_FAILURES_SIZE))
+        self._success_hours: Dict[str, List[int]] = defaultdict(lambda: [0] * 24)
+        self._recent_uploads: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._alerts: Deque[Dict[str, Any]] = deque(maxlen=RECENT_ALERTS_SIZE)
+        self._appended = 0
+
+        self._replay()
+
+    # Counters
+
+    def _add(self, scope: Tuple[str, str], metric: str, timestamp: float, amount: int = 1):
+        key = (scope[0], scope[1], metric)
+        minute = self._minute_counters.get(key)
+        if minute is None:
+            minute = self._minute_counters[key] = _BucketRing(MINUTE, 60)
+            self._hour_counters[key] = _BucketRing(HOUR, RETENTION_SECONDS // HOUR)
+        minute.add(timestamp, amount)
+        self._hour_counters[key].add(timestamp, amount)
+
+    def _count(self, scope: Tuple[str, str], metric: str, seconds: int) -> int:
+        resolution, _, epochs = _bucket_plan(seconds, time.time())
+        counters = self._minute_counters if resolution == "m" else self._hour_counters
+        ring = counters.get((scope[0], scope[1], metric))
+        return ring.total(epochs) if ring else 0
+
+    # Writes
+
+    def record_attempt(self, attempt: Dict[str, Any]):
+        """Record an upload attempt (timestamp is a unix time)"""
+        self._apply_attempt(attempt)
+        self._append({"type": "attempt", **attempt})
+
+    def record_alert(self, alert: Dict[str, Any]):
+        self._apply_alert(alert)
+        self._append({"type": "alert", **alert})
+
+    def _apply_attempt(self, attempt: Dict[str, Any]):
+        ts = attempt["timestamp"]
+        user_id = attempt["user_id"]
+        scopes = [("user", user_id), GLOBAL_SCOPE]
+        if attempt.get("ip_address"):
+            scopes.append(("ip", attempt["ip_address"]))
+
+        for scope in scopes:
+            self._add(scope, ATTEMPTS, ts)
+            self._add(scope, SUCCESSES if attempt["success"] else FAILURES, ts)
+            if attempt["success"]:
+                self._add(scope, BYTES, ts, attempt["file_size"])
+            if scope[0] != "ip":
+                files = self._files.get(scope)
+                if files is None:
+                    files = self._files[scope] = _SetRing(RETENTION_SECONDS // HOUR)
+                files.add(ts, attempt["file_hash"])
+
+        self._recent[user_id].append((ts, attempt["file_size"]))
+        if attempt["success"]:
+            self._success_hours[user_id][time.gmtime(ts).tm_hour] += 1
+        else:
+            self._failures[user_id].append((ts, attempt.get("error")))
+
+        key = (user_id, attempt["file_hash"])
+        self._recent_uploads[key] = ts
+        self._recent_uploads.move_to_end(key)
+        cutoff = time.time() - DUPLICATE_WINDOW_SECONDS
+        while self._recent_uploads:
+            oldest_key, oldest_ts = next(iter(self._recent_uploads.items()))
+            if oldest_ts > cutoff:
+                break
+            self._recent_uploads.popitem(last=False)
+
+    def _apply_alert(self, alert: Dict[str, Any]):
+        self._add(("user", alert["user_id"]), ALERTS, alert["timestamp"])
+        self._add(GLOBAL_SCOPE, ALERTS, alert["timestamp"])
+        self._alerts.append(alert)
+
+    # Reads
+
+    def attempt_count(self, scope: str, key: str, seconds: int) -> int:
+        """Upload attempts by a user or IP in the last `seconds`"""
+        return self._count((scope, key), ATTEMPTS, seconds)
+
+    def failure_count(self, user_id: str, seconds: int) -> int:
+        return self._count(("user", user_id), FAILURES, seconds)
+
+    def recent_attempts(self, user_id: str) -> List[Tuple[float, int]]:
+        """(timestamp, file size) of the user's latest attempts, oldest first"""
+        return list(self._recent.get(user_id, ()))
+
+    def recent_failures(self, user_id: str) -> List[Tuple[float, Optional[str]]]:
+        """(timestamp, error) of the user's latest failed attempts, oldest first"""
+        return list(self._failures.get(user_id, ()))
+
+    def uploaded_recently(self, user_id: str, file_hash: str) -> bool:
+        ts = self._recent_uploads.get((user_id, file_hash))
+        return ts is not None and ts > time.time() - DUPLICATE_WINDOW_SECONDS
+
+    def success_hours(self, user_id: str) -> Dict[int, int]:
+        hours = self._success_hours.get(user_id)
+        return {hour: count for hour, count in enumerate(hours) if count} if hours else {}
+
+    def window_stats(self, user_id: Optional[str], seconds: int) -> Dict[str, int]:
+        scope = ("user", user_id) if user_id else GLOBAL_SCOPE
+        _, _, epochs = _bucket_plan(max(seconds, HOUR + 1), time.time())
+        files = self._files.get(scope)
+        return {
+            ATTEMPTS: self._count(scope, ATTEMPTS, seconds),
+            SUCCESSES: self._count(scope, SUCCESSES, seconds),
+            FAILURES: self._count(scope, FAILURES, seconds),
+            BYTES: self._count(scope, BYTES, seconds),
+            ALERTS: self._count(scope, ALERTS, seconds),
+            "unique_files": files.union_size(epochs) if files else 0,
+        }
+
+    def recent_alerts(self) -> List[Dict[str, Any]]:
+        return list(self._alerts)
+
+    # Persistence
+
+    def _append(self, event: Dict[str, Any]):
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(event, separators=(",", ":")) + "\n")
+            self._appended += 1
+            if self._appended >= self.COMPACT_EVERY:
+                self.compact()
+        except Exception as e:
+            logger.error(f"Could not append upload monitoring event: {e}")
+
+    def _replay(self):
+        """Rebuild state from the event log (or the legacy JSON snapshot)"""
+        events = self._read_events()
+        for event in events:
+            if event.get("type") == "alert":
+                self._apply_alert(event)
+            else:
+                self._apply_attempt(event)
+        if events:
+            logger.info(f"Replayed {len(events)} upload monitoring events")
+            self.compact(events)
+
+    def _read_events(self) -> List[Dict[str, Any]]:
+        cutoff = time.time() - RETENTION_SECONDS
+        events = []
+        try:
+            if self.log_path.exists():
+                with open(self.log_path) as f:
+                    for line in f:
+                        try:
+                            event = json.loads(line)
+                        except ValueError:
+                            continue  # Torn write at the end of the log
+                        if event.get("timestamp", 0) > cutoff:
+                            events.append(event)
+            else:
+                events = self._read_legacy_snapshot(cutoff)
+        except Exception as e:
+            logger.warning(f"Could not load persistent monitoring data: {e}")
+        events.sort(key=lambda event: event["timestamp"])
+        return events
+
+    def _read_legacy_snapshot(self, cutoff: float) -> List[Dict[str, Any]]:
+        """Import monitor_data.json written by earlier versions"""
+        from datetime import datetime
+
+        legacy_file = self.log_path.with_name("monitor_data.json")
+        if not legacy_file.exists():
+            return []
+        with open(legacy_file) as f:
+            data = json.load(f)
+
+        events = []
+        for attempts in data.get("upload_history", {}).values():
+            for attempt in attempts:
+                ts = datetime.fromisoformat(attempt["timestamp"]).timestamp()
+                if ts > cutoff:
+                    events.append({"type": "attempt", **attempt, "timestamp": ts})
+        return events
+
+    def compact(self, events: Optional[List[Dict[str, Any]]] = None):
+        """Rewrite the log with only the events inside the retention window"""
+        if events is None:
+            events = self._read_events()
+        temp_path = self.log_path.with_suffix(".tmp")
+        try:
+            with open(temp_path, "w") as f:
+                for event in events:
+                    f.write(json.dumps(event, separators=(",", ":")) + "\n")
+            os.replace(temp_path, self.log_path)
+            self._appended = 0
+        except Exception as e:
+            logger.error(f"Could not compact upload monitoring log: {e}")
+
+
+class RedisUploadMonitorStore:
+    """Redis store shared by all workers; bucket keys expire on their own"""
+
+    PREFIX = "fingood:upload_monitor"
+
+    def __init__(self, client):
+        self.redis = client
+
+    def _counter_key(self, scope: Tuple[str, str], metric: str, resolution: str, epoch: int) -> str:
+        return f"{self.PREFIX}:{scope[0]}:{scope[1]}:{metric}:{resolution}:{epoch}"
+
+    def _files_key(self, scope: Tuple[str, str], epoch: int) -> str:
+        return f"{self.PREFIX}:{scope[0]}:{scope[1]}:files:h:{epoch}"
+
+    def _add(self, pipe, scope: Tuple[str, str], metric: str, ts: float, amount: int = 1):
+        minute_key = self._counter_key(scope, metric, "m", int(ts // MINUTE))
+        hour_key = self._counter_key(scope, metric, "h", int(ts // HOUR))
+        pipe.incrby(minute_key, amount)
+        pipe.expire(minute_key, 2 * HOUR)
+        pipe.incrby(hour_key, amount)
+        pipe.expire(hour_key, RETENTION_SECONDS + HOUR)
+
+    def _count(self, scope: Tuple[str, str], metric: str, seconds: int) -> int:
+        resolution, _, epochs = _bucket_plan(seconds, time.time())
+        values = self.redis.mget([self._counter_key(scope, metric, resolution, e) for e in epochs])
+        return sum(int(v) for v in values if v)
+
+    def record_attempt(self, attempt: Dict[str, Any]):
+        ts = attempt["timestamp"]
+        user_id = attempt["user_id"]
+        scopes = [("user", user_id), GLOBAL_SCOPE]
+        if attempt.get("ip_address"):
+            scopes.append(("ip", attempt["ip_address"]))
+
+        pipe = self.redis.pipeline(transaction=False)
+        for scope in scopes:
+            self._add(pipe, scope, ATTEMPTS, ts)
+            self._add(pipe, scope, SUCCESSES if attempt["success"] else FAILURES, ts)
+            if attempt["success"]:
+                self._add(pipe, scope, BYTES, ts, attempt["file_size"])
+            if scope[0] != "ip":
+                files_key = self._files_key(scope, int(ts // HOUR))
+                pipe.pfadd(files_key, attempt["file_hash"])
+                pipe.expire(files_key, RETENTION_SECONDS + HOUR)
+
+        user_prefix = f"{self.PREFIX}:user:{user_id}"
+        pipe.lpush(f"{user_prefix}:recent", json.dumps([ts, attempt["file_size"]]))
+        pipe.ltrim(f"{user_prefix}:recent", 0, RECENT_ATTEMPTS_SIZE - 1)
+        pipe.expire(f"{user_prefix}:recent", RETENTION_SECONDS)
+        if attempt["success"]:
+            pipe.hincrby(f"{user_prefix}:success_hours", time.gmtime(ts).tm_hour, 1)
+            pipe.expire(f"{user_prefix}:success_hours", RETENTION_SECONDS * 4)
+        else:
+            pipe.lpush(f"{user_prefix}:failures", json.dumps([ts, attempt.get("error")]))
+            pipe.ltrim(f"{user_prefix}:failures", 0, RECENT_FAILURES_SIZE - 1)
+            pipe.expire(f"{user_prefix}:failures", RETENTION_SECONDS)
+        pipe.set(f"{user_prefix}:file:{attempt['file_hash']}", 1, ex=DUPLICATE_WINDOW_SECONDS)
+        pipe.execute()
+
+    def record_alert(self, alert: Dict[str, Any]):
+        pipe = self.redis.pipeline(transaction=False)
+        self._add(pipe, ("user", alert["user_id"]), ALERTS, alert["timestamp"])
+        self._add(pipe, GLOBAL_SCOPE, ALERTS, alert["timestamp"])
+        pipe.lpush(f"{self.PREFIX}:alerts", json.dumps(alert, default=str))
+        pipe.ltrim(f"{self.PREFIX}:alerts", 0, RECENT_ALERTS_SIZE - 1)
+        pipe.execute()
+
+    def attempt_count(self, scope: str, key: str, seconds: int) -> int:
+        return self._count((scope, key), ATTEMPTS, seconds)
+
+    def failure_count(self, user_id: str, seconds: int) -> int:
+        return self._count(("user", user_id), FAILURES, seconds)
+
+    def recent_attempts(self, user_id: str) -> List[Tuple[float, int]]:
+        items = self.redis.lrange(f"{self.PREFIX}:user:{user_id}:recent", 0, -1)
+        return [tuple(json.loads(item)) for item in reversed(items)]
+
+    def recent_failures(self, user_id: str) -> List[Tuple[float, Optional[str]]]:
+        items = self.redis.lrange(f"{self.PREFIX}:user:{user_id}:failures", 0, -1)
+        return [tuple(json.loads(item)) for item in reversed(items)]
+
+    def uploaded_recently(self, user_id: str, file_hash: str) -> bool:
+        return bool(self.redis.exists(f"{self.PREFIX}:user:{user_id}:file:{file_hash}"))
+
+    def success_hours(self, user_id: str) -> Dict[int, int]:
+        hours = self.redis.hgetall(f"{self.PREFIX}:user:{user_id}:success_hours")
+        return {int(hour): int(count) for hour, count in hours.items()}
+
+    def window_stats(self, user_id: Optional[str], seconds: int) -> Dict[str, int]:
+        scope = ("user", user_id) if user_id else GLOBAL_SCOPE
+        _, _, epochs = _bucket_plan(max(seconds, HOUR + 1), time.time())
+        return {
+            ATTEMPTS: self._count(scope, ATTEMPTS, seconds),
+            SUCCESSES: self._count(scope, SUCCESSES, seconds),
+            FAILURES: self._count(scope, FAILURES, seconds),
+            BYTES: self._count(scope, BYTES, seconds),
+            ALERTS: self._count(scope, ALERTS, seconds),
+            "unique_files": self.redis.pfcount(*[self._files_key(scope, e) for e in epochs]),
+        }
+
+    def recent_alerts(self) -> List[Dict[str, Any]]:
+        return [json.loads(item) for item in reversed(self.redis.lrange(f"{self.PREFIX}:alerts", 0, -1))]
+
+
+def create_upload_monitor_store():
+    """Redis store when Redis is reachable, local event-log store otherwise"""
+    if settings.REDIS_URL:
+        try:
+            import redis
+            client = redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_timeout=2,
+                socket_connect_timeout=2
+            )
+            client.ping()
+            logger.info("Upload monitoring state stored in Redis")
+            return RedisUploadMonitorStore(client)
+        except Exception as e:
+            logger.warning(f"Upload monitoring state is process-local (Redis unavailable): {e}")
+    return LocalUploadMonitorStore()
@@ -0,0 +1,367 @@
+"""
+Upload Security Verdict Cache for FinGood
+
+Re-uploading an identical file is common (retries, re-imports after deleting
+a batch). The security pipeline (FileValidator, MalwareScanner, sandbox and
+ContentSanitizer) is deterministic for a given file, filename and rule set,
+so clean verdicts are cached and replayed instead of rescanning.
+
+Entries are keyed by the file's SHA-256, the filename and a rule-set version
+that hashes every signature list (file, CSV and sandbox), YARA rule, enabled
+engine, ClamAV database version and relevant setting. Any rule change therefore produces new keys and
+old verdicts are never consulted again (they expire after
+UPLOAD_VERDICT_CACHE_TTL_SECONDS). Only verdicts for files that passed every
+check with every malware engine finishing are stored; suspicious files and
+incomplete scans are always rescanned.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.security_scanner import CSV_COLUMN_SIGNATURES, CSV_SCRIPT_SIGNATURES, CSV_SQL_SIGNATURES
+from app.services import file_analysis
+from app.services.content_sanitizer import ContentSanitizer, SanitizationLevel, SanitizationResult
+from app.services.file_validator import FileValidationResult, FileValidator, ThreatLevel, ValidationResult
+from app.services.malware_scanner import ComprehensiveScanResult, MalwareScannerFactory
+from app.services.simple_sandbox_analyzer import SANDBOX_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Bump when the pipeline's decision logic changes in a way the hashed
+# constants below do not capture
+PIPELINE_VERSION = "1"
+
+# Entries kept in-process when Redis is unavailable
+LOCAL_CACHE_SIZE = 512
+
+
+def _normalize(value: Any) -> Any:
+    """Make constants deterministic for hashing (sets are unordered)"""
+    if isinstance(value, (set, frozenset)):
+        return sorted((_normalize(v) for v in value), key=repr)
+    if isinstance(value, dict):
+        return {repr(k): _normalize(v) for k, v in sorted(value.items(), key=lambda item: repr(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _class_constants(cls) -> Dict[str, Any]:
+    """UPPER_CASE class attributes (signature lists, limits)"""
+    return {
+        name: _normalize(getattr(cls, name))
+        for name in sorted(dir(cls))
+        if name.isupper() and not name.startswith('_')
+    }
+
+
+def _static_ruleset_digest() -> str:
+    """Digest of every rule that does not change while the process runs"""
+    rules = {
+        'pipeline': PIPELINE_VERSION,
+        'file_validator': _class_constants(FileValidator),
+        'content_sanitizer': _class_constants(ContentSanitizer),
+        'csv_signatures': [
+            repr(signature)
+            for signature in (*CSV_COLUMN_SIGNATURES, *CSV_SCRIPT_SIGNATURES, *CSV_SQL_SIGNATURES)
+        ],
+        'sandbox': SANDBOX_VERSION,
+        'patterns': sorted(repr(p) for p in file_analysis._EXACT_PATTERNS) +
+                    sorted(repr(p) for p in file_analysis._FOLDED_PATTERNS),
+        'settings': {
+            'allowed_extensions': settings.ALLOWED_EXTENSIONS,
+            'max_file_size': settings.MAX_FILE_SIZE,
+            'max_csv_size': settings.MAX_CSV_SIZE,
+            'max_excel_size': settings.MAX_EXCEL_SIZE,
+            'max_columns': settings.MAX_COLUMNS_PER_CSV,
+            'max_rows': settings.MAX_ROWS_PER_CSV,
+        },
+    }
+    return hashlib.sha256(json.dumps(rules, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+@dataclass
+class UploadVerdict:
+    """Combined outcome of the upload security pipeline for a clean file"""
+    threat_level: str
+    validation_checks: Dict[str, bool]
+    warnings: list
+    file_info: Dict[str, Any]
+    malware_engines: int
+    malware_metadata: Dict[str, Any]
+    sandbox_result: Dict[str, Any]
+    sanitization_level: str
+    modifications_made: list
+    security_issues: list
+    original_size: int
+    sanitized_size: int
+    content_unchanged: bool
+    sanitized_content: Optional[str] = None  # Only when modified and small enough
+    cached_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_results(
+        cls,
+        validation_result: FileValidationResult,
+        malware_scan_result: ComprehensiveScanResult,
+        sandbox_result: Dict[str, Any],
+        sanitization_result: SanitizationResult,
+        original_content: str
+    ) -> "UploadVerdict":
+        """Build a verdict from the results of a full pipeline run"""
+        content_unchanged = sanitization_result.sanitized_content == original_content
+        sanitized_content = None
+        if (not content_unchanged and
+                sanitization_result.sanitized_size <= settings.UPLOAD_VERDICT_CACHE_MAX_SANITIZED_BYTES):
+            sanitized_content = sanitization_result.sanitized_content
+
+        return cls(
+            threat_level=validation_result.threat_level.value,
+            validation_checks=validation_result.validation_checks,
+            warnings=validation_result.warnings,
+            file_info=validation_result.file_info,
+            malware_engines=malware_scan_result.total_engines,
+            malware_metadata=malware_scan_result.metadata,
+            sandbox_result=sandbox_result,
+            sanitization_level=sanitization_result.sanitization_level.value,
+            modifications_made=sanitization_result.modifications_made,
+            security_issues=sanitization_result.security_issues,
+            original_size=sanitization_result.original_size,
+            sanitized_size=sanitization_result.sanitized_size,
+            content_unchanged=content_unchanged,
+            sanitized_content=sanitized_content
+        )
+
+    def validation_result(self) -> FileValidationResult:
+        return FileValidationResult(
+            is_valid=True,
+            validation_result=ValidationResult.APPROVED,
+            threat_level=ThreatLevel(self.threat_level),
+            file_info=self.file_info,
+            validation_checks=self.validation_checks,
+            errors=[],
+            warnings=self.warnings,
+            scan_duration=0.0,
+            metadata={'verdict_cache': 'hit', 'cached_at': self.cached_at}
+        )
+
+    def malware_scan_result(self) -> ComprehensiveScanResult:
+        return ComprehensiveScanResult(
+            is_clean=True,
+            total_engines=self.malware_engines,
+            engines_clean=self.malware_engines,
+            threats_detected=[],
+            highest_confidence=0.0,
+            scan_duration=0.0,
+            metadata={**self.malware_metadata, 'verdict_cache': 'hit'}
+        )
+
+    def sanitization_result(self, content: str, level: SanitizationLevel) -> Optional[SanitizationResult]:
+        """
+        Replay the sanitization outcome for the decoded content
+
+        Args:
+            content: Decoded file content
+            level: Sanitization level requested by the caller
+
+        Returns:
+            SanitizationResult, or None if sanitization must be rerun (different
+            level, or the sanitized output was too large to cache)
+        """
+        if level.value != self.sanitization_level:
+            return None
+        if self.content_unchanged:
+            sanitized_content = content
+        elif self.sanitized_content is not None:
+            sanitized_content = self.sanitized_content
+        else:
+            return None
+
+        return SanitizationResult(
+            is_safe=True,
+            sanitized_content=sanitized_content,
+            modifications_made=self.modifications_made,
+            security_issues=self.security_issues,
+            original_size=self.original_size,
+            sanitized_size=self.sanitized_size,
+            sanitization_level=SanitizationLevel(self.sanitization_level)
+        )
+
+    def to_json(self) -> str:
+        data = dict(self.__dict__)
+        if data['sanitized_content'] is not None:
+            compressed = zlib.compress(data['sanitized_content'].encode('utf-8'))
+            data['sanitized_content'] = base64.b64encode(compressed).decode('ascii')
+        return json.dumps(data, default=str)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "UploadVerdict":
+        data = json.loads(raw)
+        if data.get('sanitized_content') is not None:
+            compressed = base64.b64decode(data['sanitized_content'])
+            data['sanitized_content'] = zlib.decompress(compressed).decode('utf-8')
+        return cls(**data)
+
+
+class UploadVerdictCache:
+    """Redis-backed (in-process fallback) cache of clean upload verdicts"""
+
+    KEY_PREFIX = "fingood:upload_verdict"
+
+    def __init__(self):
+        self.enabled = settings.UPLOAD_VERDICT_CACHE_ENABLED
+        self.ttl = settings.UPLOAD_VERDICT_CACHE_TTL_SECONDS
+        self._static_digest = _static_ruleset_digest()
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires, json)
+        self.hit_count = 0
+        self.miss_count = 0
+
+        self.redis_client = None
+        if self.enabled and settings.REDIS_URL:
+            try:
+                import redis
+                self.redis_client = redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_timeout=2,
+                    socket_connect_timeout=2
+                )
+                self.redis_client.ping()
+            except Exception as e:
+                logger.warning(f"Upload verdict cache is process-local (Redis unavailable): {e}")
+                self.redis_client = None
+
+    def ruleset_version(self) -> str:
+        """Version of all rules that produced a verdict (static rules + live signatures)"""
+        scanner_version = MalwareScannerFactory.get_scanner().signature_version()
+        return hashlib.sha256(f"{self._static_digest}:{scanner_version}".encode()).hexdigest()[:16]
+
+    def _key(self, sha256: str, filename: str) -> str:
+        filename_hash = hashlib.sha256(filename.encode('utf-8', errors='ignore')).hexdigest()[:16]
+        return f"{self.KEY_PREFIX}:{self.ruleset_version()}:{sha256}:{filename_hash}"
+
+    def get(self, sha256: str, filename: str) -> Optional[UploadVerdict]:
+        """
+        Look up the verdict for a previously accepted file
+
+        Args:
+            sha256: SHA-256 of the file content
+            filename: Original filename (extension and name are validated)
+
+        Returns:
+            UploadVerdict, or None if the file must be scanned
+        """
+        if not self.enabled:
+            return None
+
+        key = self._key(sha256, filename)
+        raw = None
+        try:
+            if self.redis_client is not None:
+                raw = self.redis_client.get(key)
+            else:
+                entry = self._local.get(key)
+                if entry is not None:
+                    if entry[0] > time.time():
+                        self._local.move_to_end(key)
+                        raw = entry[1]
+                    else:
+                        self._local.pop(key, None)
+            verdict = UploadVerdict.from_json(raw) if raw else None
+        except Exception as e:
+            logger.error(f"Failed to read upload verdict cache: {e}")
+            verdict = None
+
+        if verdict is None:
+            self.miss_count += 1
+        else:
+            self.hit_count += 1
+            logger.info(f"Upload verdict cache hit for {sha256[:16]}")
+        return verdict
+
+    def remember(
+        self,
+        sha256: str,
+        filename: str,
+        validation_result: FileValidationResult,
+        malware_scan_result: ComprehensiveScanResult,
+        sandbox_result: Optional[Dict[str, Any]],
+        sanitization_result: SanitizationResult,
+        original_content: str
+    ) -> bool:
+        """
+        Cache the pipeline outcome if the file passed every check
+
+        Quarantined, suspicious or unsafe files are never cached, nor are
+        files whose malware scan did not finish on every engine.
+
+        Returns:
+            True if a verdict was stored
+        """
+        if (validation_result.validation_result != ValidationResult.APPROVED or
+                not malware_scan_result.is_clean or
+                not malware_scan_result.scan_complete or
+                (sandbox_result or {}).get("threat_detected", False) or
+                not sanitization_result.is_safe):
+            return False
+
+        verdict = UploadVerdict.from_results(
+            validation_result,
+            malware_scan_result,
+            sandbox_result or {},
+            sanitization_result,
+            original_content
+        )
+        return self.set(sha256, filename, verdict)
+
+    def set(self, sha256: str, filename: str, verdict: UploadVerdict) -> bool:
+        """Store the verdict for a file that passed the whole pipeline"""
+        if not self.enabled:
+            return False
+
+        key = self._key(sha256, filename)
+        try:
+            raw = verdict.to_json()
+            if self.redis_client is not None:
+                self.redis_client.setex(key, self.ttl, raw)
+            else:
+                self._local[key] = (time.time() + self.ttl, raw)
+                self._local.move_to_end(key)
+                while len(self._local) > LOCAL_CACHE_SIZE:
+                    self._local.popitem(last=False)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to store upload verdict: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hit_count + self.miss_count
+        return {
+            'enabled': self.enabled,
+            'backend': 'redis' if self.redis_client is not None else 'local',
+            'hits': self.hit_count,
+            'misses': self.miss_count,
+            'hit_rate': round(self.hit_count / total, 4) if total else 0.0,
+        }
+
+
+_upload_verdict_cache: Optional[UploadVerdictCache] = None
+
+
+def get_upload_verdict_cache() -> UploadVerdictCache:
+    """Get the global upload verdict cache"""
+    global _upload_verdict_cache
+    if _upload_verdict_cache is None:
+        _upload_verdict_cache = UploadVerdictCache()
+    return _upload_verdict_cache
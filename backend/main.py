@@ -10,7 +10,7 @@ from dotenv import load_dotenv
 
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.core.database import engine, Base, get_db
+from app.core.database import engine, Base, get_db, register_session_listeners
 from app.core.websocket_manager import websocket_manager
 from app.core.csrf_middleware import CSRFProtectionMiddleware
 from app.core.validation_middleware import ValidationMiddleware
@@ -83,7 +83,8 @@ try:
     # Initialize performance monitoring
     if settings.ENABLE_PERFORMANCE_MONITORING:
         performance_monitor = initialize_performance_monitor(
-            enable_system_monitoring=settings.ENABLE_SYSTEM_MONITORING
+            enable_system_monitoring=settings.ENABLE_SYSTEM_MONITORING,
+            sample_every=settings.PERFORMANCE_METRIC_SAMPLE_EVERY
         )
     
     # Initialize compliance logging
@@ -107,6 +108,9 @@ except Exception as e:
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# Keep pattern statistics and fraud features current on every write
+register_session_listeners()
+
 app = FastAPI(
     title="FinGood API",
     description="AI-Powered Financial Intelligence Platform",
@@ -162,7 +166,8 @@ app = FastAPI(
 #     enable_response_validation=True,
 #     enable_sql_injection_check=True,
 #     enable_xss_protection=True,
-#     log_validation_errors=True
+#     log_validation_errors=True,
+#     max_body_size=settings.MAX_INSPECTED_BODY_SIZE
 # )
 
 # CSRF protection middleware (must be before CORS for proper security)
@@ -176,6 +181,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*", "X-CSRF-Token"],  # Allow CSRF token header
+    expose_headers=["X-Next-Cursor"],  # Keyset pagination cursor
 )
 
 # Setup error handlers - TEMPORARILY DISABLED
@@ -315,6 +321,29 @@ async def startup_event():
         print(f"⚠️  Warning: Rate limiting initialization failed: {e}")
         print("   Application will continue without rate limiting")
     
+    try:
+        # Load the revoked-token filter before the first authenticated request
+        if settings.REVOCATION_CACHE_ENABLED:
+            from app.core.database import SessionLocal
+            from app.core.revocation_cache import get_revocation_cache
+            db = SessionLocal()
+            try:
+                get_revocation_cache().refresh(db, force=True)
+            finally:
+                db.close()
+            app_logger.info("Revoked-token filter loaded")
+    except Exception as e:
+        app_logger.warning(f"Revoked-token filter not preloaded: {e}")
+
+    try:
+        # Create the malware scanner (engine checks, ClamAV database version)
+        # before the first upload
+        from app.services.malware_scanner import MalwareScannerFactory
+        MalwareScannerFactory.get_scanner()
+        app_logger.info("Malware scanner initialized")
+    except Exception as e:
+        app_logger.warning(f"Malware scanner not preloaded: {e}")
+
     try:
         # Start performance monitoring if enabled
         if settings.ENABLE_PERFORMANCE_MONITORING:
@@ -365,7 +394,23 @@ async def shutdown_event():
         app_logger.info("Rate limiter connections closed")
     except Exception as e:
         app_logger.warning(f"Warning during rate limiter shutdown: {e}")
-    
+
+    try:
+        # Close pooled async database connections
+        from app.core.database import dispose_async_engine
+        await dispose_async_engine()
+        app_logger.info("Async database connections closed")
+    except Exception as e:
+        app_logger.warning(f"Warning during async database shutdown: {e}")
+
+    try:
+        # Stop malware scan worker processes
+        from app.services.scan_orchestrator import shutdown_scan_orchestrator
+        shutdown_scan_orchestrator()
+        app_logger.info("Scan worker pool stopped")
+    except Exception as e:
+        app_logger.warning(f"Warning during scan worker pool shutdown: {e}")
+
     try:
         # Stop performance monitoring
         if settings.ENABLE_PERFORMANCE_MONITORING:
@@ -14,13 +14,26 @@ Features:
 - Orphaned data detection
 - Financial calculation verification
 
+Execution:
+- All row-level checks of a table are compiled into a single scan of that
+  table, one conditional aggregate per check
+  (COUNT(*) FILTER (WHERE ...) where supported, SUM(CASE ...) elsewhere)
+- Independent tables are scanned in parallel, one connection each
+- Sampled validation scans a percentage of each table
+  (TABLESAMPLE SYSTEM on PostgreSQL, an id modulus elsewhere)
+- Incremental validation only scans rows added since the table's last
+  verified high-water mark (highest id of a full scan without errors)
+
 """
 
+import json
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from decimal import Decimal, InvalidOperation
 
@@ -67,6 +80,51 @@ class DataValidationReport:
     execution_time: float
     compliance_status: Dict[ComplianceStandard, bool]
     summary: Dict[ValidationSeverity, int]
+    incremental: bool = False
+    sample_percent: Optional[float] = None
+    high_water_marks: Dict[str, int] = field(default_factory=dict)
+
+@dataclass
+class ValidationCheck:
+    """
+    A row-level check, evaluated as one conditional aggregate in its table's scan.
+    
+    The condition is an SQL predicate over the scanned table (alias ``t``)
+    and its joins; rows matching it are issues.
+    """
+    column: Optional[str]
+    severity: ValidationSeverity
+    condition: str
+    message: str
+    recommendation: str
+    sample_columns: Optional[str] = None  # Columns of sample rows, fetched only if the check fails
+    sample_group_by: Optional[str] = None  # Group the sample rows by this expression
+
+@dataclass
+class SetValidationCheck:
+    """A check over sets of rows (duplicates, hierarchy) that needs its own query."""
+    column: Optional[str]
+    severity: ValidationSeverity
+    query: str  # Returns a single count
+    message: str
+    recommendation: str
+
+@dataclass
+class TableValidationSpec:
+    """All checks of one table."""
+    table: str
+    checks: List[ValidationCheck]
+    joins: str = ""
+    set_checks: List[SetValidationCheck] = field(default_factory=list)
+    missing_severity: Optional[ValidationSeverity] = None  # Report a missing table at this severity
+
+@dataclass
+class TableScanResult:
+    """Outcome of validating one table."""
+    table: str
+    issues: List[ValidationIssue]
+    records_checked: int
+    max_id: Optional[int] = None
 
 class FinancialDataValidator:
     """
@@ -76,50 +134,96 @@ class FinancialDataValidator:
     according to financial industry standards and regulations.
     """
     
-    def __init__(self, database_url: str):
-        """Initialize the financial data validator."""
+    # Dialects supporting the aggregate FILTER clause
+    FILTER_DIALECTS = ('postgresql', 'sqlite')
+    
+    def __init__(self, database_url: str, max_workers: int = 4, state_path: Optional[str] = None):
+        """
+        Initialize the financial data validator.
+        
+        Args:
+            database_url: Database to validate
+            max_workers: Tables scanned in parallel
+            state_path: JSON file holding verified high-water marks for incremental validation
+        """
         self.database_url = database_url
         self.engine = create_engine(database_url)
         self.issues: List[ValidationIssue] = []
+        self.max_workers = max_workers
+        self.state_path = Path(state_path or 'logs/migration_validation/high_water_marks.json')
         
         # Financial validation rules
         self.min_amount = Decimal('-999999999.99')  # Minimum valid amount
         self.max_amount = Decimal('999999999.99')   # Maximum valid amount
         self.valid_currencies = ['USD', 'EUR', 'GBP', 'CAD', 'AUD']  # Add as needed
-        
-    def validate_financial_data(self, scope: str = "full") -> DataValidationReport:
+        self.valid_sources = ['csv', 'quickbooks', 'xero', 'manual', 'api']
+        self.suspicious_patterns = [
+            ('test', 'Test transactions in production data'),
+            ('xxx', 'Placeholder transactions'),
+            ('temp', 'Temporary transactions'),
+        ]
+    
+    def validate_financial_data(
+        self,
+        scope: str = "full",
+        incremental: bool = False,
+        sample_percent: Optional[float] = None
+    ) -> DataValidationReport:
         """
         Perform comprehensive financial data validation.
         
         Args:
-            scope: Validation scope ("full", "transactions", "users", "categories")
-            
+            scope: Validation scope ("full", "transactions", "users", "categories", "rules")
+            incremental: Only validate rows added since each table's last verified high-water mark
+            sample_percent: Validate a sample of this percentage of each table (0-100)
+        
         Returns:
             DataValidationReport with all validation results
         """
         logger.info(f"Starting financial data validation: {scope}")
         start_time = time.time()
         
+        if sample_percent is not None and not 0 < sample_percent <= 100:
+            raise ValueError("sample_percent must be between 0 and 100")
+        
         self.issues = []
-        total_records = 0
         
         try:
-            if scope in ["full", "transactions"]:
-                total_records += self._validate_transactions()
-            
-            if scope in ["full", "users"]:
-                total_records += self._validate_users()
-            
-            if scope in ["full", "categories"]:
-                total_records += self._validate_categories()
+            database_name = self._get_database_name()
+            existing_tables = set(inspect(self.engine).get_table_names())
+            specs = self._table_specs(scope)
+            
+            high_water_marks = self._load_high_water_marks(database_name) if incremental else {}
+            
+            # Tables are independent: scan them in parallel
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(specs) or 1))) as executor:
+                results = list(executor.map(
+                    lambda spec: self._scan_table(
+                        spec,
+                        spec.table in existing_tables,
+                        high_water_marks.get(spec.table),
+                        sample_percent
+                    ),
+                    specs
+                ))
             
-            if scope in ["full", "rules"]:
-                total_records += self._validate_categorization_rules()
+            total_records = 0
+            verified_marks = {}
+            for result in results:
+                self.issues.extend(result.issues)
+                total_records += result.records_checked
+                if result.max_id is not None and sample_percent is None and not any(
+                    issue.severity in (ValidationSeverity.ERROR, ValidationSeverity.CRITICAL)
+                    for issue in result.issues
+                ):
+                    verified_marks[result.table] = result.max_id
             
             # Cross-table validation
             if scope == "full":
                 self._validate_referential_integrity()
-                self._validate_business_rules()
+            
+            if verified_marks:
+                self._save_high_water_marks(database_name, verified_marks)
             
             # Generate compliance status
             compliance_status = self._check_compliance_standards()
@@ -131,647 +235,449 @@ class FinancialDataValidator:
             
             report = DataValidationReport(
                 timestamp=datetime.now(timezone.utc),
-                database_name=self._get_database_name(),
+                database_name=database_name,
                 validation_scope=scope,
                 issues=self.issues,
                 total_records_checked=total_records,
                 execution_time=execution_time,
                 compliance_status=compliance_status,
-                summary=summary
+                summary=summary,
+                incremental=incremental,
+                sample_percent=sample_percent,
+                high_water_marks={**high_water_marks, **verified_marks}
             )
             
             logger.info(f"Financial data validation completed: {len(self.issues)} issues found")
             return report
-            
+        
         except Exception as e:
             logger.error(f"Financial data validation failed: {e}")
             raise
     
-    def _validate_transactions(self) -> int:
-        """Validate transaction data integrity."""
-        logger.info("Validating transaction data")
-        
-        with self.engine.connect() as conn:
-            # Check if transactions table exists
-            inspector = inspect(self.engine)
-            if 'transactions' not in inspector.get_table_names():
-                self.issues.append(ValidationIssue(
-                    table="transactions",
-                    column=None,
-                    severity=ValidationSeverity.ERROR,
-                    message="Transactions table does not exist",
-                    count=0,
-                    recommendation="Create transactions table before proceeding"
-                ))
-                return 0
-            
-            # Get total record count
-            result = conn.execute(text("SELECT COUNT(*) FROM transactions"))
-            total_count = result.scalar()
-            
-            # Validate transaction amounts
-            self._validate_transaction_amounts(conn)
-            
-            # Validate transaction dates
-            self._validate_transaction_dates(conn)
-            
-            # Validate transaction descriptions
-            self._validate_transaction_descriptions(conn)
-            
-            # Validate transaction categories
-            self._validate_transaction_categories(conn)
-            
-            # Validate transaction sources
-            self._validate_transaction_sources(conn)
-            
-            # Validate transaction user references
-            self._validate_transaction_user_references(conn)
-            
-            return total_count
-    
-    def _validate_transaction_amounts(self, conn):
-        """Validate transaction amount fields."""
-        # Check for NULL amounts
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM transactions WHERE amount IS NULL
-        """))
-        null_count = result.scalar()
-        
-        if null_count > 0:
-            self.issues.append(ValidationIssue(
-                table="transactions",
+    def _table_specs(self, scope: str) -> List[TableValidationSpec]:
+        """Table specifications to validate for a scope."""
+        specs = []
+        if scope in ["full", "transactions"]:
+            specs.append(self._transaction_spec(include_business_rules=scope == "full"))
+        if scope in ["full", "users"]:
+            specs.append(self._user_spec())
+        if scope in ["full", "categories"]:
+            specs.append(self._category_spec())
+        if scope in ["full", "rules"]:
+            specs.append(self._categorization_rule_spec())
+        return specs
+    
+    def _transaction_spec(self, include_business_rules: bool) -> TableValidationSpec:
+        """Transaction checks: amounts, dates, descriptions, categories, sources, user references."""
+        sources = ", ".join(f"'{source}'" for source in self.valid_sources)
+        checks = [
+            # Amounts
+            ValidationCheck(
                 column="amount",
                 severity=ValidationSeverity.CRITICAL,
+                condition="t.amount IS NULL",
                 message="Transactions with NULL amounts found",
-                count=null_count,
                 recommendation="All transactions must have valid amounts"
-            ))
-        
-        # Check for zero amounts
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM transactions WHERE amount = 0
-        """))
-        zero_count = result.scalar()
-        
-        if zero_count > 0:
-            self.issues.append(ValidationIssue(
-                table="transactions",
+            ),
+            ValidationCheck(
                 column="amount",
                 severity=ValidationSeverity.WARNING,
+                condition="t.amount = 0",
                 message="Transactions with zero amounts found",
-                count=zero_count,
                 recommendation="Review zero-amount transactions for validity"
-            ))
-        
-        # Check for extremely large amounts
-        result = conn.execute(text(f"""
-            SELECT COUNT(*) FROM transactions 
-            WHERE ABS(amount) > {self.max_amount}
-        """))
-        large_count = result.scalar()
-        
-        if large_count > 0:
-            # Get samples
-            sample_result = conn.execute(text(f"""
-                SELECT id, amount, description 
-                FROM transactions 
-                WHERE ABS(amount) > {self.max_amount}
-                LIMIT 5
-            """))
-            samples = [dict(row._mapping) for row in sample_result]
-            
-            self.issues.append(ValidationIssue(
-                table="transactions",
+            ),
+            ValidationCheck(
                 column="amount",
                 severity=ValidationSeverity.ERROR,
+                condition=f"ABS(t.amount) > {self.max_amount}",
                 message="Transactions with unusually large amounts found",
-                count=large_count,
-                sample_data=samples,
-                recommendation="Verify large amounts are legitimate"
-            ))
-        
-        # Check for precision issues (more than 2 decimal places)
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM transactions 
-            WHERE (amount * 100) != ROUND(amount * 100)
-        """))
-        precision_count = result.scalar()
-        
-        if precision_count > 0:
-            self.issues.append(ValidationIssue(
-                table="transactions",
+                recommendation="Verify large amounts are legitimate",
+                sample_columns="t.id, t.amount, t.description"
+            ),
+            ValidationCheck(
                 column="amount",
                 severity=ValidationSeverity.WARNING,
+                condition="(t.amount * 100) != ROUND(t.amount * 100)",
                 message="Transactions with more than 2 decimal places found",
-                count=precision_count,
                 recommendation="Financial amounts should have at most 2 decimal places"
-            ))
-    
-    def _validate_transaction_dates(self, conn):
-        """Validate transaction date fields."""
-        # Check for NULL dates
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM transactions WHERE date IS NULL
-        """))
-        null_count = result.scalar()
-        
-        if null_count > 0:
-            self.issues.append(ValidationIssue(
-                table="transactions",
+            ),
+            # Dates
+            ValidationCheck(
                 column="date",
                 severity=ValidationSeverity.CRITICAL,
+                condition="t.date IS NULL",
                 message="Transactions with NULL dates found",
-                count=null_count,
                 recommendation="All transactions must have valid dates"
-            ))
-        
-        # Check for future dates (more than 1 day in future)
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM transactions 
-            WHERE date > CURRENT_DATE + INTERVAL '1 day'
-        """))
-        future_count = result.scalar()
-        
-        if future_count > 0:
-            # Get samples
-            sample_result = conn.execute(text("""
-                SELECT id, date, description 
-                FROM transactions 
-                WHERE date > CURRENT_DATE + INTERVAL '1 day'
-                LIMIT 5
-            """))
-            samples = [dict(row._mapping) for row in sample_result]
-            
-            self.issues.append(ValidationIssue(
-                table="transactions",
+            ),
+            ValidationCheck(
                 column="date",
                 severity=ValidationSeverity.WARNING,
+                condition=f"t.date > {self._current_date('+1 day')}",
                 message="Transactions with future dates found",
-                count=future_count,
-                sample_data=samples,
-                recommendation="Review future-dated transactions for accuracy"
-            ))
-        
-        # Check for very old dates (more than 10 years ago)
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM transactions 
-            WHERE date < CURRENT_DATE - INTERVAL '10 years'
-        """))
-        old_count = result.scalar()
-        
-        if old_count > 0:
-            self.issues.append(ValidationIssue(
-                table="transactions",
+                recommendation="Review future-dated transactions for accuracy",
+                sample_columns="t.id, t.date, t.description"
+            ),
+            ValidationCheck(
                 column="date",
                 severity=ValidationSeverity.INFO,
+                condition=f"t.date < {self._current_date('-10 years')}",
                 message="Transactions older than 10 years found",
-                count=old_count,
                 recommendation="Consider archiving very old transactions"
-            ))
-    
-    def _validate_transaction_descriptions(self, conn):
-        """Validate transaction description fields."""
-        # Check for NULL descriptions
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM transactions WHERE description IS NULL
-        """))
-        null_count = result.scalar()
-        
-        if null_count > 0:
-            self.issues.append(ValidationIssue(
-                table="transactions",
+            ),
+            # Descriptions
+            ValidationCheck(
                 column="description",
                 severity=ValidationSeverity.ERROR,
+                condition="t.description IS NULL",
                 message="Transactions with NULL descriptions found",
-                count=null_count,
                 recommendation="All transactions should have descriptions"
-            ))
-        
-        # Check for empty descriptions
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM transactions 
-            WHERE description IS NOT NULL AND TRIM(description) = ''
-        """))
-        empty_count = result.scalar()
-        
-        if empty_count > 0:
-            self.issues.append(ValidationIssue(
-                table="transactions",
+            ),
+            ValidationCheck(
                 column="description",
                 severity=ValidationSeverity.WARNING,
+                condition="t.description IS NOT NULL AND TRIM(t.description) = ''",
                 message="Transactions with empty descriptions found",
-                count=empty_count,
                 recommendation="Transactions should have meaningful descriptions"
-            ))
-        
-        # Check for potentially suspicious patterns
-        suspicious_patterns = [
-            ('test', 'Test transactions in production data'),
-            ('xxx', 'Placeholder transactions'),
-            ('temp', 'Temporary transactions'),
+            ),
         ]
-        
-        for pattern, description in suspicious_patterns:
-            result = conn.execute(text(f"""
-                SELECT COUNT(*) FROM transactions 
-                WHERE LOWER(description) LIKE '%{pattern}%'
-            """))
-            count = result.scalar()
-            
-            if count > 0:
-                self.issues.append(ValidationIssue(
-                    table="transactions",
-                    column="description",
-                    severity=ValidationSeverity.WARNING,
-                    message=description,
-                    count=count,
-                    recommendation=f"Review transactions containing '{pattern}'"
-                ))
-    
-    def _validate_transaction_categories(self, conn):
-        """Validate transaction categorization."""
-        # Check categorization consistency
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM transactions 
-            WHERE is_categorized = true AND category IS NULL
-        """))
-        inconsistent_count = result.scalar()
-        
-        if inconsistent_count > 0:
-            self.issues.append(ValidationIssue(
-                table="transactions",
+        checks.extend(
+            ValidationCheck(
+                column="description",
+                severity=ValidationSeverity.WARNING,
+                condition=f"LOWER(t.description) LIKE '%{pattern}%'",
+                message=description,
+                recommendation=f"Review transactions containing '{pattern}'"
+            )
+            for pattern, description in self.suspicious_patterns
+        )
+        checks.extend([
+            # Categories
+            ValidationCheck(
                 column="category",
                 severity=ValidationSeverity.ERROR,
+                condition="t.is_categorized = true AND t.category IS NULL",
                 message="Transactions marked as categorized but missing category",
-                count=inconsistent_count,
                 recommendation="Fix categorization status or assign categories"
-            ))
-        
-        # Check for uncategorized transactions (if business rule requires categorization)
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM transactions 
-            WHERE is_categorized = false OR category IS NULL
-        """))
-        uncategorized_count = result.scalar()
-        
-        if uncategorized_count > 0:
-            self.issues.append(ValidationIssue(
-                table="transactions",
+            ),
+            ValidationCheck(
                 column="category",
                 severity=ValidationSeverity.INFO,
+                condition="t.is_categorized = false OR t.category IS NULL",
                 message="Uncategorized transactions found",
-                count=uncategorized_count,
                 recommendation="Consider implementing automated categorization"
-            ))
-    
-    def _validate_transaction_sources(self, conn):
-        """Validate transaction source fields."""
-        # Check for valid sources
-        valid_sources = ['csv', 'quickbooks', 'xero', 'manual', 'api']
-        
-        result = conn.execute(text(f"""
-            SELECT COUNT(*) FROM transactions 
-            WHERE source NOT IN ({','.join([f"'{s}'" for s in valid_sources])})
-        """))
-        invalid_source_count = result.scalar()
-        
-        if invalid_source_count > 0:
-            # Get samples
-            sample_result = conn.execute(text(f"""
-                SELECT DISTINCT source, COUNT(*) as count
-                FROM transactions 
-                WHERE source NOT IN ({','.join([f"'{s}'" for s in valid_sources])})
-                GROUP BY source
-                LIMIT 5
-            """))
-            samples = [dict(row._mapping) for row in sample_result]
-            
-            self.issues.append(ValidationIssue(
-                table="transactions",
+            ),
+            # Sources
+            ValidationCheck(
                 column="source",
                 severity=ValidationSeverity.WARNING,
+                condition=f"t.source NOT IN ({sources})",
                 message="Transactions with invalid source values found",
-                count=invalid_source_count,
-                sample_data=samples,
-                recommendation="Use standardized source values"
-            ))
-    
-    def _validate_transaction_user_references(self, conn):
-        """Validate transaction user references."""
-        # Check for orphaned transactions
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM transactions t
-            LEFT JOIN users u ON t.user_id = u.id
-            WHERE u.id IS NULL
-        """))
-        orphaned_count = result.scalar()
-        
-        if orphaned_count > 0:
-            self.issues.append(ValidationIssue(
-                table="transactions",
+                recommendation="Use standardized source values",
+                sample_columns="t.source, COUNT(*) AS count",
+                sample_group_by="t.source"
+            ),
+            # User references (orphaned transactions)
+            ValidationCheck(
                 column="user_id",
                 severity=ValidationSeverity.CRITICAL,
+                condition="u.id IS NULL",
                 message="Orphaned transactions found (no matching user)",
-                count=orphaned_count,
                 recommendation="Fix user references or remove orphaned transactions"
-            ))
-    
-    def _validate_users(self) -> int:
-        """Validate user data integrity."""
-        logger.info("Validating user data")
+            ),
+        ])
         
-        with self.engine.connect() as conn:
-            # Check if users table exists
-            inspector = inspect(self.engine)
-            if 'users' not in inspector.get_table_names():
-                self.issues.append(ValidationIssue(
-                    table="users",
-                    column=None,
+        if include_business_rules:
+            checks.extend([
+                ValidationCheck(
+                    column="amount",
+                    severity=ValidationSeverity.WARNING,
+                    condition="t.is_income = true AND t.amount < 0",
+                    message="Income transactions with negative amounts found",
+                    recommendation="Review income transactions - amounts should typically be positive"
+                ),
+                ValidationCheck(
+                    column="amount",
+                    severity=ValidationSeverity.INFO,
+                    condition="t.is_income = false AND t.amount > 0",
+                    message="Expense transactions with positive amounts found",
+                    recommendation="Verify expense transaction amounts - consider using negative values"
+                ),
+            ])
+        
+        return TableValidationSpec(
+            table="transactions",
+            checks=checks,
+            joins="LEFT JOIN users u ON t.user_id = u.id",
+            missing_severity=ValidationSeverity.ERROR
+        )
+    
+    def _user_spec(self) -> TableValidationSpec:
+        """User checks: emails, status, authentication data."""
+        return TableValidationSpec(
+            table="users",
+            checks=[
+                ValidationCheck(
+                    column="email",
+                    severity=ValidationSeverity.CRITICAL,
+                    condition="t.email IS NULL",
+                    message="Users with NULL email addresses found",
+                    recommendation="All users must have valid email addresses"
+                ),
+                ValidationCheck(
+                    column="email",
                     severity=ValidationSeverity.ERROR,
-                    message="Users table does not exist",
-                    count=0,
-                    recommendation="Create users table before proceeding"
-                ))
-                return 0
-            
-            # Get total record count
-            result = conn.execute(text("SELECT COUNT(*) FROM users"))
-            total_count = result.scalar()
-            
-            # Validate email addresses
-            self._validate_user_emails(conn)
-            
-            # Validate user status
-            self._validate_user_status(conn)
-            
-            # Validate user authentication data
-            self._validate_user_auth_data(conn)
-            
-            return total_count
-    
-    def _validate_user_emails(self, conn):
-        """Validate user email addresses."""
-        # Check for NULL emails
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM users WHERE email IS NULL
-        """))
-        null_count = result.scalar()
-        
-        if null_count > 0:
-            self.issues.append(ValidationIssue(
-                table="users",
-                column="email",
-                severity=ValidationSeverity.CRITICAL,
-                message="Users with NULL email addresses found",
-                count=null_count,
-                recommendation="All users must have valid email addresses"
-            ))
-        
-        # Check for duplicate emails
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM (
-                SELECT email FROM users 
-                WHERE email IS NOT NULL
-                GROUP BY email 
-                HAVING COUNT(*) > 1
-            ) duplicates
-        """))
-        duplicate_count = result.scalar()
-        
-        if duplicate_count > 0:
-            self.issues.append(ValidationIssue(
-                table="users",
-                column="email",
-                severity=ValidationSeverity.CRITICAL,
-                message="Duplicate email addresses found",
-                count=duplicate_count,
-                recommendation="Email addresses must be unique"
-            ))
-        
-        # Check for invalid email formats (basic check)
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM users 
-            WHERE email IS NOT NULL 
-            AND email NOT LIKE '%_@_%.__%'
-        """))
-        invalid_format_count = result.scalar()
-        
-        if invalid_format_count > 0:
-            self.issues.append(ValidationIssue(
-                table="users",
-                column="email",
-                severity=ValidationSeverity.ERROR,
-                message="Users with invalid email formats found",
-                count=invalid_format_count,
-                recommendation="Validate and fix email address formats"
-            ))
-    
-    def _validate_user_status(self, conn):
-        """Validate user status fields."""
-        # Check for users without proper status
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM users 
-            WHERE is_active IS NULL
-        """))
-        null_status_count = result.scalar()
-        
-        if null_status_count > 0:
-            self.issues.append(ValidationIssue(
-                table="users",
-                column="is_active",
-                severity=ValidationSeverity.WARNING,
-                message="Users with NULL active status found",
-                count=null_status_count,
-                recommendation="All users should have defined active status"
-            ))
-    
-    def _validate_user_auth_data(self, conn):
-        """Validate user authentication data."""
-        # Check for users without hashed passwords
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM users 
-            WHERE hashed_password IS NULL OR hashed_password = ''
-        """))
-        no_password_count = result.scalar()
-        
-        if no_password_count > 0:
-            self.issues.append(ValidationIssue(
-                table="users",
-                column="hashed_password",
-                severity=ValidationSeverity.CRITICAL,
-                message="Users without hashed passwords found",
-                count=no_password_count,
-                recommendation="All users must have secure password hashes"
-            ))
-    
-    def _validate_categories(self) -> int:
-        """Validate category data integrity."""
-        logger.info("Validating category data")
+                    condition="t.email IS NOT NULL AND t.email NOT LIKE '%_@_%.__%'",
+                    message="Users with invalid email formats found",
+                    recommendation="Validate and fix email address formats"
+                ),
+                ValidationCheck(
+                    column="is_active",
+                    severity=ValidationSeverity.WARNING,
+                    condition="t.is_active IS NULL",
+                    message="Users with NULL active status found",
+                    recommendation="All users should have defined active status"
+                ),
+                ValidationCheck(
+                    column="hashed_password",
+                    severity=ValidationSeverity.CRITICAL,
+                    condition="t.hashed_password IS NULL OR t.hashed_password = ''",
+                    message="Users without hashed passwords found",
+                    recommendation="All users must have secure password hashes"
+                ),
+            ],
+            set_checks=[
+                SetValidationCheck(
+                    column="email",
+                    severity=ValidationSeverity.CRITICAL,
+                    query="""
+                        SELECT COUNT(*) FROM (
+                            SELECT email FROM users
+                            WHERE email IS NOT NULL
+                            GROUP BY email
+                            HAVING COUNT(*) > 1
+                        ) duplicates
+                    """,
+                    message="Duplicate email addresses found",
+                    recommendation="Email addresses must be unique"
+                ),
+            ],
+            missing_severity=ValidationSeverity.ERROR
+        )
+    
+    def _category_spec(self) -> TableValidationSpec:
+        """Category checks: names and hierarchy."""
+        return TableValidationSpec(
+            table="categories",
+            checks=[
+                ValidationCheck(
+                    column="name",
+                    severity=ValidationSeverity.ERROR,
+                    condition="t.name IS NULL",
+                    message="Categories with NULL names found",
+                    recommendation="All categories must have valid names"
+                ),
+            ],
+            set_checks=[
+                SetValidationCheck(
+                    column="name",
+                    severity=ValidationSeverity.WARNING,
+                    query="""
+                        SELECT COUNT(*) FROM (
+                            SELECT user_id, name FROM categories
+                            WHERE name IS NOT NULL
+                            GROUP BY user_id, name
+                            HAVING COUNT(*) > 1
+                        ) duplicates
+                    """,
+                    message="Duplicate category names per user found",
+                    recommendation="Category names should be unique per user"
+                ),
+                # This is a simplified check - you might want more sophisticated cycle detection
+                SetValidationCheck(
+                    column="parent_category",
+                    severity=ValidationSeverity.ERROR,
+                    query="""
+                        SELECT COUNT(*) FROM categories c1
+                        JOIN categories c2 ON c1.parent_category = c2.name AND c1.user_id = c2.user_id
+                        WHERE c2.parent_category = c1.name
+                    """,
+                    message="Circular references in category hierarchy found",
+                    recommendation="Fix category hierarchy to prevent circular references"
+                ),
+            ]
+        )
+    
+    def _categorization_rule_spec(self) -> TableValidationSpec:
+        """Categorization rule checks: patterns."""
+        return TableValidationSpec(
+            table="categorization_rules",
+            checks=[
+                ValidationCheck(
+                    column="pattern",
+                    severity=ValidationSeverity.ERROR,
+                    condition="t.pattern IS NULL OR TRIM(t.pattern) = ''",
+                    message="Categorization rules with empty patterns found",
+                    recommendation="All categorization rules must have valid patterns"
+                ),
+            ]
+        )
+    
+    def _count_where(self, condition: str) -> str:
+        """Conditional count aggregate for the engine's dialect."""
+        if self.engine.dialect.name in self.FILTER_DIALECTS:
+            return f"COUNT(*) FILTER (WHERE {condition})"
+        return f"COALESCE(SUM(CASE WHEN {condition} THEN 1 ELSE 0 END), 0)"
+    
+    def _current_date(self, offset: str) -> str:
+        """Today shifted by a signed offset such as '+1 day', for the engine's dialect."""
+        if self.engine.dialect.name == 'sqlite':
+            return f"DATE('now', '{offset}')"
+        return f"CURRENT_DATE {offset[0]} INTERVAL '{offset[1:]}'"
+    
+    def _scan_filter(
+        self,
+        since_id: Optional[int],
+        sample_percent: Optional[float]
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        """Sampling clause, WHERE conditions and parameters shared by a table's queries."""
+        tablesample = ""
+        conditions = []
+        params: Dict[str, Any] = {}
+        if since_id is not None:
+            conditions.append("t.id > :since_id")
+            params["since_id"] = since_id
+        if sample_percent is not None and sample_percent < 100:
+            if self.engine.dialect.name == 'postgresql':
+                tablesample = f" TABLESAMPLE SYSTEM ({float(sample_percent)})"
+            else:
+                conditions.append("t.id % :sample_modulus = 0")
+                params["sample_modulus"] = max(1, round(100 / sample_percent))
+        return tablesample, " AND ".join(conditions), params
+    
+    def _scan_table(
+        self,
+        spec: TableValidationSpec,
+        exists: bool,
+        since_id: Optional[int] = None,
+        sample_percent: Optional[float] = None
+    ) -> TableScanResult:
+        """
+        Validate one table: a single scan for all row checks, then set checks.
         
-        with self.engine.connect() as conn:
-            # Check if categories table exists
-            inspector = inspect(self.engine)
-            if 'categories' not in inspector.get_table_names():
-                # This might be acceptable if categories are stored differently
-                return 0
-            
-            # Get total record count
-            result = conn.execute(text("SELECT COUNT(*) FROM categories"))
-            total_count = result.scalar()
-            
-            # Validate category names
-            self._validate_category_names(conn)
-            
-            # Validate category hierarchy
-            self._validate_category_hierarchy(conn)
-            
-            return total_count
-    
-    def _validate_category_names(self, conn):
-        """Validate category names."""
-        # Check for NULL category names
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM categories WHERE name IS NULL
-        """))
-        null_count = result.scalar()
+        Args:
+            spec: Table checks
+            exists: Whether the table exists
+            since_id: Only scan rows with a higher id (incremental validation)
+            sample_percent: Only scan this percentage of the table
         
-        if null_count > 0:
-            self.issues.append(ValidationIssue(
-                table="categories",
-                column="name",
-                severity=ValidationSeverity.ERROR,
-                message="Categories with NULL names found",
-                count=null_count,
-                recommendation="All categories must have valid names"
-            ))
+        Returns:
+            TableScanResult with the table's issues
+        """
+        logger.info(f"Validating {spec.table} data")
         
-        # Check for duplicate category names per user
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM (
-                SELECT user_id, name FROM categories 
-                WHERE name IS NOT NULL
-                GROUP BY user_id, name 
-                HAVING COUNT(*) > 1
-            ) duplicates
-        """))
-        duplicate_count = result.scalar()
+        if not exists:
+            issues = []
+            if spec.missing_severity is not None:
+                issues.append(ValidationIssue(
+                    table=spec.table,
+                    column=None,
+                    severity=spec.missing_severity,
+                    message=f"{spec.table.capitalize()} table does not exist",
+                    count=0,
+                    recommendation=f"Create {spec.table} table before proceeding"
+                ))
+            return TableScanResult(table=spec.table, issues=issues, records_checked=0)
         
-        if duplicate_count > 0:
-            self.issues.append(ValidationIssue(
-                table="categories",
-                column="name",
-                severity=ValidationSeverity.WARNING,
-                message="Duplicate category names per user found",
-                count=duplicate_count,
-                recommendation="Category names should be unique per user"
-            ))
-    
-    def _validate_category_hierarchy(self, conn):
-        """Validate category hierarchy."""
-        # Check for circular references in parent categories
-        # This is a simplified check - you might want more sophisticated cycle detection
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM categories c1
-            JOIN categories c2 ON c1.parent_category = c2.name AND c1.user_id = c2.user_id
-            WHERE c2.parent_category = c1.name
-        """))
-        circular_count = result.scalar()
+        tablesample, where, params = self._scan_filter(since_id, sample_percent)
+        source = f"{spec.table} t{tablesample} {spec.joins}".rstrip()
+        where_clause = f" WHERE {where}" if where else ""
         
-        if circular_count > 0:
-            self.issues.append(ValidationIssue(
-                table="categories",
-                column="parent_category",
-                severity=ValidationSeverity.ERROR,
-                message="Circular references in category hierarchy found",
-                count=circular_count,
-                recommendation="Fix category hierarchy to prevent circular references"
-            ))
-    
-    def _validate_categorization_rules(self) -> int:
-        """Validate categorization rules."""
-        logger.info("Validating categorization rules")
+        aggregates = ["COUNT(*) AS total_rows", "MAX(t.id) AS max_id"]
+        aggregates.extend(
+            f"{self._count_where(check.condition)} AS check_{index}"
+            for index, check in enumerate(spec.checks)
+        )
         
+        issues = []
         with self.engine.connect() as conn:
-            # Check if categorization_rules table exists
-            inspector = inspect(self.engine)
-            if 'categorization_rules' not in inspector.get_table_names():
-                return 0
-            
-            # Get total record count
-            result = conn.execute(text("SELECT COUNT(*) FROM categorization_rules"))
-            total_count = result.scalar()
-            
-            # Validate rule patterns
-            self._validate_rule_patterns(conn)
+            row = conn.execute(
+                text(f"SELECT {', '.join(aggregates)} FROM {source}{where_clause}"),
+                params
+            ).one()
+            
+            for index, check in enumerate(spec.checks):
+                count = row[2 + index] or 0
+                if count <= 0:
+                    continue
+                
+                samples = None
+                if check.sample_columns:
+                    sample_where = f"({check.condition})" + (f" AND {where}" if where else "")
+                    group_by = f" GROUP BY {check.sample_group_by}" if check.sample_group_by else ""
+                    sample_result = conn.execute(
+                        text(f"SELECT {check.sample_columns} FROM {source} WHERE {sample_where}{group_by} LIMIT 5"),
+                        params
+                    )
+                    samples = [dict(sample._mapping) for sample in sample_result]
+                
+                issues.append(ValidationIssue(
+                    table=spec.table,
+                    column=check.column,
+                    severity=check.severity,
+                    message=check.message,
+                    count=count,
+                    sample_data=samples,
+                    recommendation=check.recommendation
+                ))
             
-            return total_count
+            # Set checks compare rows with each other: always over the whole table
+            for set_check in spec.set_checks:
+                count = conn.execute(text(set_check.query)).scalar() or 0
+                if count > 0:
+                    issues.append(ValidationIssue(
+                        table=spec.table,
+                        column=set_check.column,
+                        severity=set_check.severity,
+                        message=set_check.message,
+                        count=count,
+                        recommendation=set_check.recommendation
+                    ))
+        
+        return TableScanResult(
+            table=spec.table,
+            issues=issues,
+            records_checked=row.total_rows or 0,
+            max_id=row.max_id if row.max_id is not None else since_id
+        )
+    
+    def _load_high_water_marks(self, database_name: str) -> Dict[str, int]:
+        """Verified high-water marks of a database."""
+        try:
+            state = json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return {table: int(mark) for table, mark in state.get(database_name, {}).items()}
     
-    def _validate_rule_patterns(self, conn):
-        """Validate categorization rule patterns."""
-        # Check for empty patterns
-        result = conn.execute(text("""
-            SELECT COUNT(*) FROM categorization_rules 
-            WHERE pattern IS NULL OR TRIM(pattern) = ''
-        """))
-        empty_pattern_count = result.scalar()
-        
-        if empty_pattern_count > 0:
-            self.issues.append(ValidationIssue(
-                table="categorization_rules",
-                column="pattern",
-                severity=ValidationSeverity.ERROR,
-                message="Categorization rules with empty patterns found",
-                count=empty_pattern_count,
-                recommendation="All categorization rules must have valid patterns"
-            ))
+    def _save_high_water_marks(self, database_name: str, marks: Dict[str, int]):
+        """Record verified high-water marks of a database."""
+        try:
+            try:
+                state = json.loads(self.state_path.read_text())
+            except (OSError, ValueError):
+                state = {}
+            state.setdefault(database_name, {}).update(marks)
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            self.state_path.write_text(json.dumps(state, indent=2, sort_keys=True))
+        except OSError as e:
+            logger.warning(f"Could not save validation high-water marks: {e}")
     
     def _validate_referential_integrity(self):
         """Validate referential integrity across tables."""
         logger.info("Validating referential integrity")
         
-        with self.engine.connect() as conn:
-            # Already checked transaction-user integrity in transaction validation
-            pass
-    
-    def _validate_business_rules(self):
-        """Validate business-specific rules."""
-        logger.info("Validating business rules")
-        
-        with self.engine.connect() as conn:
-            # Check for income transactions with negative amounts
-            result = conn.execute(text("""
-                SELECT COUNT(*) FROM transactions 
-                WHERE is_income = true AND amount < 0
-            """))
-            negative_income_count = result.scalar()
-            
-            if negative_income_count > 0:
-                self.issues.append(ValidationIssue(
-                    table="transactions",
-                    column="amount",
-                    severity=ValidationSeverity.WARNING,
-                    message="Income transactions with negative amounts found",
-                    count=negative_income_count,
-                    recommendation="Review income transactions - amounts should typically be positive"
-                ))
-            
-            # Check for expense transactions with positive amounts
-            result = conn.execute(text("""
-                SELECT COUNT(*) FROM transactions 
-                WHERE is_income = false AND amount > 0
-            """))
-            positive_expense_count = result.scalar()
-            
-            if positive_expense_count > 0:
-                self.issues.append(ValidationIssue(
-                    table="transactions",
-                    column="amount",
-                    severity=ValidationSeverity.INFO,
-                    message="Expense transactions with positive amounts found",
-                    count=positive_expense_count,
-                    recommendation="Verify expense transaction amounts - consider using negative values"
-                ))
-    
+        # Transaction-user integrity is part of the transaction scan
+        pass
+
     def _check_compliance_standards(self) -> Dict[ComplianceStandard, bool]:
         """Check compliance with financial standards."""
         compliance_status = {}
@@ -851,6 +757,10 @@ def format_validation_report(report: DataValidationReport) -> str:
     output.append(f"Database: {report.database_name}")
     output.append(f"Scope: {report.validation_scope}")
     output.append(f"Timestamp: {report.timestamp.isoformat()}")
+    if report.incremental:
+        output.append(f"Mode: incremental (rows above verified high-water marks)")
+    if report.sample_percent is not None:
+        output.append(f"Sample: {report.sample_percent:g}% of rows")
     output.append("=" * 80)
     
     # Summary
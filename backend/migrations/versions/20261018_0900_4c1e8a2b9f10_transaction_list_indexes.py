@@ -0,0 +1,122 @@
+"""transaction_list_indexes
+
+Revision ID: 4c1e8a2b9f10
+Revises: d7a37370ef38
+Create Date: 2026-10-18 09:00:00.000000+00:00
+
+FINANCIAL SAFETY NOTICE:
+This migration affects financial data. Ensure proper backup and testing procedures
+are followed before applying to production. All changes must be reversible.
+
+ROLLBACK STRATEGY:
+- Test rollback procedures in staging environment
+- Verify data integrity after rollback
+- Document any manual steps required for rollback
+
+Adds composite indexes backing keyset pagination of the transaction list and
+its most common filters. Indexes are built CONCURRENTLY on PostgreSQL so the
+transactions table stays writable; rollback only drops indexes.
+
+"""
+from typing import Sequence, Union
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1e8a2b9f10'
+down_revision: Union[str, None] = 'd7a37370ef38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Configure logging for this migration
+logger = logging.getLogger(__name__)
+
+# (name, columns) - must match Transaction.__table_args__
+TRANSACTION_INDEXES = [
+    ('idx_transactions_user_date_id', ['user_id', sa.text('date DESC'), 'id']),
+    ('idx_transactions_user_categorized', ['user_id', 'is_categorized']),
+    ('idx_transactions_user_batch', ['user_id', 'import_batch']),
+    ('idx_transactions_user_category_date', ['user_id', 'category', 'date']),
+]
+
+
+def validate_data_integrity() -> bool:
+    """
+    Validate financial data integrity before and after migration.
+    Index changes do not modify rows; only check the table is reachable.
+    """
+    try:
+        op.get_bind().execute(sa.text("SELECT 1 FROM transactions LIMIT 1"))
+        logger.info("Data integrity validation passed")
+        return True
+    except Exception as e:
+        logger.error(f"Data integrity validation failed: {e}")
+        return False
+
+
+def upgrade() -> None:
+    """Apply the migration changes."""
+    logger.info(f"Starting migration upgrade: transaction_list_indexes")
+
+    try:
+        # Validate data integrity before migration
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-migration data integrity check failed")
+
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, columns in TRANSACTION_INDEXES:
+                op.create_index(
+                    name, 'transactions', columns,
+                    unique=False,
+                    if_not_exists=True,
+                    postgresql_concurrently=True
+                )
+
+        # Validate data integrity after migration
+        if not validate_data_integrity():
+            raise RuntimeError("Post-migration data integrity check failed")
+
+        logger.info(f"Migration upgrade completed successfully: transaction_list_indexes")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration upgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration upgrade: {e}")
+        raise
+
+
+def downgrade() -> None:
+    """Rollback the migration changes."""
+    logger.info(f"Starting migration downgrade: transaction_list_indexes")
+
+    try:
+        # Validate data integrity before rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-rollback data integrity check failed")
+
+        with op.get_context().autocommit_block():
+            for name, _ in reversed(TRANSACTION_INDEXES):
+                op.drop_index(
+                    name, table_name='transactions',
+                    if_exists=True,
+                    postgresql_concurrently=True
+                )
+
+        # Validate data integrity after rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Post-rollback data integrity check failed")
+
+        logger.info(f"Migration downgrade completed successfully: transaction_list_indexes")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration downgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration downgrade: {e}")
+        raise
@@ -0,0 +1,128 @@
+"""transaction_search_indexes
+
+Revision ID: 9b7d3f6e2a41
+Revises: 4c1e8a2b9f10
+Create Date: 2026-10-18 11:00:00.000000+00:00
+
+FINANCIAL SAFETY NOTICE:
+This migration affects financial data. Ensure proper backup and testing procedures
+are followed before applying to production. All changes must be reversible.
+
+ROLLBACK STRATEGY:
+- Test rollback procedures in staging environment
+- Verify data integrity after rollback
+- Document any manual steps required for rollback
+
+Adds pg_trgm GIN indexes on transactions.description and vendor so
+ILIKE '%term%' filters and similarity search stop scanning every row.
+PostgreSQL only (SQLite builds its FTS5 table at runtime). Indexes are built
+CONCURRENTLY; rollback drops them and leaves the pg_trgm extension installed.
+
+"""
+from typing import Sequence, Union
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b7d3f6e2a41'
+down_revision: Union[str, None] = '4c1e8a2b9f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Configure logging for this migration
+logger = logging.getLogger(__name__)
+
+# (name, column) - must match Transaction.__table_args__
+TRIGRAM_INDEXES = [
+    ('idx_transactions_description_trgm', 'description'),
+    ('idx_transactions_vendor_trgm', 'vendor'),
+]
+
+
+def validate_data_integrity() -> bool:
+    """
+    Validate financial data integrity before and after migration.
+    Index changes do not modify rows; only check the table is reachable.
+    """
+    try:
+        op.get_bind().execute(sa.text("SELECT 1 FROM transactions LIMIT 1"))
+        logger.info("Data integrity validation passed")
+        return True
+    except Exception as e:
+        logger.error(f"Data integrity validation failed: {e}")
+        return False
+
+
+def upgrade() -> None:
+    """Apply the migration changes."""
+    logger.info(f"Starting migration upgrade: transaction_search_indexes")
+
+    try:
+        # Validate data integrity before migration
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-migration data integrity check failed")
+
+        if op.get_bind().dialect.name != 'postgresql':
+            logger.info("Trigram indexes are PostgreSQL-only; skipping")
+        else:
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+            with op.get_context().autocommit_block():
+                for name, column in TRIGRAM_INDEXES:
+                    op.create_index(
+                        name, 'transactions', [column],
+                        unique=False,
+                        if_not_exists=True,
+                        postgresql_using='gin',
+                        postgresql_ops={column: 'gin_trgm_ops'},
+                        postgresql_concurrently=True
+                    )
+
+        # Validate data integrity after migration
+        if not validate_data_integrity():
+            raise RuntimeError("Post-migration data integrity check failed")
+
+        logger.info(f"Migration upgrade completed successfully: transaction_search_indexes")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration upgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration upgrade: {e}")
+        raise
+
+
+def downgrade() -> None:
+    """Rollback the migration changes."""
+    logger.info(f"Starting migration downgrade: transaction_search_indexes")
+
+    try:
+        # Validate data integrity before rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-rollback data integrity check failed")
+
+        if op.get_bind().dialect.name == 'postgresql':
+            with op.get_context().autocommit_block():
+                for name, _ in reversed(TRIGRAM_INDEXES):
+                    op.drop_index(
+                        name, table_name='transactions',
+                        if_exists=True,
+                        postgresql_concurrently=True
+                    )
+
+        # Validate data integrity after rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Post-rollback data integrity check failed")
+
+        logger.info(f"Migration downgrade completed successfully: transaction_search_indexes")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration downgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration downgrade: {e}")
+        raise
@@ -0,0 +1,159 @@
+"""import_batches
+
+Revision ID: 5e2f9c7a1d38
+Revises: 9b7d3f6e2a41
+Create Date: 2026-10-18 13:00:00.000000+00:00
+
+FINANCIAL SAFETY NOTICE:
+This migration affects financial data. Ensure proper backup and testing procedures
+are followed before applying to production. All changes must be reversible.
+
+ROLLBACK STRATEGY:
+- Test rollback procedures in staging environment
+- Verify data integrity after rollback
+- Document any manual steps required for rollback
+
+Adds the import_batches table (one row per imported file with its
+transaction aggregates) and backfills it from existing transactions.
+Transactions are not modified; rollback drops the table.
+
+"""
+from typing import Sequence, Union
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2f9c7a1d38'
+down_revision: Union[str, None] = '9b7d3f6e2a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Configure logging for this migration
+logger = logging.getLogger(__name__)
+
+BACKFILL_SQL = """
+INSERT INTO import_batches (
+    user_id, batch_id, filename, file_hash, source, status,
+    transaction_count, rejected_count, total_amount,
+    first_transaction_date, last_transaction_date, created_at
+)
+SELECT
+    user_id,
+    import_batch,
+    MIN({filename}),
+    CASE WHEN LENGTH(import_batch) = 64 THEN import_batch END,
+    MIN(source),
+    'completed',
+    COUNT(*),
+    0,
+    COALESCE(SUM(amount), 0),
+    MIN(date),
+    MAX(date),
+    MIN(created_at)
+FROM transactions
+WHERE import_batch IS NOT NULL
+GROUP BY user_id, import_batch
+"""
+
+
+def validate_data_integrity() -> bool:
+    """
+    Validate financial data integrity before and after migration.
+    Transactions are only read; check the table is reachable.
+    """
+    try:
+        op.get_bind().execute(sa.text("SELECT 1 FROM transactions LIMIT 1"))
+        logger.info("Data integrity validation passed")
+        return True
+    except Exception as e:
+        logger.error(f"Data integrity validation failed: {e}")
+        return False
+
+
+def upgrade() -> None:
+    """Apply the migration changes."""
+    logger.info(f"Starting migration upgrade: import_batches")
+
+    try:
+        # Validate data integrity before migration
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-migration data integrity check failed")
+
+        op.create_table(
+            'import_batches',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('batch_id', sa.String(length=100), nullable=False),
+            sa.Column('filename', sa.String(length=255), nullable=True),
+            sa.Column('file_hash', sa.String(length=64), nullable=True),
+            sa.Column('source', sa.String(length=50), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('transaction_count', sa.Integer(), nullable=False),
+            sa.Column('rejected_count', sa.Integer(), nullable=False),
+            sa.Column('total_amount', sa.Float(), nullable=False),
+            sa.Column('first_transaction_date', sa.DateTime(), nullable=True),
+            sa.Column('last_transaction_date', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'batch_id', name='uq_import_batches_user_batch')
+        )
+        op.create_index(op.f('ix_import_batches_id'), 'import_batches', ['id'], unique=False)
+        op.create_index(
+            'idx_import_batches_user_created', 'import_batches',
+            ['user_id', sa.text('created_at DESC')], unique=False
+        )
+
+        # Backfill one row per existing batch
+        bind = op.get_bind()
+        if bind.dialect.name == 'postgresql':
+            filename = "meta_data->>'filename'"
+        else:
+            filename = "json_extract(meta_data, '$.filename')"
+        result = bind.execute(sa.text(BACKFILL_SQL.format(filename=filename)))
+        logger.info(f"Backfilled {result.rowcount} import batches")
+
+        # Validate data integrity after migration
+        if not validate_data_integrity():
+            raise RuntimeError("Post-migration data integrity check failed")
+
+        logger.info(f"Migration upgrade completed successfully: import_batches")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration upgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration upgrade: {e}")
+        raise
+
+
+def downgrade() -> None:
+    """Rollback the migration changes."""
+    logger.info(f"Starting migration downgrade: import_batches")
+
+    try:
+        # Validate data integrity before rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-rollback data integrity check failed")
+
+        op.drop_index('idx_import_batches_user_created', table_name='import_batches')
+        op.drop_index(op.f('ix_import_batches_id'), table_name='import_batches')
+        op.drop_table('import_batches')
+
+        # Validate data integrity after rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Post-rollback data integrity check failed")
+
+        logger.info(f"Migration downgrade completed successfully: import_batches")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration downgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration downgrade: {e}")
+        raise
@@ -0,0 +1,120 @@
+"""bulk_operation_journal
+
+Revision ID: 8a4d6b2c0e57
+Revises: 5e2f9c7a1d38
+Create Date: 2026-10-18 15:00:00.000000+00:00
+
+FINANCIAL SAFETY NOTICE:
+This migration affects financial data. Ensure proper backup and testing procedures
+are followed before applying to production. All changes must be reversible.
+
+ROLLBACK STRATEGY:
+- Test rollback procedures in staging environment
+- Verify data integrity after rollback
+- Document any manual steps required for rollback
+
+Adds the bulk_operation_journal table holding the before-images of bulk
+transaction operations for undo. Transactions are not modified; rollback
+drops the table (pending undo history is lost).
+
+"""
+from typing import Sequence, Union
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4d6b2c0e57'
+down_revision: Union[str, None] = '5e2f9c7a1d38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Configure logging for this migration
+logger = logging.getLogger(__name__)
+
+
+def validate_data_integrity() -> bool:
+    """
+    Validate financial data integrity before and after migration.
+    Transactions are not touched; check the table is reachable.
+    """
+    try:
+        op.get_bind().execute(sa.text("SELECT 1 FROM transactions LIMIT 1"))
+        logger.info("Data integrity validation passed")
+        return True
+    except Exception as e:
+        logger.error(f"Data integrity validation failed: {e}")
+        return False
+
+
+def upgrade() -> None:
+    """Apply the migration changes."""
+    logger.info(f"Starting migration upgrade: bulk_operation_journal")
+
+    try:
+        # Validate data integrity before migration
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-migration data integrity check failed")
+
+        op.create_table(
+            'bulk_operation_journal',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('operation_id', sa.String(length=100), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('operation_type', sa.String(length=50), nullable=False),
+            sa.Column('transaction_count', sa.Integer(), nullable=False),
+            sa.Column('before_images', sa.JSON(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('undone_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('operation_id')
+        )
+        op.create_index(op.f('ix_bulk_operation_journal_id'), 'bulk_operation_journal', ['id'], unique=False)
+        op.create_index(
+            'idx_bulk_operation_journal_user_created', 'bulk_operation_journal',
+            ['user_id', 'created_at'], unique=False
+        )
+
+        # Validate data integrity after migration
+        if not validate_data_integrity():
+            raise RuntimeError("Post-migration data integrity check failed")
+
+        logger.info(f"Migration upgrade completed successfully: bulk_operation_journal")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration upgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration upgrade: {e}")
+        raise
+
+
+def downgrade() -> None:
+    """Rollback the migration changes."""
+    logger.info(f"Starting migration downgrade: bulk_operation_journal")
+
+    try:
+        # Validate data integrity before rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-rollback data integrity check failed")
+
+        op.drop_index('idx_bulk_operation_journal_user_created', table_name='bulk_operation_journal')
+        op.drop_index(op.f('ix_bulk_operation_journal_id'), table_name='bulk_operation_journal')
+        op.drop_table('bulk_operation_journal')
+
+        # Validate data integrity after rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Post-rollback data integrity check failed")
+
+        logger.info(f"Migration downgrade completed successfully: bulk_operation_journal")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration downgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration downgrade: {e}")
+        raise
@@ -0,0 +1,128 @@
+"""pattern_statistics
+
+Revision ID: 3c7e1f9a5b24
+Revises: 8a4d6b2c0e57
+Create Date: 2026-10-18 17:00:00.000000+00:00
+
+FINANCIAL SAFETY NOTICE:
+This migration affects financial data. Ensure proper backup and testing procedures
+are followed before applying to production. All changes must be reversible.
+
+ROLLBACK STRATEGY:
+- Test rollback procedures in staging environment
+- Verify data integrity after rollback
+- Document any manual steps required for rollback
+
+Adds the pattern_statistics table holding per-user co-occurrence counts of
+transaction features with categories for pattern discovery. Existing users
+are backfilled on their first pattern analysis, so no data is copied here.
+Transactions are not modified; rollback drops the derived table.
+
+"""
+from typing import Sequence, Union
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e1f9a5b24'
+down_revision: Union[str, None] = '8a4d6b2c0e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Configure logging for this migration
+logger = logging.getLogger(__name__)
+
+
+def validate_data_integrity() -> bool:
+    """
+    Validate financial data integrity before and after migration.
+    Transactions are not touched; check the table is reachable.
+    """
+    try:
+        op.get_bind().execute(sa.text("SELECT 1 FROM transactions LIMIT 1"))
+        logger.info("Data integrity validation passed")
+        return True
+    except Exception as e:
+        logger.error(f"Data integrity validation failed: {e}")
+        return False
+
+
+def upgrade() -> None:
+    """Apply the migration changes."""
+    logger.info(f"Starting migration upgrade: pattern_statistics")
+
+    try:
+        # Validate data integrity before migration
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-migration data integrity check failed")
+
+        op.create_table(
+            'pattern_statistics',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('feature_type', sa.String(length=20), nullable=False),
+            sa.Column('feature_value', sa.String(length=255), nullable=False),
+            sa.Column('category', sa.String(length=255), nullable=False),
+            sa.Column('subcategory', sa.String(length=100), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('value_sum', sa.Float(), nullable=False),
+            sa.Column('value_sq_sum', sa.Float(), nullable=False),
+            sa.Column('first_seen', sa.DateTime(), nullable=True),
+            sa.Column('last_seen', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint(
+                'user_id', 'feature_type', 'feature_value', 'category', 'subcategory',
+                name='uq_pattern_statistics_feature'
+            )
+        )
+        op.create_index(op.f('ix_pattern_statistics_id'), 'pattern_statistics', ['id'], unique=False)
+        op.create_index(
+            'idx_pattern_statistics_user_type', 'pattern_statistics',
+            ['user_id', 'feature_type'], unique=False
+        )
+
+        # Validate data integrity after migration
+        if not validate_data_integrity():
+            raise RuntimeError("Post-migration data integrity check failed")
+
+        logger.info(f"Migration upgrade completed successfully: pattern_statistics")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration upgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration upgrade: {e}")
+        raise
+
+
+def downgrade() -> None:
+    """Rollback the migration changes."""
+    logger.info(f"Starting migration downgrade: pattern_statistics")
+
+    try:
+        # Validate data integrity before rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-rollback data integrity check failed")
+
+        op.drop_index('idx_pattern_statistics_user_type', table_name='pattern_statistics')
+        op.drop_index(op.f('ix_pattern_statistics_id'), table_name='pattern_statistics')
+        op.drop_table('pattern_statistics')
+
+        # Validate data integrity after rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Post-rollback data integrity check failed")
+
+        logger.info(f"Migration downgrade completed successfully: pattern_statistics")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration downgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration downgrade: {e}")
+        raise
@@ -0,0 +1,200 @@
+"""rule_match_index
+
+Revision ID: 6f2b8d4e1a93
+Revises: 3c7e1f9a5b24
+Create Date: 2026-10-18 19:00:00.000000+00:00
+
+FINANCIAL SAFETY NOTICE:
+This migration affects financial data. Ensure proper backup and testing procedures
+are followed before applying to production. All changes must be reversible.
+
+ROLLBACK STRATEGY:
+- Test rollback procedures in staging environment
+- Verify data integrity after rollback
+- Document any manual steps required for rollback
+
+Adds the rule_matches table recording which rule categorized each
+transaction, and match_count / override_count / last_matched_at counters on
+categorization_rules. Existing categorized transactions are attributed to
+the highest-priority active rule that matches them with the same category
+(the attribution rule performance analytics used before). Regex rules are
+only backfilled on PostgreSQL. Transactions are not modified; rollback
+drops the table and the counter columns.
+
+"""
+from typing import Sequence, Union
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f2b8d4e1a93'
+down_revision: Union[str, None] = '3c7e1f9a5b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Configure logging for this migration
+logger = logging.getLogger(__name__)
+
+
+def validate_data_integrity() -> bool:
+    """
+    Validate financial data integrity before and after migration.
+    Transactions are not touched; check the table is reachable.
+    """
+    try:
+        op.get_bind().execute(sa.text("SELECT 1 FROM transactions LIMIT 1"))
+        logger.info("Data integrity validation passed")
+        return True
+    except Exception as e:
+        logger.error(f"Data integrity validation failed: {e}")
+        return False
+
+
+def _match_condition(pattern_type: str, is_postgresql: bool):
+    """SQL condition equivalent to CategorizationService._rule_matches, or None"""
+    position = "strpos" if is_postgresql else "instr"
+    if pattern_type in ('keyword', 'contains'):
+        return f"{position}(lower(t.description), lower(:pattern)) > 0"
+    if pattern_type == 'vendor':
+        return f"t.vendor IS NOT NULL AND {position}(lower(t.vendor), lower(:pattern)) > 0"
+    if pattern_type == 'exact':
+        return "lower(t.description) = lower(:pattern)"
+    if pattern_type == 'regex' and is_postgresql:
+        return "t.description ~* :pattern"
+    return None
+
+
+def backfill_rule_matches() -> None:
+    """Attribute categorized transactions to rules, highest priority first"""
+    bind = op.get_bind()
+    is_postgresql = bind.dialect.name == 'postgresql'
+
+    rules = bind.execute(sa.text(
+        "SELECT id, user_id, pattern, pattern_type, category, subcategory "
+        "FROM categorization_rules WHERE is_active = :active "
+        "ORDER BY user_id, priority DESC, id"
+    ), {"active": True}).all()
+
+    attributed = 0
+    for rule in rules:
+        condition = _match_condition(rule.pattern_type, is_postgresql)
+        if condition is None:
+            continue
+        statement = sa.text(f"""
+            INSERT INTO rule_matches (user_id, rule_id, transaction_id, category, subcategory, matched_at)
+            SELECT t.user_id, :rule_id, t.id, t.category, t.subcategory,
+                   COALESCE(t.updated_at, t.created_at, CURRENT_TIMESTAMP)
+            FROM transactions t
+            WHERE t.user_id = :user_id
+              AND t.is_categorized = :categorized
+              AND t.category = :category
+              AND COALESCE(t.subcategory, '') = COALESCE(:subcategory, '')
+              AND NOT EXISTS (SELECT 1 FROM rule_matches m WHERE m.transaction_id = t.id)
+              AND {condition}
+        """)
+        try:
+            # Savepoint so an invalid regex only skips its own rule
+            with bind.begin_nested():
+                result = bind.execute(statement, {
+                    "rule_id": rule.id,
+                    "user_id": rule.user_id,
+                    "categorized": True,
+                    "category": rule.category,
+                    "subcategory": rule.subcategory,
+                    "pattern": rule.pattern
+                })
+                attributed += result.rowcount or 0
+        except SQLAlchemyError as e:
+            logger.warning(f"Skipped backfill of rule {rule.id}: {e}")
+
+    bind.execute(sa.text("""
+        UPDATE categorization_rules SET
+            match_count = (SELECT COUNT(*) FROM rule_matches m WHERE m.rule_id = categorization_rules.id),
+            last_matched_at = (SELECT MAX(m.matched_at) FROM rule_matches m WHERE m.rule_id = categorization_rules.id)
+    """))
+    logger.info(f"Attributed {attributed} transactions to {len(rules)} rules")
+
+
+def upgrade() -> None:
+    """Apply the migration changes."""
+    logger.info(f"Starting migration upgrade: rule_match_index")
+
+    try:
+        # Validate data integrity before migration
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-migration data integrity check failed")
+
+        op.add_column('categorization_rules', sa.Column('match_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column('categorization_rules', sa.Column('override_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column('categorization_rules', sa.Column('last_matched_at', sa.DateTime(timezone=True), nullable=True))
+
+        op.create_table(
+            'rule_matches',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('rule_id', sa.Integer(), nullable=False),
+            sa.Column('transaction_id', sa.Integer(), nullable=False),
+            sa.Column('category', sa.String(length=100), nullable=False),
+            sa.Column('subcategory', sa.String(length=100), nullable=True),
+            sa.Column('matched_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.Column('overridden_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['rule_id'], ['categorization_rules.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('transaction_id')
+        )
+        op.create_index(op.f('ix_rule_matches_id'), 'rule_matches', ['id'], unique=False)
+        op.create_index('idx_rule_matches_rule_matched', 'rule_matches', ['rule_id', 'matched_at'], unique=False)
+        op.create_index('idx_rule_matches_user_rule', 'rule_matches', ['user_id', 'rule_id'], unique=False)
+
+        backfill_rule_matches()
+
+        # Validate data integrity after migration
+        if not validate_data_integrity():
+            raise RuntimeError("Post-migration data integrity check failed")
+
+        logger.info(f"Migration upgrade completed successfully: rule_match_index")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration upgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration upgrade: {e}")
+        raise
+
+
+def downgrade() -> None:
+    """Rollback the migration changes."""
+    logger.info(f"Starting migration downgrade: rule_match_index")
+
+    try:
+        # Validate data integrity before rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-rollback data integrity check failed")
+
+        op.drop_index('idx_rule_matches_user_rule', table_name='rule_matches')
+        op.drop_index('idx_rule_matches_rule_matched', table_name='rule_matches')
+        op.drop_index(op.f('ix_rule_matches_id'), table_name='rule_matches')
+        op.drop_table('rule_matches')
+
+        op.drop_column('categorization_rules', 'last_matched_at')
+        op.drop_column('categorization_rules', 'override_count')
+        op.drop_column('categorization_rules', 'match_count')
+
+        # Validate data integrity after rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Post-rollback data integrity check failed")
+
+        logger.info(f"Migration downgrade completed successfully: rule_match_index")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration downgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration downgrade: {e}")
+        raise
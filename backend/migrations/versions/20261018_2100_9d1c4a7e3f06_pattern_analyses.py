@@ -0,0 +1,133 @@
+"""pattern_analyses
+
+Revision ID: 9d1c4a7e3f06
+Revises: 6f2b8d4e1a93
+Create Date: 2026-10-18 21:00:00.000000+00:00
+
+FINANCIAL SAFETY NOTICE:
+This migration affects financial data. Ensure proper backup and testing procedures
+are followed before applying to production. All changes must be reversible.
+
+ROLLBACK STRATEGY:
+- Test rollback procedures in staging environment
+- Verify data integrity after rollback
+- Document any manual steps required for rollback
+
+Adds the pattern_analyses table holding the persisted results of background
+pattern analysis jobs (patterns, suggested rules, supporting transaction id
+ranges) versioned by a fingerprint of the analysed data. Transactions are
+not modified; rollback drops the derived table and analyses are recomputed
+on the next request.
+
+"""
+from typing import Sequence, Union
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d1c4a7e3f06'
+down_revision: Union[str, None] = '6f2b8d4e1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Configure logging for this migration
+logger = logging.getLogger(__name__)
+
+
+def validate_data_integrity() -> bool:
+    """
+    Validate financial data integrity before and after migration.
+    Transactions are not touched; check the table is reachable.
+    """
+    try:
+        op.get_bind().execute(sa.text("SELECT 1 FROM transactions LIMIT 1"))
+        logger.info("Data integrity validation passed")
+        return True
+    except Exception as e:
+        logger.error(f"Data integrity validation failed: {e}")
+        return False
+
+
+def upgrade() -> None:
+    """Apply the migration changes."""
+    logger.info(f"Starting migration upgrade: pattern_analyses")
+
+    try:
+        # Validate data integrity before migration
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-migration data integrity check failed")
+
+        op.create_table(
+            'pattern_analyses',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('analysis_id', sa.String(length=36), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('fingerprint', sa.String(length=64), nullable=False),
+            sa.Column('parameters', sa.JSON(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('error_message', sa.Text(), nullable=True),
+            sa.Column('summary', sa.JSON(), nullable=True),
+            sa.Column('patterns', sa.JSON(), nullable=True),
+            sa.Column('suggested_rules', sa.JSON(), nullable=True),
+            sa.Column('supporting_transactions', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('analysis_id')
+        )
+        op.create_index(op.f('ix_pattern_analyses_id'), 'pattern_analyses', ['id'], unique=False)
+        op.create_index(
+            'idx_pattern_analyses_user_fingerprint', 'pattern_analyses',
+            ['user_id', 'fingerprint'], unique=False
+        )
+        op.create_index(
+            'idx_pattern_analyses_user_status', 'pattern_analyses',
+            ['user_id', 'status', 'completed_at'], unique=False
+        )
+
+        # Validate data integrity after migration
+        if not validate_data_integrity():
+            raise RuntimeError("Post-migration data integrity check failed")
+
+        logger.info(f"Migration upgrade completed successfully: pattern_analyses")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration upgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration upgrade: {e}")
+        raise
+
+
+def downgrade() -> None:
+    """Rollback the migration changes."""
+    logger.info(f"Starting migration downgrade: pattern_analyses")
+
+    try:
+        # Validate data integrity before rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-rollback data integrity check failed")
+
+        op.drop_index('idx_pattern_analyses_user_status', table_name='pattern_analyses')
+        op.drop_index('idx_pattern_analyses_user_fingerprint', table_name='pattern_analyses')
+        op.drop_index(op.f('ix_pattern_analyses_id'), table_name='pattern_analyses')
+        op.drop_table('pattern_analyses')
+
+        # Validate data integrity after rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Post-rollback data integrity check failed")
+
+        logger.info(f"Migration downgrade completed successfully: pattern_analyses")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration downgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration downgrade: {e}")
+        raise
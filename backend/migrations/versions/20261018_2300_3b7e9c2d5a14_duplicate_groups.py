@@ -0,0 +1,164 @@
+"""duplicate_groups
+
+Revision ID: 3b7e9c2d5a14
+Revises: 9d1c4a7e3f06
+Create Date: 2026-10-18 23:00:00.000000+00:00
+
+FINANCIAL SAFETY NOTICE:
+This migration affects financial data. Ensure proper backup and testing procedures
+are followed before applying to production. All changes must be reversible.
+
+ROLLBACK STRATEGY:
+- Test rollback procedures in staging environment
+- Verify data integrity after rollback
+- Document any manual steps required for rollback
+
+Adds the duplicate_groups table holding the duplicate groups found by the
+background duplicate scans (with their review status), and the
+duplicate_scans table tracking those scans. Transactions are not modified;
+rollback drops both tables, losing only review decisions on unmerged groups,
+and groups are found again by the next scan.
+
+"""
+from typing import Sequence, Union
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e9c2d5a14'
+down_revision: Union[str, None] = '9d1c4a7e3f06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Configure logging for this migration
+logger = logging.getLogger(__name__)
+
+
+def validate_data_integrity() -> bool:
+    """
+    Validate financial data integrity before and after migration.
+    Transactions are not touched; check the table is reachable.
+    """
+    try:
+        op.get_bind().execute(sa.text("SELECT 1 FROM transactions LIMIT 1"))
+        logger.info("Data integrity validation passed")
+        return True
+    except Exception as e:
+        logger.error(f"Data integrity validation failed: {e}")
+        return False
+
+
+def upgrade() -> None:
+    """Apply the migration changes."""
+    logger.info(f"Starting migration upgrade: duplicate_groups")
+
+    try:
+        # Validate data integrity before migration
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-migration data integrity check failed")
+
+        op.create_table(
+            'duplicate_groups',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('group_key', sa.String(length=64), nullable=False),
+            sa.Column('transaction_ids', sa.JSON(), nullable=False),
+            sa.Column('primary_transaction_id', sa.Integer(), nullable=False),
+            sa.Column('transactions', sa.JSON(), nullable=False),
+            sa.Column('confidence_score', sa.Float(), nullable=False),
+            sa.Column('match_type', sa.String(length=20), nullable=False),
+            sa.Column('total_amount', sa.Float(), nullable=False),
+            sa.Column('date_start', sa.DateTime(), nullable=False),
+            sa.Column('date_end', sa.DateTime(), nullable=False),
+            sa.Column('review_status', sa.String(length=20), nullable=False),
+            sa.Column('reviewed_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'group_key', name='uq_duplicate_groups_user_key')
+        )
+        op.create_index(op.f('ix_duplicate_groups_id'), 'duplicate_groups', ['id'], unique=False)
+        op.create_index(
+            'idx_duplicate_groups_user_status', 'duplicate_groups',
+            ['user_id', 'review_status', 'confidence_score'], unique=False
+        )
+        op.create_index(
+            'idx_duplicate_groups_user_dates', 'duplicate_groups',
+            ['user_id', 'date_start', 'date_end'], unique=False
+        )
+
+        op.create_table(
+            'duplicate_scans',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('scan_id', sa.String(length=36), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('scan_type', sa.String(length=20), nullable=False),
+            sa.Column('batch_id', sa.String(length=100), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('error_message', sa.Text(), nullable=True),
+            sa.Column('transactions_scanned', sa.Integer(), nullable=False),
+            sa.Column('groups_found', sa.Integer(), nullable=False),
+            sa.Column('groups_created', sa.Integer(), nullable=False),
+            sa.Column('groups_removed', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('scan_id')
+        )
+        op.create_index(op.f('ix_duplicate_scans_id'), 'duplicate_scans', ['id'], unique=False)
+        op.create_index(
+            'idx_duplicate_scans_user_created', 'duplicate_scans',
+            ['user_id', 'created_at'], unique=False
+        )
+
+        # Validate data integrity after migration
+        if not validate_data_integrity():
+            raise RuntimeError("Post-migration data integrity check failed")
+
+        logger.info(f"Migration upgrade completed successfully: duplicate_groups")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration upgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration upgrade: {e}")
+        raise
+
+
+def downgrade() -> None:
+    """Rollback the migration changes."""
+    logger.info(f"Starting migration downgrade: duplicate_groups")
+
+    try:
+        # Validate data integrity before rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Pre-rollback data integrity check failed")
+
+        op.drop_index('idx_duplicate_scans_user_created', table_name='duplicate_scans')
+        op.drop_index(op.f('ix_duplicate_scans_id'), table_name='duplicate_scans')
+        op.drop_table('duplicate_scans')
+
+        op.drop_index('idx_duplicate_groups_user_dates', table_name='duplicate_groups')
+        op.drop_index('idx_duplicate_groups_user_status', table_name='duplicate_groups')
+        op.drop_index(op.f('ix_duplicate_groups_id'), table_name='duplicate_groups')
+        op.drop_table('duplicate_groups')
+
+        # Validate data integrity after rollback
+        if not validate_data_integrity():
+            raise RuntimeError("Post-rollback data integrity check failed")
+
+        logger.info(f"Migration downgrade completed successfully: duplicate_groups")
+
+    except (SQLAlchemyError, OperationalError) as e:
+        logger.error(f"Database error in migration downgrade: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in migration downgrade: {e}")
+        raise
@@ -44,6 +44,7 @@ from rq.exceptions import WorkerException
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
 
 from app.core.config import settings
+from app.core.database import register_session_listeners
 from app.core.logging_config import setup_logging
 
 # Setup logging
@@ -75,6 +76,9 @@ class FinGoodWorker:
         self.shutdown_requested = False
         self.start_time = datetime.utcnow()
         
+        # Jobs write transactions; keep pattern statistics and fraud features current
+        register_session_listeners()
+        
         # Initialize Redis connection
         try:
             self.redis_conn = redis.from_url(
@@ -0,0 +1,305 @@
+"""
+Tests for the background job system
+
+BackgroundJobManager runs against fakeredis and the enqueued CSV upload
+jobs are executed by an RQ SimpleWorker, with an in-memory SQLite
+database as the worker's session.
+"""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import fakeredis
+import pytest
+from rq import SimpleWorker
+from rq.job import Job
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.background_jobs import (
+    BackgroundJobManager,
+    JobType,
+    JobState,
+    JobPriority,
+    JobProgress,
+    JobResult
+)
+from app.core.database import Base
+from app.core.exceptions import SystemException
+from app.models import ImportBatch, Transaction, User
+
+CSV_CONTENT = (
+    b"date,description,amount\n"
+    b"2024-03-01,Corner Cafe,-4.75\n"
+    b"2024-03-02,Office Rent,-900.00\n"
+    b"2024-03-03,Client Payment,2500.00\n"
+)
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def manager(redis_server):
+    """Job manager on fakeredis, installed as the module's global job_manager"""
+    def from_url(url, decode_responses=False, **kwargs):
+        return fakeredis.FakeRedis(server=redis_server, decode_responses=decode_responses)
+
+    with patch("app.core.background_jobs.redis.from_url", from_url):
+        manager = BackgroundJobManager()
+    with patch("app.core.background_jobs.job_manager", manager):
+        yield manager
+
+
+@pytest.fixture
+def worker(manager):
+    """Burst worker over the manager's queues"""
+    return SimpleWorker(list(manager.queues.values()), connection=manager.queue_connection)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="owner@example.com", hashed_password="x"))
+    session.commit()
+    with patch("app.core.background_jobs.get_background_session", sessionmaker(bind=engine)), \
+            patch("app.services.duplicate_scans.job_manager"):
+        yield session
+    session.close()
+    engine.dispose()
+
+
+def _queue(manager, user_id="user-1", content=CSV_CONTENT, priority=JobPriority.NORMAL):
+    return asyncio.run(manager.queue_csv_upload_job(
+        user_id=user_id,
+        file_content=content,
+        filename="statement.csv",
+        file_size=len(content),
+        priority=priority
+    ))
+
+
+class TestBackgroundJobManager:
+    """Queueing, status tracking and cancellation through Redis"""
+
+    @pytest.mark.asyncio
+    async def test_queue_csv_upload_job(self, manager):
+        job_id = await manager.queue_csv_upload_job(
+            user_id="user-1", file_content=CSV_CONTENT, filename="statement.csv",
+            file_size=len(CSV_CONTENT), priority=JobPriority.HIGH
+        )
+
+        queue = manager.queues[JobPriority.HIGH]
+        assert queue.job_ids == [job_id]
+        assert queue.fetch_job(job_id).meta["filename"] == "statement.csv"
+        assert manager.redis_client.smembers(manager._get_user_jobs_key("user-1")) == {job_id}
+
+        progress = await manager.get_job_status(job_id)
+        assert progress.state == JobState.QUEUED
+        assert progress.details["file_size"] == len(CSV_CONTENT)
+
+    @pytest.mark.asyncio
+    async def test_batch_id_defaults_to_content_hash(self, manager):
+        first = await manager.get_job_status(
+            await manager.queue_csv_upload_job("user-1", CSV_CONTENT, "a.csv", len(CSV_CONTENT))
+        )
+        second = await manager.get_job_status(
+            await manager.queue_csv_upload_job("user-1", CSV_CONTENT, "b.csv", len(CSV_CONTENT))
+        )
+
+        assert first.details["batch_id"] == second.details["batch_id"]
+        assert len(first.details["batch_id"]) == 64
+
+    @pytest.mark.asyncio
+    async def test_queue_failure_raises_system_exception(self, manager):
+        with patch.object(manager.queues[JobPriority.NORMAL], "enqueue", side_effect=ConnectionError("down")):
+            with pytest.raises(SystemException):
+                await manager.queue_csv_upload_job("user-1", CSV_CONTENT, "a.csv", len(CSV_CONTENT))
+
+    @pytest.mark.asyncio
+    async def test_unknown_job_status_is_none(self, manager):
+        assert await manager.get_job_status("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_get_user_jobs_newest_first(self, manager):
+        job_ids = [
+            await manager.queue_csv_upload_job("user-1", CSV_CONTENT, f"{index}.csv", len(CSV_CONTENT))
+            for index in range(3)
+        ]
+        await manager.queue_csv_upload_job("user-2", CSV_CONTENT, "other.csv", len(CSV_CONTENT))
+
+        jobs = await manager.get_user_jobs("user-1")
+
+        assert [job.job_id for job in jobs] == job_ids[::-1]
+
+    @pytest.mark.asyncio
+    async def test_cancel_job(self, manager):
+        job_id = await manager.queue_csv_upload_job("user-1", CSV_CONTENT, "a.csv", len(CSV_CONTENT))
+
+        assert not await manager.cancel_job(job_id, "user-2")
+        assert await manager.cancel_job(job_id, "user-1")
+
+        assert (await manager.get_job_status(job_id)).state == JobState.CANCELLED
+        assert Job.fetch(job_id, connection=manager.queue_connection).get_status() == "canceled"
+        assert manager.queues[JobPriority.NORMAL].job_ids == []
+
+    @pytest.mark.asyncio
+    async def test_get_queue_stats(self, manager):
+        await manager.queue_csv_upload_job("user-1", CSV_CONTENT, "a.csv", len(CSV_CONTENT))
+        await manager.queue_csv_upload_job(
+            "user-1", CSV_CONTENT, "b.csv", len(CSV_CONTENT), priority=JobPriority.LOW
+        )
+
+        info = {"used_memory_human": "1M", "connected_clients": 1}
+        with patch.object(manager.redis_client, "info", return_value=info):
+            stats = manager.get_queue_stats()
+
+        assert stats["total_queued"] == 2
+        assert stats["queues"]["normal"]["length"] == 1
+        assert stats["queues"]["low"]["name"] == "low"
+
+
+class TestProcessCSVUploadJob:
+    """Queued uploads run the full pipeline on an RQ worker"""
+
+    def test_upload_imports_transactions(self, manager, worker, db):
+        job_id = _queue(manager, user_id=1)
+
+        worker.work(burst=True)
+
+        job = manager.queues[JobPriority.NORMAL].fetch_job(job_id)
+        assert job.is_finished
+        assert job.result.success, job.result.error_message
+        assert job.result.data["processed_count"] == 3
+        assert asyncio.run(manager.get_job_status(job_id)).state == JobState.COMPLETED
+
+        db.expire_all()
+        assert sorted(t.description for t in db.query(Transaction)) == ["Client Payment", "Corner Cafe", "Office Rent"]
+        assert db.query(ImportBatch).one().transaction_count == 3
+
+    def test_unknown_user_fails_job(self, manager, worker, db):
+        job_id = _queue(manager, user_id=99)
+
+        worker.work(burst=True)
+
+        result = manager.queues[JobPriority.NORMAL].fetch_job(job_id).result
+        assert not result.success
+        assert "User not found" in result.error_message
+        assert asyncio.run(manager.get_job_status(job_id)).state == JobState.FAILED
+
+    def test_denied_upload_fails_job(self, manager, worker, db):
+        job_id = _queue(manager, user_id=1)
+
+        with patch("app.core.background_jobs.check_upload_allowed", AsyncMock(return_value=(False, "Daily limit"))), \
+                patch("app.core.background_jobs.record_upload", AsyncMock()):
+            worker.work(burst=True)
+
+        result = manager.queues[JobPriority.NORMAL].fetch_job(job_id).result
+        assert not result.success
+        assert "Upload denied: Daily limit" in result.error_message
+        assert db.query(Transaction).count() == 0
+
+    def test_malware_fails_job(self, manager, worker, db):
+        job_id = _queue(manager, user_id=1, content=CSV_CONTENT + b"2024-03-04,Infected,-1.00\n")
+        scan = MagicMock(is_clean=False, threats_detected=["EICAR-Test-File"])
+
+        with patch("app.core.background_jobs.scan_file_for_malware", AsyncMock(return_value=scan)):
+            worker.work(burst=True)
+
+        result = manager.queues[JobPriority.NORMAL].fetch_job(job_id).result
+        assert not result.success
+        assert "Malware detected" in result.error_message
+        assert db.query(Transaction).count() == 0
+
+
+class TestJobDataStructures:
+    """Test suite for job data structures and enums"""
+    
+    def test_job_type_enum(self):
+        """Test JobType enum values"""
+        assert JobType.CSV_UPLOAD == "csv_upload"
+        assert JobType.BULK_CATEGORIZATION == "bulk_categorization"
+        assert JobType.DATA_EXPORT == "data_export"
+        assert JobType.BATCH_DELETE == "batch_delete"
+    
+    def test_job_state_enum(self):
+        """Test JobState enum values"""
+        assert JobState.QUEUED == "queued"
+        assert JobState.STARTED == "started"
+        assert JobState.PROCESSING == "processing"
+        assert JobState.COMPLETED == "completed"
+        assert JobState.FAILED == "failed"
+        assert JobState.CANCELLED == "cancelled"
+        assert JobState.RETRYING == "retrying"
+    
+    def test_job_priority_enum(self):
+        """Test JobPriority enum values"""
+        assert JobPriority.LOW == "low"
+        assert JobPriority.NORMAL == "normal"
+        assert JobPriority.HIGH == "high"
+        assert JobPriority.CRITICAL == "critical"
+    
+    def test_job_progress_creation(self):
+        """Test JobProgress data structure creation"""
+        now = datetime.utcnow()
+        progress = JobProgress(
+            job_id="test-123",
+            job_type=JobType.CSV_UPLOAD,
+            state=JobState.PROCESSING,
+            progress_percentage=75.0,
+            current_step="categorization",
+            message="Categorizing transactions",
+            details={"processed": 150, "total": 200},
+            user_id="user-456",
+            created_at=now,
+            updated_at=now
+        )
+        
+        assert progress.job_id == "test-123"
+        assert progress.job_type == JobType.CSV_UPLOAD
+        assert progress.state == JobState.PROCESSING
+        assert progress.progress_percentage == 75.0
+        assert progress.current_step == "categorization"
+        assert progress.message == "Categorizing transactions"
+        assert progress.details["processed"] == 150
+        assert progress.user_id == "user-456"
+        assert progress.retry_count == 0
+        assert progress.max_retries == 3
+    
+    def test_job_result_success(self):
+        """Test successful JobResult creation"""
+        result = JobResult(
+            success=True,
+            data={"processed_count": 100, "batch_id": "batch-123"},
+            processing_time=45.2,
+            statistics={"success_rate": 98.5}
+        )
+        
+        assert result.success is True
+        assert result.data["processed_count"] == 100
+        assert result.processing_time == 45.2
+        assert result.statistics["success_rate"] == 98.5
+        assert result.error_message is None
+    
+    def test_job_result_failure(self):
+        """Test failed JobResult creation"""
+        result = JobResult(
+            success=False,
+            error_message="Processing failed",
+            error_code="PROCESSING_ERROR",
+            correlation_id="corr-123",
+            processing_time=10.5
+        )
+        
+        assert result.success is False
+        assert result.error_message == "Processing failed"
+        assert result.error_code == "PROCESSING_ERROR"
+        assert result.correlation_id == "corr-123"
+        assert result.processing_time == 10.5
+        assert result.data is None
@@ -0,0 +1,418 @@
+"""
+Comprehensive test suite for Transaction Bulk Operations Service
+
+Tests cover all bulk operation types with security, validation, 
+and transaction integrity verification.
+"""
+
+import pytest
+import uuid
+from decimal import Decimal
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models import BulkOperationJournal, ImportBatch, Transaction, User
+from app.services.transaction_operations import (
+    TransactionBulkOperations, BulkUpdateRequest, BulkOperationType,
+    BulkOperationStatus, BulkOperationLimits
+)
+from app.core.exceptions import ValidationException, BusinessLogicException
+
+
+class TestBulkOperationsService:
+    """Test suite for TransactionBulkOperations service"""
+    
+    @pytest.fixture
+    def mock_user(self):
+        """Create a mock user for testing"""
+        user = Mock(spec=User)
+        user.id = 1
+        user.email = "test@example.com"
+        return user
+    
+    @pytest.fixture
+    def mock_db(self):
+        """Create a mock database session"""
+        db = Mock(spec=Session)
+        return db
+    
+    @pytest.fixture
+    def bulk_ops_service(self, mock_db, mock_user):
+        """Create bulk operations service instance"""
+        with patch('app.services.transaction_operations.security_audit_logger') as mock_logger:
+            service = TransactionBulkOperations(mock_db, mock_user)
+            service.audit_logger = mock_logger
+            return service
+    
+    @pytest.fixture
+    def sample_transactions(self, mock_user):
+        """Create sample transactions for testing"""
+        transactions = []
+        for i in range(5):
+            txn = Mock(spec=Transaction)
+            txn.id = i + 1
+            txn.user_id = mock_user.id
+            txn.category = "Food"
+            txn.subcategory = "Restaurants" 
+            txn.description = f"Test transaction {i}"
+            txn.vendor = f"Vendor {i}"
+            txn.amount = Decimal("100.50")
+            txn.is_categorized = True
+            txn.confidence_score = 0.85
+            txn.updated_at = datetime.utcnow()
+            transactions.append(txn)
+        return transactions
+
+    def test_service_initialization(self, mock_db, mock_user):
+        """Test service initializes correctly"""
+        with patch('app.services.transaction_operations.security_audit_logger'):
+            service = TransactionBulkOperations(mock_db, mock_user)
+            
+            assert service.db == mock_db
+            assert service.user == mock_user
+            assert service.max_undo_operations == BulkOperationLimits.MAX_UNDO_OPERATIONS
+
+    @pytest.mark.asyncio
+    async def test_validate_bulk_request_valid(self, bulk_ops_service):
+        """Test validation passes for valid bulk request"""
+        request = BulkUpdateRequest(
+            transaction_ids=[1, 2, 3],
+            operation_type=BulkOperationType.UPDATE_CATEGORY,
+            updates={"category": "Business Expenses"}
+        )
+        
+        # Should not raise exception
+        await bulk_ops_service._validate_bulk_request(request)
+
+    @pytest.mark.asyncio 
+    async def test_validate_bulk_request_empty_ids(self, bulk_ops_service):
+        """Test validation fails for empty transaction IDs"""
+        request = BulkUpdateRequest(
+            transaction_ids=[],
+            operation_type=BulkOperationType.UPDATE_CATEGORY,
+            updates={"category": "Business Expenses"}
+        )
+        
+        with pytest.raises(ValidationException, match="Transaction IDs list cannot be empty"):
+            await bulk_ops_service._validate_bulk_request(request)
+
+    @pytest.mark.asyncio
+    async def test_validate_bulk_request_too_many_transactions(self, bulk_ops_service):
+        """Test validation fails for too many transactions"""
+        # Create request with more than the limit
+        large_id_list = list(range(1, BulkOperationLimits.MAX_TRANSACTIONS_PER_OPERATION + 2))
+        request = BulkUpdateRequest(
+            transaction_ids=large_id_list,
+            operation_type=BulkOperationType.UPDATE_CATEGORY,
+            updates={"category": "Business Expenses"}
+        )
+        
+        with pytest.raises(ValidationException, match="Bulk operations limited to"):
+            await bulk_ops_service._validate_bulk_request(request)
+
+    @pytest.mark.asyncio
+    async def test_validate_bulk_request_invalid_ids(self, bulk_ops_service):
+        """Test validation fails for invalid transaction IDs"""
+        request = BulkUpdateRequest(
+            transaction_ids=[1, -5, "invalid", 0, 2**32],  # Mix of invalid IDs
+            operation_type=BulkOperationType.UPDATE_CATEGORY,
+            updates={"category": "Business Expenses"}
+        )
+        
+        with pytest.raises(ValidationException, match="Invalid transaction IDs"):
+            await bulk_ops_service._validate_bulk_request(request)
+
+    @pytest.mark.asyncio
+    async def test_validate_category_update(self, bulk_ops_service):
+        """Test category update validation"""
+        # Valid category
+        await bulk_ops_service._validate_operation_updates(
+            BulkOperationType.UPDATE_CATEGORY,
+            {"category": "Valid Category"}
+        )
+        
+        # Missing category
+        with pytest.raises(ValidationException, match="Category update requires 'category' field"):
+            await bulk_ops_service._validate_operation_updates(
+                BulkOperationType.UPDATE_CATEGORY,
+                {}
+            )
+        
+        # Empty category
+        with pytest.raises(ValidationException, match="Category cannot be empty"):
+            await bulk_ops_service._validate_operation_updates(
+                BulkOperationType.UPDATE_CATEGORY,
+                {"category": "   "}
+            )
+        
+        # Category too long
+        long_category = "x" * (BulkOperationLimits.MAX_CATEGORY_LENGTH + 1)
+        with pytest.raises(ValidationException, match="Category name too long"):
+            await bulk_ops_service._validate_operation_updates(
+                BulkOperationType.UPDATE_CATEGORY,
+                {"category": long_category}
+            )
+
+    @pytest.mark.asyncio
+    async def test_validate_amount_update(self, bulk_ops_service):
+        """Test amount update validation"""
+        # Valid amount
+        await bulk_ops_service._validate_operation_updates(
+            BulkOperationType.UPDATE_AMOUNT,
+            {"amount": "123.45"}
+        )
+        
+        # Missing amount
+        with pytest.raises(ValidationException, match="Amount update requires 'amount' field"):
+            await bulk_ops_service._validate_operation_updates(
+                BulkOperationType.UPDATE_AMOUNT,
+                {}
+            )
+        
+        # Invalid amount format
+        with pytest.raises(ValidationException, match="Invalid amount format"):
+            await bulk_ops_service._validate_operation_updates(
+                BulkOperationType.UPDATE_AMOUNT,
+                {"amount": "not_a_number"}
+            )
+        
+        # Amount too large
+        with pytest.raises(ValidationException, match="Amount exceeds maximum allowed value"):
+            await bulk_ops_service._validate_operation_updates(
+                BulkOperationType.UPDATE_AMOUNT,
+                {"amount": "1000000000000.00"}
+            )
+        
+        # Too many decimal places
+        with pytest.raises(ValidationException, match="Amount precision limited to 2 decimal places"):
+            await bulk_ops_service._validate_operation_updates(
+                BulkOperationType.UPDATE_AMOUNT,
+                {"amount": "123.456"}
+            )
+
+    @pytest.mark.asyncio
+    async def test_validate_description_update(self, bulk_ops_service):
+        """Test description update validation"""
+        # Valid description
+        await bulk_ops_service._validate_operation_updates(
+            BulkOperationType.UPDATE_DESCRIPTION,
+            {"description": "Valid description"}
+        )
+        
+        # Description too long
+        long_desc = "x" * (BulkOperationLimits.MAX_DESCRIPTION_LENGTH + 1)
+        with pytest.raises(ValidationException, match="Description too long"):
+            await bulk_ops_service._validate_operation_updates(
+                BulkOperationType.UPDATE_DESCRIPTION,
+                {"description": long_desc}
+            )
+
+
+class TestBulkOperationsDatabase:
+    """Set-based operations and journaled undo against a real database"""
+
+    @pytest.fixture
+    def db(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+        engine.dispose()
+
+    @pytest.fixture
+    def user(self, db):
+        user = User(id=1, email="test@example.com", hashed_password="x")
+        db.add_all([user, User(id=2, email="other@example.com", hashed_password="x")])
+        db.commit()
+        return user
+
+    @pytest.fixture
+    def transactions(self, db, user):
+        """Three categorized transactions in one import batch, plus another user's row"""
+        rows = [
+            Transaction(
+                id=i + 1, user_id=user.id, date=datetime(2024, 5, i + 1), amount=-50.0 * (i + 1),
+                description=f"Transaction {i}", vendor=f"Vendor {i}", category="Food",
+                is_categorized=True, confidence_score=0.5, source="csv", import_batch="batch-1"
+            )
+            for i in range(3)
+        ]
+        rows.append(Transaction(
+            id=4, user_id=2, date=datetime(2024, 5, 1), amount=-10.0, description="Other user",
+            category="Food", is_categorized=True, source="csv", import_batch="batch-2"
+        ))
+        db.add_all(rows)
+        db.add(ImportBatch(
+            user_id=user.id, batch_id="batch-1", transaction_count=3, total_amount=-300.0,
+            first_transaction_date=datetime(2024, 5, 1), last_transaction_date=datetime(2024, 5, 3)
+        ))
+        db.commit()
+        return rows
+
+    @pytest.fixture
+    def service(self, db, user):
+        return TransactionBulkOperations(db, user)
+
+    def _transaction(self, db, transaction_id):
+        db.expire_all()
+        return db.get(Transaction, transaction_id)
+
+    def _batch(self, db):
+        db.expire_all()
+        return db.query(ImportBatch).filter(ImportBatch.batch_id == "batch-1").one()
+
+    @pytest.mark.asyncio
+    async def test_update_category_and_undo_restores_values(self, db, service, transactions):
+        result = await service.execute_bulk_update(BulkUpdateRequest(
+            transaction_ids=[1, 2],
+            operation_type=BulkOperationType.UPDATE_CATEGORY,
+            updates={"category": "Business Expenses"}
+        ))
+
+        assert result.status == BulkOperationStatus.COMPLETED
+        assert sorted(result.affected_transaction_ids) == [1, 2]
+        assert self._transaction(db, 1).category == "Business Expenses"
+        assert self._transaction(db, 1).confidence_score == 1.0
+        assert self._transaction(db, 3).category == "Food"
+
+        undo = await service.undo_last_operation()
+
+        assert undo.status == BulkOperationStatus.COMPLETED
+        assert undo.successful_count == 2
+        for transaction_id in (1, 2):
+            transaction = self._transaction(db, transaction_id)
+            assert transaction.category == "Food"
+            assert transaction.confidence_score == 0.5
+
+    @pytest.mark.asyncio
+    async def test_journal_holds_before_images(self, db, service, transactions):
+        await service.execute_bulk_update(BulkUpdateRequest(
+            transaction_ids=[1],
+            operation_type=BulkOperationType.UPDATE_VENDOR,
+            updates={"vendor": "New Vendor"}
+        ))
+
+        entry = db.query(BulkOperationJournal).one()
+        columns = entry.before_images["columns"]
+        row = entry.before_images["rows"][0]
+        assert row[columns.index("vendor")] == "Vendor 0"
+
+    @pytest.mark.asyncio
+    async def test_update_amount_and_undo_restores_batch_totals(self, db, service, transactions):
+        await service.execute_bulk_update(BulkUpdateRequest(
+            transaction_ids=[1, 2, 3],
+            operation_type=BulkOperationType.UPDATE_AMOUNT,
+            updates={"amount": "-10.00"}
+        ))
+
+        assert self._batch(db).total_amount == -30.0
+
+        await service.undo_last_operation()
+
+        assert self._transaction(db, 2).amount == -100.0
+        assert self._batch(db).total_amount == -300.0
+        assert self._batch(db).transaction_count == 3
+
+    @pytest.mark.asyncio
+    async def test_delete_and_undo_restores_rows_and_batch_totals(self, db, service, transactions):
+        result = await service.execute_bulk_update(BulkUpdateRequest(
+            transaction_ids=[1, 3],
+            operation_type=BulkOperationType.DELETE,
+            updates={}
+        ))
+
+        assert result.successful_count == 2
+        assert self._transaction(db, 1) is None
+        batch = self._batch(db)
+        assert (batch.transaction_count, batch.total_amount) == (1, -100.0)
+
+        undo = await service.undo_last_operation()
+
+        assert sorted(undo.affected_transaction_ids) == [1, 3]
+        assert self._transaction(db, 3).description == "Transaction 2"
+        batch = self._batch(db)
+        assert (batch.transaction_count, batch.total_amount) == (3, -300.0)
+        assert batch.first_transaction_date == datetime(2024, 5, 1)
+        assert batch.last_transaction_date == datetime(2024, 5, 3)
+
+    @pytest.mark.asyncio
+    async def test_other_users_transactions_untouched(self, db, service, transactions):
+        result = await service.execute_bulk_update(BulkUpdateRequest(
+            transaction_ids=[1, 4],
+            operation_type=BulkOperationType.UPDATE_CATEGORY,
+            updates={"category": "Travel"}
+        ))
+
+        assert result.affected_transaction_ids == [1]
+        assert self._transaction(db, 4).category == "Food"
+
+    @pytest.mark.asyncio
+    async def test_unknown_ids_rejected_without_journal(self, db, service, transactions):
+        with pytest.raises(ValidationException, match="No valid transactions found"):
+            await service.execute_bulk_update(BulkUpdateRequest(
+                transaction_ids=[999],
+                operation_type=BulkOperationType.UPDATE_CATEGORY,
+                updates={"category": "Travel"}
+            ))
+
+        assert db.query(BulkOperationJournal).count() == 0
+
+    @pytest.mark.asyncio
+    async def test_undo_without_operations(self, service, transactions):
+        with pytest.raises(BusinessLogicException, match="No operations available to undo"):
+            await service.undo_last_operation()
+
+    @pytest.mark.asyncio
+    async def test_undo_applies_once(self, service, transactions):
+        await service.execute_bulk_update(BulkUpdateRequest(
+            transaction_ids=[1],
+            operation_type=BulkOperationType.UPDATE_DESCRIPTION,
+            updates={"description": "Renamed"}
+        ))
+        await service.undo_last_operation()
+
+        with pytest.raises(BusinessLogicException, match="No operations available to undo"):
+            await service.undo_last_operation()
+
+    @pytest.mark.asyncio
+    async def test_history_and_stats(self, db, service, transactions):
+        await service.execute_bulk_update(BulkUpdateRequest(
+            transaction_ids=[1, 2],
+            operation_type=BulkOperationType.UPDATE_CATEGORY,
+            updates={"category": "Travel"}
+        ))
+        await service.execute_bulk_update(BulkUpdateRequest(
+            transaction_ids=[3],
+            operation_type=BulkOperationType.UPDATE_DESCRIPTION,
+            updates={"description": "Renamed"}
+        ))
+
+        history = service.get_undo_history(limit=5)
+        stats = await service.get_bulk_operation_stats()
+
+        assert [item["operation_type"] for item in history] == ["update_description", "update_category"]
+        assert all(item["can_undo"] for item in history)
+        assert stats["total_bulk_operations"] == 2
+        assert stats["operations_by_type"] == {"update_category": 1, "update_description": 1}
+        assert stats["total_transactions_affected"] == 3
+
+    @pytest.mark.asyncio
+    async def test_journal_keeps_most_recent_entries(self, db, service, transactions):
+        service.max_undo_operations = 3
+        for i in range(5):
+            await service.execute_bulk_update(BulkUpdateRequest(
+                transaction_ids=[1],
+                operation_type=BulkOperationType.UPDATE_DESCRIPTION,
+                updates={"description": f"Description {i}"}
+            ))
+
+        assert db.query(BulkOperationJournal).count() == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
\ No newline at end of file
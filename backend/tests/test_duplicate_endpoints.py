@@ -0,0 +1,235 @@
+"""
+Tests for the duplicates API endpoints over the stored duplicate groups
+
+The endpoint coroutines are called directly with an in-memory SQLite
+session; the rate limiter and the RQ queue are patched.
+"""
+
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints.duplicates import (
+    auto_merge_high_confidence_duplicates, get_duplicate_groups, get_duplicate_scan,
+    get_duplicate_detection_stats, review_duplicate_group, scan_for_duplicates
+)
+from app.core.audit_logger import security_audit_logger
+from app.core.background_jobs import JobPriority
+from app.core.database import Base
+from app.models import DuplicateGroupRecord, DuplicateScan, Transaction, User
+from app.services.duplicate_detection import DuplicateReviewStatus
+from app.services.duplicate_scans import group_key
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="owner@example.com", hashed_password="x"))
+    session.add(User(id=2, email="other@example.com", hashed_password="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def user(db):
+    return db.get(User, 1)
+
+
+@pytest.fixture(autouse=True)
+def rate_limiter():
+    limiter = MagicMock()
+    limiter.check_rate_limit = AsyncMock(return_value=MagicMock(allowed=True))
+    with patch("app.core.rate_limiter.get_rate_limiter", AsyncMock(return_value=limiter)):
+        yield limiter
+
+
+@pytest.fixture
+def queue():
+    queue = MagicMock()
+    with patch("app.services.duplicate_scans.job_manager") as job_manager:
+        job_manager.queues = {priority: queue for priority in JobPriority}
+        yield queue
+
+
+def _duplicate_pair(db, confidence=0.97, user_id=1, review_status="pending"):
+    """Two identical transactions and their stored group"""
+    date = datetime.utcnow() - timedelta(days=2)
+    transactions = [
+        Transaction(
+            user_id=user_id, date=date, amount=-12.5, description="Corner cafe",
+            vendor="Corner Cafe", source="csv"
+        )
+        for _ in range(2)
+    ]
+    db.add_all(transactions)
+    db.flush()
+    ids = [transaction.id for transaction in transactions]
+    group = DuplicateGroupRecord(
+        user_id=user_id, group_key=group_key(ids), transaction_ids=ids, primary_transaction_id=ids[0],
+        transactions=[
+            {"id": transaction.id, "amount": "-12.50", "description": transaction.description}
+            for transaction in transactions
+        ],
+        confidence_score=confidence, match_type="exact", total_amount=-25.0,
+        date_start=date, date_end=date, review_status=review_status
+    )
+    db.add(group)
+    db.commit()
+    return group
+
+
+class TestScanEndpoints:
+    """POST /scan queues one scan per user and audits the request"""
+
+    @pytest.mark.asyncio
+    async def test_scan_queued_and_audited(self, db, user, queue):
+        with patch.object(security_audit_logger.logger, "info") as audit_info:
+            response = await scan_for_duplicates(current_user=user, db=db)
+
+        body = json.loads(response.body)
+        assert response.status_code == 202
+        assert body["queued"] is True
+        assert body["status"] == "pending"
+        queue.enqueue.assert_called_once()
+        assert "Duplicate scan requested" in audit_info.call_args.args[0]
+
+    @pytest.mark.asyncio
+    async def test_repeat_scan_joins_pending_scan(self, db, user, queue):
+        first = json.loads((await scan_for_duplicates(current_user=user, db=db)).body)
+        second = json.loads((await scan_for_duplicates(current_user=user, db=db)).body)
+
+        assert second["queued"] is False
+        assert second["scan_id"] == first["scan_id"]
+        assert queue.enqueue.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_queue_failure_is_unavailable(self, db, user, queue):
+        queue.enqueue.side_effect = ConnectionError("redis down")
+
+        with pytest.raises(HTTPException) as exc_info:
+            await scan_for_duplicates(current_user=user, db=db)
+
+        assert exc_info.value.status_code == 503
+        assert db.query(DuplicateScan).one().status == "failed"
+
+    @pytest.mark.asyncio
+    async def test_scan_status_is_scoped_to_user(self, db, user, queue):
+        scan_id = json.loads((await scan_for_duplicates(current_user=user, db=db)).body)["scan_id"]
+
+        assert (await get_duplicate_scan(scan_id=scan_id, current_user=user, db=db))["scan_id"] == scan_id
+        with pytest.raises(HTTPException) as exc_info:
+            await get_duplicate_scan(scan_id=scan_id, current_user=db.get(User, 2), db=db)
+        assert exc_info.value.status_code == 404
+
+
+class TestGroupEndpoints:
+    """Stored groups are listed, reviewed and summarised per user"""
+
+    @pytest.mark.asyncio
+    async def test_groups_list_pending_only(self, db, user):
+        pending = _duplicate_pair(db)
+        _duplicate_pair(db, review_status="dismissed")
+        _duplicate_pair(db, user_id=2)
+
+        response = await get_duplicate_groups(
+            date_range_days=30, min_confidence=0.5, include_reviewed=False, current_user=user, db=db
+        )
+
+        assert [group["group_id"] for group in response["duplicate_groups"]] == [str(pending.id)]
+        assert response["scan_summary"]["auto_merge_candidates"] == 1
+
+    @pytest.mark.asyncio
+    async def test_review_updates_status_and_audits(self, db, user):
+        group = _duplicate_pair(db)
+
+        with patch.object(security_audit_logger.logger, "info") as audit_info:
+            response = await review_duplicate_group(
+                group_id=group.id, review_status=DuplicateReviewStatus.DISMISSED, current_user=user, db=db
+            )
+
+        assert response["review_status"] == "dismissed"
+        db.refresh(group)
+        assert group.review_status == "dismissed"
+        assert group.reviewed_at is not None
+        assert f"Duplicate group {group.id} marked dismissed" in audit_info.call_args.args[0]
+
+    @pytest.mark.asyncio
+    async def test_review_of_other_users_group_not_found(self, db, user):
+        group = _duplicate_pair(db, user_id=2)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await review_duplicate_group(
+                group_id=group.id, review_status=DuplicateReviewStatus.REVIEWED, current_user=user, db=db
+            )
+
+        assert exc_info.value.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_review_cannot_mark_merged(self, db, user):
+        group = _duplicate_pair(db)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await review_duplicate_group(
+                group_id=group.id, review_status=DuplicateReviewStatus.MERGED, current_user=user, db=db
+            )
+
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_stats_count_open_groups(self, db, user):
+        _duplicate_pair(db)
+        _duplicate_pair(db, confidence=0.6)
+        _duplicate_pair(db, review_status="dismissed")
+
+        response = await get_duplicate_detection_stats(current_user=user, db=db)
+
+        stats = response["duplicate_statistics"]
+        assert stats["potential_duplicates_found"] == 2
+        assert stats["auto_merge_candidates"] == 1
+        assert stats["match_types"] == {"exact": 2}
+
+
+class TestAutoMergeEndpoint:
+    """Auto-merge previews, then deletes the non-primary members"""
+
+    @pytest.mark.asyncio
+    async def test_dry_run_changes_nothing(self, db, user):
+        group = _duplicate_pair(db)
+
+        response = await auto_merge_high_confidence_duplicates(
+            min_confidence=0.95, dry_run=True, current_user=user, db=db
+        )
+
+        assert response["auto_merge_preview"]["total_transactions_to_delete"] == 1
+        assert response["groups_preview"][0]["duplicate_transaction_ids"] == [group.transaction_ids[1]]
+        assert db.query(Transaction).count() == 2
+
+    @pytest.mark.asyncio
+    async def test_merge_deletes_duplicates_and_closes_group(self, db, user):
+        group = _duplicate_pair(db)
+        _duplicate_pair(db, confidence=0.8)
+
+        with patch.object(security_audit_logger.logger, "info") as audit_info:
+            response = await auto_merge_high_confidence_duplicates(
+                min_confidence=0.95, dry_run=False, current_user=user, db=db
+            )
+
+        assert response["success"] is True
+        assert response["merge_results"]["total_groups_merged"] == 1
+        assert response["merge_results"]["total_transactions_deleted"] == 1
+        db.expire_all()
+        assert db.get(Transaction, group.transaction_ids[1]) is None
+        assert db.get(Transaction, group.primary_transaction_id) is not None
+        assert db.get(DuplicateGroupRecord, group.id).review_status == "auto_merged"
+        assert db.query(Transaction).count() == 3
+        assert "Auto-merge completed" in audit_info.call_args.args[0]
@@ -0,0 +1,75 @@
+"""
+Tests for compliance checks that do not finish within the latency budget
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.financial_audit_logger import FinancialOperationType
+from app.core.financial_compliance_monitor import FinancialComplianceMonitor
+
+PAYMENT_ACCESS = {'data_type': 'payment_card', 'transaction_id': 'txn-1'}
+
+
+async def _stalled_check(*args):
+    await asyncio.sleep(5)
+
+
+async def _failing_check(*args):
+    raise RuntimeError("rule store unavailable")
+
+
+@pytest.fixture
+def monitor():
+    return FinancialComplianceMonitor("secret", check_latency_budget=0.05)
+
+
+class TestUnfinishedChecks:
+    """Late or failing checks are never silently treated as passing"""
+
+    @pytest.mark.asyncio
+    async def test_finished_checks_report_nothing_extra(self, monitor):
+        violations = await monitor.evaluate_operation(
+            FinancialOperationType.SENSITIVE_DATA_ACCESS, "user-1", PAYMENT_ACCESS, {'user_role': 'admin'}
+        )
+
+        assert violations == []
+        assert monitor.inconclusive_checks == []
+
+    @pytest.mark.asyncio
+    async def test_blocking_rule_timeout_is_violation(self, monitor):
+        monitor.check_payment_data_access = _stalled_check
+
+        violations = await monitor.evaluate_operation(
+            FinancialOperationType.SENSITIVE_DATA_ACCESS, "user-1", PAYMENT_ACCESS, {'user_role': 'admin'}
+        )
+
+        assert [violation.rule_id for violation in violations] == ["PCI-001"]
+        assert violations[0].immediate_action_required
+        assert "latency budget" in violations[0].evidence['check_incomplete']
+        assert monitor.stats['checks_timed_out'] == 1
+
+    @pytest.mark.asyncio
+    async def test_other_rule_timeout_is_inconclusive(self, monitor):
+        monitor.check_segregation_of_duties = _stalled_check
+
+        violations = await monitor.evaluate_operation(
+            FinancialOperationType.SENSITIVE_DATA_ACCESS, "user-1", PAYMENT_ACCESS, {'user_role': 'admin'}
+        )
+
+        assert violations == []
+        assert [check['rule_id'] for check in monitor.inconclusive_checks] == ["SOX-003"]
+        assert monitor.inconclusive_checks[0]['transaction_id'] == "txn-1"
+        assert monitor.get_compliance_statistics()['inconclusive_checks'] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_check_is_inconclusive(self, monitor):
+        monitor.check_segregation_of_duties = _failing_check
+
+        await monitor.evaluate_operation(
+            FinancialOperationType.SENSITIVE_DATA_ACCESS, "user-1", PAYMENT_ACCESS, {'user_role': 'admin'}
+        )
+
+        assert "rule store unavailable" in monitor.inconclusive_checks[0]['reason']
+        assert monitor.stats['checks_timed_out'] == 0
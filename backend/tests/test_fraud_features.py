@@ -0,0 +1,66 @@
+"""
+Tests for the session listeners that feed created transactions into the fraud features
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base, register_session_listeners
+from app.core.fraud_features import FraudFeatureEngine
+from app.models import Transaction, User
+
+
+@pytest.fixture
+def db():
+    register_session_listeners()
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="owner@example.com", hashed_password="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def fraud_engine():
+    fraud_engine = FraudFeatureEngine()
+    with patch("app.core.fraud_features.get_fraud_feature_engine", return_value=fraud_engine):
+        yield fraud_engine
+
+
+def _transaction(amount):
+    return Transaction(user_id=1, date=datetime.utcnow(), amount=amount, description="Wire out", source="csv")
+
+
+class TestSessionListeners:
+    """Created transactions count once committed"""
+
+    def test_committed_transactions_recorded(self, db, fraud_engine):
+        db.add_all([_transaction(9950.0), _transaction(-20.0)])
+        db.commit()
+
+        features = fraud_engine.features(1)["1h"]
+        assert features["count"] == 2
+        assert features["bands"]["near_reporting_threshold"] == 1
+
+    def test_rolled_back_transactions_discarded(self, db, fraud_engine):
+        db.add(_transaction(-20.0))
+        db.flush()
+        db.rollback()
+        db.commit()
+
+        assert fraud_engine.features(1)["1h"]["count"] == 0
+
+    def test_registration_is_idempotent(self, db, fraud_engine):
+        register_session_listeners()
+        db.add(_transaction(-20.0))
+        db.commit()
+
+        assert fraud_engine.features(1)["1h"]["count"] == 1
@@ -0,0 +1,59 @@
+"""
+Tests for the combined malware scan verdict when engines do not finish
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.services.malware_scanner import MalwareScanner, ScanEngine, ScanResult
+
+CSV_CONTENT = b"date,amount,description\n2024-01-02,-4.75,Corner cafe\n"
+
+
+@pytest.fixture
+def scanner():
+    scanner = MalwareScanner()
+    scanner.clamav_available = False
+    scanner.yara_available = False
+    return scanner
+
+
+async def _stalled_engine(*args):
+    await asyncio.sleep(5)
+
+
+class TestComprehensiveScanVerdict:
+    """Only a scan in which every engine finished can call a file clean"""
+
+    @pytest.mark.asyncio
+    async def test_all_engines_finish_clean(self, scanner):
+        result = await scanner.comprehensive_scan(CSV_CONTENT, "statement.csv")
+
+        assert result.is_clean
+        assert result.scan_complete
+        assert result.metadata["engines_incomplete"] == []
+
+    @pytest.mark.asyncio
+    async def test_engine_timeout_is_not_clean(self, scanner):
+        with patch.dict(MalwareScanner.ENGINE_TIMEOUTS, {"behavioral": 0.05}), \
+                patch.object(scanner, "_scan_behavioral", _stalled_engine):
+            result = await scanner.comprehensive_scan(CSV_CONTENT, "statement.csv")
+
+        assert not result.is_clean
+        assert not result.scan_complete
+        assert result.threats_detected == []
+        assert result.metadata["engines_incomplete"] == ["behavioral"]
+
+    @pytest.mark.asyncio
+    async def test_engine_error_is_not_clean(self, scanner):
+        async def failed_engine(*args):
+            return ScanResult(is_clean=True, engine=ScanEngine.BEHAVIORAL, threat_detected=False, error="engine crashed")
+
+        with patch.object(scanner, "_scan_behavioral", failed_engine):
+            result = await scanner.comprehensive_scan(CSV_CONTENT, "statement.csv")
+
+        assert not result.is_clean
+        assert not result.scan_complete
+        assert result.metadata["engines_incomplete"] == ["behavioral"]
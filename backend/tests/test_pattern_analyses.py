@@ -0,0 +1,244 @@
+"""
+Tests for persisted pattern analyses: id ranges, fingerprint reuse, rule lookup
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+import pytest
+from rq import Queue, SimpleWorker
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.background_jobs import JobPriority
+from app.core.database import Base
+from app.core.exceptions import SystemException
+from app.models import PatternAnalysis, Transaction, User
+from app.services.pattern_analyses import (
+    ANALYSES_KEPT_PER_USER, _prune_analyses, _supporting_transactions, compress_ids,
+    count_ids, expand_ids, find_suggested_rule, get_analysis, request_pattern_analysis
+)
+
+PARAMETERS = {
+    "date_range_days": 90,
+    "include_uncategorized": False,
+    "focus_corrections": True,
+    "generation_strategy": "balanced"
+}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="owner@example.com", hashed_password="x"))
+    session.add(User(id=2, email="other@example.com", hashed_password="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def user(db):
+    return db.get(User, 1)
+
+
+@pytest.fixture
+def queue():
+    queue = MagicMock()
+    with patch("app.services.pattern_analyses.job_manager") as job_manager:
+        job_manager.queues = {priority: queue for priority in JobPriority}
+        yield queue
+
+
+def _transaction(description, category="Food", days_ago=1, **values):
+    columns = dict(
+        user_id=1, date=datetime.utcnow() - timedelta(days=days_ago), amount=-4.75,
+        description=description, vendor=description.split()[0], category=category,
+        is_categorized=True, source="csv"
+    )
+    return Transaction(**{**columns, **values})
+
+
+def _completed(db, analysis_id, rules=(), user_id=1, minutes_ago=0):
+    analysis = PatternAnalysis(
+        analysis_id=analysis_id, user_id=user_id, fingerprint="f" * 64, parameters=PARAMETERS,
+        status="completed", suggested_rules=list(rules),
+        completed_at=datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    )
+    db.add(analysis)
+    db.commit()
+    return analysis
+
+
+class TestIdRanges:
+    """Supporting transaction ids are stored as inclusive ranges"""
+
+    def test_compress_sorts_and_merges_runs(self):
+        assert compress_ids([7, 3, 1, 2, 2]) == [[1, 3], [7, 7]]
+
+    def test_round_trip(self):
+        ids = [1, 2, 3, 10, 11, 40]
+        ranges = compress_ids(ids)
+
+        assert expand_ids(ranges) == ids
+        assert count_ids(ranges) == len(ids)
+
+    def test_empty(self):
+        assert compress_ids([]) == []
+        assert expand_ids(None) == []
+        assert count_ids(None) == 0
+
+
+class TestRequestPatternAnalysis:
+    """Requests reuse analyses of unchanged data and queue the rest"""
+
+    def test_first_request_queues_job(self, db, user, queue):
+        analysis, queued = request_pattern_analysis(db, user, PARAMETERS)
+
+        assert queued
+        assert analysis.status == "pending"
+        queue.enqueue.assert_called_once()
+        assert queue.enqueue.call_args.kwargs["job_id"] == analysis.analysis_id
+
+    def test_repeat_request_joins_pending_analysis(self, db, user, queue):
+        first, _ = request_pattern_analysis(db, user, PARAMETERS)
+        second, queued = request_pattern_analysis(db, user, PARAMETERS)
+
+        assert not queued
+        assert second.analysis_id == first.analysis_id
+        assert queue.enqueue.call_count == 1
+
+    def test_completed_analysis_served_until_data_changes(self, db, user, queue):
+        db.add(_transaction("Starbucks coffee"))
+        db.commit()
+        first, _ = request_pattern_analysis(db, user, PARAMETERS)
+        first.status = "completed"
+        first.completed_at = datetime.now(timezone.utc)
+        db.commit()
+
+        served, queued = request_pattern_analysis(db, user, PARAMETERS)
+        assert not queued
+        assert served.analysis_id == first.analysis_id
+
+        db.add(_transaction("Shell gas", category="Transport"))
+        db.commit()
+        fresh, queued = request_pattern_analysis(db, user, PARAMETERS)
+        assert queued
+        assert fresh.analysis_id != first.analysis_id
+
+    def test_different_parameters_queue_new_analysis(self, db, user, queue):
+        first, _ = request_pattern_analysis(db, user, PARAMETERS)
+        second, queued = request_pattern_analysis(db, user, {**PARAMETERS, "date_range_days": 30})
+
+        assert queued
+        assert second.analysis_id != first.analysis_id
+
+    def test_lost_pending_analysis_is_replaced(self, db, user, queue):
+        first, _ = request_pattern_analysis(db, user, PARAMETERS)
+        first.created_at = datetime.now(timezone.utc) - timedelta(hours=2)
+        db.commit()
+
+        second, queued = request_pattern_analysis(db, user, PARAMETERS)
+
+        assert queued
+        assert second.analysis_id != first.analysis_id
+
+    def test_queue_failure_marks_analysis_failed(self, db, user, queue):
+        queue.enqueue.side_effect = ConnectionError("redis down")
+
+        with pytest.raises(SystemException):
+            request_pattern_analysis(db, user, PARAMETERS)
+
+        analysis = db.query(PatternAnalysis).one()
+        assert analysis.status == "failed"
+
+
+class TestStoredAnalyses:
+    """Lookups read completed analyses of the requesting user only"""
+
+    def test_get_analysis_by_id_is_scoped_to_user(self, db):
+        _completed(db, "a-1")
+
+        assert get_analysis(db, 1, "a-1").analysis_id == "a-1"
+        assert get_analysis(db, 2, "a-1") is None
+
+    def test_get_latest_completed(self, db):
+        _completed(db, "old", minutes_ago=10)
+        _completed(db, "new")
+
+        assert get_analysis(db, 1).analysis_id == "new"
+
+    def test_find_suggested_rule(self, db):
+        _completed(db, "a-1", rules=[{"rule_id": "rule-1", "category": "Food"}])
+
+        assert find_suggested_rule(db, 1, "rule-1")["category"] == "Food"
+        assert find_suggested_rule(db, 1, "missing") is None
+        assert find_suggested_rule(db, 2, "rule-1") is None
+
+    def test_prune_keeps_newest_completed(self, db):
+        for index in range(ANALYSES_KEPT_PER_USER + 2):
+            _completed(db, f"a-{index}", minutes_ago=100 - index)
+        _completed(db, "other-user", user_id=2, minutes_ago=500)
+
+        _prune_analyses(db, 1)
+        db.commit()
+
+        kept = {analysis.analysis_id for analysis in db.query(PatternAnalysis).filter_by(user_id=1)}
+        assert kept == {f"a-{index}" for index in range(2, ANALYSES_KEPT_PER_USER + 2)}
+        assert get_analysis(db, 2, "other-user") is not None
+
+
+class TestSupportingTransactions:
+    """Each rule is supported by the categorized transactions it matches with its category"""
+
+    def test_matches_category_and_window(self, db):
+        db.add_all([
+            _transaction("Starbucks coffee"),
+            _transaction("Starbucks beans"),
+            _transaction("Starbucks mug", category="Shopping"),
+            _transaction("Starbucks latte", days_ago=200),
+            _transaction("Starbucks pending", is_categorized=False)
+        ])
+        db.commit()
+        ids = [row.id for row in db.query(Transaction).order_by(Transaction.id)]
+        rules = [
+            {"rule_id": "vendor", "rule_pattern": "starbucks", "rule_type": "vendor", "category": "Food"},
+            {"rule_id": "broken", "rule_pattern": "(", "rule_type": "regex", "category": "Food"}
+        ]
+
+        supporting = _supporting_transactions(db, 1, rules, date_range_days=90)
+
+        assert supporting == {"vendor": [[ids[0], ids[1]]]}
+
+
+class TestAnalysisJob:
+    """Queued analyses run to completion on an RQ worker"""
+
+    def test_worker_completes_queued_analysis(self, db, user):
+        db.add_all([_transaction(f"Starbucks coffee {index}", days_ago=index + 1) for index in range(12)])
+        db.commit()
+        connection = fakeredis.FakeStrictRedis()
+        rq_queue = Queue("normal", connection=connection)
+
+        with patch("app.services.pattern_analyses.job_manager") as job_manager, \
+                patch(
+                    "app.services.pattern_analyses.get_background_session",
+                    sessionmaker(bind=db.get_bind())
+                ):
+            job_manager.queues = {priority: rq_queue for priority in JobPriority}
+            analysis, queued = request_pattern_analysis(db, user, PARAMETERS)
+            SimpleWorker([rq_queue], connection=connection).work(burst=True)
+
+        job = rq_queue.fetch_job(analysis.analysis_id)
+        assert queued
+        assert job.is_finished
+        assert job.result.success
+        db.expire_all()
+        assert analysis.status == "completed"
+        assert analysis.summary["total_transactions_analyzed"] == 12
+        assert analysis.suggested_rules
@@ -0,0 +1,675 @@
+"""
+Comprehensive test suite for Pattern Recognition Engine
+
+Tests pattern discovery algorithms, rule generation, user behavior analysis,
+and API endpoint functionality with extensive edge case coverage.
+"""
+
+import pytest
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch, AsyncMock
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.transaction import Transaction, CategorizationRule
+from app.models.pattern_statistics import PatternStatistic
+from app.models.user import User
+from app.services.pattern_recognition import (
+    PatternRecognitionEngine, PatternType, PatternConfidenceLevel,
+    RuleGenerationStrategy, RecognizedPattern, PatternRule,
+    UserBehaviorProfile, PatternAnalysisResult, PatternRecognitionLimits
+)
+from app.services.pattern_statistics import (
+    AMOUNT, CORRECTION, FEATURE_COLUMNS, RECURRING, TOKEN, VENDOR, WEEKDAY, accumulate
+)
+from app.core.exceptions import ValidationException, BusinessLogicException
+
+
+def build_pattern_stats(transactions, user_id=1):
+    """Statistics rows the store would hold for these transactions, grouped by feature type"""
+    deltas = {}
+    for txn in transactions:
+        accumulate(deltas, {name: getattr(txn, name) for name in FEATURE_COLUMNS}, 1, events=True)
+
+    grouped = defaultdict(list)
+    for (feature_type, value, category, subcategory), entry in deltas.items():
+        count, value_sum, value_sq_sum, first_seen, last_seen = entry
+        grouped[feature_type].append(PatternStatistic(
+            user_id=user_id, feature_type=feature_type, feature_value=value,
+            category=category, subcategory=subcategory, count=count,
+            value_sum=value_sum, value_sq_sum=value_sq_sum,
+            first_seen=first_seen, last_seen=last_seen
+        ))
+    return grouped
+
+
+def mock_transaction(txn_id, date, category, vendor=None, description="", amount=Decimal("10.00")):
+    """Categorized transaction mock with every feature column set"""
+    txn = Mock(spec=Transaction)
+    txn.id = txn_id
+    txn.date = date
+    txn.vendor = vendor
+    txn.description = description
+    txn.amount = amount
+    txn.category = category
+    txn.subcategory = None
+    txn.is_categorized = True
+    txn.confidence_score = 0.9
+    txn.meta_data = {}
+    return txn
+
+
+class TestPatternRecognitionEngine:
+    """Test suite for PatternRecognitionEngine"""
+    
+    @pytest.fixture
+    def mock_user(self):
+        """Create a mock user for testing"""
+        user = Mock(spec=User)
+        user.id = 1
+        user.email = "test@example.com"
+        return user
+    
+    @pytest.fixture
+    def mock_db(self):
+        """Create a mock database session"""
+        db = Mock(spec=Session)
+        return db
+    
+    @pytest.fixture
+    def pattern_engine(self, mock_db, mock_user):
+        """Create pattern recognition engine instance"""
+        with patch('app.services.pattern_recognition.security_audit_logger') as mock_logger:
+            with patch('app.services.pattern_recognition.MLCategorizationService'):
+                engine = PatternRecognitionEngine(mock_db, mock_user)
+                engine.audit_logger = mock_logger
+                return engine
+    
+    @pytest.fixture
+    def sample_transactions(self, mock_user):
+        """Create sample transactions for pattern analysis testing"""
+        base_date = datetime.utcnow()
+        transactions = []
+        
+        # Vendor pattern transactions (Starbucks -> Food)
+        for i in range(5):
+            txn = Mock(spec=Transaction)
+            txn.id = i + 1
+            txn.user_id = mock_user.id
+            txn.date = base_date - timedelta(days=i * 7)
+            txn.amount = Decimal("4.75")
+            txn.description = f"STARBUCKS COFFEE #{12345 + i}"
+            txn.vendor = "Starbucks"
+            txn.category = "Food"
+            txn.subcategory = "Coffee"
+            txn.is_categorized = True
+            txn.confidence_score = 0.9
+            txn.meta_data = {"categorization_method": "manual"}
+            transactions.append(txn)
+        
+        # Description pattern transactions (GAS -> Transportation) 
+        for i in range(4):
+            txn = Mock(spec=Transaction)
+            txn.id = i + 6
+            txn.user_id = mock_user.id
+            txn.date = base_date - timedelta(days=i * 10)
+            txn.amount = Decimal(f"{45.00 + i * 5}")
+            txn.description = f"SHELL GAS STATION #{i + 1}"
+            txn.vendor = f"Shell Station {i + 1}"
+            txn.category = "Transportation"
+            txn.subcategory = "Fuel"
+            txn.is_categorized = True
+            txn.confidence_score = 0.85
+            txn.meta_data = {"categorization_method": "rule"}
+            transactions.append(txn)
+        
+        # Correction pattern transactions (ML corrections)
+        for i in range(3):
+            txn = Mock(spec=Transaction)
+            txn.id = i + 10
+            txn.user_id = mock_user.id
+            txn.date = base_date - timedelta(days=i * 5)
+            txn.amount = Decimal("12.99")
+            txn.description = f"SPOTIFY PREMIUM {i + 1}"
+            txn.vendor = "Spotify"
+            txn.category = "Entertainment"
+            txn.subcategory = "Streaming"
+            txn.is_categorized = True
+            txn.confidence_score = 1.0
+            txn.meta_data = {
+                "categorization_method": "manual",
+                "manual_correction": True,
+                "original_ml_category": "Technology"
+            }
+            transactions.append(txn)
+        
+        # Amount pattern transactions (similar amounts -> Groceries)
+        for i in range(6):
+            txn = Mock(spec=Transaction)
+            txn.id = i + 13
+            txn.user_id = mock_user.id
+            txn.date = base_date - timedelta(days=i * 3)
+            txn.amount = Decimal(f"{85.00 + i * 2}")  # $85-95 range
+            txn.description = f"SAFEWAY GROCERY #{i + 1000}"
+            txn.vendor = f"Safeway #{i + 1}"
+            txn.category = "Food"
+            txn.subcategory = "Groceries"
+            txn.is_categorized = True
+            txn.confidence_score = 0.8
+            txn.meta_data = {"categorization_method": "ml"}
+            transactions.append(txn)
+        
+        # Uncategorized transactions for testing
+        for i in range(3):
+            txn = Mock(spec=Transaction)
+            txn.id = i + 19
+            txn.user_id = mock_user.id
+            txn.date = base_date - timedelta(days=i)
+            txn.amount = Decimal("25.00")
+            txn.description = f"UNKNOWN MERCHANT {i}"
+            txn.vendor = None
+            txn.category = None
+            txn.subcategory = None
+            txn.is_categorized = False
+            txn.confidence_score = None
+            txn.meta_data = {}
+            transactions.append(txn)
+        
+        return transactions
+
+    @pytest.fixture
+    def pattern_stats(self, sample_transactions):
+        """Pattern statistics of the sample transactions"""
+        return build_pattern_stats(sample_transactions)
+
+    def test_engine_initialization(self, mock_db, mock_user):
+        """Test pattern recognition engine initializes correctly"""
+        with patch('app.services.pattern_recognition.security_audit_logger'):
+            with patch('app.services.pattern_recognition.MLCategorizationService'):
+                engine = PatternRecognitionEngine(mock_db, mock_user)
+                
+                assert engine.db == mock_db
+                assert engine.user == mock_user
+                assert engine.analysis_config["min_pattern_frequency"] == 3
+                assert engine.analysis_config["min_confidence"] == 0.6
+                assert engine.analysis_config["generation_strategy"] == RuleGenerationStrategy.BALANCED
+
+    @pytest.mark.asyncio
+    async def test_load_pattern_statistics(self, pattern_engine, pattern_stats):
+        """Test statistics are loaded and grouped by feature type"""
+        rows = [row for group in pattern_stats.values() for row in group]
+        
+        with patch('app.services.pattern_recognition.statistics_current', return_value=True), \
+                patch('app.services.pattern_recognition.rebuild_user_statistics') as mock_rebuild, \
+                patch('app.services.pattern_recognition.load_user_statistics', return_value=rows):
+            grouped = await pattern_engine._load_pattern_statistics(90)
+        
+        assert set(grouped) == set(pattern_stats)
+        assert len(grouped[VENDOR]) == len(pattern_stats[VENDOR])
+        mock_rebuild.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_load_pattern_statistics_rebuilds_stale(self, pattern_engine):
+        """Test statistics without a current marker are rebuilt before loading"""
+        with patch('app.services.pattern_recognition.statistics_current', return_value=False), \
+                patch('app.services.pattern_recognition.rebuild_user_statistics') as mock_rebuild, \
+                patch('app.services.pattern_recognition.load_user_statistics', return_value=[]):
+            await pattern_engine._load_pattern_statistics(90)
+        
+        mock_rebuild.assert_called_once_with(pattern_engine.db, pattern_engine.user.id)
+        pattern_engine.db.commit.assert_called_once()
+
+    @pytest.mark.asyncio 
+    async def test_load_pattern_statistics_database_error(self, pattern_engine):
+        """Test database error handling in statistics loading"""
+        with patch('app.services.pattern_recognition.statistics_current',
+                   side_effect=SQLAlchemyError("Database error")):
+            with pytest.raises(BusinessLogicException, match="Database error while loading pattern statistics"):
+                await pattern_engine._load_pattern_statistics(90)
+
+    @pytest.mark.asyncio
+    async def test_build_user_behavior_profile(self, pattern_engine, pattern_stats):
+        """Test building comprehensive user behavior profile"""
+        profile = await pattern_engine._build_user_behavior_profile(pattern_stats)
+        
+        assert isinstance(profile, UserBehaviorProfile)
+        assert profile.user_id == pattern_engine.user.id
+        assert profile.total_manual_corrections > 0
+        assert profile.categorization_style in ["simple", "detailed", "balanced"]
+        assert 0 <= profile.consistency_score <= 1.0
+        assert 0 <= profile.learning_rate <= 1.0
+
+    def test_determine_categorization_style_simple(self, pattern_engine):
+        """Test categorization style determination for simple users"""
+        category_counts = {"Food": 50, "Transportation": 30}  # Only 2 categories
+        style = pattern_engine._determine_categorization_style(category_counts)
+        assert style == "simple"
+
+    def test_determine_categorization_style_detailed(self, pattern_engine):
+        """Test categorization style determination for detailed users"""
+        category_counts = {f"Category{i}": 5 for i in range(20)}  # 20 categories
+        style = pattern_engine._determine_categorization_style(category_counts)
+        assert style == "detailed"
+
+    def test_determine_categorization_style_balanced(self, pattern_engine):
+        """Test categorization style determination for balanced users"""
+        # 8 categories, the largest holding between 20% and 50% of transactions
+        category_counts = {"Food": 30, "Transportation": 20, **{f"Category{i}": 10 for i in range(6)}}
+        style = pattern_engine._determine_categorization_style(category_counts)
+        assert style == "balanced"
+
+    def test_determine_categorization_style_even_spread_is_detailed(self, pattern_engine):
+        """Test that mid-sized category sets spread evenly count as detailed"""
+        category_counts = {f"Category{i}": 10 for i in range(8)}  # Largest category holds 12.5%
+        style = pattern_engine._determine_categorization_style(category_counts)
+        assert style == "detailed"
+
+    @pytest.mark.asyncio
+    async def test_discover_vendor_patterns(self, pattern_engine, pattern_stats):
+        """Test vendor-based pattern discovery"""
+        vendor_patterns = await pattern_engine._discover_vendor_patterns(pattern_stats[VENDOR])
+        
+        # Should find Starbucks and Shell patterns
+        pattern_vendors = [p.pattern_value for p in vendor_patterns]
+        assert "starbucks" in pattern_vendors
+        
+        # Check pattern properties
+        starbucks_pattern = next(p for p in vendor_patterns if p.pattern_value == "starbucks")
+        assert starbucks_pattern.pattern_type == PatternType.VENDOR_PATTERN
+        assert starbucks_pattern.category == "Food"
+        assert starbucks_pattern.confidence_score >= 0.7
+        assert starbucks_pattern.frequency >= 3
+
+    @pytest.mark.asyncio
+    async def test_discover_description_patterns(self, pattern_engine, pattern_stats):
+        """Test description keyword pattern discovery"""
+        description_patterns = await pattern_engine._discover_description_patterns(pattern_stats[TOKEN])
+        
+        # Should find patterns based on significant words
+        assert len(description_patterns) >= 0
+        
+        # Check for gas-related patterns
+        gas_patterns = [p for p in description_patterns if "gas" in p.pattern_value.lower()]
+        if gas_patterns:
+            gas_pattern = gas_patterns[0]
+            assert gas_pattern.pattern_type == PatternType.DESCRIPTION_PATTERN
+            assert gas_pattern.confidence_score >= 0.6
+
+    @pytest.mark.asyncio
+    async def test_discover_amount_patterns(self, pattern_engine, pattern_stats):
+        """Test amount-based pattern discovery"""
+        amount_patterns = await pattern_engine._discover_amount_patterns(pattern_stats[AMOUNT])
+        
+        # Should discover patterns for grocery amounts ($85-95 range)
+        grocery_amount_patterns = [p for p in amount_patterns if p.category == "Food"]
+        
+        if grocery_amount_patterns:
+            pattern = grocery_amount_patterns[0]
+            assert pattern.pattern_type == PatternType.AMOUNT_PATTERN
+            assert pattern.confidence_score >= 0.6
+
+    @pytest.mark.asyncio
+    async def test_discover_correction_patterns(self, pattern_engine, pattern_stats):
+        """Test correction pattern discovery from user corrections"""
+        correction_patterns = await pattern_engine._discover_correction_patterns(pattern_stats[CORRECTION])
+        
+        # Should find Spotify correction pattern (Technology -> Entertainment)
+        spotify_patterns = [p for p in correction_patterns if "spotify" in p.pattern_value.lower()]
+        
+        if spotify_patterns:
+            spotify_pattern = spotify_patterns[0]
+            assert spotify_pattern.pattern_type == PatternType.CORRECTION_PATTERN
+            assert spotify_pattern.category == "Entertainment"
+            assert spotify_pattern.confidence_score >= 0.7
+
+    @pytest.mark.asyncio
+    async def test_discover_frequency_patterns(self, pattern_engine):
+        """Test frequency-based pattern discovery"""
+        # Transactions with regular intervals
+        base_date = datetime.utcnow()
+        regular_transactions = [
+            mock_transaction(i + 100, base_date - timedelta(days=i * 30), "Utilities", vendor="Monthly Service")
+            for i in range(4)  # Monthly pattern
+        ]
+        
+        stats = build_pattern_stats(regular_transactions)
+        frequency_patterns = await pattern_engine._discover_frequency_patterns(stats[RECURRING])
+        
+        if frequency_patterns:
+            pattern = frequency_patterns[0]
+            assert pattern.pattern_type == PatternType.FREQUENCY_PATTERN
+            assert "avg_interval_days" in pattern.pattern_metadata
+
+    @pytest.mark.asyncio
+    async def test_discover_behavioral_patterns(self, pattern_engine):
+        """Test behavioral pattern discovery"""
+        # Transactions with day-of-week patterns
+        base_date = datetime.utcnow()
+        behavioral_transactions = [
+            mock_transaction(i + 200, base_date - timedelta(days=i * 7), "Food")  # Same weekday
+            for i in range(5)
+        ]
+        
+        stats = build_pattern_stats(behavioral_transactions)
+        behavioral_patterns = await pattern_engine._discover_behavioral_patterns(stats[WEEKDAY])
+        
+        # Should find day-of-week patterns
+        assert len(behavioral_patterns) >= 0
+
+    def test_filter_and_rank_patterns(self, pattern_engine):
+        """Test pattern filtering and ranking"""
+        # Create test patterns with different confidence scores
+        patterns = []
+        
+        for i in range(5):
+            pattern = RecognizedPattern(
+                pattern_id=str(uuid.uuid4()),
+                pattern_type=PatternType.VENDOR_PATTERN,
+                pattern_value=f"vendor_{i}",
+                confidence_score=0.5 + (i * 0.1),  # 0.5, 0.6, 0.7, 0.8, 0.9
+                frequency=i + 3,
+                category="Food",
+                subcategory=None,
+                supporting_transactions=[1, 2, 3],
+                pattern_metadata={},
+                created_at=datetime.utcnow(),
+                last_seen=datetime.utcnow()
+            )
+            patterns.append(pattern)
+        
+        # Set minimum confidence to 0.6
+        pattern_engine.analysis_config["min_confidence"] = 0.6
+        
+        filtered = pattern_engine._filter_and_rank_patterns(patterns)
+        
+        # Should filter out patterns below 0.6 confidence
+        assert len(filtered) == 4  # 0.6, 0.7, 0.8, 0.9
+        
+        # Should be ranked by confidence (descending)
+        assert filtered[0].confidence_score == 0.9
+        assert filtered[-1].confidence_score == 0.6
+
+    def test_convert_pattern_to_rule(self, pattern_engine):
+        """Test pattern to rule conversion"""
+        # Test vendor pattern conversion
+        vendor_pattern = RecognizedPattern(
+            pattern_id=str(uuid.uuid4()),
+            pattern_type=PatternType.VENDOR_PATTERN,
+            pattern_value="starbucks",
+            confidence_score=0.9,
+            frequency=5,
+            category="Food",
+            subcategory="Coffee",
+            supporting_transactions=[1, 2, 3, 4, 5],
+            pattern_metadata={},
+            created_at=datetime.utcnow(),
+            last_seen=datetime.utcnow()
+        )
+        
+        rule_type, rule_pattern = pattern_engine._convert_pattern_to_rule(vendor_pattern)
+        assert rule_type == "vendor"
+        assert rule_pattern == "starbucks"
+        
+        # Test description pattern conversion
+        desc_pattern = RecognizedPattern(
+            pattern_id=str(uuid.uuid4()),
+            pattern_type=PatternType.DESCRIPTION_PATTERN,
+            pattern_value="coffee",
+            confidence_score=0.8,
+            frequency=4,
+            category="Food",
+            subcategory="Coffee",
+            supporting_transactions=[1, 2, 3, 4],
+            pattern_metadata={},
+            created_at=datetime.utcnow(),
+            last_seen=datetime.utcnow()
+        )
+        
+        rule_type, rule_pattern = pattern_engine._convert_pattern_to_rule(desc_pattern)
+        assert rule_type == "keyword"
+        assert rule_pattern == "coffee"
+
+    def test_calculate_rule_priority(self, pattern_engine):
+        """Test rule priority calculation"""
+        # Create test user profile
+        user_profile = UserBehaviorProfile(
+            user_id=1,
+            total_manual_corrections=10,
+            correction_patterns={},
+            preferred_categories={"Food": 20, "Transportation": 15},
+            categorization_style="balanced",
+            consistency_score=0.8,
+            learning_rate=0.3,
+            last_updated=datetime.utcnow()
+        )
+        
+        # Test high-confidence correction pattern
+        correction_pattern = RecognizedPattern(
+            pattern_id=str(uuid.uuid4()),
+            pattern_type=PatternType.CORRECTION_PATTERN,
+            pattern_value="spotify",
+            confidence_score=0.95,
+            frequency=10,
+            category="Food",  # User's preferred category
+            subcategory=None,
+            supporting_transactions=list(range(1, 11)),
+            pattern_metadata={},
+            created_at=datetime.utcnow(),
+            last_seen=datetime.utcnow()
+        )
+        
+        priority = pattern_engine._calculate_rule_priority(correction_pattern, user_profile)
+        
+        # Should get high priority for correction pattern with high confidence and frequency
+        assert priority >= 8
+
+    def test_estimate_rule_accuracy(self, pattern_engine):
+        """Test rule accuracy estimation"""
+        # Test vendor pattern (generally reliable)
+        vendor_pattern = RecognizedPattern(
+            pattern_id=str(uuid.uuid4()),
+            pattern_type=PatternType.VENDOR_PATTERN,
+            pattern_value="starbucks",
+            confidence_score=0.8,
+            frequency=10,
+            category="Food",
+            subcategory="Coffee",
+            supporting_transactions=list(range(1, 11)),
+            pattern_metadata={},
+            created_at=datetime.utcnow(),
+            last_seen=datetime.utcnow()
+        )
+        
+        accuracy = pattern_engine._estimate_rule_accuracy(vendor_pattern)
+        
+        # Should be higher than base confidence due to vendor pattern reliability
+        assert accuracy > 0.8
+        assert accuracy <= 0.98  # Should be capped
+
+    def test_extract_significant_words(self, pattern_engine):
+        """Test significant word extraction from descriptions"""
+        text = "STARBUCKS COFFEE PURCHASE STORE #12345"
+        words = pattern_engine._extract_significant_words(text)
+        
+        assert words == ["starbucks", "coffee", "store", "12345"]
+        # Generic financial terms are stop words
+        assert "purchase" not in words
+
+    def test_get_amount_range(self, pattern_engine):
+        """Test amount range categorization"""
+        assert pattern_engine._get_amount_range(Decimal("5.00")) == "0-10"
+        assert pattern_engine._get_amount_range(Decimal("15.00")) == "10-25"
+        assert pattern_engine._get_amount_range(Decimal("75.00")) == "50-100"
+        assert pattern_engine._get_amount_range(Decimal("150.00")) == "100-250"
+        assert pattern_engine._get_amount_range(Decimal("1500.00")) == "1000+"
+
+    def test_get_description_key(self, pattern_engine):
+        """Test description key generation for frequency analysis"""
+        description = "STARBUCKS COFFEE PURCHASE #12345"
+        key = pattern_engine._get_description_key(description)
+        
+        # Should extract key terms
+        assert len(key) > 0
+        assert any(word in key.lower() for word in ["starbucks", "coffee"])
+
+    @pytest.mark.asyncio
+    async def test_analyze_user_patterns_insufficient_data(self, pattern_engine):
+        """Test pattern analysis with insufficient transaction data"""
+        # No statistics and no uncategorized transactions
+        with patch.object(pattern_engine, '_load_pattern_statistics', return_value={}):
+            with patch.object(pattern_engine, '_count_uncategorized', return_value=0):
+                with pytest.raises(ValidationException, match="Insufficient transaction history"):
+                    await pattern_engine.analyze_user_patterns()
+
+    @pytest.mark.asyncio
+    async def test_analyze_user_patterns_success(self, pattern_engine, pattern_stats):
+        """Test successful pattern analysis"""
+        # Mock the pattern discovery methods to return test patterns
+        test_pattern = RecognizedPattern(
+            pattern_id=str(uuid.uuid4()),
+            pattern_type=PatternType.VENDOR_PATTERN,
+            pattern_value="test_vendor",
+            confidence_score=0.9,
+            frequency=5,
+            category="Food",
+            subcategory="Coffee",
+            supporting_transactions=[1, 2, 3, 4, 5],
+            pattern_metadata={},
+            created_at=datetime.utcnow(),
+            last_seen=datetime.utcnow()
+        )
+        
+        with patch.object(pattern_engine, '_load_pattern_statistics', return_value=pattern_stats), \
+                patch.object(pattern_engine, '_count_uncategorized', return_value=3), \
+                patch.object(pattern_engine, '_discover_patterns', return_value=[test_pattern]):
+            with patch.object(pattern_engine, '_generate_rules_from_patterns', return_value=[]):
+                with patch.object(pattern_engine, '_estimate_accuracy_improvements', return_value={}):
+                    
+                    result = await pattern_engine.analyze_user_patterns()
+                    
+                    assert isinstance(result, PatternAnalysisResult)
+                    assert result.user_id == pattern_engine.user.id
+                    assert result.patterns_discovered >= 0
+                    assert result.total_transactions_analyzed == 21  # 18 categorized + 3 uncategorized
+
+    @pytest.mark.asyncio
+    async def test_analyze_user_patterns_exception_handling(self, pattern_engine):
+        """Test exception handling in pattern analysis"""
+        # Mock database error
+        with patch.object(pattern_engine, '_load_pattern_statistics',
+                          side_effect=Exception("Database connection failed")):
+            with pytest.raises(BusinessLogicException, match="Pattern analysis failed"):
+                await pattern_engine.analyze_user_patterns()
+
+
+class TestPatternRecognitionLimits:
+    """Test pattern recognition limits and constraints"""
+    
+    def test_limits_constants(self):
+        """Test that all limits are properly defined"""
+        assert PatternRecognitionLimits.MAX_TRANSACTIONS_ANALYZE > 0
+        assert PatternRecognitionLimits.MAX_PATTERNS_PER_ANALYSIS > 0
+        assert PatternRecognitionLimits.MAX_RULES_GENERATE > 0
+        assert PatternRecognitionLimits.MIN_PATTERN_FREQUENCY >= 2
+        assert 0 < PatternRecognitionLimits.MIN_PATTERN_CONFIDENCE < 1
+        assert PatternRecognitionLimits.MAX_ANALYSIS_TIME_MINUTES > 0
+        assert PatternRecognitionLimits.CACHE_TTL_HOURS > 0
+
+
+class TestPatternRecognitionDataClasses:
+    """Test pattern recognition data classes"""
+    
+    def test_recognized_pattern_creation(self):
+        """Test RecognizedPattern data class"""
+        pattern = RecognizedPattern(
+            pattern_id="test-id",
+            pattern_type=PatternType.VENDOR_PATTERN,
+            pattern_value="test_vendor",
+            confidence_score=0.9,
+            frequency=5,
+            category="Food",
+            subcategory="Coffee",
+            supporting_transactions=[1, 2, 3],
+            pattern_metadata={"test": "data"},
+            created_at=datetime.utcnow(),
+            last_seen=datetime.utcnow()
+        )
+        
+        assert pattern.pattern_id == "test-id"
+        assert pattern.pattern_type == PatternType.VENDOR_PATTERN
+        assert pattern.confidence_score == 0.9
+        assert len(pattern.supporting_transactions) == 3
+
+    def test_pattern_rule_creation(self):
+        """Test PatternRule data class"""
+        rule = PatternRule(
+            rule_id="rule-id",
+            pattern_id="pattern-id", 
+            pattern_type=PatternType.VENDOR_PATTERN,
+            rule_pattern="starbucks",
+            rule_type="vendor",
+            category="Food",
+            subcategory="Coffee",
+            confidence=0.9,
+            priority=8,
+            estimated_accuracy=0.85,
+            supporting_evidence={"frequency": 5},
+            creation_reason="Test rule"
+        )
+        
+        assert rule.rule_id == "rule-id"
+        assert rule.rule_type == "vendor"
+        assert rule.priority == 8
+
+    def test_user_behavior_profile_creation(self):
+        """Test UserBehaviorProfile data class"""
+        profile = UserBehaviorProfile(
+            user_id=1,
+            total_manual_corrections=10,
+            correction_patterns={"old->new": 5},
+            preferred_categories={"Food": 20},
+            categorization_style="balanced",
+            consistency_score=0.8,
+            learning_rate=0.3,
+            last_updated=datetime.utcnow()
+        )
+        
+        assert profile.user_id == 1
+        assert profile.categorization_style == "balanced"
+        assert profile.consistency_score == 0.8
+
+
+class TestPatternRecognitionEnums:
+    """Test pattern recognition enums"""
+    
+    def test_pattern_type_enum(self):
+        """Test PatternType enum values"""
+        assert PatternType.VENDOR_PATTERN.value == "vendor_pattern"
+        assert PatternType.DESCRIPTION_PATTERN.value == "description_pattern"
+        assert PatternType.CORRECTION_PATTERN.value == "correction_pattern"
+        
+        # Test all enum values are unique
+        values = [pt.value for pt in PatternType]
+        assert len(values) == len(set(values))
+
+    def test_pattern_confidence_level_enum(self):
+        """Test PatternConfidenceLevel enum values"""
+        assert PatternConfidenceLevel.VERY_HIGH.value == 0.95
+        assert PatternConfidenceLevel.HIGH.value == 0.85
+        assert PatternConfidenceLevel.MEDIUM.value == 0.70
+        assert PatternConfidenceLevel.LOW.value == 0.55
+        assert PatternConfidenceLevel.VERY_LOW.value == 0.40
+
+    def test_rule_generation_strategy_enum(self):
+        """Test RuleGenerationStrategy enum values"""
+        assert RuleGenerationStrategy.CONSERVATIVE.value == "conservative"
+        assert RuleGenerationStrategy.BALANCED.value == "balanced"
+        assert RuleGenerationStrategy.AGGRESSIVE.value == "aggressive"
+        assert RuleGenerationStrategy.LEARNING.value == "learning"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
\ No newline at end of file
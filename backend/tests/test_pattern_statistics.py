@@ -0,0 +1,179 @@
+"""
+Tests for the incrementally maintained pattern statistics store
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base, register_session_listeners
+from app.models import PatternStatistic, Transaction, User
+from app.services.pattern_recognition import PatternRecognitionEngine
+from app.services.pattern_statistics import (
+    CATEGORY, STATE, VENDOR, apply_row_changes, fetch_feature_rows, load_user_statistics,
+    rebuild_user_statistics, statistics_current
+)
+
+
+@pytest.fixture
+def db():
+    register_session_listeners()
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="owner@example.com", hashed_password="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _transaction(day, vendor="Starbucks", category="Food", **values):
+    columns = dict(
+        user_id=1, date=datetime(2024, 3, day), amount=-4.75, description=f"{vendor} purchase",
+        vendor=vendor, category=category, is_categorized=True, confidence_score=0.9, source="csv"
+    )
+    return Transaction(**{**columns, **values})
+
+
+def _vendor_row(db, vendor="starbucks", category="Food"):
+    db.expire_all()
+    return db.query(PatternStatistic).filter(
+        PatternStatistic.user_id == 1,
+        PatternStatistic.feature_type == VENDOR,
+        PatternStatistic.feature_value == vendor,
+        PatternStatistic.category == category
+    ).one_or_none()
+
+
+class TestIncrementalMaintenance:
+    """ORM flushes keep the counts current"""
+
+    def test_insert_recategorize_and_delete(self, db):
+        transactions = [_transaction(day) for day in (1, 2, 3)]
+        db.add_all(transactions)
+        db.commit()
+
+        assert _vendor_row(db).count == 3
+
+        transactions[0].category = "Coffee"
+        db.commit()
+
+        assert _vendor_row(db).count == 2
+        assert _vendor_row(db, category="Coffee").count == 1
+
+        db.delete(transactions[1])
+        db.commit()
+
+        assert _vendor_row(db).count == 1
+
+    def test_uncategorized_transactions_not_counted(self, db):
+        db.add(_transaction(1, category=None, is_categorized=False))
+        db.commit()
+
+        assert db.query(PatternStatistic).count() == 0
+
+
+class TestRebuildMarker:
+    """Statistics are rebuilt when incomplete or after deletes"""
+
+    def test_incremental_rows_are_not_current(self, db):
+        db.add(_transaction(1))
+        db.commit()
+
+        assert not statistics_current(db, 1)
+
+    def test_rebuild_writes_marker_hidden_from_loading(self, db):
+        db.add_all([_transaction(1), _transaction(2)])
+        db.commit()
+
+        assert rebuild_user_statistics(db, 1) == 2
+        db.commit()
+
+        assert statistics_current(db, 1)
+        rows = load_user_statistics(db, 1)
+        assert rows and all(row.feature_type != STATE for row in rows)
+        assert sum(row.count for row in rows if row.feature_type == CATEGORY) == 2
+
+    def test_rebuild_counts_history_before_the_store(self, db):
+        db.add_all([_transaction(day) for day in (1, 2, 3)])
+        db.commit()
+        # History recorded before the store existed
+        db.query(PatternStatistic).delete()
+        db.commit()
+        db.add(_transaction(4))
+        db.commit()
+        assert _vendor_row(db).count == 1
+
+        rebuild_user_statistics(db, 1)
+        db.commit()
+
+        assert _vendor_row(db).count == 4
+
+    def test_orm_delete_drops_marker_and_rebuild_shrinks_dates(self, db):
+        transactions = [_transaction(day) for day in (1, 2, 3)]
+        db.add_all(transactions)
+        db.commit()
+        rebuild_user_statistics(db, 1)
+        db.commit()
+
+        db.delete(transactions[2])
+        db.commit()
+
+        assert not statistics_current(db, 1)
+        assert _vendor_row(db).last_seen == datetime(2024, 3, 3)
+
+        rebuild_user_statistics(db, 1)
+        db.commit()
+
+        assert _vendor_row(db).last_seen == datetime(2024, 3, 2)
+
+    def test_set_based_delete_drops_marker(self, db):
+        db.add_all([_transaction(1), _transaction(2)])
+        db.commit()
+        rebuild_user_statistics(db, 1)
+        db.commit()
+
+        removed = fetch_feature_rows(db, 1, Transaction.date == datetime(2024, 3, 2))
+        db.query(Transaction).filter(Transaction.date == datetime(2024, 3, 2)).delete(synchronize_session=False)
+        apply_row_changes(db, 1, removed=removed.values(), events=True)
+        db.commit()
+
+        assert not statistics_current(db, 1)
+        assert _vendor_row(db).count == 1
+
+    def test_recategorization_keeps_marker(self, db):
+        transaction = _transaction(1)
+        db.add(transaction)
+        db.commit()
+        rebuild_user_statistics(db, 1)
+        db.commit()
+
+        transaction.category = "Coffee"
+        db.commit()
+
+        assert statistics_current(db, 1)
+
+
+class TestEngineLoading:
+    """The engine rebuilds stale statistics before analysis"""
+
+    @pytest.mark.asyncio
+    async def test_backfills_before_first_analysis(self, db):
+        db.add_all([_transaction(day) for day in (1, 2, 3)])
+        db.commit()
+        db.query(PatternStatistic).delete()
+        db.commit()
+        db.add(_transaction(4))
+        db.commit()
+
+        with patch('app.services.pattern_recognition.MLCategorizationService'):
+            engine = PatternRecognitionEngine(db, db.get(User, 1))
+        grouped = await engine._load_pattern_statistics(date_range_days=100000)
+
+        assert statistics_current(db, 1)
+        assert sum(row.count for row in grouped[CATEGORY]) == 4
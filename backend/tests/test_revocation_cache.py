@@ -0,0 +1,99 @@
+"""
+Tests for the in-memory revocation cache (Bloom filter + incremental polling)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.revocation_cache import BloomFilter, RevocationCache
+from app.models import RevokedToken
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    RevokedToken.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _revoke(db, jti, user_id=1, revoked_at=None):
+    now = datetime.utcnow()
+    db.add(RevokedToken(
+        jti=jti,
+        token_hash=f"hash-{jti}",
+        user_id=user_id,
+        revoked_at=revoked_at or now,
+        expires_at=now + timedelta(hours=1),
+    ))
+    db.commit()
+
+
+class TestBloomFilter:
+    """Membership and counting"""
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.001)
+        for i in range(500):
+            bloom.add(f"jti-{i}")
+
+        assert all(f"jti-{i}" in bloom for i in range(500))
+
+    def test_re_adding_does_not_grow_count(self):
+        bloom = BloomFilter(1000, 0.001)
+        bloom.add("jti-1")
+        bloom.add("jti-1")
+        bloom.add("jti-2")
+
+        assert bloom.count == 2
+
+
+class TestRevocationCachePolling:
+    """Polls pick up new revocations without inflating the filter count"""
+
+    def test_poll_picks_up_new_revocations(self, db):
+        cache = RevocationCache()
+        cache.refresh(db, force=True)
+        assert cache.might_be_revoked("jti-new", db) is False
+
+        _revoke(db, "jti-new")
+        cache.refresh(db, force=True)
+
+        assert cache.might_be_revoked("jti-new", db) is True
+
+    def test_overlapping_polls_count_each_token_once(self, db):
+        for i in range(10):
+            _revoke(db, f"jti-{i}")
+        cache = RevocationCache()
+        cache.refresh(db, force=True)
+
+        # Every poll re-reads the rows inside POLL_OVERLAP
+        for _ in range(20):
+            cache.refresh(db, force=True)
+
+        assert cache.get_stats()["revoked_tokens"] == 10
+
+    def test_local_revocation_seen_by_poll_counted_once(self, db):
+        cache = RevocationCache()
+        cache.refresh(db, force=True)
+
+        _revoke(db, "jti-local")
+        cache.add_revoked("jti-local")
+        cache.refresh(db, force=True)
+
+        assert cache.get_stats()["revoked_tokens"] == 1
+
+    def test_mass_revocation_tracked(self, db):
+        cache = RevocationCache()
+        cache.refresh(db, force=True)
+        issued_at = datetime.utcnow() - timedelta(minutes=1)
+
+        _revoke(db, "MASS_REVOKE_7_1", user_id=7)
+        cache.refresh(db, force=True)
+
+        assert cache.mass_revoked_after(7, issued_at, db) is True
+        assert cache.mass_revoked_after(8, issued_at, db) is False
@@ -0,0 +1,202 @@
+"""
+Tests for the rule match index and the per-rule counters
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints.transactions import update_transaction
+from app.core.database import Base
+from app.models import CategorizationRule, RuleMatch, Transaction, User
+from app.schemas.transaction import TransactionUpdate
+from app.services.rule_match_index import note_rule_match, record_rule_matches, record_rule_overrides
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="owner@example.com", hashed_password="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def rules(db):
+    coffee = CategorizationRule(user_id=1, pattern="starbucks", pattern_type="vendor", category="Food", subcategory="Coffee")
+    fuel = CategorizationRule(user_id=1, pattern="shell", pattern_type="vendor", category="Transportation")
+    db.add_all([coffee, fuel])
+    db.commit()
+    return coffee, fuel
+
+
+@pytest.fixture
+def transactions(db):
+    rows = [
+        Transaction(
+            user_id=1, date=datetime(2024, 4, day), amount=-5.0, description=f"Purchase {day}",
+            source="csv"
+        )
+        for day in (1, 2, 3)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+@contextmanager
+def _committing_transaction(user_id, operation_type, db_session):
+    """financial_transaction without the PostgreSQL isolation level"""
+    yield MagicMock()
+    db_session.commit()
+
+
+def _rule(db, rule):
+    db.expire_all()
+    return db.get(CategorizationRule, rule.id)
+
+
+def _matches(db):
+    db.expire_all()
+    return {match.transaction_id: match for match in db.query(RuleMatch).all()}
+
+
+class TestRecordRuleMatches:
+    """Attributions and match counters"""
+
+    def test_records_matches_and_counts(self, db, rules, transactions):
+        coffee, _ = rules
+        matches = {t.id: (coffee.id, 1, "Food", "Coffee") for t in transactions}
+
+        assert record_rule_matches(db, matches) == 3
+        db.commit()
+
+        assert _rule(db, coffee).match_count == 3
+        assert _rule(db, coffee).last_matched_at is not None
+        assert set(_matches(db)) == {t.id for t in transactions}
+
+    def test_same_match_again_is_not_counted(self, db, rules, transactions):
+        coffee, _ = rules
+        matches = {transactions[0].id: (coffee.id, 1, "Food", "Coffee")}
+        record_rule_matches(db, matches)
+        db.commit()
+
+        assert record_rule_matches(db, matches) == 0
+        db.commit()
+
+        assert _rule(db, coffee).match_count == 1
+
+    def test_rematch_to_other_category_overrides_previous_rule(self, db, rules, transactions):
+        coffee, fuel = rules
+        transaction_id = transactions[0].id
+        record_rule_matches(db, {transaction_id: (coffee.id, 1, "Food", "Coffee")})
+        db.commit()
+
+        record_rule_matches(db, {transaction_id: (fuel.id, 1, "Transportation", None)})
+        db.commit()
+
+        assert _rule(db, coffee).override_count == 1
+        assert _rule(db, fuel).match_count == 1
+        assert _matches(db)[transaction_id].rule_id == fuel.id
+
+    def test_empty_matches(self, db):
+        assert record_rule_matches(db, {}) == 0
+
+
+class TestRecordRuleOverrides:
+    """Recategorizations mark attributions overridden"""
+
+    def test_changed_category_is_overridden(self, db, rules, transactions):
+        coffee, _ = rules
+        record_rule_matches(db, {t.id: (coffee.id, 1, "Food", "Coffee") for t in transactions})
+        db.commit()
+
+        overridden = record_rule_overrides(db, 1, [transactions[0].id, transactions[1].id], "Travel")
+        db.commit()
+
+        assert overridden == 2
+        assert _rule(db, coffee).override_count == 2
+        matches = _matches(db)
+        assert matches[transactions[0].id].overridden_at is not None
+        assert matches[transactions[2].id].overridden_at is None
+
+    def test_same_category_is_not_overridden(self, db, rules, transactions):
+        coffee, _ = rules
+        record_rule_matches(db, {transactions[0].id: (coffee.id, 1, "Food", "Coffee")})
+        db.commit()
+
+        assert record_rule_overrides(db, 1, [transactions[0].id], "Food", "Coffee") == 0
+
+    def test_subcategory_change_optional(self, db, rules, transactions):
+        coffee, _ = rules
+        record_rule_matches(db, {transactions[0].id: (coffee.id, 1, "Food", "Coffee")})
+        db.commit()
+
+        assert record_rule_overrides(db, 1, [transactions[0].id], "Food", "Bakery", compare_subcategory=False) == 0
+        assert record_rule_overrides(db, 1, [transactions[0].id], "Food", "Bakery") == 1
+
+    def test_other_users_attributions_untouched(self, db, rules, transactions):
+        coffee, _ = rules
+        record_rule_matches(db, {transactions[0].id: (coffee.id, 1, "Food", "Coffee")})
+        db.commit()
+
+        assert record_rule_overrides(db, 2, [transactions[0].id], "Travel") == 0
+
+
+class TestPendingMatches:
+    """Matches queued during categorization are written on commit"""
+
+    def test_written_on_commit_with_new_transaction_ids(self, db, rules):
+        coffee, _ = rules
+        transaction = Transaction(
+            user_id=1, date=datetime(2024, 4, 5), amount=-4.0, description="Starbucks", source="csv",
+            category="Food", subcategory="Coffee", is_categorized=True
+        )
+        db.add(transaction)
+        note_rule_match(db, coffee, transaction)
+
+        db.commit()
+
+        assert _matches(db)[transaction.id].rule_id == coffee.id
+        assert _rule(db, coffee).match_count == 1
+
+    def test_discarded_on_rollback(self, db, rules, transactions):
+        coffee, _ = rules
+        note_rule_match(db, coffee, transactions[0])
+
+        db.rollback()
+        db.commit()
+
+        assert _matches(db) == {}
+
+
+class TestUpdateTransactionEndpoint:
+    """PUT /transactions/{id} counts a changed category against the matching rule"""
+
+    @pytest.mark.asyncio
+    async def test_recategorization_overrides_rule(self, db, rules, transactions):
+        coffee, _ = rules
+        record_rule_matches(db, {t.id: (coffee.id, 1, "Food", "Coffee") for t in transactions})
+        db.commit()
+
+        with patch("app.api.v1.endpoints.transactions.financial_transaction", _committing_transaction):
+            await update_transaction(
+                transaction_id=transactions[0].id,
+                transaction_update=TransactionUpdate(category="Travel"),
+                current_user=db.get(User, 1),
+                db=db
+            )
+
+        assert _rule(db, coffee).override_count == 1
+        matches = _matches(db)
+        assert matches[transactions[0].id].overridden_at is not None
+        assert matches[transactions[1].id].overridden_at is None
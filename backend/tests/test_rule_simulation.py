@@ -0,0 +1,70 @@
+"""
+Tests for rule simulation over a mix of categorized and uncategorized transactions
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints.categorization_rules import simulate_categorization_rules
+from app.core.database import Base
+from app.models import Transaction, User
+from app.schemas.category import RuleBase, RuleSimulationRequest, RuleSimulationResponse
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="owner@example.com", hashed_password="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def user(db):
+    return db.get(User, 1)
+
+
+def _transaction(description, category=None):
+    return Transaction(
+        user_id=1, date=datetime.utcnow() - timedelta(days=1), amount=-4.75, description=description,
+        vendor=description.split()[0], category=category, is_categorized=category is not None, source="csv"
+    )
+
+
+class TestSimulateEndpoint:
+    """POST /categorization-rules/simulate reports transitions from uncategorized rows"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("only_uncategorized", [False, True])
+    async def test_uncategorized_transactions_transition_from_none(self, db, user, only_uncategorized):
+        db.add_all([
+            _transaction("Starbucks coffee"),
+            _transaction("Starbucks latte"),
+            _transaction("Starbucks beans", category="Shopping")
+        ])
+        db.commit()
+        request = RuleSimulationRequest(
+            rules=[RuleBase(pattern="starbucks", pattern_type="vendor", category="Food")],
+            only_uncategorized=only_uncategorized
+        )
+
+        result = await simulate_categorization_rules(simulation_request=request, current_user=user, db=db)
+
+        body = json.loads(JSONResponse(jsonable_encoder(RuleSimulationResponse(**result))).body)
+        transitions = {(t["from_category"], t["to_category"]): t["transactions"] for t in body["category_transitions"]}
+        expected = {(None, "Food"): 2}
+        if not only_uncategorized:
+            expected[("Shopping", "Food")] = 1
+        assert transitions == expected
+        assert body["newly_categorized"] == 2
@@ -0,0 +1,82 @@
+"""
+Tests for the shared SecurityScanner and the CSV cell security scan
+"""
+
+import warnings
+
+import pandas as pd
+
+from app.core.security_scanner import csv_script_scanner, csv_sql_scanner
+from app.services.csv_parser import CSVParser, MAX_REPORTED_SECURITY_ISSUES
+
+
+class TestScanSeries:
+    """Vectorized matching agrees with per-value matching"""
+
+    def test_flags_matching_values_only(self):
+        series = pd.Series(["UNION SELECT password", "Coffee shop", None, "Coffee shop"])
+
+        result = csv_sql_scanner.scan_series(series)
+
+        assert result.tolist() == [True, False, False, False]
+        assert list(result.index) == list(series.index)
+
+    def test_matches_first_match(self):
+        values = ["<script>alert(1)</script>", "javascript:void(0)", "Groceries", "onload=x"]
+
+        result = csv_script_scanner.scan_series(pd.Series(values))
+
+        assert result.tolist() == [csv_script_scanner.first_match(v.lower()) is not None for v in values]
+
+    def test_emits_no_warnings(self):
+        series = pd.Series(["' or 1=1 --", "Rent", "drop table users"])
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            csv_sql_scanner.scan_series(series)
+            csv_script_scanner.scan_series(series)
+
+
+class TestCSVCellScanCap:
+    """The CSV cell scan stops once enough issues were reported"""
+
+    def test_issues_capped_within_a_single_column(self):
+        df = pd.DataFrame({"description": ["<script>x</script> union select 1"] * 5000})
+
+        issues = CSVParser()._validate_csv_security(df)
+
+        assert len(issues) == MAX_REPORTED_SECURITY_ISSUES
+
+    def test_clean_file_has_no_issues(self):
+        df = pd.DataFrame({"description": ["Coffee", "Rent", "Salary"], "amount": [1.5, -900.0, 2500.0]})
+
+        assert CSVParser()._validate_csv_security(df) == []
+
+
+class TestCSVSuspiciousRows:
+    """SQL-like descriptions skip their row; script content rejects the file"""
+
+    def _statement(self, descriptions):
+        return pd.DataFrame({
+            "date": ["2024-03-01"] * len(descriptions),
+            "description": descriptions,
+            "amount": [-10.0] * len(descriptions)
+        })
+
+    def test_sql_like_description_skips_only_its_row(self):
+        df = self._statement(["Coffee shop", "UPDATE ADDRESS SET BY BRANCH - FEE", "Rent"])
+
+        result = CSVParser().parse_dataframe(df)
+
+        assert [t["description"] for t in result.transactions] == ["Coffee shop", "Rent"]
+        assert [error["row_number"] for error in result.errors] == [2]
+        assert result.errors[0]["error_type"] == "SuspiciousContent"
+        assert not any(error.get("type") == "security_violation" for error in result.errors)
+
+    def test_script_content_rejects_file(self):
+        df = self._statement(["Coffee shop", "<script>alert(1)</script>", "Rent"])
+
+        result = CSVParser().parse_dataframe(df)
+
+        assert result.transactions == []
+        assert result.errors[0]["type"] == "security_violation"
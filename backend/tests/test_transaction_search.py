@@ -0,0 +1,127 @@
+"""
+Tests for transaction text search (SQLite FTS5 path and the LIKE fallback)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models import Transaction, User
+from app.services import transaction_search
+from app.services.transaction_search import contains_filter, escape_like, search_transactions
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        session.add_all([
+            User(id=1, email="owner@example.com", hashed_password="x"),
+            User(id=2, email="other@example.com", hashed_password="x"),
+        ])
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+async def _add(db, user_id, description, vendor=None, days_ago=0):
+    transaction = Transaction(
+        user_id=user_id,
+        date=datetime(2024, 6, 30) - timedelta(days=days_ago),
+        amount=-10.0,
+        description=description,
+        vendor=vendor,
+        source="csv",
+    )
+    db.add(transaction)
+    await db.commit()
+    return transaction
+
+
+class TestLikeHelpers:
+    """User input is matched literally"""
+
+    def test_escape_like(self):
+        assert escape_like("50%_off\\") == "50\\%\\_off\\\\"
+
+    @pytest.mark.asyncio
+    async def test_contains_filter_treats_wildcards_literally(self, db):
+        await _add(db, 1, "Refund 100% processed")
+        await _add(db, 1, "Refund 1000 processed")
+
+        rows = (await db.execute(
+            select(Transaction.description).where(contains_filter(Transaction.description, "100%"))
+        )).scalars().all()
+
+        assert rows == ["Refund 100% processed"]
+
+
+class TestSearchTransactions:
+    """Ranked search on SQLite"""
+
+    @pytest.mark.asyncio
+    async def test_fts_index_created_with_schema(self, db):
+        assert transaction_search._sqlite_fts_ready is True
+
+    @pytest.mark.asyncio
+    async def test_substring_match_in_description_and_vendor(self, db):
+        await _add(db, 1, "AMAZON MKTPLACE PMTS", days_ago=1)
+        await _add(db, 1, "Card purchase", vendor="Amazon Web Services", days_ago=2)
+        await _add(db, 1, "Coffee shop")
+
+        results = await search_transactions(db, 1, "amazon")
+
+        assert {t.description for t in results} == {"AMAZON MKTPLACE PMTS", "Card purchase"}
+
+    @pytest.mark.asyncio
+    async def test_scoped_to_user(self, db):
+        await _add(db, 1, "Netflix subscription")
+        await _add(db, 2, "Netflix subscription")
+
+        results = await search_transactions(db, 1, "netflix")
+
+        assert [t.user_id for t in results] == [1]
+
+    @pytest.mark.asyncio
+    async def test_index_follows_updates_and_deletes(self, db):
+        transaction = await _add(db, 1, "Uber trip")
+        transaction.description = "Lyft ride"
+        await db.commit()
+
+        assert await search_transactions(db, 1, "uber") == []
+        assert [t.id for t in await search_transactions(db, 1, "lyft")] == [transaction.id]
+
+        await db.delete(transaction)
+        await db.commit()
+
+        assert await search_transactions(db, 1, "lyft") == []
+
+    @pytest.mark.asyncio
+    async def test_short_terms_use_like(self, db):
+        await _add(db, 1, "AB Electric", days_ago=1)
+        await _add(db, 1, "Grocery AB", days_ago=0)
+
+        results = await search_transactions(db, 1, "ab")
+
+        # LIKE fallback orders newest first
+        assert [t.description for t in results] == ["Grocery AB", "AB Electric"]
+
+    @pytest.mark.asyncio
+    async def test_blank_query_returns_nothing(self, db):
+        await _add(db, 1, "Rent")
+
+        assert await search_transactions(db, 1, "   ") == []
+
+    @pytest.mark.asyncio
+    async def test_limit(self, db):
+        for day in range(5):
+            await _add(db, 1, f"Payroll run {day}", days_ago=day)
+
+        assert len(await search_transactions(db, 1, "payroll", limit=3)) == 3
@@ -0,0 +1,88 @@
+"""
+Tests for the upload verdict cache: what is cached and how rule versions are read
+"""
+
+import hashlib
+from unittest.mock import patch
+
+import pytest
+
+from app.services.content_sanitizer import SanitizationLevel, SanitizationResult
+from app.services.file_validator import FileValidationResult, ThreatLevel, ValidationResult
+from app.services.malware_scanner import ComprehensiveScanResult, MalwareScanner
+from app.services.upload_verdict_cache import UploadVerdictCache
+
+CONTENT = "date,amount,description\n2024-01-02,-4.75,Corner cafe\n"
+SHA256 = hashlib.sha256(CONTENT.encode()).hexdigest()
+
+
+@pytest.fixture
+def cache():
+    with patch("app.services.upload_verdict_cache.settings") as settings:
+        settings.UPLOAD_VERDICT_CACHE_ENABLED = True
+        settings.UPLOAD_VERDICT_CACHE_TTL_SECONDS = 60
+        settings.UPLOAD_VERDICT_CACHE_MAX_SANITIZED_BYTES = 1024
+        settings.REDIS_URL = None
+        yield UploadVerdictCache()
+
+
+def _validation():
+    return FileValidationResult(
+        is_valid=True, validation_result=ValidationResult.APPROVED, threat_level=ThreatLevel.SAFE,
+        file_info={}, validation_checks={}, errors=[], warnings=[]
+    )
+
+
+def _scan(**values):
+    columns = dict(
+        is_clean=True, total_engines=3, engines_clean=3, threats_detected=[], highest_confidence=0.0,
+        scan_duration=0.1, metadata={'engines_cancelled': [], 'engines_incomplete': []}
+    )
+    return ComprehensiveScanResult(**{**columns, **values})
+
+
+def _sanitization():
+    return SanitizationResult(
+        is_safe=True, sanitized_content=CONTENT, modifications_made=[], security_issues=[],
+        original_size=len(CONTENT), sanitized_size=len(CONTENT), sanitization_level=SanitizationLevel.MODERATE
+    )
+
+
+class TestRemember:
+    """Only files that passed a complete scan are cached"""
+
+    def test_clean_complete_scan_is_cached(self, cache):
+        assert cache.remember(SHA256, "statement.csv", _validation(), _scan(), None, _sanitization(), CONTENT)
+        assert cache.get(SHA256, "statement.csv") is not None
+
+    def test_incomplete_scan_is_not_cached(self, cache):
+        scan = _scan(metadata={'engines_cancelled': [], 'engines_incomplete': ['clamav']}, scan_complete=False)
+
+        assert not cache.remember(SHA256, "statement.csv", _validation(), scan, None, _sanitization(), CONTENT)
+        assert cache.get(SHA256, "statement.csv") is None
+
+
+class TestSignatureVersion:
+    """The ClamAV database version is never read on the request path"""
+
+    def test_version_served_without_checking_clamav(self):
+        with patch.object(MalwareScanner, "_check_clamav_availability", return_value=True), \
+                patch.object(MalwareScanner, "_clamav_database_version", return_value="ClamAV 1.0.1/26912") as check:
+            scanner = MalwareScanner()
+            version = scanner.signature_version()
+
+        assert check.call_count == 1
+        assert version == scanner.signature_version()
+
+    def test_expired_version_refreshed_in_background(self):
+        with patch.object(MalwareScanner, "_check_clamav_availability", return_value=True), \
+                patch.object(MalwareScanner, "_clamav_database_version", return_value="ClamAV 1.0.1/26912"):
+            scanner = MalwareScanner()
+        first = scanner.signature_version()
+        scanner._signature_version_checked -= MalwareScanner.SIGNATURE_VERSION_CHECK_INTERVAL + 1
+
+        with patch.object(MalwareScanner, "_clamav_database_version", return_value="ClamAV 1.0.1/26913"):
+            assert scanner.signature_version() == first
+            scanner._signature_refresh.join(timeout=5)
+
+        assert scanner.signature_version() != first
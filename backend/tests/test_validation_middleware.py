@@ -0,0 +1,96 @@
+"""
+Tests for the ASGI ValidationMiddleware request body checks
+
+Bodies are fed through the raw ASGI receive channel so chunked bodies
+(no Content-Length) are covered as well as sized ones.
+"""
+
+import json
+
+import pytest
+
+from app.core.validation_middleware import ValidationMiddleware
+
+
+def _scope(body_headers):
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/v1/transactions",
+        "raw_path": b"/api/v1/transactions",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")] + body_headers,
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 1234),
+        "root_path": "",
+        "http_version": "1.1",
+    }
+
+
+async def _call(middleware, scope, chunks):
+    """Run a request through the middleware; returns (status, body, app_called)"""
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+        for index, chunk in enumerate(chunks)
+    ]
+    sent = []
+    app_called = False
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    async def app(scope, receive, send):
+        nonlocal app_called
+        app_called = True
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    await middleware.__class__(app, max_body_size=middleware.max_body_size)(scope, receive, send)
+    status = next(m["status"] for m in sent if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return status, body, app_called
+
+
+class TestValidationMiddlewareBodySize:
+    """Oversized bodies are rejected whether or not they announce their size"""
+
+    @pytest.fixture
+    def middleware(self):
+        return ValidationMiddleware(app=None, max_body_size=64)
+
+    @pytest.mark.asyncio
+    async def test_small_body_passes(self, middleware):
+        body = json.dumps({"description": "Coffee"}).encode()
+        status, _, app_called = await _call(
+            middleware, _scope([(b"content-length", str(len(body)).encode())]), [body]
+        )
+
+        assert status == 200
+        assert app_called
+
+    @pytest.mark.asyncio
+    async def test_oversized_body_with_content_length_rejected(self, middleware):
+        body = json.dumps({"description": "x" * 200}).encode()
+        status, response, app_called = await _call(
+            middleware, _scope([(b"content-length", str(len(body)).encode())]), [body]
+        )
+
+        assert status >= 400
+        assert b"BODY_TOO_LARGE" in response
+        assert not app_called
+
+    @pytest.mark.asyncio
+    async def test_oversized_chunked_body_rejected(self, middleware):
+        body = json.dumps({"description": "x" * 200}).encode()
+        chunks = [body[i:i + 32] for i in range(0, len(body), 32)]
+        status, response, app_called = await _call(
+            middleware, _scope([(b"transfer-encoding", b"chunked")]), chunks
+        )
+
+        assert status >= 400
+        assert b"BODY_TOO_LARGE" in response
+        assert not app_called